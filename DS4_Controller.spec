@@ -5,7 +5,7 @@ a = Analysis(
     ['ds4_controller.py'],
     pathex=[],
     binaries=[],
-    datas=[('requirements.txt', '.')],
+    datas=[('requirements.txt', '.'), ('patterns', 'patterns'), ('mappings', 'mappings')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,227 @@
+"""
+DualShock 4 için asyncio arayüzü (otomasyon betikleri için)
+Geliştirici: rtx4090
+
+Qt gerektirmez. hidraw dosya tanımlayıcısı loop.add_reader ile olay
+döngüsüne eklenir; okuma thread'i, yoklama veya time.sleep yoktur. Böylece
+tek bir işlem, tek bir olay döngüsünde birçok kontrolcüye ve başka G/Ç'ye
+hizmet edebilir. hidraw gerektirdiği için yalnızca Linux'ta çalışır.
+
+    async with AsyncDS4.open() as pad:
+        await pad.rumble(0, 200, duration=0.3)
+        async for state in pad.states():
+            print(state.lx, state.ly, state.buttons)
+"""
+
+import asyncio
+import contextlib
+import os
+
+from ds4_hotplug import scan_hidraw
+from ds4_input import (ReportRing, DS4State, decode_any, valid_report, hidraw_get_feature,
+                       BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+from ds4_output import OutputState, TRANSPORT_BT, TRANSPORT_USB
+
+
+class AsyncDS4:
+    # queue_size: states() abonesi başına bekleyen en fazla durum. Abone
+    # yetişemezse en eski durum atılır (overflows artar); okuma hiç bloklanmaz
+    # ve tüketici her zaman en güncel duruma yetişir. Ara raporların hepsi
+    # gerekiyorsa ring.reports_since() ile halka tampondan okunabilir.
+    # sticks: durumlara uygulanan çubuk/tetik işlemcisi (ds4_sticks.StickProcessor)
+    def __init__(self, info, fd, queue_size=64, output_interval=0.004, ring_capacity=1024, sticks=None):
+        self.info = info
+        self.fd = fd
+        self.loop = asyncio.get_running_loop()
+        self.queue_size = queue_size
+        self.output_interval = output_interval
+        self.transport = info.get('transport', TRANSPORT_USB)
+        self.ring = ReportRing(ring_capacity, validate=valid_report)
+        self.state = DS4State()
+        self.sticks = sticks
+        self.output = OutputState()
+        self._pack_output, size = self.output.packer(self.transport)
+        self._output_report = bytearray(size)
+        self._last_output = None
+        self._next_write = 0.0
+        self._flush_handle = None
+        self._write_waiters = []
+        self._queues = set()
+        self.closed = False
+        self.reports = 0
+        self.overflows = 0
+        self.writes = 0
+        self.loop.add_reader(fd, self._on_readable)
+
+    @classmethod
+    def open(cls, info=None, **kwargs):
+        # async with AsyncDS4.open() as pad: ... (info verilmezse ilk DS4)
+        return _open_pad(cls, info, **kwargs)
+
+    @staticmethod
+    def devices():
+        return list(scan_hidraw().values())
+
+    @property
+    def path(self):
+        return self.info['path']
+
+    def _on_readable(self):
+        ring = self.ring
+        clock = self.loop.time
+        head = ring.head
+        while True:
+            try:
+                length = ring.read_from(self.fd, clock())
+            except BlockingIOError:
+                break
+            except OSError as e:
+                print(f"Kontrolcü okuma hatası ({self.path!r}): {e}")
+                length = 0
+            if not length:
+                self.close()
+                return
+        # CRC'si bozuk raporlar okunur ama tampona girmez
+        count = ring.head - head
+        if not count:
+            return
+        self.reports += count
+        # Bir uyanmada gelen raporlardan yalnızca en sonuncusu çözülür
+        _, _, report = ring.latest()
+        if decode_any(report, self.state) is None:
+            return
+        if self.sticks:
+            self.sticks.apply(self.state)
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+                self.overflows += 1
+            state = DS4State()
+            state.copy_from(self.state)
+            queue.put_nowait(state)
+
+    async def states(self, queue_size=None):
+        # Her yeni rapor için durumun bir kopyasını verir; kontrolcü ayrılınca biter
+        queue = asyncio.Queue(queue_size or self.queue_size)
+        self._queues.add(queue)
+        try:
+            while not self.closed or not queue.empty():
+                state = await queue.get()
+                if state is None:
+                    return
+                yield state
+        finally:
+            self._queues.discard(queue)
+
+    def _update(self, **values):
+        # Çıkış durumunu değiştir; en geç output_interval sonra tek raporda gönderilir
+        if self.closed:
+            raise ConnectionError("Kontrolcü bağlı değil")
+        self.output.set(**values)
+        waiter = self.loop.create_future()
+        self._write_waiters.append(waiter)
+        if self._flush_handle is None:
+            delay = self._next_write - self.loop.time()
+            if delay > 0:
+                self._flush_handle = self.loop.call_later(delay, self._flush)
+            else:
+                self._flush_handle = self.loop.call_soon(self._flush)
+        return waiter
+
+    def _flush(self):
+        self._flush_handle = None
+        report = bytes(self._pack_output(self._output_report))
+        error = None
+        if report != self._last_output:
+            try:
+                os.write(self.fd, report)
+                self.writes += 1
+                self._last_output = report
+            except BlockingIOError:
+                # Çekirdek tamponu dolu: bir aralık sonra yeniden dene
+                self._flush_handle = self.loop.call_later(self.output_interval, self._flush)
+                return
+            except OSError as e:
+                error = e
+            self._next_write = self.loop.time() + self.output_interval
+        waiters, self._write_waiters = self._write_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                if error:
+                    waiter.set_exception(error)
+                else:
+                    waiter.set_result(None)
+
+    async def rumble(self, small_motor, big_motor, duration=None):
+        # Rapor gönderilince döner; duration verilirse süre sonunda motorları durdurur
+        await self._update(small_motor=small_motor, big_motor=big_motor)
+        if duration is not None:
+            await asyncio.sleep(duration)
+            if not self.closed:
+                await self._update(small_motor=0, big_motor=0)
+
+    async def set_led(self, red, green, blue):
+        await self._update(red=red, green=green, blue=blue)
+
+    async def set_flash(self, flash_on, flash_off):
+        await self._update(flash_on=flash_on, flash_off=flash_off)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.loop.remove_reader(self.fd)
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for waiter in self._write_waiters:
+            if not waiter.done():
+                waiter.set_exception(ConnectionError("Kontrolcü bağlantısı kapandı"))
+        self._write_waiters = []
+        # Abonelerin beklemesini bitir
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        os.close(self.fd)
+
+    async def aclose(self):
+        # Bekleyen çıkış durumunu gönderip titreşimi durdurarak kapat
+        if not self.closed:
+            try:
+                await self._update(small_motor=0, big_motor=0)
+            except OSError:
+                pass
+        self.close()
+
+    def stats(self):
+        return {
+            'reports': self.reports,
+            'overflows': self.overflows,
+            'writes': self.writes,
+            'rejected': self.ring.rejected,
+        }
+
+
+@contextlib.asynccontextmanager
+async def _open_pad(cls, info=None, **kwargs):
+    if info is None:
+        devices = cls.devices()
+        if not devices:
+            raise OSError("DualShock 4 bulunamadı")
+        info = devices[0]
+    fd = os.open(info['path'], os.O_RDWR | os.O_NONBLOCK)
+    if info.get('transport') == TRANSPORT_BT:
+        try:
+            hidraw_get_feature(fd, BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+        except OSError as e:
+            print(f"Bluetooth genişletilmiş rapor modu açılamadı: {e}")
+    try:
+        pad = cls(info, fd, **kwargs)
+    except BaseException:
+        os.close(fd)
+        raise
+    try:
+        yield pad
+    finally:
+        await pad.aclose()
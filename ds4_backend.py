@@ -0,0 +1,164 @@
+"""
+DualShock 4 cihaz arka uçları: gerçek hidapi ve donanımsız sahte cihaz
+Geliştirici: rtx4090
+
+DS4Controller cihazı doğrudan hid.device() ile değil bir arka uç üzerinden
+açar. FakeBackend/FakeDevice, hid.device'ın kullandığımız kısmını taklit eder:
+sentetik ya da kaydedilmiş raporları istenen hızda üretir ve kendisine
+yazılan çıkış raporlarını saklar.
+"""
+
+import struct
+import threading
+import time
+import zlib
+
+from ds4_hotplug import SONY_VENDOR_ID, DS4_PRODUCT_IDS, info_from_hidapi
+from ds4_input import USB_REPORT_SIZE, BT_REPORT_SIZE, BT_INPUT_CRC_SEED
+
+
+def synthetic_report(i):
+    # Her çağrıda farklı değerler içeren sentetik bir USB 0x01 raporu
+    report = bytearray(USB_REPORT_SIZE)
+    report[0] = 0x01
+    report[1:5] = bytes(((i * 3) & 0xFF, (i * 5) & 0xFF, (i * 7) & 0xFF, (i * 11) & 0xFF))
+    report[5] = (i % 9) | ((i & 0x0F) << 4)
+    report[6] = i & 0xFF
+    report[7] = ((i & 0x3F) << 2) | (i & 0x03)
+    report[8] = i & 0xFF
+    report[9] = 255 - (i & 0xFF)
+    report[10:12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+    report[30] = 0x10 | (i % 11)
+    report[33] = 1
+    report[35:39] = bytes((i & 0x7F, 0x40, 0x31, 0x20))
+    report[39:43] = bytes((0x80, 0, 0, 0))
+    return report
+
+
+def synthetic_bt_report(i):
+    # Aynı verinin Bluetooth 0x11 karşılığı (iki bayt kaymış, sonunda CRC32)
+    usb = synthetic_report(i)
+    report = bytearray(BT_REPORT_SIZE)
+    report[0] = 0x11
+    report[1] = 0xC0
+    report[3:3 + USB_REPORT_SIZE - 1] = usb[1:]
+    crc = zlib.crc32(report[:BT_REPORT_SIZE - 4], BT_INPUT_CRC_SEED)
+    struct.pack_into('<I', report, BT_REPORT_SIZE - 4, crc)
+    return report
+
+
+class HidapiBackend:
+    # Gerçek cihazlar; hid modülü ilk kullanımda yüklenir
+    def enumerate(self, vendor_id=SONY_VENDOR_ID, product_ids=DS4_PRODUCT_IDS):
+        import hid
+        return [info_from_hidapi(dev) for dev in hid.enumerate(vendor_id)
+                if dev['product_id'] in product_ids]
+
+    def open(self, info):
+        import hid
+        device = hid.device()
+        device.open_path(info['path'])
+        return device
+
+
+class FakeDevice:
+    # hid.device yerine geçen sahte kontrolcü. rate=0 ise raporlar beklemeden
+    # üretilir; aksi halde mutlak zaman ızgarasına göre `rate` Hz'de gelir.
+    def __init__(self, rate=1000, reports=None, transport='usb', path=b'fake:0',
+                 product_id=0x09CC, max_writes=100_000):
+        self.rate = rate
+        self.transport = transport
+        self.path = path
+        self.product_id = product_id
+        if reports is None:
+            make = synthetic_bt_report if transport == 'bt' else synthetic_report
+            reports = [bytes(make(i)) for i in range(256)]
+        self.reports = reports
+        self.max_writes = max_writes
+        # Alınan çıkış raporları: (zaman damgası, bayt)
+        self.writes = []
+        self.feature_requests = []
+        self.emitted = 0
+        self.start_time = None
+        self.nonblocking = False
+        self.closed = True
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_capture(cls, path, rate=1000, **kwargs):
+        from ds4_capture import CaptureReader
+        reader = CaptureReader(path)
+        try:
+            reports = [bytes(report) for _, report in reader]
+        finally:
+            reader.close()
+        return cls(rate, reports, **kwargs)
+
+    @property
+    def info(self):
+        return {
+            'path': self.path,
+            'vendor_id': SONY_VENDOR_ID,
+            'product_id': self.product_id,
+            'bus': 0,
+            'transport': self.transport,
+            'name': 'Sahte DualShock 4',
+            'serial': '',
+        }
+
+    def emitted_at(self, index):
+        # index'inci raporun planlanan üretim zamanı
+        return self.start_time + index / self.rate if self.rate else None
+
+    def open_path(self, path):
+        self.closed = False
+        self.start_time = time.perf_counter()
+
+    def set_nonblocking(self, nonblocking):
+        self.nonblocking = bool(nonblocking)
+
+    def read(self, max_length, timeout_ms=0):
+        if self.closed:
+            raise OSError("Cihaz kapalı")
+        if self.rate:
+            wait = self.start_time + self.emitted / self.rate - time.perf_counter()
+            if wait > 0:
+                if timeout_ms > 0:
+                    if wait > timeout_ms / 1000:
+                        time.sleep(timeout_ms / 1000)
+                        return []
+                elif self.nonblocking:
+                    return []
+                time.sleep(wait)
+        report = self.reports[self.emitted % len(self.reports)]
+        self.emitted += 1
+        return list(report[:max_length])
+
+    def write(self, data):
+        if self.closed:
+            raise OSError("Cihaz kapalı")
+        with self._lock:
+            if len(self.writes) < self.max_writes:
+                self.writes.append((time.perf_counter(), bytes(data)))
+        return len(data)
+
+    def get_feature_report(self, report_id, length):
+        self.feature_requests.append(report_id)
+        return [report_id] + [0] * (length - 1)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBackend:
+    def __init__(self, devices=None):
+        self.devices = {device.path: device for device in (devices or [FakeDevice()])}
+
+    def enumerate(self, vendor_id=SONY_VENDOR_ID, product_ids=DS4_PRODUCT_IDS):
+        return [device.info for device in self.devices.values()
+                if vendor_id == SONY_VENDOR_ID and device.product_id in product_ids]
+
+    def open(self, info):
+        device = self.devices[info['path']]
+        device.open_path(info['path'])
+        return device
@@ -0,0 +1,150 @@
+"""
+DualShock 4 pil takibi
+Geliştirici: rtx4090
+
+Pil seviyesi ve şarj durumu ayrıca okuma yapılmadan normal giriş
+raporlarındaki durum baytından (USB'de 30. bayt) alınır. Seviye 10'luk
+adımlarla geldiği için üstel ortalama ile yumuşatılır ve sabit boyutlu bir
+zaman serisi halkasında saklanır; kalan süre bu seriden tahmin edilir.
+"""
+
+import time
+from array import array
+
+# Durum baytının alt 4 biti: pilde 0-10, kablodayken 0-9 şarj oluyor, 10-11 dolu
+_FULL_WHILE_CABLED = (10, 11)
+_MAX_VALID_LEVEL = 11
+
+SPARK_BLOCKS = '▁▂▃▄▅▆▇█'
+
+
+def battery_percent(status):
+    # (yüzde, şarj oluyor mu, kablo takılı mı); geçersiz değerde yüzde None
+    level = status & 0x0F
+    cable = (status & 0x10) != 0
+    if level > _MAX_VALID_LEVEL:
+        return None, False, cable
+    if cable:
+        if level in _FULL_WHILE_CABLED:
+            return 100, False, True
+        return level * 10 + 5, True, True
+    return min(level * 10 + 5, 100), False, False
+
+
+def sparkline(values, low=0.0, high=100.0):
+    span = high - low
+    if not values or span <= 0:
+        return ''
+    last = len(SPARK_BLOCKS) - 1
+    return ''.join(SPARK_BLOCKS[max(0, min(last, int((value - low) / span * last + 0.5)))]
+                   for value in values)
+
+
+class BatteryMonitor:
+    # update() her çözülen raporda çağrılabilir; örnek en fazla
+    # sample_interval saniyede bir alınır, arada yalnızca bir karşılaştırma yapılır.
+    # smoothing: üstel ortalamanın zaman sabiti (sn)
+    def __init__(self, capacity=4096, sample_interval=10.0, smoothing=60.0, estimate_window=1200.0):
+        if capacity & (capacity - 1):
+            raise ValueError("Kapasite 2'nin kuvveti olmalı")
+        self.capacity = capacity
+        self.sample_interval = sample_interval
+        self.smoothing = smoothing
+        self.estimate_window = estimate_window
+        self._mask = capacity - 1
+        self._times = array('d', [0.0]) * capacity
+        self._levels = array('f', [0.0]) * capacity
+        self.reset()
+
+    def reset(self):
+        self.head = 0
+        self.percent = None
+        self.smoothed = None
+        self.charging = False
+        self.cable = False
+        # Şarj durumunun son değiştiği an; tahmin yalnızca o andan sonraki örnekleri kullanır
+        self.state_since = None
+        self._next_sample = 0.0
+        self._last_time = None
+
+    def update(self, status, now=None):
+        now = time.monotonic() if now is None else now
+        if now < self._next_sample:
+            return False
+        self._next_sample = now + self.sample_interval
+        percent, charging, cable = battery_percent(status)
+        if percent is None:
+            return False
+        if self.smoothed is None or charging != self.charging or cable != self.cable:
+            self.smoothed = float(percent)
+            self.state_since = now
+        else:
+            alpha = min(1.0, (now - self._last_time) / self.smoothing)
+            self.smoothed += (percent - self.smoothed) * alpha
+        self.percent = percent
+        self.charging = charging
+        self.cable = cable
+        self._last_time = now
+        index = self.head & self._mask
+        self._times[index] = now
+        self._levels[index] = self.smoothed
+        self.head += 1
+        return True
+
+    def samples(self, since=None):
+        # Halkadaki örnekler eskiden yeniye (zaman, yumuşatılmış yüzde)
+        start = max(0, self.head - self.capacity)
+        result = []
+        for seq in range(start, self.head):
+            index = seq & self._mask
+            if since is None or self._times[index] >= since:
+                result.append((self._times[index], self._levels[index]))
+        return result
+
+    def history(self, count=40):
+        start = max(0, self.head - min(count, self.capacity))
+        return [self._levels[seq & self._mask] for seq in range(start, self.head)]
+
+    def slope(self):
+        # Son estimate_window saniyedeki eğim (yüzde/sn, en küçük kareler)
+        if self.state_since is None:
+            return None
+        since = max(self.state_since, self._last_time - self.estimate_window)
+        points = self.samples(since)
+        if len(points) < 3 or points[-1][0] - points[0][0] < 120:
+            return None
+        t0 = points[0][0]
+        n = len(points)
+        mean_t = sum(t - t0 for t, _ in points) / n
+        mean_v = sum(v for _, v in points) / n
+        var = sum((t - t0 - mean_t) ** 2 for t, _ in points)
+        if not var:
+            return None
+        return sum((t - t0 - mean_t) * (v - mean_v) for t, v in points) / var
+
+    def remaining(self):
+        # Pildeyken boşalmaya, şarjdayken dolmaya kalan tahmini süre (sn) veya None
+        slope = self.slope()
+        if slope is None or self.smoothed is None:
+            return None
+        if self.charging and slope > 0:
+            return (100.0 - self.smoothed) / slope
+        if not self.cable and slope < 0:
+            return self.smoothed / -slope
+        return None
+
+    def snapshot(self):
+        return {
+            'percent': self.percent,
+            'smoothed': self.smoothed,
+            'charging': self.charging,
+            'cable': self.cable,
+            'remaining_seconds': self.remaining(),
+            'samples': min(self.head, self.capacity),
+        }
+
+
+def format_duration(seconds):
+    minutes = int(seconds // 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours} sa {minutes} dk' if hours else f'{minutes} dk'
@@ -0,0 +1,1060 @@
+"""
+DualShock 4 performans ölçümleri
+Geliştirici: rtx4090
+
+Donanım gerekmez: giriş/çıkış yolları FakeDevice ile sürülür.
+
+Kullanım:
+    python ds4_bench.py [ölçüm ...] [--count N] [--duration SN] [--capture DOSYA]
+                        [--json SONUC.json] [--compare ONCEKI.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import selectors
+import platform
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from ds4_async import AsyncDS4
+from ds4_backend import FakeDevice, synthetic_report as make_report, synthetic_bt_report as make_bt_report
+from ds4_buttons import ButtonEvents, PRESS, RELEASE
+from ds4_dsu import DSUServer, DSUClient
+from ds4_combos import ComboRecognizer, BUTTON_SYMBOLS
+from ds4_capture import CaptureReader, CaptureWriter
+from ds4_haptics import HapticsPlayer
+from ds4_imu import OrientationTracker
+from ds4_input import DS4State, ReportRing, InputReader, DEVICE_TICK_US, decode_report, decode_any, valid_report
+from ds4_lightbar import LightbarEngine
+from ds4_manager import DS4Manager
+from ds4_output import OutputWriter
+from ds4_stats import InputStats
+from ds4_sticks import StickProcessor, StickSettings, TriggerSettings
+from ds4_uinput import VirtualGamepad, compile_mapping
+from ds4_touch import TouchTracker, TAP, SWIPE, PINCH, SCROLL
+
+RESULTS_VERSION = 1
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_decode(count=1_000_000, **_):
+    reports = [make_report(i) for i in range(256)]
+    views = [memoryview(r) for r in reports]
+    state = DS4State()
+
+    # Isınma
+    for view in views:
+        decode_report(view, state)
+
+    start = time.perf_counter()
+    for i in range(count):
+        decode_report(views[i & 0xFF], state)
+    elapsed = time.perf_counter() - start
+
+    # Döngü süresince bellekte kalan net ayırma miktarı
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(100_000):
+        decode_report(views[i & 0xFF], state)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Bluetooth yolu: CRC doğrulama + aynı çözücü
+    bt_views = [memoryview(make_bt_report(i)) for i in range(256)]
+    start = time.perf_counter()
+    for i in range(count):
+        view = bt_views[i & 0xFF]
+        if valid_report(view):
+            decode_any(view, state)
+    bt_elapsed = time.perf_counter() - start
+
+    return {
+        'name': 'decode',
+        'reports': count,
+        'seconds': elapsed,
+        'reports_per_second': count / elapsed,
+        'ns_per_report': elapsed / count * 1e9,
+        'retained_bytes': after - before,
+        'bt_validate_decode_per_second': count / bt_elapsed,
+        'bt_validate_decode_ns': bt_elapsed / count * 1e9,
+    }
+
+
+def bench_lightbar(count=1_000_000, **_):
+    # Işık çubuğu karesi başına CPU maliyeti (çıkış yazmadan)
+    engine = LightbarEngine(lambda r, g, b: None, lambda on, off: None,
+                            battery_source=lambda: 7)
+    results = {'name': 'lightbar', 'frames': count}
+    for effect in ('nefes', 'gokkusagi', 'pil'):
+        if effect == 'nefes':
+            engine.breathing((52, 152, 219))
+        elif effect == 'gokkusagi':
+            engine.rainbow()
+        else:
+            engine.battery_gradient()
+        render = engine.render_frame
+        start = time.perf_counter()
+        for i in range(count):
+            render(i * 0.001)
+        elapsed = time.perf_counter() - start
+        results[f'{effect}_ns_per_frame'] = elapsed / count * 1e9
+    return results
+
+
+def _pump_reports(sockets, rate, duration):
+    # Her sokete `rate` Hz hızında rapor gönderen sahte kontrolcüler
+    report = bytes(make_report(1))
+    period = 1.0 / rate
+    start = time.perf_counter()
+    tick = 0
+    sent = 0
+    while True:
+        next_tick = start + tick * period
+        now = time.perf_counter()
+        if next_tick - now > 0:
+            time.sleep(next_tick - now)
+        if now - start >= duration:
+            break
+        for sock in sockets:
+            try:
+                sock.send(report)
+                sent += 1
+            except BlockingIOError:
+                pass
+        tick += 1
+    return sent
+
+
+def bench_manager(duration=1.0, rate=1000, pad_counts=(1, 2, 4, 8, 16), **_):
+    # N sahte kontrolcü için toplam rapor hızı ve yönetici thread'inin CPU kullanımı.
+    # SOCK_SEQPACKET, hidraw gibi rapor sınırlarını korur.
+    results = {'name': 'manager', 'rate_per_pad': rate}
+    for pads in pad_counts:
+        pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _ in range(pads)]
+        manager = DS4Manager()
+        for i, (device_end, app_end) in enumerate(pairs):
+            device_end.setblocking(False)
+            app_end.setblocking(False)
+            manager.add_fd({'path': f'fake{i}'.encode()}, os.dup(app_end.fileno()))
+        manager.start()
+        sent = _pump_reports([device_end for device_end, _ in pairs], rate, duration)
+        time.sleep(0.05)
+        manager.stop()
+        stats = manager.stats()
+        for device_end, app_end in pairs:
+            device_end.close()
+            app_end.close()
+        results[f'{pads}_pads_reports_per_second'] = stats['reports'] / duration
+        results[f'{pads}_pads_lost'] = sent - stats['reports']
+        results[f'{pads}_pads_cpu_percent'] = stats['cpu_seconds'] / duration * 100
+    return results
+
+
+def bench_async(duration=1.0, rate=1000, pad_counts=(1, 4, 16), **_):
+    # bench_manager'ın asyncio karşılığı: tüm kontrolcüler ve aboneleri tek olay
+    # döngüsünde. CPU, döngü thread'inin kullandığı süredir.
+    results = {'name': 'async', 'rate_per_pad': rate}
+
+    async def run(pairs):
+        pads = [AsyncDS4({'path': f'fake{i}'.encode()}, os.dup(app_end.fileno()))
+                for i, (_, app_end) in enumerate(pairs)]
+        received = [0] * len(pads)
+
+        async def consume(index, pad):
+            async for _ in pad.states():
+                received[index] += 1
+
+        consumers = [asyncio.ensure_future(consume(i, pad)) for i, pad in enumerate(pads)]
+        loop = asyncio.get_running_loop()
+        pump = loop.run_in_executor(None, _pump_reports, [device_end for device_end, _ in pairs], rate, duration)
+        cpu_start = time.thread_time()
+        sent = await pump
+        await asyncio.sleep(0.05)
+        cpu = time.thread_time() - cpu_start
+        for pad in pads:
+            pad.close()
+        await asyncio.gather(*consumers)
+        return sent, sum(pad.reports for pad in pads), sum(received), cpu
+
+    for count in pad_counts:
+        pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _ in range(count)]
+        for device_end, app_end in pairs:
+            device_end.setblocking(False)
+            app_end.setblocking(False)
+        sent, reports, states, cpu = asyncio.run(run(pairs))
+        for device_end, app_end in pairs:
+            device_end.close()
+            app_end.close()
+        results[f'{count}_pads_reports_per_second'] = reports / duration
+        results[f'{count}_pads_lost'] = sent - reports
+        results[f'{count}_pads_states'] = states
+        results[f'{count}_pads_cpu_percent'] = cpu / duration * 100
+    return results
+
+
+def write_synthetic_capture(path, count, rate=1000):
+    # Donanım olmadan, `rate` Hz'lik sahte bir oturum kaydı üret
+    ring = ReportRing(1024)
+    writer = CaptureWriter(ring, path)
+    reports = [bytes(make_report(i)) for i in range(256)]
+    for i in range(count):
+        ring.push(reports[i & 0xFF], i / rate)
+        if (i & 511) == 511:
+            writer.flush()
+    writer.flush()
+    writer.close()
+
+
+def bench_replay(count=1_000_000, capture=None, **_):
+    # Kayıttaki tüm raporları olabildiğince hızlı çözücüden geçir
+    temp_path = None
+    if capture is None:
+        fd, temp_path = tempfile.mkstemp(suffix='.ds4cap')
+        os.close(fd)
+        os.unlink(temp_path)
+        write_synthetic_capture(temp_path, count)
+        capture = temp_path
+    try:
+        reader = CaptureReader(capture)
+        state = DS4State()
+        decoded = [0]
+
+        def sink(stamp, report):
+            if decode_any(report, state):
+                decoded[0] += 1
+
+        start = time.perf_counter()
+        played = reader.replay(sink, realtime=False)
+        elapsed = time.perf_counter() - start
+        duration = reader.duration
+        reader.close()
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+    return {
+        'name': 'replay',
+        'records': played,
+        'decoded': decoded[0],
+        'capture_seconds': duration,
+        'seconds': elapsed,
+        'reports_per_second': played / elapsed if elapsed else 0.0,
+        'speedup_vs_realtime': duration / elapsed if elapsed else 0.0,
+    }
+
+
+def bench_latency(duration=1.0, rate=1000, ui_fps=60, **_):
+    # FakeDevice -> InputReader -> halka tampon -> arayüz. Cihazın raporu ürettiği
+    # planlanan an ile tampona girdiği an arasındaki gecikme ve arayüz karesinde
+    # gösterilen en son raporun yaşı.
+    device = FakeDevice(rate)
+    device.open_path(device.path)
+    ring = ReportRing(4096)
+    reader = InputReader(device, ring)
+    reader.start()
+    frame = 1.0 / ui_fps
+    ages = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        time.sleep(frame)
+        latest = ring.latest()
+        if latest:
+            ages.append(time.perf_counter() - latest[1])
+    reader.stop()
+    device.close()
+
+    delays = [stamp - device.emitted_at(seq) for seq, stamp, _ in ring.reports_since(0)]
+    return {
+        'name': 'latency',
+        'rate': rate,
+        'reports': ring.head,
+        'reports_per_second': ring.head / duration,
+        'reader_p50_us': percentile(delays, 0.5) * 1e6,
+        'reader_p99_us': percentile(delays, 0.99) * 1e6,
+        'ui_age_p50_ms': percentile(ages, 0.5) * 1e3,
+        'ui_age_p99_ms': percentile(ages, 0.99) * 1e3,
+    }
+
+
+def bench_output(count=1_000_000, duration=1.0, **_):
+    # Kaydırıcı yağmuru: olabildiğince hızlı titreşim güncellemesi gönder
+    device = FakeDevice(rate=0)
+    device.open_path(device.path)
+    writer = OutputWriter(device, interval=0.004)
+    writer.start()
+    requests = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration and requests < count:
+        writer.update(small_motor=requests & 0xFF, big_motor=255 - (requests & 0xFF))
+        requests += 1
+    elapsed = time.perf_counter() - start
+    writer.stop()
+    stats = writer.stats()
+    return {
+        'name': 'output',
+        'requests': stats['requests'],
+        'requests_per_second': requests / elapsed,
+        'writes': len(device.writes),
+        'writes_per_second': len(device.writes) / elapsed,
+        'saved': stats['saved'],
+        'saved_percent': stats['saved'] / stats['requests'] * 100 if stats['requests'] else 0.0,
+    }
+
+
+def bench_haptics(**_):
+    # "nabiz" deseninde her açma/kapama geçişinin planlanan zamana göre sapması
+    changes = []
+    player = HapticsPlayer(lambda small, big: changes.append((time.perf_counter(), small)))
+    pattern = player.patterns['nabiz']
+    player.start()
+    start = time.perf_counter()
+    player.play('nabiz')
+    time.sleep(pattern.duration + 0.1)
+    player.stop()
+
+    expected = []
+    for i in range(1, len(pattern.small)):
+        if pattern.small[i] != pattern.small[i - 1]:
+            expected.append(i / pattern.tick_rate)
+    actual = [stamp - start for stamp, _ in changes[1:len(expected) + 1]]
+    errors = [abs(a - e) for a, e in zip(actual, expected)]
+    return {
+        'name': 'haptics',
+        'transitions': len(errors),
+        'error_mean_ms': sum(errors) / len(errors) * 1e3 if errors else 0.0,
+        'error_max_ms': max(errors) * 1e3 if errors else 0.0,
+        'missed_ticks': player.missed_ticks,
+    }
+
+
+def bench_stats(count=1_000_000, **_):
+    # Ölçüm açıkken rapor başına maliyet ve kayıp tespitinin doğruluğu:
+    # her 1000 rapordan 3'ü ve bir kez 130 rapor (sayaç sarması) atlanır
+    ring = ReportRing(1 << 16)
+    reports = [make_report(i) for i in range(256)]
+    report = bytearray(64)
+    stats = InputStats()
+    expected_drops = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    for i in range(count):
+        if ring.head and (i % 1000 < 3 or 500_000 <= i < 500_130):
+            expected_drops += 1
+            continue
+        # 256 raporluk döngüde zaman damgası sürekli kalsın
+        report[:] = reports[i & 0xFF]
+        report[10:12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+        ring.push(report, i / 1000)
+        if ring.head & 0x3FF == 0:
+            begin = time.perf_counter()
+            stats.consume(ring)
+            elapsed += time.perf_counter() - begin
+    begin = time.perf_counter()
+    stats.consume(ring)
+    elapsed += time.perf_counter() - begin
+    snapshot = stats.snapshot()
+    return {
+        'name': 'stats',
+        'reports': snapshot['reports'],
+        'ns_per_report': elapsed / snapshot['reports'] * 1e9,
+        'dropped': snapshot['dropped'],
+        'expected_dropped': expected_drops,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def bench_startup(runs=5, target_ms=500, **_):
+    # Uygulamayı ayrı işlemde --startup-bench ile başlatır: işlem başlangıcından
+    # pencerenin ilk çizimi bitip olay döngüsüne girene kadar geçen süre
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ds4_controller.py')
+    env = dict(os.environ)
+    if not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY') and sys.platform.startswith('linux'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    totals = []
+    in_process = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, script, '--startup-bench'], env=env,
+                                capture_output=True, text=True, timeout=30)
+        elapsed = time.perf_counter() - start
+        ready = [line for line in result.stdout.splitlines() if line.startswith('READY ')]
+        if not ready:
+            error = (result.stderr.strip().splitlines() or ['çıktı yok'])[-1]
+            return {'name': 'startup', 'error': error}
+        totals.append(elapsed * 1e3)
+        in_process.append(float(ready[-1].split()[1]))
+    return {
+        'name': 'startup',
+        'runs': runs,
+        'ready_ms': min(totals),
+        'ready_median_ms': percentile(totals, 0.5),
+        'module_to_ready_ms': min(in_process),
+        'target_ms': target_ms,
+        'within_target': min(totals) < target_ms,
+    }
+
+
+def bench_buttons(count=1_000_000, **_):
+    # Tuş olayı çıkarımının rapor başına maliyeti. Raporların çoğunda tuşlar
+    # değişmez; her 50 raporda bir × basılır/bırakılır.
+    ring = ReportRing(1 << 16)
+    idle = make_report(0)
+    idle[5:8] = b'\x08\x00\x00'
+    pressed = bytearray(idle)
+    pressed[5] |= 0x20
+    received = []
+    events = ButtonEvents()
+    events.on(received.append)
+    elapsed = 0.0
+    for i in range(count):
+        report = pressed if (i // 50) & 1 else idle
+        report[10:12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+        ring.push(report, i / 1000)
+        if ring.head & 0x3FF == 0:
+            begin = time.perf_counter()
+            events.consume(ring)
+            elapsed += time.perf_counter() - begin
+    begin = time.perf_counter()
+    events.consume(ring)
+    elapsed += time.perf_counter() - begin
+    return {
+        'name': 'buttons',
+        'reports': count,
+        'ns_per_report': elapsed / count * 1e9,
+        'reports_per_second': count / elapsed,
+        'events': len(received),
+        'transitions': sum(1 for event in received if event.kind in (PRESS, RELEASE)),
+        'expected_transitions': count // 50 - 1,
+    }
+
+
+def bench_imu(count=1_000_000, rate=1000, batch_sizes=(1, 16, 64, 256), yaw_rate=90.0, **_):
+    # Yönelim filtresinin tek çekirdekte saniyede işlediği örnek sayısı. Kontrolcü
+    # masada düz dururken sabit hızla kendi dikey ekseni etrafında döner; sonuçtaki
+    # sapma açısı beklenenle karşılaştırılır. 1 kHz girişe yetişmek için
+    # samples_per_s >= rate olmalı (arayüz 50 ms'de bir ~50 örneklik pencere işler).
+    samples = min(count, 100_000)
+    ring = ReportRing(1 << 10)
+    raw_yaw = round(yaw_rate * 16.384)
+    reports = []
+    for i in range(256):
+        report = make_report(i)
+        # Jiroskop (pitch, yaw, roll) ve ivme (x, y, z): yerçekimi +y
+        report[13:25] = struct.pack('<6h', 0, raw_yaw, 0, 0, 8192, 0)
+        reports.append(report)
+    result = {'name': 'imu', 'samples': samples, 'rate_hz': rate}
+    worst = None
+    for batch in batch_sizes:
+        tracker = OrientationTracker()
+        tracker.reset(ring)
+        report = bytearray(64)
+        elapsed = 0.0
+        for i in range(samples):
+            report[:] = reports[i & 0xFF]
+            report[10:12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+            ring.push(report, i / rate)
+            if (i + 1) % batch == 0:
+                begin = time.perf_counter()
+                tracker.consume(ring)
+                elapsed += time.perf_counter() - begin
+        begin = time.perf_counter()
+        tracker.consume(ring)
+        elapsed += time.perf_counter() - begin
+        per_second = tracker.samples / elapsed
+        result[f'batch{batch}_samples_per_s'] = per_second
+        if batch > 1 and (worst is None or per_second < worst):
+            worst = per_second
+        # İlk örneğin aralığı bilinmediği için (samples - 1) aralık entegre edilir
+        expected_yaw = (samples - 1) * 188 * 16 / 3 / 1e6 * (raw_yaw / 16.384)
+        yaw_error = (tracker.euler()[2] - expected_yaw + 180) % 360 - 180
+        result[f'batch{batch}_yaw_error_deg'] = abs(yaw_error)
+    result['keeps_up'] = worst is not None and worst >= rate
+    result['realtime_factor'] = (worst or 0.0) / rate
+    return result
+
+
+def _touch_script():
+    # Bir dokunma, sağa kaydırma, iki parmakla dokunma, kıstırma ve iki parmakla
+    # kaydırma; her kare bir rapor (1 kHz). Kare: [(kimlik, x, y), ...]
+    frames = []
+    frames += [[(1, 900, 400)]] * 20 + [[]] * 50
+    frames += [[(2, 300 + i * 6, 450)] for i in range(200)] + [[]] * 50
+    frames += [[(3, 800, 400), (4, 1100, 420)]] * 30 + [[]] * 50
+    frames += [[(5, 960 - 100 - i * 2, 470), (6, 960 + 100 + i * 2, 470)] for i in range(200)] + [[]] * 50
+    frames += [[(7, 800, 200 + i * 2), (8, 1100, 200 + i * 2)] for i in range(200)] + [[]] * 50
+    expected = {TAP: 2, SWIPE: 1}
+    return frames, expected
+
+
+def _set_touch(report, counter, fingers):
+    # USB raporuna tek dokunma paketi yaz (bayt 33: paket sayısı, 34: paket)
+    report[33] = 1
+    report[34] = counter & 0xFF
+    for slot in range(2):
+        offset = 35 + slot * 4
+        if slot < len(fingers):
+            touch_id, x, y = fingers[slot]
+            report[offset:offset + 4] = bytes((touch_id & 0x7F, x & 0xFF, (x >> 8) | ((y & 0x0F) << 4), y >> 4))
+        else:
+            report[offset] = 0x80
+
+
+def bench_touch(count=1_000_000, **_):
+    # Rapor başına dokunma takibi maliyeti ve hareketlerin doğru tanınması
+    frames, expected = _touch_script()
+    reports = []
+    for i, fingers in enumerate(frames):
+        report = make_report(i)
+        _set_touch(report, i, fingers)
+        report[10:12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+        reports.append(report)
+    loops = max(1, count // len(reports))
+    ring = ReportRing(1 << 12)
+    tracker = TouchTracker()
+    counts = dict.fromkeys((TAP, SWIPE, PINCH, SCROLL), 0)
+    tracker.on(lambda gesture: counts.__setitem__(gesture.kind, counts[gesture.kind] + 1))
+    report = bytearray(64)
+    elapsed = 0.0
+    seq = 0
+    for _ in range(loops):
+        for template in reports:
+            report[:] = template
+            # Sayaç ve zaman damgası döngüler boyunca sürekli kalsın
+            report[34] = seq & 0xFF
+            report[10:12] = ((seq * 188) & 0xFFFF).to_bytes(2, 'little')
+            ring.push(report, seq / 1000)
+            seq += 1
+            if ring.head & 0x3FF == 0:
+                begin = time.perf_counter()
+                tracker.consume(ring)
+                elapsed += time.perf_counter() - begin
+    begin = time.perf_counter()
+    tracker.consume(ring)
+    elapsed += time.perf_counter() - begin
+    return {
+        'name': 'touch',
+        'reports': seq,
+        'ns_per_report': elapsed / seq * 1e9,
+        'frames': tracker.frames,
+        'taps': counts[TAP],
+        'expected_taps': expected[TAP] * loops,
+        'swipes': counts[SWIPE],
+        'expected_swipes': expected[SWIPE] * loops,
+        'pinch_steps': counts[PINCH],
+        'scroll_steps': counts[SCROLL],
+        'lost': tracker.lost,
+    }
+
+
+def bench_sticks(count=1_000_000, pads=4, **_):
+    # Rapor başına tablo maliyeti (birkaç kontrolcü aynı işlemciyi paylaşır),
+    # ayar değişikliğinde derleme süresi ve halka tampon penceresi için NumPy yolu
+    settings = StickSettings(radial_deadzone=0.1, axial_deadzone_x=0.02, anti_deadzone=0.15,
+                             curve='kuadratik', offset_x=-3, offset_y=2)
+    begin = time.perf_counter()
+    sticks = StickProcessor(settings, settings, TriggerSettings(deadzone=0.05), TriggerSettings(saturation=0.9))
+    compile_ms = (time.perf_counter() - begin) * 1e3
+    states = []
+    for i in range(256):
+        state = DS4State()
+        decode_report(make_report(i), state)
+        states.append(state)
+    work = DS4State()
+    apply = sticks.apply
+    begin = time.perf_counter()
+    for i in range(count):
+        work.copy_from(states[i & 0xFF])
+        apply(work)
+    apply_elapsed = time.perf_counter() - begin
+    begin = time.perf_counter()
+    for i in range(count):
+        work.copy_from(states[i & 0xFF])
+    copy_elapsed = time.perf_counter() - begin
+    ns_per_report = max(0.0, apply_elapsed - copy_elapsed) / count * 1e9
+
+    ring = ReportRing(1 << 16)
+    for i in range(ring.capacity):
+        ring.push(make_report(i), i / 1000)
+    begin = time.perf_counter()
+    values, _ = sticks.process_ring(ring)
+    batch_elapsed = time.perf_counter() - begin
+    # Toplu yol ile tek tek yol aynı sonucu vermeli
+    mismatches = sum(1 for i in range(0, ring.capacity, 97)
+                     if tuple(int(v) for v in values[:, i]) != sticks.process(*_stick_fields(make_report(i))))
+    return {
+        'name': 'sticks',
+        'reports': count,
+        'ns_per_report': ns_per_report,
+        'reports_per_second_per_core': 1e9 / ns_per_report if ns_per_report else 0.0,
+        'pads_at_1khz_cpu_percent': ns_per_report * 1000 * pads / 1e9 * 100,
+        'compile_ms': compile_ms,
+        'batch_reports': values.shape[1],
+        'batch_ns_per_report': batch_elapsed / values.shape[1] * 1e9,
+        'batch_mismatches': mismatches,
+    }
+
+
+def _stick_fields(report):
+    return report[1], report[2], report[3], report[4], report[8], report[9]
+
+
+def bench_uinput(count=1_000_000, duration=1.0, rate=1000, **_):
+    # Eşleme (tuş değişimi, turbo, ters eksen, çubuktan tuşa) rapor başına
+    # maliyeti ve okuyucu thread'inde yayının ek gecikmesi. /dev/uinput yerine
+    # bir boruya yazılır; karşı uçtaki thread olayları boşaltır.
+    mapping = compile_mapping({
+        'buttons': {'CROSS': 'CIRCLE', 'CIRCLE': 'CROSS', 'SHARE': None},
+        'turbo': {'SQUARE': 15},
+        'invert': ['ry'],
+        'axis_buttons': [{'axis': 'lx', 'direction': -1, 'threshold': 0.5, 'button': 'LEFT'}],
+    })
+    states = []
+    for i in range(256):
+        state = DS4State()
+        decode_report(make_report(i), state)
+        states.append(state)
+    remap = mapping.remap
+    begin = time.perf_counter()
+    for i in range(count):
+        remap(states[i & 0xFF], i / 1000)
+    remap_ns = (time.perf_counter() - begin) / count * 1e9
+
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(write_fd, False)
+    drained = [0]
+
+    def drain():
+        while True:
+            data = os.read(read_fd, 65536)
+            if not data:
+                break
+            drained[0] += len(data)
+
+    drainer = threading.Thread(target=drain, daemon=True)
+    drainer.start()
+    device = FakeDevice(rate)
+    device.open_path(device.path)
+    ring = ReportRing(4096)
+    gamepad = VirtualGamepad(mapping, fd=write_fd)
+    gamepad.attach(ring)
+    reader = InputReader(device, ring)
+    reader.start()
+    time.sleep(duration)
+    reader.stop()
+    device.close()
+    gamepad.detach()
+    os.close(write_fd)
+    drainer.join(1.0)
+    os.close(read_fd)
+    stats = gamepad.stats()
+    return {
+        'name': 'uinput',
+        'remap_ns_per_report': remap_ns,
+        'reports': stats['reports'],
+        'writes': stats['writes'],
+        'events': stats['events'],
+        'bytes': drained[0],
+        'process_us_avg': stats['remap_us_avg'],
+        'added_latency_p50_us': stats['latency_p50_us'],
+        'added_latency_p99_us': stats['latency_p99_us'],
+        'added_latency_max_us': stats['latency_max_us'],
+        'write_errors': stats['errors'],
+    }
+
+
+def bench_combos(count=1_000_000, combo_counts=(1, 100, 1000), **_):
+    # Rapor başına maliyet kayıtlı kombo sayısıyla değişmemeli. Girdi her 20
+    # raporda bir tuş basıp bırakır; her 400 raporda bir tanınması gereken
+    # "↑ ↑ ↓ ↓ × ○" dizisi gelir (1 kHz, cihaz zaman damgasıyla).
+    import random
+    names = ['↑', '↓', '←', '→', '□', '○', '×', '△', 'L1', 'R1', 'SHARE', 'OPTIONS']
+    konami = ['↑', '↑', '↓', '↓', '×', '○']
+    masks = BUTTON_SYMBOLS
+    dpad = {'↑': 0, '→': 2, '↓': 4, '←': 6}
+    rng = random.Random(1)
+    presses = []
+    while len(presses) * 20 < 4096:
+        if len(presses) % 20 == 0:
+            presses.extend(konami)
+        else:
+            presses.append(rng.choice(['□', '△', 'L1', 'R1']))
+    templates = []
+    for index, name in enumerate(presses):
+        for held in (True, False):
+            report = make_report(index)
+            report[5] = (dpad.get(name, 8) | (masks[name] & 0xF0)) if held else 8
+            report[6] = (masks[name] >> 8) & 0xFF if held else 0
+            report[7] &= 0xFC
+            templates.append(report)
+    result = {'name': 'combos', 'reports': count}
+    for combo_count in combo_counts:
+        recognizer = ComboRecognizer()
+        fired = [0]
+        recognizer.add(' '.join(konami), lambda combo, time: fired.__setitem__(0, fired[0] + 1), within=3.0)
+        for _ in range(combo_count - 1):
+            if rng.random() < 0.2:
+                recognizer.add('+'.join(rng.sample(names[4:], 2)) + f' {rng.randint(1, 3)}sn', lambda combo, time: None)
+            else:
+                recognizer.add(' '.join(rng.choice(names) for _ in range(rng.randint(3, 8))), lambda combo, time: None)
+        recognizer.compile()
+        ring = ReportRing(1 << 12)
+        report = bytearray(64)
+        elapsed = 0.0
+        expected = 0
+        for i in range(count):
+            slot = (i // 10) % len(templates)
+            report[:] = templates[slot]
+            report[10:12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+            ring.push(report, i / 1000)
+            # Her basış 10 rapor basılı, 10 rapor bırakılmış; dizinin son (○) basışı
+            if i % 10 == 0 and slot % 2 == 0 and slot // 2 % 20 == 5 and i >= 10:
+                expected += 1
+            if ring.head & 0x3FF == 0:
+                begin = time.perf_counter()
+                recognizer.consume(ring)
+                elapsed += time.perf_counter() - begin
+        begin = time.perf_counter()
+        recognizer.consume(ring)
+        elapsed += time.perf_counter() - begin
+        result[f'combos{combo_count}_ns_per_report'] = elapsed / count * 1e9
+        result[f'combos{combo_count}_states'] = recognizer.states
+        result[f'combos{combo_count}_fired'] = fired[0]
+        result[f'combos{combo_count}_expected'] = expected
+    return result
+
+
+def _qt_app():
+    # Ekran yoksa offscreen platformla QApplication; PyQt5 yoksa hata metni
+    if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY') and sys.platform.startswith('linux'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5 import QtWidgets
+    except ImportError as e:
+        return str(e)
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _label_grid(widgets):
+    # Şemadan önceki tuş testi görünümü: stil sayfalı ve emojili QLabel ızgarası
+    button_style = """
+        QLabel {
+            background-color: #34495e;
+            color: #ecf0f1;
+            padding: 12px;
+            border: 2px solid #2c3e50;
+            border-radius: 8px;
+            min-width: 80px;
+            font-size: 16px;
+            font-weight: bold;
+        }
+    """
+    stick_style = "QLabel { background-color: #f0f0f0; padding: 5px; border: 1px solid gray; border-radius: 3px; }"
+    container = widgets.QWidget()
+    layout = widgets.QVBoxLayout(container)
+    grid = widgets.QHBoxLayout()
+    labels = {}
+    for names in (['↑', '↓', '←', '→', '□', '○', '×', '△'], ['SHARE', 'OPTIONS', 'PS', 'TOUCHPAD'],
+                  ['L1', 'L2', 'R1', 'R2', 'L3', 'R3']):
+        column = widgets.QVBoxLayout()
+        for btn in names:
+            labels[btn] = widgets.QLabel(f'{btn}: ⬛')
+            labels[btn].setStyleSheet(button_style)
+            column.addWidget(labels[btn])
+        grid.addLayout(column)
+    layout.addLayout(grid)
+    sticks = widgets.QHBoxLayout()
+    stick_labels = [widgets.QLabel('Sol Analog: X: 0, Y: 0'), widgets.QLabel('Sağ Analog: X: 0, Y: 0')]
+    for label in stick_labels:
+        label.setStyleSheet(stick_style)
+        sticks.addWidget(label)
+    layout.addLayout(sticks)
+    shown = {'buttons': 0, 'left': (0, 0), 'right': (0, 0)}
+
+    def render(state):
+        # Eski render_state: yalnızca değişen etiketlere setText
+        from ds4_controller import BUTTON_NAMES, ALL_BUTTONS_MASK
+        changed = (state.buttons ^ shown['buttons']) & ALL_BUTTONS_MASK
+        left = (state.lx - 128, state.ly - 128)
+        right = (state.rx - 128, state.ry - 128)
+        container.setUpdatesEnabled(False)
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            btn = BUTTON_NAMES[bit]
+            labels[btn].setText(f'{btn}: {"🟩" if state.buttons & bit else "⬛"}')
+        if left != shown['left']:
+            stick_labels[0].setText(f'Sol Analog: X: {left[0]}, Y: {left[1]}')
+        if right != shown['right']:
+            stick_labels[1].setText(f'Sağ Analog: X: {right[0]}, Y: {right[1]}')
+        container.setUpdatesEnabled(True)
+        shown.update(buttons=state.buttons & ALL_BUTTONS_MASK, left=left, right=right)
+
+    return container, render
+
+
+def _paint_frames(app, render, states):
+    # Durum değişikliğinden çizimin bitmesine kadar kare başına süre (µs)
+    for state in states[:50]:
+        render(state)
+        app.processEvents()
+    times = []
+    for state in states:
+        begin = time.perf_counter()
+        render(state)
+        app.processEvents()
+        times.append((time.perf_counter() - begin) * 1e6)
+    return times
+
+
+def bench_paint(count=1_000_000, frames=2000, fps=60, **_):
+    # Tuş testi görünümünün kare başına çizim maliyeti: eski QLabel ızgarası ile
+    # önbellekli özel çizilen şema aynı durum dizisiyle sürülür. Her karede
+    # çubuklar ve tetikler değişir, birkaç karede bir tuş basılır/bırakılır.
+    app = _qt_app()
+    if isinstance(app, str):
+        return {'name': 'paint', 'error': app}
+    from PyQt5 import QtWidgets
+    from ds4_controller import ControllerWidget, BUTTON_BITS
+    frames = min(count, frames)
+    bits = list(BUTTON_BITS.values())
+    states = []
+    buttons = 0
+    for i in range(frames):
+        if i % 4 == 0:
+            buttons ^= bits[(i // 4) % len(bits)]
+        state = DS4State()
+        state.buttons = buttons
+        state.lx = 128 + (i * 7) % 100 - 50
+        state.ly = 128 + (i * 5) % 80 - 40
+        state.rx = 128 + (i * 3) % 60 - 30
+        state.ry = 128
+        state.l2 = (i * 9) & 0xFF
+        state.r2 = 0
+        states.append(state)
+
+    grid, render_grid = _label_grid(QtWidgets)
+    grid.show()
+    label_times = _paint_frames(app, render_grid, states)
+    grid.close()
+
+    view = ControllerWidget()
+    view.show()
+    view_times = _paint_frames(app, view.show_state, states)
+    paint_times = [seconds * 1e6 for seconds in view.paint_times]
+    view.close()
+    budget = 1e6 / fps
+    return {
+        'name': 'paint',
+        'frames': frames,
+        'budget_us': budget,
+        'labels_frame_p50_us': percentile(label_times, 0.5),
+        'labels_frame_p99_us': percentile(label_times, 0.99),
+        'widget_frame_p50_us': percentile(view_times, 0.5),
+        'widget_frame_p99_us': percentile(view_times, 0.99),
+        'widget_paint_p50_us': percentile(paint_times, 0.5),
+        'speedup': sum(label_times) / sum(view_times),
+        'widget_budget_percent': percentile(view_times, 0.99) / budget * 100,
+    }
+
+
+def bench_scope(count=1_000_000, seconds=10.0, rates=(250, 1000, 4000), width=1000, **_):
+    # Osiloskop: okuyucu thread'inde rapor başına eklenen maliyet ve çizimden
+    # önceki hazırlığın (pencere + seyreltme) örnek hızına göre maliyeti.
+    # Çizilen nokta sayısı örnek hızından bağımsız, yalnızca genişliğe bağlı kalmalıdır.
+    from ds4_scope import ScopeBuffer, CHANNELS, decimate, envelope
+    reports = [make_report(i) for i in range(256)]
+    count = min(count, 200_000)
+    timings = {}
+    for attached in (False, True):
+        ring = ReportRing(1 << 10)
+        if attached:
+            ScopeBuffer().attach(ring)
+        start = time.perf_counter()
+        for i in range(count):
+            ring.push(reports[i & 0xFF], 0.0)
+        timings[attached] = time.perf_counter() - start
+    result = {
+        'name': 'scope',
+        'reports': count,
+        'push_ns_per_report': (timings[True] - timings[False]) / count * 1e9,
+    }
+
+    app = _qt_app()
+    for rate in rates:
+        buffer = ScopeBuffer(seconds, rate)
+        step = round(1e6 / rate / DEVICE_TICK_US)
+        report = bytearray(reports[0])
+        for i in range(int(seconds * rate)):
+            report[1] = 128 + (i * 7) % 100 - 50
+            report[10:12] = ((i * step) & 0xFFFF).to_bytes(2, 'little')
+            buffer.push(report)
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            times, values = buffer.window(seconds)
+            columns, low, high = decimate(times, values, width, seconds)
+            points = sum(len(envelope(columns, low[channel], high[channel])) for channel in range(len(CHANNELS)))
+        result[f'rate{rate}_samples'] = len(times)
+        result[f'rate{rate}_prepare_us'] = (time.perf_counter() - start) / runs * 1e6
+        result[f'rate{rate}_points'] = points
+        if not isinstance(app, str):
+            # Aynı pencerenin tam çizimi (hazırlık dahil)
+            from ds4_controller import ScopeWidget
+            scope = ScopeWidget(buffer)
+            scope.span = seconds
+            scope.resize(width, 480)
+            scope.show()
+            app.processEvents()
+            scope.paint_times.clear()
+            for _ in range(runs):
+                scope.repaint()
+            result[f'rate{rate}_paint_us'] = percentile(list(scope.paint_times), 0.5) * 1e6
+            result[f'rate{rate}_paint_points'] = scope.shown_points
+            scope.close()
+    return result
+
+
+def bench_dsu(duration=1.0, rate=1000, client_counts=(1, 8, 32), **_):
+    # Halka tampona `rate` Hz rapor girerken N yerel DSU istemcisine giden
+    # datagram hızı ve sunucunun gönderim thread'inin rapor başına maliyeti
+    results = {'name': 'dsu', 'rate': rate}
+    report = make_report(1)
+    for count in client_counts:
+        ring = ReportRing()
+        server = DSUServer(port=0)
+        server.add_slot(ring)
+        server.start()
+        clients = [DSUClient(('127.0.0.1', server.port)) for _ in range(count)]
+        for client in clients:
+            client.subscribe()
+        selector = selectors.DefaultSelector()
+        for client in clients:
+            client.socket.setblocking(False)
+            selector.register(client.socket, selectors.EVENT_READ)
+        while server.stats()['clients'] < count:
+            time.sleep(0.01)
+
+        received = 0
+        start = time.perf_counter()
+        tick = 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= duration:
+                break
+            due = start + tick / rate
+            if now >= due:
+                ring.push(report, now)
+                tick += 1
+            for key, _ in selector.select(max(0.0, due + 1 / rate - time.perf_counter())):
+                try:
+                    while key.fileobj.recv(256):
+                        received += 1
+                except BlockingIOError:
+                    pass
+        time.sleep(0.05)
+        for key, _ in selector.select(0):
+            try:
+                while key.fileobj.recv(256):
+                    received += 1
+            except BlockingIOError:
+                pass
+        server.stop()
+        stats = server.stats()
+        selector.close()
+        for client in clients:
+            client.close()
+        results[f'{count}_clients_reports'] = tick
+        results[f'{count}_clients_datagrams_per_second'] = stats['datagrams'] / duration
+        results[f'{count}_clients_received_percent'] = received / (tick * count) * 100 if tick else 0.0
+    return results
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'lightbar': bench_lightbar,
+    'manager': bench_manager,
+    'async': bench_async,
+    'replay': bench_replay,
+    'latency': bench_latency,
+    'output': bench_output,
+    'haptics': bench_haptics,
+    'stats': bench_stats,
+    'buttons': bench_buttons,
+    'dsu': bench_dsu,
+    'imu': bench_imu,
+    'touch': bench_touch,
+    'sticks': bench_sticks,
+    'uinput': bench_uinput,
+    'combos': bench_combos,
+    'paint': bench_paint,
+    'scope': bench_scope,
+    'startup': bench_startup,
+}
+
+
+def compare(results, previous):
+    # Sayısal değerlerin önceki sonuç dosyasına göre yüzde değişimi
+    for name, result in results.items():
+        old = previous.get('results', {}).get(name)
+        if not old:
+            continue
+        for key, value in result.items():
+            old_value = old.get(key)
+            if isinstance(value, (int, float)) and isinstance(old_value, (int, float)) and old_value:
+                change = (value - old_value) / abs(old_value) * 100
+                print(f"  {name}.{key}: {old_value:,.1f} -> {value:,.1f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DS4 performans ölçümleri')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help=f"çalıştırılacak ölçümler ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--count', type=int, default=1_000_000)
+    parser.add_argument('--duration', type=float, default=1.0, help='zamana bağlı ölçümlerin süresi (sn)')
+    parser.add_argument('--capture', help='replay ölçümü için .ds4cap kayıt dosyası')
+    parser.add_argument('--json', help='sonuçları bu JSON dosyasına yaz')
+    parser.add_argument('--compare', help='sonuçları önceki bir JSON dosyasıyla karşılaştır')
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"bilinmeyen ölçüm: {', '.join(unknown)}")
+
+    results = {}
+    for name in args.names or list(BENCHMARKS):
+        result = BENCHMARKS[name](count=args.count, duration=args.duration, capture=args.capture)
+        results[name] = result
+        values = ', '.join(f"{key}={value:,.1f}" if isinstance(value, float) else f"{key}={value}"
+                           for key, value in result.items() if key != 'name')
+        print(f"{result['name']}: {values}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': RESULTS_VERSION,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"Karşılaştırma ({args.compare}):")
+        compare(results, previous)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+DualShock 4 tuş olayları: basma, bırakma, uzun basma, çift dokunma
+Geliştirici: rtx4090
+
+ButtonEvents halka tampondaki her raporu kendi imleciyle işler; böylece iki
+arayüz karesi arasında gelen kısa basışlar da kaçmaz. Rapor tamamen
+çözülmez, yalnızca üç tuş baytı ve zaman damgası okunur. Ardışık iki
+raporun tuş maskeleri XOR'lanır; değişiklik yoksa başka iş yapılmaz.
+Olay zamanları kontrolcünün kendi 16 bitlik zaman damgasından (sarmalar
+açılarak) saniye cinsinden hesaplanır.
+"""
+
+from ds4_input import (USB_REPORT_ID, BT_REPORT_ID, BT_REPORT_SIZE, MIN_REPORT_LENGTH,
+                       DEVICE_TICK_US, button_mask)
+
+PRESS = 'basma'
+RELEASE = 'birakma'
+LONG_PRESS = 'uzun_basma'
+DOUBLE_TAP = 'cift_dokunma'
+EVENT_KINDS = (PRESS, RELEASE, LONG_PRESS, DOUBLE_TAP)
+
+ALL_BUTTONS = (1 << 18) - 1
+_DEVICE_TICK = DEVICE_TICK_US / 1e6
+
+
+class ButtonEvent:
+    __slots__ = ('kind', 'button', 'time', 'stamp', 'seq')
+
+    def __init__(self, kind, button, time, stamp, seq):
+        self.kind = kind
+        self.button = button    # Tek bitlik BTN_* değeri
+        self.time = time        # Cihaz zamanı (sn)
+        self.stamp = stamp      # Raporun tampona giriş anı (perf_counter)
+        self.seq = seq          # Halka tampondaki sıra numarası
+
+    def __repr__(self):
+        return f'ButtonEvent({self.kind}, 0x{self.button:05X}, {self.time:.4f})'
+
+
+class ButtonEvents:
+    # long_press: uzun basma eşiği (sn), double_tap: iki basış arasındaki en
+    # uzun süre (sn). Geri çağrılar consume() çağıran thread'de çalışır.
+    def __init__(self, long_press=0.6, double_tap=0.3):
+        self.long_press = long_press
+        self.double_tap = double_tap
+        self._listeners = []
+        self.reset()
+
+    def reset(self, ring=None):
+        self.cursor = ring.head if ring is not None else 0
+        self.buttons = 0
+        self.device_time = 0.0
+        self.events = 0
+        self.lost = 0
+        self._last_timestamp = None
+        self._last_raw = None
+        # Uzun basma için bekleyen tuşlar: bit -> basılma zamanı
+        self._long_pending = {}
+        # Çift dokunma için son basış zamanları: bit -> zaman
+        self._last_press = {}
+
+    def on(self, callback, kinds=EVENT_KINDS, mask=ALL_BUTTONS):
+        # callback(ButtonEvent); kaldırmak için dönen değer off()'a verilir
+        listener = (callback, frozenset((kinds,) if isinstance(kinds, str) else kinds), mask)
+        self._listeners.append(listener)
+        return listener
+
+    def off(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, kind, bit, seq, stamp):
+        self.events += 1
+        event = None
+        for callback, kinds, mask in self._listeners:
+            if kind in kinds and bit & mask:
+                if event is None:
+                    event = ButtonEvent(kind, bit, self.device_time, stamp, seq)
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"Tuş olayı işleyici hatası: {e}")
+
+    def consume(self, ring):
+        # Halka tamponda bu yana gelen tüm raporları işle
+        lost = ring.lost(self.cursor)
+        if lost:
+            # Aradaki raporlar kaçtı; geçişler birleşik görünür ve zaman sürekliliği bozulur
+            self.lost += lost
+            self._last_timestamp = None
+        buttons = self.buttons
+        device_time = self.device_time
+        last_timestamp = self._last_timestamp
+        long_pending = self._long_pending
+        last_raw = self._last_raw
+        cursor = self.cursor
+        for seq, stamp, report in ring.reports_since(cursor):
+            cursor = seq + 1
+            length = len(report)
+            if not length:
+                continue
+            report_id = report[0]
+            if report_id == USB_REPORT_ID and length >= MIN_REPORT_LENGTH:
+                base = 5
+            elif report_id == BT_REPORT_ID and length >= BT_REPORT_SIZE:
+                base = 7
+            else:
+                continue
+            timestamp = report[base + 5] | (report[base + 6] << 8)
+            if last_timestamp is not None:
+                device_time += ((timestamp - last_timestamp) & 0xFFFF) * _DEVICE_TICK
+            last_timestamp = timestamp
+            # Ham baytlar önceki raporla aynıysa maske hesaplanmaz
+            raw = report[base] | (report[base + 1] << 8) | ((report[base + 2] & 0x03) << 16)
+            if raw == last_raw and not long_pending:
+                continue
+            last_raw = raw
+            current = button_mask(report[base], report[base + 1], report[base + 2])
+            changed = current ^ buttons
+            if changed or long_pending:
+                self.device_time = device_time
+                if changed:
+                    self._transitions(changed, current, seq, stamp)
+                    buttons = current
+                if long_pending:
+                    self._check_long_presses(seq, stamp)
+        self.buttons = buttons
+        self.device_time = device_time
+        self._last_timestamp = last_timestamp
+        self._last_raw = last_raw
+        self.cursor = cursor
+
+    def _transitions(self, changed, current, seq, stamp):
+        now = self.device_time
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            if current & bit:
+                self._emit(PRESS, bit, seq, stamp)
+                previous = self._last_press.get(bit)
+                if previous is not None and now - previous <= self.double_tap:
+                    self._emit(DOUBLE_TAP, bit, seq, stamp)
+                    # Üçüncü basış yeni bir çiftin ilk basışı sayılır
+                    self._last_press.pop(bit)
+                else:
+                    self._last_press[bit] = now
+                self._long_pending[bit] = now
+            else:
+                self._emit(RELEASE, bit, seq, stamp)
+                self._long_pending.pop(bit, None)
+
+    def _check_long_presses(self, seq, stamp):
+        now = self.device_time
+        for bit, pressed_at in list(self._long_pending.items()):
+            if now - pressed_at >= self.long_press:
+                del self._long_pending[bit]
+                self._emit(LONG_PRESS, bit, seq, stamp)
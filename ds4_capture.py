@@ -0,0 +1,201 @@
+"""
+DualShock 4 ham giriş raporlarını kaydetme ve yeniden oynatma
+Geliştirici: rtx4090
+
+Dosya biçimi (yalnızca sona ekleme yapılır, küçük uçlu):
+    Başlık (32 bayt): b'DS4CAP01', sürüm (H), kayıt boyutu (H),
+                      başlangıç duvar saati (d), başlangıç monotonik saati (d)
+    Kayıtlar (96 bayt): monotonik zaman damgası (d), rapor uzunluğu (H),
+                        6 bayt boşluk, 80 bayt ham rapor (USB 64 / BT 78 bayt)
+Yarım kalmış son kayıt (ör. çökme sonrası) okunurken yok sayılır.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+from ds4_input import REPORT_SIZE
+
+CAPTURE_MAGIC = b'DS4CAP01'
+CAPTURE_VERSION = 1
+CAPTURE_EXTENSION = '.ds4cap'
+
+_HEADER = struct.Struct('<8sHHdd4x')
+_RECORD_HEAD = struct.Struct('<dH6x')
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = _RECORD_HEAD.size + REPORT_SIZE
+
+
+class CaptureWriter(threading.Thread):
+    # Halka tampondaki raporları kendi imleciyle takip eder ve toplu halde
+    # tamponlu dosyaya yazar; okuyucu thread'i hiç yavaşlatmaz.
+    def __init__(self, ring, path, flush_interval=0.05, batch_size=1024):
+        super().__init__(name="DS4Capture", daemon=True)
+        self.ring = ring
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._batch = bytearray(RECORD_SIZE * batch_size)
+        self._zeros = bytes(REPORT_SIZE)
+        self._stop_event = threading.Event()
+        self.records = 0
+        self.lost = 0
+
+        self._file = open(path, 'ab', buffering=1 << 20)
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, RECORD_SIZE,
+                                          time.time(), time.perf_counter()))
+        else:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or _HEADER.unpack(header)[:3] != (CAPTURE_MAGIC, CAPTURE_VERSION, RECORD_SIZE):
+                self._file.close()
+                raise ValueError(f"Kayıt dosyası biçimi uyumsuz: {path}")
+        # Yalnızca kayıt başladıktan sonra gelen raporlar yazılır
+        self._cursor = ring.head
+
+    def flush(self):
+        # Halka tamponda bekleyen raporları dosyaya ekle
+        batch = self._batch
+        count = 0
+        lost = self.ring.lost(self._cursor)
+        if lost:
+            self.lost += lost
+        for seq, stamp, report in self.ring.reports_since(self._cursor):
+            offset = count * RECORD_SIZE
+            length = len(report)
+            _RECORD_HEAD.pack_into(batch, offset, stamp, length)
+            data = offset + _RECORD_HEAD.size
+            batch[data:data + length] = report
+            batch[data + length:offset + RECORD_SIZE] = self._zeros[length:]
+            count += 1
+            self._cursor = seq + 1
+            if count == self.batch_size:
+                self._file.write(memoryview(batch)[:count * RECORD_SIZE])
+                self.records += count
+                count = 0
+        if count:
+            self._file.write(memoryview(batch)[:count * RECORD_SIZE])
+            self.records += count
+        self._cursor = max(self._cursor, self.ring.head - self.ring.capacity)
+
+    def run(self):
+        try:
+            while not self._stop_event.wait(self.flush_interval):
+                self.flush()
+            self.flush()
+        finally:
+            self.close()
+
+    def close(self):
+        self._file.close()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+
+class CaptureReader:
+    # Kayıt dosyasını belleğe eşler; kayıtlar kopyalanmadan okunur
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER_SIZE:
+            self._file.close()
+            raise ValueError(f"Kayıt dosyası çok kısa: {path}")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, record_size, self.wall_start, self.mono_start = _HEADER.unpack_from(self._map, 0)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Kayıt dosyası biçimi uyumsuz: {path}")
+        self.count = (size - HEADER_SIZE) // RECORD_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        # (zaman damgası, rapor memoryview'i)
+        offset = HEADER_SIZE + index * RECORD_SIZE
+        stamp, length = _RECORD_HEAD.unpack_from(self._map, offset)
+        data = offset + _RECORD_HEAD.size
+        return stamp, self._view[data:data + length]
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.record(index)
+
+    @property
+    def duration(self):
+        if self.count < 2:
+            return 0.0
+        return self.record(self.count - 1)[0] - self.record(0)[0]
+
+    def replay(self, sink, realtime=True, speed=1.0, stop_event=None):
+        # sink(zaman damgası, rapor) her kayıt için çağrılır. realtime=True ise
+        # kayıtlar orijinal aralıklarla (speed katsayısıyla) verilir; bekleme
+        # süresi başlangıca göre hesaplandığı için kayma birikmez.
+        if not self.count:
+            return 0
+        clock = time.perf_counter
+        first = self.record(0)[0]
+        start = clock()
+        played = 0
+        for stamp, report in self:
+            if realtime:
+                delay = start + (stamp - first) / speed - clock()
+                if delay > 0:
+                    if stop_event is not None:
+                        if stop_event.wait(delay):
+                            break
+                    else:
+                        time.sleep(delay)
+            # Oynatma geride kalıp hiç beklemese de durdurma isteği kaçmaz
+            if stop_event is not None and stop_event.is_set():
+                break
+            sink(stamp, report)
+            played += 1
+        return played
+
+    def close(self):
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # Dışarıda hâlâ kullanılan rapor görünümleri var; eşleme çöp toplayıcıya kalır
+            pass
+        self._file.close()
+
+
+class CaptureReplayer(threading.Thread):
+    # Bir kaydı halka tampona oynatır; tüketiciler (arayüz vb.) cihaz bağlıymış
+    # gibi raporları oradan okur. Raporlar tampona girdikleri anla damgalanır.
+    def __init__(self, path, ring, realtime=True, speed=1.0, on_finished=None):
+        super().__init__(name="DS4Replay", daemon=True)
+        self.reader = CaptureReader(path)
+        self.ring = ring
+        self.realtime = realtime
+        self.speed = speed
+        self.on_finished = on_finished
+        self._stop_event = threading.Event()
+        self.played = 0
+
+    def run(self):
+        push = self.ring.push
+        clock = time.perf_counter
+        try:
+            self.played = self.reader.replay(lambda stamp, report: push(report, clock()),
+                                             self.realtime, self.speed, self._stop_event)
+        finally:
+            self.reader.close()
+            if self.on_finished:
+                self.on_finished()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
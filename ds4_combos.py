@@ -0,0 +1,259 @@
+"""
+DualShock 4 tuş kombinasyonları: sıralı kombolar ve basılı tutulan akorlar
+Geliştirici: rtx4090
+
+İki tür kombo vardır:
+- Sıralı kombo, ör. "↑ ↑ ↓ ↓ × ○": tuşlara sırayla basılır.
+- Akor, ör. "L1+R1 2sn": tuşlar birlikte, belirli bir süre basılı tutulur.
+
+Tüm sıralı kombolar tek bir Aho-Corasick otomatına derlenir. Otomat
+basma kenarlarıyla ilerler; her kenarda tek bir sözlük araması yapılır.
+Akorlar tam basılı tuş maskesine göre sözlükte tutulur. Böylece rapor
+başına maliyet kayıtlı kombo sayısından bağımsızdır.
+
+Zaman pencereleri (adımlar arası süre, toplam süre, basılı tutma)
+kontrolcünün kendi zaman damgasıyla ölçülür. Arayüz zamanlayıcısının
+ne sıklıkla çalıştığı sonucu etkilemez.
+"""
+
+import re
+from collections import deque
+
+from ds4_input import (USB_REPORT_ID, BT_REPORT_ID, BT_REPORT_SIZE, MIN_REPORT_LENGTH,
+                       DEVICE_TICK_US, button_mask)
+import ds4_input
+
+_DEVICE_TICK = DEVICE_TICK_US / 1e6
+
+# Arayüzdeki simgeler ve BTN_* adları
+BUTTON_SYMBOLS = {
+    '↑': ds4_input.BTN_UP, '↓': ds4_input.BTN_DOWN, '←': ds4_input.BTN_LEFT, '→': ds4_input.BTN_RIGHT,
+    '□': ds4_input.BTN_SQUARE, '○': ds4_input.BTN_CIRCLE, '×': ds4_input.BTN_CROSS, '△': ds4_input.BTN_TRIANGLE,
+}
+BUTTON_SYMBOLS.update({name[4:]: getattr(ds4_input, name) for name in dir(ds4_input) if name.startswith('BTN_')})
+
+_HOLD = re.compile(r'^(\d+(?:\.\d+)?)\s*(?:s|sn)$', re.IGNORECASE)
+
+
+def parse_button(token):
+    bit = BUTTON_SYMBOLS.get(token) or BUTTON_SYMBOLS.get(token.upper())
+    if not bit:
+        raise ValueError(f"Bilinmeyen tuş: {token}")
+    return bit
+
+
+def parse_combo(text):
+    # "↑ ↑ ↓ ↓ × ○" -> ('sequence', [bit, ...], 0.0)
+    # "L1+R1 2sn" / "L1+R1 2 s" -> ('chord', maske, 2.0)
+    tokens = text.split()
+    hold = None
+    if len(tokens) >= 2 and _HOLD.match(''.join(tokens[-2:])):
+        hold = float(_HOLD.match(''.join(tokens[-2:])).group(1))
+        tokens = tokens[:-2]
+    elif tokens and _HOLD.match(tokens[-1]):
+        hold = float(_HOLD.match(tokens[-1]).group(1))
+        tokens = tokens[:-1]
+    if not tokens:
+        raise ValueError(f"Boş kombo: {text!r}")
+    if hold is not None or (len(tokens) == 1 and '+' in tokens[0]):
+        if len(tokens) != 1:
+            raise ValueError(f"Akor tek parça olmalı (ör. L1+R1 2sn): {text!r}")
+        mask = 0
+        for token in tokens[0].split('+'):
+            mask |= parse_button(token)
+        return 'chord', mask, hold or 0.0
+    if any('+' in token for token in tokens):
+        raise ValueError(f"Sıralı komboda akor desteklenmez: {text!r}")
+    return 'sequence', [parse_button(token) for token in tokens], 0.0
+
+
+class Combo:
+    __slots__ = ('name', 'text', 'kind', 'buttons', 'hold', 'within', 'callback', 'fired')
+
+    def __init__(self, name, text, kind, buttons, hold, within, callback):
+        self.name = name
+        self.text = text
+        self.kind = kind            # 'sequence' veya 'chord'
+        self.buttons = buttons      # Sıralı komboda bit listesi, akorda maske
+        self.hold = hold            # Akorun basılı tutulma süresi (sn)
+        self.within = within        # Sıralı komboda toplam en uzun süre (sn, None = sınırsız)
+        self.callback = callback    # callback(combo, device_time)
+        self.fired = 0
+
+    def __repr__(self):
+        return f'Combo({self.name!r}, {self.text!r})'
+
+
+class ComboRecognizer:
+    # gap: sıralı kombolarda iki basış arasındaki en uzun süre (sn). Geri
+    # çağrılar consume() çağıran thread'de çalışır.
+    def __init__(self, gap=0.6):
+        self.gap = gap
+        self.combos = []
+        self._compiled = False
+        # consume() içinde tetiklenen kombolar; geri çağrılar durum kaydedildikten sonra çalışır
+        self._fired = []
+        self._consuming = False
+        self.reset()
+
+    def add(self, text, callback, name=None, within=None):
+        kind, buttons, hold = parse_combo(text)
+        combo = Combo(name or text, text, kind, buttons, hold, within, callback)
+        self.combos.append(combo)
+        self._compiled = False
+        return combo
+
+    def remove(self, combo):
+        if combo in self.combos:
+            self.combos.remove(combo)
+            self._compiled = False
+
+    def compile(self):
+        # Sıralı kombolardan tam geçiş tablolu Aho-Corasick otomatı, akorlardan
+        # maske -> süreye göre sıralı kombolar sözlüğü
+        goto = [{}]
+        outputs = [[]]
+        for combo in self.combos:
+            if combo.kind != 'sequence':
+                continue
+            state = 0
+            for bit in combo.buttons:
+                if bit not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][bit] = len(goto) - 1
+                state = goto[state][bit]
+            outputs[state].append(combo)
+
+        # Hata bağlantıları genişlik öncelikli hesaplanır; eksik geçişler
+        # hata durumunun geçişiyle doldurulur (tam DFA)
+        fail = [0] * len(goto)
+        delta = [dict(transitions) for transitions in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for bit, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(bit, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+            for bit, target in delta[fail[state]].items():
+                delta[state].setdefault(bit, target)
+        self._delta = delta
+        self._outputs = outputs
+        # Durum numaraları yeniden verildi; yarım kalan sıralı kombolar baştan başlar
+        self._state = 0
+        self._max_length = max((len(combo.buttons) for combo in self.combos if combo.kind == 'sequence'),
+                               default=1)
+        self._edge_times = deque(maxlen=self._max_length)
+
+        chords = {}
+        for combo in self.combos:
+            if combo.kind == 'chord':
+                chords.setdefault(combo.buttons, []).append(combo)
+        self._chords = {mask: sorted(combos, key=lambda combo: combo.hold) for mask, combos in chords.items()}
+        self._compiled = True
+        self.states = len(goto)
+
+    def reset(self, ring=None):
+        self.cursor = ring.head if ring is not None else 0
+        self.buttons = 0
+        self.device_time = 0.0
+        self.lost = 0
+        self._state = 0
+        self._last_edge = None
+        self._last_timestamp = None
+        self._last_raw = None
+        # Basılı tutulan akor: (kombolar, başlangıç, sıradaki indeks)
+        self._pending = None
+        if self._compiled:
+            self._edge_times.clear()
+
+    def _fire(self, combo):
+        combo.fired += 1
+        self._fired.append((combo, self.device_time))
+
+    def _press(self, bit):
+        now = self.device_time
+        if self._last_edge is not None and now - self._last_edge > self.gap:
+            self._state = 0
+        self._last_edge = now
+        self._edge_times.append(now)
+        self._state = self._delta[self._state].get(bit, 0)
+        for combo in self._outputs[self._state]:
+            if combo.within is None or now - self._edge_times[-len(combo.buttons)] <= combo.within:
+                self._fire(combo)
+
+    def _check_hold(self):
+        combos, start, index = self._pending
+        now = self.device_time
+        while index < len(combos) and now - start >= combos[index].hold:
+            self._fire(combos[index])
+            index += 1
+        self._pending = (combos, start, index) if index < len(combos) else None
+
+    def consume(self, ring):
+        # Halka tamponda bu yana gelen tüm raporları işle. Geri çağrı iç içe bir
+        # olay döngüsü açıp (ör. modal pencere) yeniden consume() çağırırsa bu
+        # çağrı bir şey yapmaz; durum zaten kaydedilmiştir.
+        if self._consuming:
+            return
+        self._consuming = True
+        try:
+            self._consume(ring)
+        finally:
+            self._consuming = False
+
+    def _consume(self, ring):
+        if not self._compiled:
+            self.compile()
+        lost = ring.lost(self.cursor)
+        if lost:
+            # Aradaki basışlar kaçtı; yarım kalan kombolar ve akorlar iptal
+            self.lost += lost
+            self._last_timestamp = None
+            self._state = 0
+            self._pending = None
+        cursor = self.cursor
+        last_timestamp = self._last_timestamp
+        last_raw = self._last_raw
+        for seq, stamp, report in ring.reports_since(cursor):
+            cursor = seq + 1
+            length = len(report)
+            if not length:
+                continue
+            report_id = report[0]
+            if report_id == USB_REPORT_ID and length >= MIN_REPORT_LENGTH:
+                base = 5
+            elif report_id == BT_REPORT_ID and length >= BT_REPORT_SIZE:
+                base = 7
+            else:
+                continue
+            timestamp = report[base + 5] | (report[base + 6] << 8)
+            if last_timestamp is not None:
+                self.device_time += ((timestamp - last_timestamp) & 0xFFFF) * _DEVICE_TICK
+            last_timestamp = timestamp
+            raw = report[base] | (report[base + 1] << 8) | ((report[base + 2] & 0x03) << 16)
+            if raw != last_raw:
+                last_raw = raw
+                current = button_mask(report[base], report[base + 1], report[base + 2])
+                changed = current ^ self.buttons
+                if changed:
+                    pressed = changed & current
+                    while pressed:
+                        bit = pressed & -pressed
+                        pressed ^= bit
+                        self._press(bit)
+                    self.buttons = current
+                    chord = self._chords.get(current)
+                    self._pending = (chord, self.device_time, 0) if chord else None
+            if self._pending:
+                self._check_hold()
+        self._last_timestamp = last_timestamp
+        self._last_raw = last_raw
+        self.cursor = cursor
+        fired, self._fired = self._fired, []
+        for combo, device_time in fired:
+            try:
+                combo.callback(combo, device_time)
+            except Exception as e:
+                print(f"Kombo işleyici hatası ({combo.name}): {e}")
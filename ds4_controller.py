@@ -3,15 +3,46 @@ DualShock 4 Kontrol Paneli
 Geliştirici: rtx4090
 """
 
+import time
+# Açılış süresi ölçümü için işlemin bu modülü yüklemeye başladığı an
+STARTUP_CLOCK = time.perf_counter()
+
+import os
 import sys
-import pygame
-import hid
+import threading
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QHBoxLayout, QSlider, QLabel, QPushButton, QMessageBox,
-                           QColorDialog, QSplashScreen)
-from PyQt5.QtCore import Qt, QTimer, QThread, QSize
-from PyQt5.QtGui import QMovie, QPixmap, QPainter, QColor, QFont, QPen, QLinearGradient
-import time
+                           QColorDialog, QSplashScreen, QGridLayout, QFileDialog, QComboBox,
+                           QInputDialog)
+from PyQt5.QtCore import Qt, QTimer, QRectF, QPointF, pyqtSignal
+from PyQt5.QtGui import (QPainter, QColor, QFont, QPen, QLinearGradient, QPixmap, QPainterPath,
+                         QPolygonF, QRegion, QTransform)
+import ds4_input
+from ds4_input import (ReportRing, InputReader, DS4State, decode_any, valid_report,
+                       BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+from ds4_output import OutputWriter, TRANSPORT_BT, TRANSPORT_USB
+from ds4_hotplug import HotplugMonitor, SONY_VENDOR_ID, DS4_PRODUCT_IDS
+from ds4_backend import HidapiBackend
+# Çoklu kontrolcü (ds4_manager), kayıt (ds4_capture), ölçüm (ds4_stats) ve
+# osiloskop (ds4_scope) modülleri yalnızca ilgili özellik ilk kullanıldığında yüklenir.
+# Tuş olayları, pil, çubuklar, kombolar, dokunmatik yüzey, titreşim ve ışık çubuğu
+# modülleri ise ilk çizimden sonra yüklenir (bkz. DS4ControlPanel.load_features)
+
+# Arayüzdeki tuş etiketleri ve DS4State.buttons içindeki bitleri
+BUTTON_BITS = {
+    '↑': ds4_input.BTN_UP, '↓': ds4_input.BTN_DOWN,
+    '←': ds4_input.BTN_LEFT, '→': ds4_input.BTN_RIGHT,
+    '□': ds4_input.BTN_SQUARE, '○': ds4_input.BTN_CIRCLE,
+    '×': ds4_input.BTN_CROSS, '△': ds4_input.BTN_TRIANGLE,
+    'SHARE': ds4_input.BTN_SHARE, 'OPTIONS': ds4_input.BTN_OPTIONS,
+    'PS': ds4_input.BTN_PS, 'TOUCHPAD': ds4_input.BTN_TOUCHPAD,
+    'L1': ds4_input.BTN_L1, 'L2': ds4_input.BTN_L2,
+    'R1': ds4_input.BTN_R1, 'R2': ds4_input.BTN_R2,
+    'L3': ds4_input.BTN_L3, 'R3': ds4_input.BTN_R3,
+}
+BUTTON_NAMES = {bit: btn for btn, bit in BUTTON_BITS.items()}
+ALL_BUTTONS_MASK = sum(BUTTON_BITS.values())
 
 class LoadingScreen(QSplashScreen):
     def __init__(self):
@@ -41,26 +72,24 @@ class LoadingScreen(QSplashScreen):
         self.loading_text = "DualShock 4 Kontrol Paneli Yükleniyor"
         self.angle = 0  # Dönen animasyon için açı
         
-        # Yükleme animasyonu için timer
+        # Yükleme animasyonu; yeniden çizim olay döngüsüne bırakılır
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_loading)
         self.timer.start(50)  # Her 50ms'de bir güncelle
         
-        # Yükleme yüzdesi
+        # Yükleme yüzdesi gerçek adımlara göre set_progress ile ilerler
         self.progress = 0
-        self.progress_timer = QTimer(self)
-        self.progress_timer.timeout.connect(self.update_progress)
-        self.progress_timer.start(30)
     
     def update_loading(self):
         self.loading_dots = (self.loading_dots + 1) % 4
         self.angle = (self.angle + 10) % 360  # Dönen animasyon için açıyı güncelle
-        self.repaint()
+        self.update()
     
-    def update_progress(self):
-        if self.progress < 100:
-            self.progress += 1
-            self.repaint()
+    def set_progress(self, progress, text=None):
+        self.progress = progress
+        if text:
+            self.loading_text = text
+        self.update()
     
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -133,37 +162,369 @@ class LoadingScreen(QSplashScreen):
         # Tıklama olaylarını engelle
         pass
 
+class TouchTrailWidget(QWidget):
+    # Dokunmatik yüzeydeki parmak izlerini çizer. Raporlar ekran yenileme
+    # hızında toplu işlenir (bkz. DS4ControlPanel.update_touch); widget yalnızca
+    # iz değiştiyse veya sönmekte olan bir iz varsa yeniden çizilir.
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.tracker = None
+        self.pad_size = None
+        self.shown_version = -1
+        self.setMinimumSize(240, 118)
+        self.background_color = QColor(44, 62, 80)
+        self.trail_color = QColor(52, 152, 219)
+        if tracker is not None:
+            self.set_tracker(tracker)
+    
+    def set_tracker(self, tracker):
+        # İzleyici ds4_touch ile birlikte ilk çizimden sonra gelir
+        from ds4_touch import TOUCHPAD_WIDTH, TOUCHPAD_HEIGHT
+        self.tracker = tracker
+        self.pad_size = (TOUCHPAD_WIDTH, TOUCHPAD_HEIGHT)
+        self.update()
+    
+    def refresh(self):
+        if self.tracker.version != self.shown_version or self.tracker.ended_trails:
+            self.shown_version = self.tracker.version
+            self.update()
+    
+    def paintEvent(self, event):
+        if self.tracker is None:
+            return
+        pad_width, pad_height = self.pad_size
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        # Dokunmatik yüzeyin en-boy oranını koru
+        width = self.width()
+        height = width * pad_height // pad_width
+        if height > self.height():
+            height = self.height()
+            width = height * pad_width // pad_height
+        left = (self.width() - width) // 2
+        top = (self.height() - height) // 2
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.background_color)
+        painter.drawRoundedRect(left, top, width, height, 8, 8)
+        scale_x = width / pad_width
+        scale_y = height / pad_height
+        color = QColor(self.trail_color)
+        for trail, fade in self.tracker.trails():
+            points = [(left + x * scale_x, top + y * scale_y) for x, y in trail]
+            count = len(points)
+            # İzin eski kısmı ve kalkmış parmakların izleri soluk çizilir
+            for i in range(1, count):
+                color.setAlpha(int(255 * (1 - fade) * i / count))
+                painter.setPen(QPen(color, 3))
+                painter.drawLine(int(points[i - 1][0]), int(points[i - 1][1]),
+                                 int(points[i][0]), int(points[i][1]))
+            if not fade and points:
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(self.trail_color)
+                painter.drawEllipse(int(points[-1][0]) - 6, int(points[-1][1]) - 6, 12, 12)
+
+class ControllerWidget(QWidget):
+    # Kontrolcü şeması. Gövde, tuş çerçeveleri ve yazılar boyut değiştiğinde
+    # bir kez QPixmap'e çizilir. Durum değişince yalnızca değişen öğelerin
+    # dikdörtgenleri geçersiz kılınır; paintEvent bu alanlarda önbellekten
+    # kopyalayıp üstüne basılı tuş, tetik ve çubuk katmanını çizer.
+    DESIGN_WIDTH = 440
+    DESIGN_HEIGHT = 260
+    # Tasarım koordinatlarında tuşlar: (x, y, genişlik, yükseklik, şekil)
+    BUTTON_SHAPES = {
+        '↑': (80, 72, 20, 22, 'rect'), '↓': (80, 106, 20, 22, 'rect'),
+        '←': (56, 90, 22, 20, 'rect'), '→': (102, 90, 22, 20, 'rect'),
+        '△': (338, 64, 24, 24, 'circle'), '×': (338, 112, 24, 24, 'circle'),
+        '□': (314, 88, 24, 24, 'circle'), '○': (362, 88, 24, 24, 'circle'),
+        'SHARE': (112, 50, 40, 14, 'rect'), 'OPTIONS': (288, 50, 40, 14, 'rect'),
+        'PS': (208, 122, 24, 24, 'circle'), 'TOUCHPAD': (160, 50, 120, 62, 'rect'),
+        'L1': (50, 28, 90, 12, 'rect'), 'R1': (300, 28, 90, 12, 'rect'),
+        'L2': (50, 6, 90, 16, 'trigger'), 'R2': (300, 6, 90, 16, 'trigger'),
+        'L3': (132, 132, 56, 56, 'stick'), 'R3': (252, 132, 56, 56, 'stick'),
+    }
+    STICKS = {'left': (160, 160), 'right': (280, 160)}
+    STICK_RADIUS = 28
+    STICK_TRAVEL = 17
+    TRIGGERS = {'l2': 'L2', 'r2': 'R2'}
+    # Tuşlar, iki çubuk ve iki analog tetik
+    ELEMENT_COUNT = len(BUTTON_SHAPES) + 4
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(self.DESIGN_WIDTH, self.DESIGN_HEIGHT)
+        # Arka plan her seferinde önbellekten kopyalanır; Qt'nin ayrıca silmesine gerek yok
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.body_color = QColor(44, 62, 80)
+        self.button_color = QColor(52, 73, 94)
+        self.text_color = QColor(236, 240, 241)
+        self.pressed_color = QColor(46, 204, 113, 170)
+        self.pressed_pen = QPen(QColor(46, 204, 113), 3)
+        self.trigger_color = QColor(52, 152, 219, 190)
+        self.stick_color = QColor(236, 240, 241)
+        self.value_font = QFont()
+        self.value_font.setPixelSize(10)
+        self.buttons = 0
+        self.values = {'left': (128, 128), 'right': (128, 128), 'l2': 0, 'r2': 0}
+        self.cache = None
+        self.transform = QTransform()
+        self.element_rects = {}
+        # Son çizimlerin süreleri (sn)
+        self.paint_times = deque(maxlen=512)
+        self.layout_elements()
+    
+    def layout_elements(self):
+        # Tasarım koordinatlarını widget'a ortalanmış ölçekle eşle
+        scale = min(self.width() / self.DESIGN_WIDTH, self.height() / self.DESIGN_HEIGHT)
+        self.transform = QTransform()
+        self.transform.translate((self.width() - self.DESIGN_WIDTH * scale) / 2,
+                                 (self.height() - self.DESIGN_HEIGHT * scale) / 2)
+        self.transform.scale(scale, scale)
+        
+        def widget_rect(x, y, width, height):
+            # Kenar yumuşatma taşmaları için birkaç piksel pay
+            return self.transform.mapRect(QRectF(x, y, width, height)).toAlignedRect().adjusted(-3, -3, 3, 3)
+        
+        self.element_rects = {name: widget_rect(*shape[:4]) for name, shape in self.BUTTON_SHAPES.items()}
+        for name, (cx, cy) in self.STICKS.items():
+            # Çubuk yuvası ve altındaki değer yazısı
+            self.element_rects[name] = widget_rect(cx - 50, cy - 30, 100, 76)
+        for name, button in self.TRIGGERS.items():
+            self.element_rects[name] = self.element_rects[button]
+        self.cache = None
+    
+    def resizeEvent(self, event):
+        self.layout_elements()
+        super().resizeEvent(event)
+    
+    def show_state(self, state):
+        # Değişen öğelerin alanlarını geçersiz kılar; değişen öğe sayısını döner
+        dirty = []
+        buttons = state.buttons & ALL_BUTTONS_MASK
+        changed = buttons ^ self.buttons
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            dirty.append(BUTTON_NAMES[bit])
+        self.buttons = buttons
+        values = self.values
+        for name, value in (('left', (state.lx, state.ly)), ('right', (state.rx, state.ry)),
+                            ('l2', state.l2), ('r2', state.r2)):
+            if values[name] != value:
+                values[name] = value
+                dirty.append(name)
+        if dirty:
+            region = QRegion()
+            for name in dirty:
+                region += self.element_rects[name]
+            self.update(region)
+        return len(dirty)
+    
+    def render_static(self):
+        # Değişmeyen çizim: gövde, tuş çerçeveleri, yazılar ve çubuk yuvaları
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(self.palette().color(self.backgroundRole()))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setTransform(self.transform)
+        
+        body = QPainterPath()
+        body.addRoundedRect(30, 44, 380, 166, 45, 45)
+        for x in (30, 290):
+            grip = QPainterPath()
+            grip.addEllipse(x, 110, 120, 130)
+            body = body.united(grip)
+        painter.fillPath(body, self.body_color)
+        
+        font = QFont()
+        painter.setPen(QPen(self.text_color, 1))
+        for name, (x, y, width, height, shape) in self.BUTTON_SHAPES.items():
+            painter.setBrush(self.button_color)
+            if shape == 'circle':
+                painter.drawEllipse(QRectF(x, y, width, height))
+            elif shape == 'stick':
+                painter.drawEllipse(QRectF(x, y, width, height))
+                continue
+            else:
+                painter.drawRoundedRect(QRectF(x, y, width, height), 4, 4)
+            font.setPixelSize(7 if len(name) > 2 else 13)
+            painter.setFont(font)
+            painter.drawText(QRectF(x, y, width, height), Qt.AlignCenter, name)
+        painter.end()
+        self.cache = pixmap
+    
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        if self.cache is None:
+            self.render_static()
+        exposed = event.rect()
+        painter = QPainter(self)
+        ratio = self.cache.devicePixelRatio()
+        painter.drawPixmap(QRectF(exposed), self.cache,
+                           QRectF(exposed.x() * ratio, exposed.y() * ratio,
+                                  exposed.width() * ratio, exposed.height() * ratio))
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setTransform(self.transform)
+        rects = self.element_rects
+        
+        # Analog tetik dolulukları
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.trigger_color)
+        for name, button in self.TRIGGERS.items():
+            value = self.values[name]
+            if value and rects[name].intersects(exposed):
+                x, y, width, height, _ = self.BUTTON_SHAPES[button]
+                painter.drawRoundedRect(QRectF(x, y, width * value / 255, height), 4, 4)
+        
+        # Basılı tuşlar: tuşlar yarı saydam dolgu, tetik ve çubuklar çerçeve
+        buttons = self.buttons
+        while buttons:
+            bit = buttons & -buttons
+            buttons ^= bit
+            name = BUTTON_NAMES[bit]
+            if not rects[name].intersects(exposed):
+                continue
+            x, y, width, height, shape = self.BUTTON_SHAPES[name]
+            if shape in ('trigger', 'stick'):
+                painter.setPen(self.pressed_pen)
+                painter.setBrush(Qt.NoBrush)
+            else:
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(self.pressed_color)
+            if shape in ('circle', 'stick'):
+                painter.drawEllipse(QRectF(x, y, width, height))
+            else:
+                painter.drawRoundedRect(QRectF(x, y, width, height), 4, 4)
+        
+        # Çubuk konumları ve değerleri (merkeze göre)
+        for name, (cx, cy) in self.STICKS.items():
+            if not rects[name].intersects(exposed):
+                continue
+            x, y = self.values[name]
+            # Köşegen ham değerler yuvanın dışına taşmasın diye daireye sınırla
+            dx = (x - 128) / 127
+            dy = (y - 128) / 127
+            scale = self.STICK_TRAVEL / max(1.0, (dx * dx + dy * dy) ** 0.5)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.stick_color)
+            painter.drawEllipse(QPointF(cx + dx * scale, cy + dy * scale), 11, 11)
+            painter.setPen(self.text_color)
+            painter.setFont(self.value_font)
+            painter.drawText(QRectF(cx - 50, cy + 30, 100, 14), Qt.AlignCenter, f'X: {x - 128}, Y: {y - 128}')
+        painter.end()
+        self.paint_times.append(time.perf_counter() - start)
+
 class DS4Controller:
-    def __init__(self):
+    def __init__(self, backend=None):
+        # Cihazlar bu arka uç üzerinden listelenip açılır (testlerde FakeBackend)
+        self.backend = backend or HidapiBackend()
         self.device = None
+        self.device_info = None
         # DualShock 4 için olası Vendor ID ve Product ID'ler
-        self.vendor_id = 0x054C  # Sony
-        self.product_ids = [
-            0x09CC,  # DualShock 4 v2
-            0x05C4,  # DualShock 4 v1
-            0x0BA0,  # DualShock 4 USB Wireless Adaptor
-        ]
-        
-    def connect(self):
+        self.vendor_id = SONY_VENDOR_ID
+        self.product_ids = DS4_PRODUCT_IDS
+        # Arka plan okuyucunun doldurduğu rapor tamponu
+        self.ring = ReportRing(validate=valid_report)
+        self.reader = None
+        self.transport = TRANSPORT_USB
+        self._battery_state = DS4State()
+        # Pil seviyesi giriş akışından izlenir; ayrıca okuma yapılmaz
+        # Pil, tuş olayları, dokunmatik yüzey, kombolar, çubuklar, titreşim ve
+        # ışık çubuğu load_features ile oluşturulur; açılışta yüklenmezler
+        self.battery = None
+        self.buttons = None
+        self.touch = None
+        self.combos = None
+        self.sticks = None
+        self.haptics = None
+        self.lightbar = None
+        # Açıkken titreşim istekleri motorlara iletilmez
+        self.rumble_muted = False
+        # Hareket sensörü kalibrasyonu bağlanırken bir kez okunur (bkz. ds4_imu)
+        self.imu_calibration = None
+        # Titreşim ve LED için ortak çıkış yazıcısı
+        self.output = None
+        self.output_interval = 0.004
+    
+    def load_features(self):
+        # Birden çok kez çağrılabilir; yalnızca ilk çağrı modülleri yükler
+        if self.lightbar is not None:
+            return
+        from ds4_battery import BatteryMonitor
+        from ds4_buttons import ButtonEvents
+        from ds4_touch import TouchTracker
+        from ds4_combos import ComboRecognizer
+        from ds4_sticks import StickProcessor
+        from ds4_haptics import HapticsPlayer
+        from ds4_lightbar import LightbarEngine
+        self.battery = BatteryMonitor()
+        # Tuş geçişleri her rapordan çıkarılır; olaylar cihaz zamanıyla yayınlanır
+        self.buttons = ButtonEvents()
+        # Dokunmatik yüzey: parmak takibi ve hareketler
+        self.touch = TouchTracker()
+        # Tuş kombinasyonları (cihaz zamanıyla, arayüz zamanlayıcısından bağımsız)
+        self.combos = ComboRecognizer()
+        # Çubuk/tetik tabloları ilk bağlantıda (arka planda) derlenir
+        self.sticks = StickProcessor(lazy=True)
+        # Titreşim desenleri arka planda oynatılır
+        self.haptics = HapticsPlayer(self.set_vibration)
+        self.haptics.start()
+        # Işık çubuğu efektleri aynı çıkış yazıcısını besler; en son atanır,
+        # böylece yüklenip yüklenmediği bundan anlaşılır
+        lightbar = LightbarEngine(self.set_led_color, self.set_led_flash, self.current_battery)
+        lightbar.start()
+        self.lightbar = lightbar
+        
+    @staticmethod
+    def open(info=None, **kwargs):
+        # Qt'siz asyncio arayüzü: async with DS4Controller.open() as pad (bkz. ds4_async)
+        from ds4_async import AsyncDS4
+        return AsyncDS4.open(info, **kwargs)
+    
+    def connect(self, device_info=None):
         try:
-            # Tüm HID cihazlarını bul
-            print("Bulunan tüm HID cihazları:")
-            for device in hid.enumerate():
-                print(f"VID: {device['vendor_id']:04x}, PID: {device['product_id']:04x}, Path: {device['path']}")
-            
-            # DualShock 4'ü bul
-            ds4_devices = [dev for dev in hid.enumerate() 
-                          if dev['vendor_id'] == self.vendor_id and dev['product_id'] in self.product_ids]
+            if device_info is None:
+                # Sadece Sony cihazlarını listele ve DualShock 4'ü bul
+                ds4_devices = self.backend.enumerate(self.vendor_id, self.product_ids)
+                device_info = ds4_devices[0] if ds4_devices else None
             
-            if ds4_devices:
-                self.device = hid.device()
-                self.device.open_path(ds4_devices[0]['path'])
-                self.device.set_nonblocking(True)
-                print(f"Bağlanılan kontrolcü: VID={ds4_devices[0]['vendor_id']:04x}, PID={ds4_devices[0]['product_id']:04x}")
+            if device_info:
+                self.load_features()
+                self.device = self.backend.open(device_info)
+                self.device.set_nonblocking(False)
+                self.device_info = device_info
+                self.battery.reset()
+                self.buttons.reset(self.ring)
+                self.touch.reset(self.ring)
+                self.combos.reset(self.ring)
+                self.transport = device_info.get('transport', TRANSPORT_USB)
+                print(f"Bağlanılan kontrolcü: VID={device_info['vendor_id']:04x}, PID={device_info['product_id']:04x}, Bağlantı: {self.transport}")
                 
-                # Pil durumunu kontrol et
-                print("Pil durumu kontrol ediliyor...")
-                self.get_battery_level()
+                from ds4_imu import read_calibration
+                calibration_report = None
+                if self.transport == TRANSPORT_BT:
+                    # Kalibrasyon raporunu okumak tam hızlı 0x11 raporlarını açar
+                    try:
+                        calibration_report = self.device.get_feature_report(BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+                    except Exception as e:
+                        print(f"Bluetooth genişletilmiş rapor modu açılamadı: {e}")
+                
+                if not self.sticks.compiled:
+                    self.sticks.compile()
+                
+                # Fabrika kalibrasyonu kontrolcü başına bir kez okunup seri numarasıyla
+                # önbelleğe alınır. Yol, kontrolcüler değiştirilince yeniden kullanıldığından
+                # anahtar olamaz; seri numarası yoksa her bağlantıda yeniden okunur.
+                key = device_info.get('serial') or None
+                self.imu_calibration = read_calibration(self.device, self.transport, key, calibration_report)
+                
+                # Raporları arka planda oku, çıkış raporlarını arka planda yaz
+                self.start_reader()
+                self.output = OutputWriter(self.device, self.output_interval, self.transport)
+                self.output.start()
+                # Önceki bağlantıdan kalan motor değeri yeni çıkışa taşınmasın
+                self.haptics.attach()
                 
                 return True
             else:
@@ -175,136 +536,358 @@ class DS4Controller:
             return False
     
     def disconnect(self):
+        if self.lightbar is not None:
+            self.haptics.cancel()
+            self.lightbar.stop_effect()
+        self.stop_reader()
+        if self.output:
+            self.output.stop()
+            self.output = None
         if self.device:
             self.device.close()
             self.device = None
+            self.device_info = None
+    
+    def start_reader(self):
+        self.stop_reader()
+        self.reader = InputReader(self.device, self.ring)
+        self.reader.start()
+    
+    def stop_reader(self):
+        if self.reader:
+            self.reader.stop()
+            self.reader = None
+    
+    def latest_report(self):
+        # Okuyucunun aldığı en son rapor (sıra, zaman damgası, veri) veya None
+        return self.ring.latest()
+    
+    def reports_since(self, cursor):
+        # Verilen imleçten bu yana gelen tüm raporlar
+        return self.ring.reports_since(cursor)
     
     def set_vibration(self, small_motor, big_motor):
-        # Titreşim değerlerini 0-255 arasına sınırla
-        small_motor = max(0, min(255, int(small_motor)))
-        big_motor = max(0, min(255, int(big_motor)))
-        
-        # USB HID rapor formatı - Report ID: 0x05
-        report = [
-            0x05,  # Report ID
-            0x01,  # Motor enable
-            0x00,  # Reserved
-            0x00,  # Reserved
-            0x00,  # Reserved
-            big_motor,   # Büyük motor (sol)
-            small_motor, # Küçük motor (sağ)
-            0x00,  # LED Kırmızı
-            0x00,  # LED Yeşil
-            0x00,  # LED Mavi
-            0x00,  # LED Parlak
-            0x00,  # LED Flash On
-            0x00,  # LED Flash Off
-            0x00   # Reserved
-        ]
-        
-        print(f"Titreşim raporu gönderiliyor: {report}")
-        print(f"Titreşim değerleri - Sol: {big_motor}, Sağ: {small_motor}")
-        
-        try:
-            self.device.write(report)
-        except Exception as e:
-            print(f"Titreşim raporu gönderilirken hata oluştu: {e}")
+        # Sadece motor değerleri değişir; LED ayarları korunur
+        if self.output:
+            if self.rumble_muted:
+                small_motor = big_motor = 0
+            self.output.update(small_motor=small_motor, big_motor=big_motor)
 
     def set_led_color(self, red, green, blue):
-        # LED değerlerini 0-255 arasına sınırla
-        red = max(0, min(255, int(red)))
-        green = max(0, min(255, int(green)))
-        blue = max(0, min(255, int(blue)))
-        
-        # USB HID rapor formatı - Report ID: 0x05
-        report = [
-            0x05,  # Report ID
-            0x01,  # Motor enable
-            0x00,  # Reserved
-            0x00,  # Reserved
-            0x00,  # Reserved
-            0x00,  # Küçük motor
-            0x00,  # Büyük motor
-            red,   # LED Kırmızı
-            green, # LED Yeşil
-            blue,  # LED Mavi
-            0xFF,  # LED Parlak
-            0x00,  # LED Flash On
-            0x00,  # LED Flash Off
-            0x00   # Reserved
-        ]
-        
-        print(f"LED raporu gönderiliyor: {report}")
-        print(f"LED değerleri - R: {red}, G: {green}, B: {blue}")
-        
-        try:
-            self.device.write(report)
-            time.sleep(0.05)  # Renk değişimi için kısa bekleme
-        except Exception as e:
-            print(f"LED raporu gönderilirken hata oluştu: {e}")
+        # Sadece ışık çubuğu rengi değişir; titreşim korunur
+        if self.output:
+            self.output.update(red=red, green=green, blue=blue)
 
-    def get_battery_level(self):
-        try:
-            if self.device:
-                # Birkaç deneme yap
-                for _ in range(5):
-                    try:
-                        # Durum raporunu oku
-                        data = self.device.read(64)
-                        if data and len(data) >= 32:  # Doğru rapor uzunluğu
-                            battery_level = (data[30] & 0x0f) * 10  # 0-100 arası değer
-                            is_charging = (data[30] & 0x10) != 0
-                            
-                            print(f"Ham veri: {data}")
-                            print(f"Pil Seviyesi: %{battery_level}")
-                            print(f"Şarj Oluyor: {'Evet' if is_charging else 'Hayır'}")
-                            return battery_level, is_charging
-                    except Exception as e:
-                        print(f"Okuma denemesi hatası: {e}")
-                    time.sleep(0.1)
-                
-                print("Pil seviyesi okunamadı")
-                return None, None
-                
-        except Exception as e:
-            print(f"Pil seviyesi okuma hatası: {e}")
-        return None, None
+    def set_led_flash(self, flash_on, flash_off):
+        # Yanıp sönme süreleri (birim ~10 ms, 0 = sürekli yanık)
+        if self.output:
+            self.output.update(flash_on=flash_on, flash_off=flash_off)
 
-    def vibration_pattern(self, pattern_name):
-        if pattern_name == "artan":
-            # Gittikçe artan titreşim
-            for i in range(0, 255, 5):
-                self.set_vibration(i, i)
-                time.sleep(0.05)
-        elif pattern_name == "dalgali":
-            # Dalgalı titreşim
-            for _ in range(2):
-                for i in range(0, 255, 10):
-                    self.set_vibration(i, 255-i)
-                    time.sleep(0.05)
-                for i in range(255, 0, -10):
-                    self.set_vibration(i, 255-i)
-                    time.sleep(0.05)
-        elif pattern_name == "nabiz":
-            # Nabız gibi titreşim
-            for _ in range(3):
-                self.set_vibration(255, 255)
-                time.sleep(0.2)
-                self.set_vibration(0, 0)
-                time.sleep(0.2)
-        elif pattern_name == "soft":
-            # Yumuşak titreşim
-            for _ in range(2):
-                for i in range(0, 128, 5):
-                    self.set_vibration(i, i)
-                    time.sleep(0.1)
-                for i in range(128, 0, -5):
-                    self.set_vibration(i, i)
-                    time.sleep(0.1)
-        # Son olarak titreşimi durdur
+    def current_battery(self):
+        # Son rapordaki pil seviyesi (0-10) veya None
+        latest = self.latest_report()
+        if not latest or not decode_any(latest[2], self._battery_state):
+            return None
+        return self._battery_state.battery
+
+    def output_stats(self):
+        return self.output.stats() if self.output else None
+
+    def vibration_pattern(self, pattern_name, layer=0):
+        # Deseni arka planda başlat; aynı katmandaki önceki deseni keser
+        self.load_features()
+        self.haptics.play(pattern_name, layer)
+
+    def stop_vibration(self):
+        if self.haptics is not None:
+            self.haptics.cancel()
         self.set_vibration(0, 0)
 
+class MultiPadWindow(QWidget):
+    # Tüm bağlı kontrolcüleri tek bir epoll döngüsüyle okuyup ızgarada gösterir
+    def __init__(self, panel):
+        super().__init__()
+        self.panel = panel
+        self.setWindowTitle('Çoklu Kontrolcü - DualShock 4')
+        self.setStyleSheet(panel.styleSheet())
+        self.grid = QGridLayout(self)
+        for column, title in enumerate(['Kontrolcü', 'Basılı Tuşlar', 'Sol Analog', 'Sağ Analog', 'Rapor/sn', '']):
+            header = QLabel(title)
+            header.setStyleSheet("QLabel { font-weight: bold; color: #3498db; }")
+            self.grid.addWidget(header, 0, column)
+        self.rows = {}
+        self.tried_paths = set()
+        from ds4_manager import DS4Manager
+        self.manager = DS4Manager()
+        self.manager.start()
+        
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(100)
+    
+    def showEvent(self, event):
+        self.open_new_pads()
+        super().showEvent(event)
+    
+    def open_new_pads(self):
+        # Her kontrolcü yalnızca bir kez açılmaya çalışılır; çıkarılıp takılınca yeniden denenir
+        devices = self.panel.hotplug.devices()
+        paths = {info['path'] for info in devices}
+        self.tried_paths &= paths
+        new_devices = [info for info in devices if info['path'] not in self.tried_paths]
+        if new_devices:
+            self.tried_paths |= {info['path'] for info in new_devices}
+            self.manager.open_all(new_devices)
+    
+    def add_row(self, pad):
+        row = len(self.rows) + 1
+        labels = [QLabel() for _ in range(5)]
+        labels[0].setText(pad.info.get('name') or pad.path.decode(errors='replace'))
+        for column, label in enumerate(labels):
+            self.grid.addWidget(label, row, column)
+        select_btn = QPushButton('Seç')
+        select_btn.clicked.connect(lambda checked, info=pad.info: self.panel.select_pad(info))
+        self.grid.addWidget(select_btn, row, 5)
+        self.rows[pad.path] = (labels, select_btn, [pad.ring.head, time.perf_counter()])
+    
+    def remove_row(self, path):
+        labels, select_btn, _ = self.rows.pop(path)
+        for widget in labels + [select_btn]:
+            self.grid.removeWidget(widget)
+            widget.deleteLater()
+    
+    def refresh(self):
+        self.open_new_pads()
+        pads = {pad.path: pad for pad in self.manager.pads()}
+        for path in [path for path in self.rows if path not in pads]:
+            self.remove_row(path)
+        
+        now = time.perf_counter()
+        for path, pad in pads.items():
+            if path not in self.rows:
+                self.add_row(pad)
+            labels, _, rate = self.rows[path]
+            state = pad.state
+            pressed = ' '.join(BUTTON_NAMES[bit] for bit in BUTTON_NAMES if state.buttons & bit) or '-'
+            # Rapor hızı yaklaşık her saniye yenilenir
+            rate_text = labels[4].text()
+            if now - rate[1] >= 1.0:
+                rate_text = f'{(pad.ring.head - rate[0]) / (now - rate[1]):.0f}'
+                rate[0], rate[1] = pad.ring.head, now
+            texts = (pressed, f'X: {state.lx - 128}, Y: {state.ly - 128}',
+                     f'X: {state.rx - 128}, Y: {state.ry - 128}', rate_text)
+            for label, text in zip(labels[1:], texts):
+                if label.text() != text:
+                    label.setText(text)
+    
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.manager.stop()
+        self.panel.multi_pad_window = None
+        event.accept()
+
+class ScopeWidget(QWidget):
+    # Çubuk, tetik ve jiroskop geçmişinin zaman grafiği. Veriler her karede
+    # ScopeBuffer'dan toplu alınır ve piksel genişliğine min/maks seyreltilir;
+    # çizim maliyeti örnek hızına değil widget genişliğine bağlıdır.
+    # Tekerlek zaman eksenini, Ctrl+tekerlek dikey ekseni yakınlaştırır.
+    MIN_SPAN = 0.05
+    MAX_GAIN = 1000.0
+    CHANNEL_COLORS = ('#3498db', '#e74c3c', '#2ecc71', '#f1c40f',
+                      '#3498db', '#e74c3c',
+                      '#9b59b6', '#1abc9c', '#e67e22')
+    
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        # Görünen zaman aralığı (sn) ve dikey yakınlaştırma katsayısı
+        self.span = 2.0
+        self.gain = 1.0
+        # Dondurulunca tamponun tamamının anlık görüntüsü (zaman, değerler)
+        self.frozen = None
+        self.shown_head = -1
+        self.shown_samples = 0
+        self.shown_rate = 0.0
+        self.shown_points = 0
+        self.setMinimumSize(480, 360)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.background_color = QColor(44, 62, 80)
+        self.grid_color = QColor(52, 73, 94)
+        self.text_color = QColor(236, 240, 241)
+        self.pens = [QPen(QColor(color), 1) for color in self.CHANNEL_COLORS]
+        self.label_font = QFont()
+        self.label_font.setPixelSize(11)
+        self.paint_times = deque(maxlen=512)
+    
+    def refresh(self):
+        # Ekran yenileme hızında çağrılır; yeni örnek yoksa çizilmez
+        if self.frozen is None and self.buffer.head != self.shown_head:
+            self.update()
+    
+    def set_frozen(self, frozen):
+        self.frozen = self.buffer.window() if frozen else None
+        self.update()
+    
+    def visible(self):
+        # Görünen aralığın seyreltilmemiş örnekleri (dışa aktarma için)
+        from ds4_scope import crop
+        if self.frozen is not None:
+            return crop(*self.frozen, self.span)
+        return self.buffer.window(self.span)
+    
+    def wheelEvent(self, event):
+        factor = 0.8 ** (event.angleDelta().y() / 120)
+        if event.modifiers() & Qt.ControlModifier:
+            self.gain = min(max(self.gain / factor, 1.0), self.MAX_GAIN)
+        else:
+            self.span = min(max(self.span * factor, self.MIN_SPAN), self.buffer.seconds)
+        self.update()
+    
+    @staticmethod
+    def polygon(points):
+        # (N, 2) float64 noktaları QPointF oluşturmadan QPolygonF belleğine kopyala
+        import numpy as np
+        polygon = QPolygonF(len(points))
+        pointer = polygon.data()
+        pointer.setsize(points.nbytes)
+        np.frombuffer(pointer, dtype=np.float64).reshape(-1, 2)[:] = points
+        return polygon
+    
+    def paintEvent(self, event):
+        from ds4_scope import CHANNELS, GROUPS, crop, decimate, envelope
+        start = time.perf_counter()
+        if self.frozen is None:
+            self.shown_head = self.buffer.head
+            times, values = self.buffer.window(self.span)
+        else:
+            times, values = crop(*self.frozen, self.span)
+        self.shown_samples = len(times)
+        self.shown_rate = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[0] < times[-1] else 0.0
+        
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.background_color)
+        painter.setFont(self.label_font)
+        metrics = painter.fontMetrics()
+        margin = 6
+        title_height = 16
+        plot_width = self.width() - 2 * margin
+        group_height = (self.height() - margin) / len(GROUPS)
+        columns, low, high = decimate(times, values, plot_width, self.span)
+        x = columns + margin + 0.5
+        self.shown_points = 0
+        for row, (title, channels, (bottom, top)) in enumerate(GROUPS):
+            y = margin + row * group_height
+            rect = QRectF(margin, y + title_height, plot_width, group_height - title_height - margin)
+            # Dikey yakınlaştırma grubun ortası etrafında yapılır
+            center = (top + bottom) / 2
+            half = (top - bottom) / 2 / self.gain
+            scale = -rect.height() / (2 * half)
+            offset = rect.center().y() - center * scale
+            
+            # Başlık, görünen aralık ve kanal adları
+            painter.setPen(self.text_color)
+            label = f'{title} [{center - half:.3g}, {center + half:.3g}]'
+            painter.drawText(QRectF(margin, y, plot_width, title_height), Qt.AlignLeft | Qt.AlignVCenter, label)
+            label_x = margin + metrics.horizontalAdvance(label) + 12
+            for channel in channels:
+                painter.setPen(self.pens[channel])
+                painter.drawText(QRectF(label_x, y, plot_width, title_height), Qt.AlignLeft | Qt.AlignVCenter,
+                                 CHANNELS[channel])
+                label_x += metrics.horizontalAdvance(CHANNELS[channel]) + 10
+            
+            painter.setPen(self.grid_color)
+            painter.drawRect(rect)
+            if center - half < 0 < center + half:
+                painter.drawLine(QPointF(rect.left(), offset), QPointF(rect.right(), offset))
+            
+            painter.save()
+            painter.setClipRect(rect)
+            for channel in channels:
+                points = envelope(x, low[channel] * scale + offset, high[channel] * scale + offset)
+                painter.setPen(self.pens[channel])
+                painter.drawPolyline(self.polygon(points))
+                self.shown_points += len(points)
+            painter.restore()
+        painter.end()
+        self.paint_times.append(time.perf_counter() - start)
+
+class ScopeWindow(QWidget):
+    # Osiloskop penceresi. Açıkken okuyucu thread'i her raporu ScopeBuffer'a
+    # kopyalar; kapanınca dinleyici kaldırılır.
+    def __init__(self, panel):
+        super().__init__()
+        self.panel = panel
+        self.setWindowTitle('Osiloskop - DualShock 4')
+        self.setStyleSheet(panel.styleSheet())
+        from ds4_scope import ScopeBuffer
+        self.buffer = ScopeBuffer(calibration=panel.ds4.imu_calibration)
+        self.buffer.attach(panel.ds4.ring)
+        
+        layout = QVBoxLayout(self)
+        self.scope = ScopeWidget(self.buffer)
+        layout.addWidget(self.scope)
+        
+        controls = QHBoxLayout()
+        self.freeze_button = QPushButton('Dondur')
+        self.freeze_button.setCheckable(True)
+        self.freeze_button.toggled.connect(self.toggle_freeze)
+        controls.addWidget(self.freeze_button)
+        export_button = QPushButton('Dışa Aktar (CSV)')
+        export_button.clicked.connect(self.export)
+        controls.addWidget(export_button)
+        self.info_label = QLabel('-')
+        self.info_label.setStyleSheet("QLabel { font-family: monospace; }")
+        controls.addWidget(self.info_label, 1)
+        layout.addLayout(controls)
+        layout.addWidget(QLabel('Tekerlek: zaman ekseni yakınlaştırma | Ctrl+Tekerlek: dikey yakınlaştırma'))
+        
+        # Rapor hızında değil, ekran yenileme hızında çizilir
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        refresh_rate = QApplication.primaryScreen().refreshRate() or 60
+        self.timer.start(max(4, int(1000 / refresh_rate)))
+    
+    def refresh(self):
+        self.scope.refresh()
+        paint_times = sorted(self.scope.paint_times) or [0.0]
+        text = (f'Pencere: {self.scope.span:.2f} sn | Örnek: {self.scope.shown_samples} '
+                f'({self.scope.shown_rate:.0f} Hz) | Çizilen nokta: {self.scope.shown_points} | '
+                f'Çizim p50: {paint_times[len(paint_times) // 2] * 1000:.2f} ms')
+        if self.info_label.text() != text:
+            self.info_label.setText(text)
+    
+    def toggle_freeze(self, frozen):
+        self.scope.set_frozen(frozen)
+        self.freeze_button.setText('Devam Et' if frozen else 'Dondur')
+    
+    def export(self):
+        times, values = self.scope.visible()
+        if not len(times):
+            QMessageBox.information(self, 'Osiloskop', 'Dışa aktarılacak örnek yok.')
+            return
+        path, _ = QFileDialog.getSaveFileName(self, 'Pencereyi Kaydet',
+                                              time.strftime('ds4_scope_%Y%m%d_%H%M%S.csv'), 'CSV (*.csv)')
+        if path:
+            from ds4_scope import export_csv
+            try:
+                export_csv(path, times, values)
+            except OSError as e:
+                QMessageBox.warning(self, 'Kayıt Hatası', str(e))
+    
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.buffer.detach()
+        self.panel.scope_window = None
+        event.accept()
+
 class DS4ControlPanel(QMainWindow):
+    # Tak-çıkar thread'inden GUI thread'ine bildirimler
+    controller_attached = pyqtSignal(dict)
+    controller_detached = pyqtSignal(dict)
+    replay_finished = pyqtSignal()
+    # Arka plandaki bağlantı denemesinin sonucu: (başarılı mı, kullanıcı mı başlattı)
+    connect_finished = pyqtSignal(bool, bool)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle('DualShock 4 Kontrol Paneli - by rtx4090')
@@ -358,12 +941,9 @@ class DS4ControlPanel(QMainWindow):
             }
         """)
         
-        # Pygame başlatma
-        pygame.init()
-        pygame.joystick.init()
-        
         # DS4 kontrolcüsü oluştur
         self.ds4 = DS4Controller()
+        self.features_loaded = False
         
         # Ana widget ve layout
         central_widget = QWidget()
@@ -397,6 +977,9 @@ Geliştirici: rtx4090''')
         
         # LED kontrolü için renk seçici
         self.create_led_controls(left_layout)
+        # Çubuk ayarları ds4_sticks yüklenince doldurulur
+        self.stick_settings_layout = QVBoxLayout()
+        left_layout.addLayout(self.stick_settings_layout)
         
         # Yenile ve bağlantı butonları
         self.refresh_button = QPushButton('Kontrolcüleri Yenile')
@@ -408,41 +991,117 @@ Geliştirici: rtx4090''')
         self.connect_button.setStyleSheet("QPushButton { padding: 10px; }")
         left_layout.addWidget(self.connect_button)
         
+        # Tüm kontrolcüleri ızgarada göster (yalnızca Linux, hidraw)
+        self.multi_pad_button = QPushButton('Çoklu Kontrolcü')
+        self.multi_pad_button.clicked.connect(self.show_multi_pad_window)
+        left_layout.addWidget(self.multi_pad_button)
+        self.multi_pad_window = None
+        self.selected_device = None
+        
+        # Çubuk, tetik ve jiroskop geçmişi (kayma ve titreme teşhisi için)
+        self.scope_button = QPushButton('Osiloskop')
+        self.scope_button.clicked.connect(self.show_scope_window)
+        left_layout.addWidget(self.scope_button)
+        self.scope_window = None
+        
+        # Ham rapor kaydı ve yeniden oynatma
+        capture_layout = QHBoxLayout()
+        self.capture_button = QPushButton('Kaydı Başlat')
+        self.capture_button.clicked.connect(self.toggle_capture)
+        capture_layout.addWidget(self.capture_button)
+        self.replay_button = QPushButton('Kaydı Oynat')
+        self.replay_button.clicked.connect(self.toggle_replay)
+        capture_layout.addWidget(self.replay_button)
+        left_layout.addLayout(capture_layout)
+        
+        # Emülatörler için DSU (cemuhook) sunucusu
+        self.dsu_button = QPushButton('DSU Sunucusunu Başlat')
+        self.dsu_button.clicked.connect(self.toggle_dsu_server)
+        left_layout.addWidget(self.dsu_button)
+        self.dsu_server = None
+        
+        # Linux: yeniden eşlenmiş girişi uinput sanal gamepad'inden yayınla
+        self.gamepad_button = QPushButton('Sanal Gamepad Başlat')
+        self.gamepad_button.clicked.connect(self.toggle_virtual_gamepad)
+        left_layout.addWidget(self.gamepad_button)
+        self.virtual_gamepad = None
+        self.capture = None
+        self.capture_error = False
+        self.replayer = None
+        self.replay_finished.connect(self.on_replay_finished)
+        
         # Durum etiketi
         self.status_label = QLabel('Durum: Bağlı değil | Geliştirici: rtx4090')
         self.status_label.setStyleSheet("QLabel { color: red; }")
         left_layout.addWidget(self.status_label)
         
+        # Pil seviyesi, son örneklerin grafiği ve kalan süre tahmini
+        self.battery_label = QLabel('Pil: -')
+        left_layout.addWidget(self.battery_label)
+        
         # Sol layoutu ana layouta ekle
         main_layout.addLayout(left_layout)
         
         # Sağ taraf için layout (Tuş testi)
         right_layout = QVBoxLayout()
         self.create_button_test_section(right_layout)
+        self.create_stats_section(right_layout)
+        self.create_orientation_section(right_layout)
+        self.create_touch_section(right_layout)
         main_layout.addLayout(right_layout)
         
         # Kontrolcü değişkenleri
         self.controller = None
         self.is_connected = False
+        self.last_report_seq = -1
+        self.led_color = (52, 152, 219)
+        self.state = DS4State()
+        # Şemada yeniden çizilen ve değişmediği için atlanan öğe sayıları
+        self.widget_updates = 0
+        self.widget_updates_skipped = 0
+        # Giriş ölçümü kapalıyken None; açıkken raporlar halka tampondan işlenir
+        self.input_stats = None
+        # Bağlanınca oluşturulur; NumPy yalnızca o zaman yüklenir
+        self.orientation = None
+        # Bağlantı arka planda kurulur; açılışta ilk bulunan kontrolcüye kendiliğinden bağlanılır
+        self.connecting = False
+        self.auto_connect = True
+        self.connect_finished.connect(self.on_connect_finished)
+        
+        # Kontrolcü takılıp çıkarıldığında anında haber ver
+        self.controller_attached.connect(self.on_controller_attached)
+        self.controller_detached.connect(self.on_controller_detached)
+        self.hotplug = HotplugMonitor(self.controller_attached.emit, self.controller_detached.emit)
+        self.hotplug.start()
         
-        # Timer for controller status check
+        # Timer for output stats update
         self.timer = QTimer()
-        self.timer.timeout.connect(self.check_controller)
+        self.timer.timeout.connect(self.update_output_stats)
+        self.timer.timeout.connect(self.update_battery_display)
         self.timer.start(3000)
         
         # Timer for button states update
         self.button_timer = QTimer()
         self.button_timer.timeout.connect(self.update_button_states)
         self.button_timer.start(50)  # 50ms aralıklarla güncelle (20 FPS)
+        
+        # Dokunma izi rapor hızında değil, ekran yenileme hızında çizilir
+        self.touch_timer = QTimer()
+        self.touch_timer.timeout.connect(self.update_touch)
+        refresh_rate = QApplication.primaryScreen().refreshRate() or 60
+        self.touch_timer.start(max(4, int(1000 / refresh_rate)))
+        
+        # Giriş istatistikleri paneli (yalnızca ölçüm açıkken çalışır)
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_input_stats)
     
     def refresh_controllers(self):
         try:
+            self.hotplug.rescan()
             debug_info = "Bulunan HID cihazları:\n"
-            for device in hid.enumerate():
-                if device['vendor_id'] == 0x054C:  # Sony
-                    debug_info += f"VID: {device['vendor_id']:04x}, PID: {device['product_id']:04x}, Path: {device['path']}\n"
+            for device in self.hotplug.devices():
+                debug_info += f"VID: {device['vendor_id']:04x}, PID: {device['product_id']:04x}, Path: {device['path']}\n"
             
-            self.debug_label.setText(debug_info)
             QMessageBox.information(self, 'Yenileme', f'Cihazlar yenilendi.\n\n{debug_info}')
         except Exception as e:
             print(f"Yenileme hatası: {e}")
@@ -461,98 +1120,76 @@ Geliştirici: rtx4090''')
         """)
         layout.addWidget(button_test_label)
         
-        # Tuş durumlarını gösterecek etiketler için grid
-        button_layout = QHBoxLayout()
-        button_layout.setSpacing(20)  # Tuşlar arası boşluğu artırdık
+        # Tuşlar, çubuklar ve tetikler tek bir özel çizilen şemada gösterilir
+        self.controller_view = ControllerWidget()
+        layout.addWidget(self.controller_view)
         
-        # Tuş etiketleri için ortak stil - Büyütülmüş ve daha belirgin
-        button_style = """
-            QLabel {
-                background-color: #34495e;
-                color: #ecf0f1;
-                padding: 12px;
-                border: 2px solid #2c3e50;
-                border-radius: 8px;
-                min-width: 80px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """
-        
-        # Sol taraf tuşları
-        left_buttons = QVBoxLayout()
-        left_buttons.setSpacing(8)  # Dikey boşluk
-        self.button_labels = {}
-        
-        # D-Pad tuşları
-        dpad_buttons = ['↑', '↓', '←', '→']
-        for btn in dpad_buttons:
-            self.button_labels[btn] = QLabel(f'{btn}: ⬛')
-            self.button_labels[btn].setStyleSheet(button_style)
-            left_buttons.addWidget(self.button_labels[btn])
-        
-        # Ana tuşlar
-        main_buttons = ['□', '○', '×', '△']
-        for btn in main_buttons:
-            self.button_labels[btn] = QLabel(f'{btn}: ⬛')
-            self.button_labels[btn].setStyleSheet(button_style)
-            left_buttons.addWidget(self.button_labels[btn])
-        
-        button_layout.addLayout(left_buttons)
-        
-        # Orta tuşlar
-        middle_buttons = QVBoxLayout()
-        special_buttons = ['SHARE', 'OPTIONS', 'PS', 'TOUCHPAD']
-        for btn in special_buttons:
-            self.button_labels[btn] = QLabel(f'{btn}: ⬛')
-            self.button_labels[btn].setStyleSheet(button_style)
-            middle_buttons.addWidget(self.button_labels[btn])
-        
-        button_layout.addLayout(middle_buttons)
-        
-        # Sağ taraf (Tetik ve Bumper tuşları)
-        right_buttons = QVBoxLayout()
-        trigger_buttons = ['L1', 'L2', 'R1', 'R2', 'L3', 'R3']
-        for btn in trigger_buttons:
-            self.button_labels[btn] = QLabel(f'{btn}: ⬛')
-            self.button_labels[btn].setStyleSheet(button_style)
-            right_buttons.addWidget(self.button_labels[btn])
-        
-        button_layout.addLayout(right_buttons)
-        layout.addLayout(button_layout)
-        
-        # Analog çubuk değerleri için etiketler
-        sticks_layout = QHBoxLayout()
-        
-        # Sol analog
-        left_stick = QVBoxLayout()
-        self.left_stick_label = QLabel('Sol Analog: X: 0, Y: 0')
-        self.left_stick_label.setStyleSheet("""
-            QLabel {
-                background-color: #f0f0f0;
-                padding: 5px;
-                border: 1px solid gray;
-                border-radius: 3px;
-            }
-        """)
-        left_stick.addWidget(self.left_stick_label)
-        sticks_layout.addLayout(left_stick)
+        # Son tuş olayları (uzun basma ve çift dokunma dahil)
+        self.button_event_label = QLabel('Tuş olayları: -')
+        layout.addWidget(self.button_event_label)
+        self.recent_button_events = []
         
-        # Sağ analog
-        right_stick = QVBoxLayout()
-        self.right_stick_label = QLabel('Sağ Analog: X: 0, Y: 0')
-        self.right_stick_label.setStyleSheet("""
-            QLabel {
-                background-color: #f0f0f0;
-                padding: 5px;
-                border: 1px solid gray;
-                border-radius: 3px;
-            }
-        """)
-        right_stick.addWidget(self.right_stick_label)
-        sticks_layout.addLayout(right_stick)
-        
-        layout.addLayout(sticks_layout)
+        # Kısayol kombinasyonları
+        self.combo_label = QLabel('Kombolar: L1+R1 2 sn = titreşimi sustur | SHARE+OPTIONS 1 sn = kayıt | '
+                                  '↑ ↑ ↓ ↓ × ○ = sonraki eşleme')
+        self.combo_label.setWordWrap(True)
+        layout.addWidget(self.combo_label)
+    
+    def load_features(self):
+        # İlk çizimden sonra (ve en geç ilk bağlantı ya da oynatmada) çağrılır:
+        # özellik modüllerini yükler ve onlara bağlı arayüz parçalarını kurar
+        if self.features_loaded:
+            return
+        self.features_loaded = True
+        self.ds4.load_features()
+        self.ds4.buttons.on(self.on_button_event)
+        self.ds4.combos.add('L1+R1 2sn', self.on_combo, name='titresim')
+        self.ds4.combos.add('SHARE+OPTIONS 1sn', self.on_combo, name='kayit')
+        self.ds4.combos.add('↑ ↑ ↓ ↓ × ○', self.on_combo, name='esleme', within=3.0)
+        self.touch_widget.set_tracker(self.ds4.touch)
+        self.ds4.touch.on(self.on_touch_gesture)
+        self.add_pattern_buttons()
+        self.create_stick_settings(self.stick_settings_layout)
+    
+    def on_combo(self, combo, device_time):
+        # İşlem tanıyıcının dışında, bir sonraki olay döngüsü turunda yapılır
+        QTimer.singleShot(0, lambda: self.run_combo(combo, device_time))
+    
+    def run_combo(self, combo, device_time):
+        if combo.name == 'titresim':
+            self.ds4.rumble_muted = not self.ds4.rumble_muted
+            if self.ds4.rumble_muted:
+                self.ds4.stop_vibration()
+            text = 'titreşim susturuldu' if self.ds4.rumble_muted else 'titreşim açıldı'
+        elif combo.name == 'kayit':
+            # Kombodan gelince sonuç modal pencere yerine etikette gösterilir
+            text = self.switch_capture()
+        elif combo.name == 'esleme':
+            text = self.next_gamepad_mapping()
+        else:
+            return
+        self.combo_label.setText(f'Kombo: {combo.text} → {text} ({device_time:.2f} sn)')
+    
+    def next_gamepad_mapping(self):
+        # Sanal gamepad açıksa sıradaki tuş eşlemesine geç
+        if not self.virtual_gamepad:
+            return 'sanal gamepad kapalı'
+        from ds4_uinput import load_mappings
+        mappings = list(load_mappings().values())
+        names = [mapping.name for mapping in mappings]
+        current = self.virtual_gamepad.mapping.name
+        mapping = mappings[(names.index(current) + 1) % len(mappings)] if current in names else mappings[0]
+        self.virtual_gamepad.set_mapping(mapping)
+        label = mapping.label or mapping.name
+        self.gamepad_button.setText(f'Sanal Gamepad Durdur ({label})')
+        return f'eşleme: {label}'
+    
+    def on_button_event(self, event):
+        from ds4_buttons import PRESS, RELEASE, LONG_PRESS, DOUBLE_TAP
+        names = {PRESS: 'basıldı', RELEASE: 'bırakıldı', LONG_PRESS: 'uzun basıldı', DOUBLE_TAP: 'çift dokunuldu'}
+        self.recent_button_events.append(f'{BUTTON_NAMES.get(event.button, "?")} {names[event.kind]} ({event.time:.3f} sn)')
+        del self.recent_button_events[:-4]
+        self.button_event_label.setText('Tuş olayları: ' + ' | '.join(reversed(self.recent_button_events)))
     
     def create_vibration_controls(self, layout):
         # Grup başlığı
@@ -568,36 +1205,10 @@ Geliştirici: rtx4090''')
         """)
         layout.addWidget(controls_label)
         
-        # Titreşim modları için butonlar
+        # Titreşim modları için butonlar (desenler yüklenince durdur butonunun önüne eklenir)
         patterns_layout = QHBoxLayout()
         patterns_layout.setSpacing(10)  # Butonlar arası boşluk
-        patterns = {
-            'Artan': 'artan',
-            'Dalgalı': 'dalgali',
-            'Nabız': 'nabiz',
-            'Yumuşak': 'soft'
-        }
-        
-        for pattern_name, pattern_id in patterns.items():
-            btn = QPushButton(pattern_name)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #2ecc71;
-                    color: white;
-                    min-width: 90px;
-                    padding: 10px;
-                    border-radius: 5px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #27ae60;
-                }
-                QPushButton:pressed {
-                    background-color: #219a52;
-                }
-            """)
-            btn.clicked.connect(lambda checked, p=pattern_id: self.vibration_pattern(p))
-            patterns_layout.addWidget(btn)
+        self.patterns_layout = patterns_layout
         
         # Titreşimi durdur butonu
         stop_btn = QPushButton('Titreşimi Durdur')
@@ -617,7 +1228,7 @@ Geliştirici: rtx4090''')
                 background-color: #a93226;
             }
         """)
-        stop_btn.clicked.connect(lambda: self.ds4.set_vibration(0, 0) if self.is_connected else None)
+        stop_btn.clicked.connect(lambda: self.ds4.stop_vibration() if self.is_connected else None)
         patterns_layout.addWidget(stop_btn)
         
         layout.addLayout(patterns_layout)
@@ -645,6 +1256,107 @@ Geliştirici: rtx4090''')
         right_layout.addWidget(right_label)
         right_layout.addWidget(self.right_slider)
         layout.addLayout(right_layout)
+        
+        # Çıkış raporu istatistikleri
+        self.output_stats_label = QLabel('Çıkış raporları: -')
+        layout.addWidget(self.output_stats_label)
+    
+    def add_pattern_buttons(self):
+        patterns = {pattern.label: pattern_id
+                    for pattern_id, pattern in self.ds4.haptics.patterns.items()
+                    if pattern.label}
+        
+        for index, (pattern_name, pattern_id) in enumerate(patterns.items()):
+            btn = QPushButton(pattern_name)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #2ecc71;
+                    color: white;
+                    min-width: 90px;
+                    padding: 10px;
+                    border-radius: 5px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background-color: #27ae60;
+                }
+                QPushButton:pressed {
+                    background-color: #219a52;
+                }
+            """)
+            btn.clicked.connect(lambda checked, p=pattern_id: self.vibration_pattern(p))
+            self.patterns_layout.insertWidget(index, btn)
+    
+    def create_stick_settings(self, layout):
+        sticks_label = QLabel('Çubuk ve Tetik Ayarları')
+        sticks_label.setStyleSheet("""
+            QLabel {
+                font-weight: bold;
+                font-size: 14px;
+                color: #3498db;
+                margin-top: 15px;
+                margin-bottom: 10px;
+            }
+        """)
+        layout.addWidget(sticks_label)
+        
+        from ds4_sticks import CURVES
+        # Yüzde cinsinden ayarlar: (etiket, ayar nesneleri, alan)
+        sticks = self.ds4.sticks
+        self.stick_sliders = []
+        for text, targets, field in (
+                ('Çubuk Ölü Bölge:', (sticks.left, sticks.right), 'radial_deadzone'),
+                ('Ters Ölü Bölge:', (sticks.left, sticks.right), 'anti_deadzone'),
+                ('Tetik Ölü Bölge:', (sticks.l2, sticks.r2), 'deadzone')):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(text))
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(0, 50)
+            slider.setValue(round(getattr(targets[0], field) * 100))
+            value_label = QLabel(f'%{slider.value()}')
+            slider.valueChanged.connect(
+                lambda value, t=targets, f=field, v=value_label: self.set_stick_setting(t, f, value, v))
+            row.addWidget(slider)
+            row.addWidget(value_label)
+            layout.addLayout(row)
+        
+        curve_row = QHBoxLayout()
+        curve_row.addWidget(QLabel('Tepki Eğrisi:'))
+        self.curve_combo = QComboBox()
+        self.curve_combo.addItems(list(CURVES))
+        self.curve_combo.currentTextChanged.connect(self.set_stick_curve)
+        curve_row.addWidget(self.curve_combo)
+        # Kayan çubuk için: çubuklar bırakılmışken son raporların medyanı merkez olur
+        calibrate_button = QPushButton('Merkezi Kalibre Et')
+        calibrate_button.clicked.connect(self.calibrate_stick_centers)
+        curve_row.addWidget(calibrate_button)
+        layout.addLayout(curve_row)
+    
+    def set_stick_setting(self, targets, field, value, value_label):
+        for settings in targets:
+            setattr(settings, field, value / 100)
+        value_label.setText(f'%{value}')
+        self.recompile_sticks()
+    
+    def set_stick_curve(self, name):
+        for settings in (self.ds4.sticks.left, self.ds4.sticks.right):
+            settings.curve = name
+        self.recompile_sticks()
+    
+    def recompile_sticks(self):
+        # Henüz derlenmediyse bağlanırken güncel ayarlarla derlenir
+        if self.ds4.sticks.compiled:
+            self.ds4.sticks.compile()
+    
+    def calibrate_stick_centers(self):
+        if not self.is_connected:
+            QMessageBox.information(self, 'Çubuk Kalibrasyonu', 'Önce kontrolcüye bağlanın.')
+            return
+        left = self.ds4.sticks.calibrate_center(self.ds4.ring, 'left')
+        right = self.ds4.sticks.calibrate_center(self.ds4.ring, 'right')
+        if left and right:
+            QMessageBox.information(self, 'Çubuk Kalibrasyonu',
+                f'Merkez ofsetleri: Sol ({left[0]:+.1f}, {left[1]:+.1f}), Sağ ({right[0]:+.1f}, {right[1]:+.1f})')
     
     def create_led_controls(self, layout):
         # Grup başlığı
@@ -687,58 +1399,303 @@ Geliştirici: rtx4090''')
         colors_layout.addWidget(custom_color_btn)
         
         layout.addLayout(colors_layout)
+        
+        # Işık çubuğu efektleri
+        effects_layout = QHBoxLayout()
+        effects_layout.setSpacing(10)
+        effects = {
+            'Nefes': lambda: self.ds4.lightbar.breathing(self.led_color),
+            'Gökkuşağı': lambda: self.ds4.lightbar.rainbow(),
+            'Flaş': lambda: self.ds4.lightbar.strobe(self.led_color),
+            'Pil Seviyesi': lambda: self.ds4.lightbar.battery_gradient(),
+        }
+        for effect_name, start_effect in effects.items():
+            btn = QPushButton(effect_name)
+            btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #8e44ad;
+                    color: white;
+                    min-width: 90px;
+                    padding: 10px;
+                    border-radius: 5px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background-color: #7d3c98;
+                }
+            """)
+            btn.clicked.connect(lambda checked, f=start_effect: f() if self.is_connected else None)
+            effects_layout.addWidget(btn)
+        
+        layout.addLayout(effects_layout)
     
-    def check_controller(self):
-        try:
-            pygame.event.pump()
-            joystick_count = pygame.joystick.get_count()
-            
-            if joystick_count > 0 and not self.is_connected:
-                self.status_label.setText('Durum: Kontrolcü bulundu! Bağlanmak için butona tıklayın | Geliştirici: rtx4090')
-                self.status_label.setStyleSheet("QLabel { color: orange; }")
-            elif joystick_count == 0 and not self.is_connected:
-                self.status_label.setText('Durum: Kontrolcü bulunamadı | Geliştirici: rtx4090')
-                self.status_label.setStyleSheet("QLabel { color: red; }")
-        except Exception as e:
-            print(f"Kontrol hatası: {e}")
+    def create_stats_section(self, layout):
+        stats_label = QLabel('Giriş İstatistikleri')
+        stats_label.setStyleSheet("QLabel { font-size: 16px; font-weight: bold; }")
+        layout.addWidget(stats_label)
+        
+        self.input_stats_label = QLabel('Ölçüm kapalı')
+        self.input_stats_label.setStyleSheet("QLabel { font-family: monospace; }")
+        layout.addWidget(self.input_stats_label)
+        
+        stats_buttons = QHBoxLayout()
+        self.input_stats_button = QPushButton('Ölçümü Başlat')
+        self.input_stats_button.clicked.connect(self.toggle_input_stats)
+        stats_buttons.addWidget(self.input_stats_button)
+        export_button = QPushButton('JSON Olarak Kaydet')
+        export_button.clicked.connect(self.export_input_stats)
+        stats_buttons.addWidget(export_button)
+        layout.addLayout(stats_buttons)
+    
+    def toggle_input_stats(self):
+        if self.input_stats:
+            self.stats_timer.stop()
+            self.update_input_stats()
+            self.input_stats = None
+            self.input_stats_button.setText('Ölçümü Başlat')
+        else:
+            from ds4_stats import InputStats
+            self.input_stats = InputStats()
+            self.input_stats.reset(self.ds4.ring)
+            self.stats_timer.start(1000)
+            self.input_stats_button.setText('Ölçümü Durdur')
+    
+    def update_input_stats(self):
+        if not self.input_stats:
+            return
+        from ds4_stats import histogram_text
+        s = self.input_stats.snapshot()
+        paint_times = sorted(self.controller_view.paint_times) or [0.0]
+        self.input_stats_label.setText(
+            f"Rapor: {s['reports']} | Hız: {s['rate_hz']:.0f} Hz (cihaz {s['device_rate_hz']:.0f} Hz)\n"
+            f"Kayıp: {s['dropped']} (%{s['drop_percent']:.2f}) | Tampon kaybı: {s['ring_lost']} | CRC hatası: {s['crc_rejected']}\n"
+            f"Aralık p50/p99/maks: {s['interval_p50_us'] / 1000:.2f} / {s['interval_p99_us'] / 1000:.2f} / "
+            f"{s['interval_max_us'] / 1000:.2f} ms | Titreme: {s['jitter_us']:.0f} µs\n"
+            f"Okuyucu→çizim p50/p95/p99: {s['render_latency_p50_ms']:.1f} / {s['render_latency_p95_ms']:.1f} / "
+            f"{s['render_latency_p99_ms']:.1f} ms | Şema çizimi p50/p99: "
+            f"{paint_times[len(paint_times) // 2] * 1000:.2f} / {paint_times[len(paint_times) * 99 // 100] * 1000:.2f} ms\n"
+            f"Aralık histogramı (0-{s['histogram_bin_us'] * len(s['histogram']) / 1000:.0f} ms): "
+            f"{histogram_text(s['histogram'])}")
+    
+    def export_input_stats(self):
+        if not self.input_stats:
+            QMessageBox.information(self, 'Giriş İstatistikleri', 'Önce ölçümü başlatın.')
+            return
+        path, _ = QFileDialog.getSaveFileName(self, 'İstatistikleri Kaydet',
+                                              time.strftime('ds4_stats_%Y%m%d_%H%M%S.json'), 'JSON (*.json)')
+        if path:
+            try:
+                self.input_stats.export_json(path)
+            except OSError as e:
+                QMessageBox.warning(self, 'Kayıt Hatası', str(e))
+    
+    def update_output_stats(self):
+        stats = self.ds4.output_stats()
+        if stats:
+            self.output_stats_label.setText(
+                f"Çıkış raporları: {stats['requests']} istek, {stats['writes']} yazma, "
+                f"{stats['saved']} yazma tasarrufu | LED efekti: {self.ds4.lightbar.effect_name} "
+                f"({self.ds4.lightbar.stats()['frame_us_avg']:.0f} µs/kare)")
+        if self.virtual_gamepad:
+            gamepad = self.virtual_gamepad.stats()
+            self.gamepad_button.setToolTip(
+                f"Rapor: {gamepad['reports']}, yazma: {gamepad['writes']}, "
+                f"ek gecikme p50/p99: {gamepad['latency_p50_us']:.0f}/{gamepad['latency_p99_us']:.0f} µs")
+    
+    def create_touch_section(self, layout):
+        touch_label = QLabel('Dokunmatik Yüzey')
+        touch_label.setStyleSheet("QLabel { font-size: 16px; font-weight: bold; }")
+        layout.addWidget(touch_label)
+        self.touch_widget = TouchTrailWidget(None)
+        layout.addWidget(self.touch_widget)
+        self.touch_event_label = QLabel('Hareketler: -')
+        layout.addWidget(self.touch_event_label)
+        self.recent_touch_events = []
+    
+    def on_touch_gesture(self, gesture):
+        from ds4_touch import TAP, SWIPE, PINCH, SCROLL
+        if gesture.kind == TAP:
+            text = f'{gesture.fingers} parmakla dokunma'
+        elif gesture.kind == SWIPE:
+            names = {'sol': 'sola', 'sag': 'sağa', 'yukari': 'yukarı', 'asagi': 'aşağı'}
+            text = f'{names[gesture.direction]} kaydırma'
+        elif gesture.kind == PINCH:
+            text = f"{'yakınlaştırma' if gesture.scale > 1 else 'uzaklaştırma'}"
+        else:
+            text = f'iki parmakla kaydırma ({gesture.dx:+.0f}, {gesture.dy:+.0f})'
+        # Sürekli hareketler (kıstırma, kaydırma) listeyi doldurmasın
+        if self.recent_touch_events and gesture.kind in (PINCH, SCROLL) and \
+                self.recent_touch_events[-1][0] == gesture.kind:
+            self.recent_touch_events[-1] = (gesture.kind, text)
+        else:
+            self.recent_touch_events.append((gesture.kind, text))
+            del self.recent_touch_events[:-4]
+        self.touch_event_label.setText('Hareketler: ' + ' | '.join(text for _, text in reversed(self.recent_touch_events)))
+    
+    def update_touch(self):
+        # Ekran yenileme hızında: son kareden beri gelen tüm raporlar tek seferde işlenir
+        if self.is_connected or self.replayer:
+            self.ds4.touch.consume(self.ds4.ring)
+            self.touch_widget.refresh()
+    
+    def create_orientation_section(self, layout):
+        orientation_layout = QHBoxLayout()
+        self.orientation_label = QLabel('Yönelim: -')
+        self.orientation_label.setStyleSheet("QLabel { font-family: monospace; }")
+        orientation_layout.addWidget(self.orientation_label)
+        reset_button = QPushButton('Sıfırla')
+        reset_button.clicked.connect(self.reset_orientation)
+        orientation_layout.addWidget(reset_button)
+        layout.addLayout(orientation_layout)
+    
+    def reset_orientation(self):
+        if self.orientation:
+            self.orientation.reset(self.ds4.ring)
+    
+    def update_orientation(self):
+        # Son kareden bu yana gelen tüm IMU örnekleri tek bir NumPy adımında işlenir
+        if not self.orientation.consume(self.ds4.ring):
+            return
+        roll, pitch, yaw = self.orientation.euler()
+        gyro = self.orientation.gyro_dps
+        text = (f'Yönelim: Roll {roll:+6.1f}°  Pitch {pitch:+6.1f}°  Yaw {yaw:+6.1f}° | '
+                f'Jiroskop: {gyro[0]:+6.0f} {gyro[1]:+6.0f} {gyro[2]:+6.0f} °/sn')
+        if self.orientation_label.text() != text:
+            self.orientation_label.setText(text)
+    
+    def update_battery_display(self):
+        battery = self.ds4.battery
+        if battery is None or battery.percent is None:
+            text = 'Pil: -'
+        else:
+            from ds4_battery import sparkline, format_duration
+            text = f'Pil: %{battery.smoothed:.0f}'
+            if battery.charging:
+                text += ' (Şarj Oluyor)'
+            elif battery.cable:
+                text += ' (Dolu, kablo takılı)'
+            remaining = battery.remaining()
+            if remaining is not None:
+                text += f" | {'Dolmasına' if battery.charging else 'Kalan'}: ~{format_duration(remaining)}"
+            text += f'  {sparkline(battery.history(40))}'
+        if self.battery_label.text() != text:
+            self.battery_label.setText(text)
+    
+    def show_multi_pad_window(self):
+        if not sys.platform.startswith('linux'):
+            QMessageBox.information(self, 'Çoklu Kontrolcü', 'Çoklu kontrolcü görünümü yalnızca Linux\'ta (hidraw) kullanılabilir.')
+            return
+        if self.multi_pad_window is None:
+            self.multi_pad_window = MultiPadWindow(self)
+        self.multi_pad_window.show()
+        self.multi_pad_window.raise_()
+    
+    def show_scope_window(self):
+        if self.scope_window is None:
+            self.scope_window = ScopeWindow(self)
+        self.scope_window.show()
+        self.scope_window.raise_()
+    
+    def select_pad(self, info):
+        # Ana paneli seçilen kontrolcüye geçir
+        self.selected_device = info
+        if self.is_connected:
+            if self.ds4.device_info and self.ds4.device_info['path'] == info['path']:
+                return
+            self.connect_controller()  # Mevcut bağlantıyı kes
+        self.connect_controller()
+    
+    def on_controller_attached(self, info):
+        if self.replayer:
+            # Oynatma halkayı besliyor; bağlantı oynatma bitince kurulur
+            return
+        if self.auto_connect and not self.is_connected and not self.connecting:
+            self.start_connect(user_initiated=False)
+            return
+        if not self.is_connected and not self.connecting:
+            self.status_label.setText('Durum: Kontrolcü bulundu! Bağlanmak için butona tıklayın | Geliştirici: rtx4090')
+            self.status_label.setStyleSheet("QLabel { color: orange; }")
+    
+    def on_controller_detached(self, info):
+        if self.is_connected and self.ds4.device_info and self.ds4.device_info['path'] == info['path']:
+            # Bağlı olduğumuz kontrolcü çıkarıldı; yeniden takılınca kendiliğinden bağlan
+            self.disconnect_controller()
+            self.auto_connect = True
+        if not self.is_connected and not self.hotplug.devices():
+            self.status_label.setText('Durum: Kontrolcü bulunamadı | Geliştirici: rtx4090')
+            self.status_label.setStyleSheet("QLabel { color: red; }")
     
     def connect_controller(self):
+        if self.connecting:
+            return
         if not self.is_connected:
-            if self.ds4.connect():
-                self.is_connected = True
-                self.connect_button.setText('Bağlantıyı Kes')
-                
-                # Şarj durumunu kontrol et ve göster
-                battery_level, is_charging = self.ds4.get_battery_level()
-                if battery_level is not None:
-                    status_text = f'Durum: Bağlandı - DualShock 4 (Pil: %{battery_level * 10}'
-                    if is_charging:
-                        status_text += ' - Şarj Oluyor'
-                    status_text += ') | Geliştirici: rtx4090'
-                    self.status_label.setText(status_text)
-                else:
-                    self.status_label.setText('Durum: Bağlandı - DualShock 4 | Geliştirici: rtx4090')
-                
-                self.status_label.setStyleSheet("QLabel { color: green; }")
-                
-                # Test titreşimi
-                self.ds4.set_vibration(128, 128)  # Orta şiddette titreşim
-                time.sleep(0.5)
-                self.ds4.set_vibration(0, 0)  # Titreşimi durdur
-                
+            self.start_connect(user_initiated=True)
+        else:
+            # Kullanıcı bağlantıyı kestiyse kendiliğinden yeniden bağlanma
+            self.auto_connect = False
+            self.disconnect_controller()
+    
+    def disconnect_controller(self):
+        self.ds4.disconnect()
+        self.is_connected = False
+        self.ds4.battery.reset()
+        self.update_battery_display()
+        self.orientation = None
+        self.orientation_label.setText('Yönelim: -')
+        self.connect_button.setText('Kontrolcüye Bağlan')
+        self.status_label.setText('Durum: Bağlı değil | Geliştirici: rtx4090')
+        self.status_label.setStyleSheet("QLabel { color: red; }")
+    
+    def start_connect(self, user_initiated):
+        # Cihazı açma, Bluetooth özellik raporu ve ilk raporu bekleme GUI'yi
+        # dondurmasın diye ayrı bir thread'de yapılır
+        self.load_features()
+        devices = self.hotplug.devices()
+        if self.selected_device not in devices:
+            self.selected_device = devices[0] if devices else None
+        device_info = self.selected_device
+        self.connecting = True
+        self.connect_button.setEnabled(False)
+        self.status_label.setText('Durum: Bağlanıyor... | Geliştirici: rtx4090')
+        self.status_label.setStyleSheet("QLabel { color: orange; }")
+        threading.Thread(target=lambda: self.connect_finished.emit(self.ds4.connect(device_info), user_initiated),
+                         name="DS4Connect", daemon=True).start()
+    
+    def on_connect_finished(self, connected, user_initiated):
+        self.connecting = False
+        self.connect_button.setEnabled(True)
+        if connected:
+            self.is_connected = True
+            self.auto_connect = False
+            self.connect_button.setText('Bağlantıyı Kes')
+            from ds4_imu import OrientationTracker
+            self.orientation = OrientationTracker(self.ds4.imu_calibration)
+            self.orientation.reset(self.ds4.ring)
+            if self.scope_window:
+                # Önceki kontrolcünün örnekleri ve kalibrasyonu bırakılır
+                if self.ds4.imu_calibration:
+                    self.scope_window.buffer.calibration = self.ds4.imu_calibration
+                self.scope_window.buffer.reset()
+            if self.dsu_server:
+                # Yuva bilgisi (MAC, bağlantı türü) yeni kontrolcüye göre güncellenir
+                self.dsu_server.add_slot(self.ds4.ring, self.ds4.device_info, calibration=self.ds4.imu_calibration)
+            self.status_label.setText('Durum: Bağlandı - DualShock 4 | Geliştirici: rtx4090')
+            self.status_label.setStyleSheet("QLabel { color: green; }")
+            
+            # Test titreşimi (arka planda, yarım saniye orta şiddet)
+            self.ds4.vibration_pattern('baglanti')
+            
+            if user_initiated:
                 QMessageBox.information(self, 'Başarılı', 'Kontrolcü başarıyla bağlandı!')
-            else:
+        else:
+            self.status_label.setText('Durum: Bağlı değil | Geliştirici: rtx4090')
+            self.status_label.setStyleSheet("QLabel { color: red; }")
+            if user_initiated:
                 QMessageBox.warning(self, 'Bağlantı Hatası', 
                     'Kontrolcü bulunamadı!\n\n'
                     '1. Kontrolcünün Bluetooth eşleştirmesi yapıldığından emin olun\n'
                     '2. PS + SHARE butonlarına basarak eşleştirme modunu tekrar deneyin\n'
                     '3. Windows Bluetooth ayarlarından bağlantıyı kontrol edin')
-        else:
-            self.ds4.disconnect()
-            self.is_connected = False
-            self.connect_button.setText('Kontrolcüye Bağlan')
-            self.status_label.setText('Durum: Bağlı değil | Geliştirici: rtx4090')
-            self.status_label.setStyleSheet("QLabel { color: red; }")
     
     def update_vibration(self):
         if self.is_connected:
@@ -746,14 +1703,14 @@ Geliştirici: rtx4090''')
                 left = self.left_slider.value()
                 right = self.right_slider.value()
                 self.ds4.set_vibration(right, left)  # Sağ motor küçük, sol motor büyük
-                print(f"Titreşim değerleri - Sol: {left}, Sağ: {right}")
             except Exception as e:
                 print(f"Titreşim güncelleme hatası: {e}")
     
     def set_color(self, r, g, b):
         if self.is_connected:
             try:
-                self.ds4.set_led_color(r, g, b)
+                self.led_color = (r, g, b)
+                self.ds4.lightbar.set_color(r, g, b)
             except Exception as e:
                 print(f"LED renk değiştirme hatası: {e}")
     
@@ -770,83 +1727,201 @@ Geliştirici: rtx4090''')
             if color.isValid():
                 self.set_color(color.red(), color.green(), color.blue())
     
-    def update_button_states(self):
+    def toggle_dsu_server(self):
+        if self.dsu_server:
+            self.dsu_server.stop()
+            self.dsu_server = None
+            self.dsu_button.setText('DSU Sunucusunu Başlat')
+            return
+        from ds4_dsu import DSUServer, DSU_PORT
+        server = DSUServer('127.0.0.1', DSU_PORT)
+        try:
+            server.start()
+        except OSError as e:
+            QMessageBox.warning(self, 'DSU Sunucusu', f'UDP {DSU_PORT} portu açılamadı: {e}')
+            return
+        server.add_slot(self.ds4.ring, self.ds4.device_info, calibration=self.ds4.imu_calibration)
+        self.dsu_server = server
+        self.dsu_button.setText(f'DSU Sunucusunu Durdur (:{server.port})')
+    
+    def toggle_virtual_gamepad(self):
+        if self.virtual_gamepad:
+            self.virtual_gamepad.destroy()
+            self.virtual_gamepad = None
+            self.gamepad_button.setText('Sanal Gamepad Başlat')
+            return
+        if not sys.platform.startswith('linux'):
+            QMessageBox.information(self, 'Sanal Gamepad', 'Sanal gamepad yalnızca Linux\'ta (uinput) kullanılabilir.')
+            return
+        from ds4_uinput import VirtualGamepad, load_mappings
+        mappings = load_mappings()
+        labels = [mapping.label or name for name, mapping in mappings.items()]
+        label, ok = QInputDialog.getItem(self, 'Sanal Gamepad', 'Tuş eşlemesi:', labels, 0, False)
+        if not ok:
+            return
+        mapping = list(mappings.values())[labels.index(label)]
+        self.load_features()
+        if not self.ds4.sticks.compiled:
+            self.ds4.sticks.compile()
+        gamepad = VirtualGamepad(mapping, sticks=self.ds4.sticks)
+        try:
+            gamepad.create()
+        except OSError as e:
+            QMessageBox.warning(self, 'Sanal Gamepad', str(e))
+            return
+        # Olaylar okuyucu thread'inde, her rapor geldiği anda yayınlanır
+        gamepad.attach(self.ds4.ring)
+        self.virtual_gamepad = gamepad
+        self.gamepad_button.setText(f'Sanal Gamepad Durdur ({label})')
+    
+    def toggle_capture(self):
+        text = self.switch_capture()
+        if self.capture_error:
+            QMessageBox.warning(self, 'Kayıt Hatası', text)
+        elif text and not self.capture:
+            QMessageBox.information(self, 'Kayıt', text)
+    
+    def switch_capture(self):
+        # Kaydı başlat/durdur; sonucu metin olarak döndür (hata varsa capture_error True)
+        self.capture_error = False
+        if self.capture:
+            self.capture.stop()
+            text = (f'{self.capture.records} rapor kaydedildi: {self.capture.path}'
+                    + (f' ({self.capture.lost} rapor kaçırıldı)' if self.capture.lost else ''))
+            self.capture = None
+            self.capture_button.setText('Kaydı Başlat')
+            return text
+        if not self.is_connected:
+            return 'kayıt için bağlı kontrolcü yok'
+        from ds4_capture import CaptureWriter, CAPTURE_EXTENSION
+        os.makedirs('captures', exist_ok=True)
+        path = os.path.join('captures', time.strftime('ds4_%Y%m%d_%H%M%S') + CAPTURE_EXTENSION)
+        try:
+            self.capture = CaptureWriter(self.ds4.ring, path)
+        except (OSError, ValueError) as e:
+            self.capture_error = True
+            return str(e)
+        self.capture.start()
+        self.capture_button.setText('Kaydı Durdur')
+        return f'kayıt başladı: {path}'
+    
+    def toggle_replay(self):
+        if self.replayer:
+            self.replayer.stop()
+            return
         if self.is_connected:
+            QMessageBox.information(self, 'Kayıt', 'Oynatmak için önce kontrolcü bağlantısını kesin.')
+            return
+        from ds4_capture import CaptureReplayer, CAPTURE_EXTENSION
+        path, _ = QFileDialog.getOpenFileName(self, 'Kayıt Seç', 'captures', f'DS4 Kayıtları (*{CAPTURE_EXTENSION})')
+        if not path:
+            return
+        try:
+            self.replayer = CaptureReplayer(path, self.ds4.ring, on_finished=self.replay_finished.emit)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, 'Kayıt Hatası', str(e))
+            return
+        self.load_features()
+        if not self.ds4.sticks.compiled:
+            self.ds4.sticks.compile()
+        self.replayer.start()
+        self.replay_button.setText('Oynatmayı Durdur')
+        self.status_label.setText(f'Durum: Kayıt oynatılıyor - {os.path.basename(path)} | Geliştirici: rtx4090')
+        self.status_label.setStyleSheet("QLabel { color: orange; }")
+    
+    def on_replay_finished(self):
+        self.replayer = None
+        self.replay_button.setText('Kaydı Oynat')
+        self.status_label.setText('Durum: Bağlı değil | Geliştirici: rtx4090')
+        self.status_label.setStyleSheet("QLabel { color: red; }")
+        # Oynatma sırasında takılan kontrolcü şimdi bağlanır
+        devices = self.hotplug.devices()
+        if devices:
+            self.on_controller_attached(devices[0])
+    
+    def update_button_states(self):
+        if self.is_connected or self.replayer:
             try:
-                # Kontrolcüden veri oku
-                data = self.ds4.device.read(64)
-                if data:
-                    # D-Pad durumları
-                    dpad = data[5] & 0x0F
-                    self.button_labels['↑'].setText(f'↑: {"🟩" if dpad == 0 or dpad == 1 or dpad == 7 else "⬛"}')
-                    self.button_labels['→'].setText(f'→: {"🟩" if dpad == 1 or dpad == 2 or dpad == 3 else "⬛"}')
-                    self.button_labels['↓'].setText(f'↓: {"🟩" if dpad == 3 or dpad == 4 or dpad == 5 else "⬛"}')
-                    self.button_labels['←'].setText(f'←: {"🟩" if dpad == 5 or dpad == 6 or dpad == 7 else "⬛"}')
-                    
-                    # Ana tuşlar
-                    buttons = data[5] >> 4
-                    self.button_labels['□'].setText(f'□: {"🟩" if buttons & 0x1 else "⬛"}')
-                    self.button_labels['×'].setText(f'×: {"🟩" if buttons & 0x2 else "⬛"}')
-                    self.button_labels['○'].setText(f'○: {"🟩" if buttons & 0x4 else "⬛"}')
-                    self.button_labels['△'].setText(f'△: {"🟩" if buttons & 0x8 else "⬛"}')
-                    
-                    # L1, R1, L2, R2
-                    buttons2 = data[6]
-                    self.button_labels['L1'].setText(f'L1: {"🟩" if buttons2 & 0x1 else "⬛"}')
-                    self.button_labels['R1'].setText(f'R1: {"🟩" if buttons2 & 0x2 else "⬛"}')
-                    self.button_labels['L2'].setText(f'L2: {"🟩" if buttons2 & 0x4 else "⬛"}')
-                    self.button_labels['R2'].setText(f'R2: {"🟩" if buttons2 & 0x8 else "⬛"}')
-                    
-                    # Share, Options, L3, R3, PS, TouchPad
-                    self.button_labels['SHARE'].setText(f'SHARE: {"🟩" if buttons2 & 0x10 else "⬛"}')
-                    self.button_labels['OPTIONS'].setText(f'OPTIONS: {"🟩" if buttons2 & 0x20 else "⬛"}')
-                    self.button_labels['L3'].setText(f'L3: {"🟩" if buttons2 & 0x40 else "⬛"}')
-                    self.button_labels['R3'].setText(f'R3: {"🟩" if buttons2 & 0x80 else "⬛"}')
-                    self.button_labels['PS'].setText(f'PS: {"🟩" if data[7] & 0x1 else "⬛"}')
-                    self.button_labels['TOUCHPAD'].setText(f'TOUCHPAD: {"🟩" if data[7] & 0x2 else "⬛"}')
-                    
-                    # Analog çubuklar
-                    lx = data[1] - 128
-                    ly = data[2] - 128
-                    rx = data[3] - 128
-                    ry = data[4] - 128
-                    
-                    self.left_stick_label.setText(f'Sol Analog: X: {lx}, Y: {ly}')
-                    self.right_stick_label.setText(f'Sağ Analog: X: {rx}, Y: {ry}')
+                # Okuyucunun aldığı en son raporu al; aradakiler tamponda kalır
+                latest = self.ds4.latest_report()
+                # Aradaki raporlar da işlenir; iki kare arasındaki kısa basışlar kaçmaz
+                self.ds4.buttons.consume(self.ds4.ring)
+                self.ds4.combos.consume(self.ds4.ring)
+                if self.input_stats:
+                    self.input_stats.consume(self.ds4.ring)
+                if self.orientation:
+                    self.update_orientation()
+                if latest and latest[0] != self.last_report_seq:
+                    self.last_report_seq, stamp, data = latest
+                    if decode_any(data, self.state):
+                        if self.ds4.sticks.compiled:
+                            self.ds4.sticks.apply(self.state)
+                        self.render_state(self.state)
+                        self.ds4.battery.update(self.state.status)
+                        if self.input_stats:
+                            self.input_stats.rendered(stamp)
+                else:
+                    # Yeni rapor yok: şemada hiçbir alan geçersiz kılınmadı
+                    self.widget_updates_skipped += ControllerWidget.ELEMENT_COUNT
             except Exception as e:
                 print(f"Tuş durumu güncelleme hatası: {e}")
     
+    def render_state(self, state):
+        # Şema yalnızca değişen öğelerin alanlarını yeniden çizer
+        updates = self.controller_view.show_state(state)
+        self.widget_updates += updates
+        self.widget_updates_skipped += ControllerWidget.ELEMENT_COUNT - updates
+    
     def closeEvent(self, event):
+        if self.dsu_server:
+            self.dsu_server.stop()
+        if self.virtual_gamepad:
+            self.virtual_gamepad.destroy()
+        if self.capture:
+            self.capture.stop()
+        if self.replayer:
+            self.replayer.stop()
         if self.is_connected:
-            self.ds4.set_vibration(0, 0)  # Titreşimi durdur
+            self.ds4.stop_vibration()  # Titreşimi durdur
             self.ds4.disconnect()
-        pygame.quit()
+        if self.multi_pad_window:
+            self.multi_pad_window.close()
+        if self.scope_window:
+            self.scope_window.close()
+        self.hotplug.stop()
         event.accept()
 
 def main():
+    # --startup-bench: pencere etkileşime hazır olunca geçen süreyi yazıp çık
+    startup_bench = '--startup-bench' in sys.argv
     app = QApplication(sys.argv)
     
-    # Yükleme ekranını göster
-    splash = LoadingScreen()
-    splash.show()
-    
-    # Ana pencereyi oluştur ama henüz gösterme
-    window = DS4ControlPanel()
-    
-    # Yükleme tamamlanana kadar bekle (5 saniye)
-    start_time = time.time()
-    while time.time() - start_time < 5:
-        remaining = 5 - (time.time() - start_time)
-        progress = min(100, ((5 - remaining) / 5) * 100)
-        splash.progress = int(progress)
+    # Yükleme ekranı yalnızca arayüz kurulurken görünür
+    splash = None
+    if not startup_bench:
+        splash = LoadingScreen()
+        splash.show()
+        splash.set_progress(30, "Arayüz hazırlanıyor")
         app.processEvents()
-        time.sleep(0.05)
     
-    # Yükleme tamamlandığında ana pencereyi göster
+    window = DS4ControlPanel()
     window.show()
-    splash.finish(window)
+    if splash:
+        splash.set_progress(100)
+        splash.finish(window)
+    
+    if startup_bench:
+        # Olay döngüsü ilk çizimi bitirdiğinde tetiklenir
+        def report_ready():
+            print(f"READY {(time.perf_counter() - STARTUP_CLOCK) * 1000:.1f}", flush=True)
+            window.close()
+            app.quit()
+        QTimer.singleShot(0, report_ready)
+    else:
+        # Özellik modülleri ilk çizimden sonra yüklenir
+        QTimer.singleShot(0, window.load_features)
     
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,470 @@
+"""
+DSU (cemuhook) UDP sunucusu
+Geliştirici: rtx4090
+
+Kontrolcü durumunu (tuşlar, çubuklar, dokunmatik ve hareket verisi) DSU
+protokolüyle aynı makinedeki ya da yerel ağdaki emülatörlere gönderir.
+Varsayılan port 26760'tır.
+
+İki thread kullanılır: biri istemci isteklerini (sürüm, bağlantı noktası
+bilgisi, abonelik) yanıtlar, diğeri halka tampondaki her yeni rapor için
+abonelere birer datagram gönderir. Okuyucu thread'e tek yük, halka tampon
+dinleyicisi olarak bir Event.set() çağrısıdır. Veri paketi her rapor için
+önceden ayrılmış tampona bir kez yazılır; istemciye özel yalnızca paket
+numarası ve CRC32 değişir.
+
+Paket yapısı (küçük uçlu): 'DSUS', protokol sürümü (1001), başlıktan sonraki
+uzunluk, CRC32 (bu alan sıfırken tüm paket üzerinden), sunucu kimliği, mesaj
+türü. İstemciler aboneliklerini yaklaşık saniyede bir yeniler; 5 saniye
+yenilemeyen abone silinir.
+
+Kullanım (Qt olmadan, ilk kontrolcüyle):
+    python ds4_dsu.py [--host 0.0.0.0] [--port 26760]
+"""
+
+import argparse
+import os
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from ds4_battery import battery_percent
+from ds4_imu import IMUCalibration
+from ds4_input import DS4State, decode_any, DEVICE_TICK_US
+
+DSU_PORT = 26760
+DSU_PROTOCOL_VERSION = 1001
+DSU_MAX_SLOTS = 4
+
+MSG_VERSION = 0x100000
+MSG_PORT_INFO = 0x100001
+MSG_PAD_DATA = 0x100002
+
+SERVER_MAGIC = b'DSUS'
+CLIENT_MAGIC = b'DSUC'
+
+SLOT_DISCONNECTED = 0
+SLOT_CONNECTED = 2
+MODEL_FULL_GYRO = 2
+CONNECTION_USB = 1
+CONNECTION_BT = 2
+
+# Abonelik türleri (bayrak biti)
+REGISTER_ALL = 0
+REGISTER_SLOT = 1
+REGISTER_MAC = 2
+
+CLIENT_TIMEOUT = 5.0
+
+# DSU eksen yönleri (DS4Windows'un DSU sunucusuyla aynı). Ham IMU değerleri
+# yuvanın kalibrasyonuyla (ds4_imu.IMUCalibration) g ve derece/sn'ye çevrilir.
+ACCEL_SIGNS = np.array((-1.0, -1.0, -1.0))
+GYRO_SIGNS = np.array((1.0, -1.0, -1.0))
+
+_HEADER = struct.Struct('<4sHHII')
+_MESSAGE_TYPE = struct.Struct('<I')
+HEADER_SIZE = _HEADER.size + _MESSAGE_TYPE.size
+_CRC_OFFSET = 8
+# Yuva başlığı: yuva, durum, model, bağlantı türü, MAC, pil
+_SLOT_HEAD = struct.Struct('<BBBB6sB')
+_PAD_DATA = struct.Struct('<BI' + 'BBBB' + '4B' + '4B' + '4B' + '4B' + 'BBHH' + 'BBHH' + 'Q6f')
+PAD_DATA_SIZE = HEADER_SIZE + _SLOT_HEAD.size + _PAD_DATA.size
+PORT_INFO_SIZE = HEADER_SIZE + _SLOT_HEAD.size + 1
+_PACKET_NUMBER_OFFSET = HEADER_SIZE + _SLOT_HEAD.size + 1
+_PACKET_NUMBER = struct.Struct('<I')
+_CRC = struct.Struct('<I')
+
+# DS4State.buttons -> DSU tuş baytları
+# bayt 1: Sol, Aşağı, Sağ, Yukarı, OPTIONS, R3, L3, SHARE (en yüksek bitten)
+# bayt 2: □, ×, ○, △, R1, L1, R2, L2
+_DPAD_TO_DSU = {0: 0x10, 1: 0x20, 2: 0x40, 3: 0x80}          # yukarı, sağ, aşağı, sol
+_SYSTEM_TO_DSU = {12: 0x01, 13: 0x08, 14: 0x02, 15: 0x04}      # SHARE, OPTIONS, L3, R3
+_FACE_TO_DSU = {4: 0x80, 5: 0x40, 6: 0x20, 7: 0x10, 8: 0x04, 9: 0x08, 10: 0x01, 11: 0x02}
+
+
+def _table(mapping, shift):
+    # 8 bitlik bir tuş grubunu DSU baytına çeviren 256 girdilik tablo
+    table = bytearray(256)
+    for value in range(256):
+        for bit, dsu in mapping.items():
+            if value & (1 << (bit - shift)):
+                table[value] |= dsu
+    return bytes(table)
+
+
+_BUTTONS1_LOW = _table(_DPAD_TO_DSU, 0)
+_BUTTONS1_HIGH = _table(_SYSTEM_TO_DSU, 12)
+_BUTTONS2 = _table(_FACE_TO_DSU, 4)
+
+
+def dsu_battery(status):
+    percent, charging, cable = battery_percent(status)
+    if percent is None:
+        return 0x00
+    if cable:
+        return 0xEE if charging else 0xEF
+    if percent <= 10:
+        return 0x01
+    if percent <= 30:
+        return 0x02
+    if percent <= 60:
+        return 0x03
+    if percent < 95:
+        return 0x04
+    return 0x05
+
+
+def mac_bytes(text):
+    # "aa:bb:cc:dd:ee:ff" -> 6 bayt; çözülemezse sıfırlar
+    try:
+        value = bytes(int(part, 16) for part in text.split(':'))
+    except (AttributeError, ValueError):
+        return bytes(6)
+    return value if len(value) == 6 else bytes(6)
+
+
+def finish_packet(packet, length=None):
+    # CRC alanını sıfırla, tüm paketin CRC32'sini hesaplayıp yaz
+    view = memoryview(packet)[:length] if length else memoryview(packet)
+    _CRC.pack_into(packet, _CRC_OFFSET, 0)
+    _CRC.pack_into(packet, _CRC_OFFSET, zlib.crc32(view))
+    return view
+
+
+def packet_valid(data, magic):
+    if len(data) < HEADER_SIZE:
+        return False
+    found, version, length, crc, _ = _HEADER.unpack_from(data)
+    if found != magic or version != DSU_PROTOCOL_VERSION or len(data) < _HEADER.size + length:
+        return False
+    check = bytearray(data[:_HEADER.size + length])
+    _CRC.pack_into(check, _CRC_OFFSET, 0)
+    return zlib.crc32(check) == crc
+
+
+def build_packet(magic, sender_id, message_type, payload):
+    packet = bytearray(HEADER_SIZE + len(payload))
+    _HEADER.pack_into(packet, 0, magic, DSU_PROTOCOL_VERSION, len(packet) - _HEADER.size, 0, sender_id)
+    _MESSAGE_TYPE.pack_into(packet, _HEADER.size, message_type)
+    packet[HEADER_SIZE:] = payload
+    finish_packet(packet)
+    return bytes(packet)
+
+
+class DSUSlot:
+    # Bir DSU yuvasına bağlanan kontrolcü: halka tamponu, tanımlayıcı bilgisi ve
+    # IMU kalibrasyonu (None ise nominal değerler)
+    def __init__(self, slot, ring, info=None, calibration=None):
+        self.slot = slot
+        self.ring = ring
+        self.info = info or {}
+        self.calibration = calibration or IMUCalibration()
+        # Ham ivme ve jiroskop için yeniden kullanılan tampon
+        self.imu_raw = np.zeros((2, 3))
+        self.mac = mac_bytes(self.info.get('serial', ''))
+        self.connection = CONNECTION_BT if self.info.get('transport') == 'bt' else CONNECTION_USB
+        self.cursor = ring.head
+        self.state = DS4State()
+        self.device_time_us = 0.0
+        self._last_timestamp = None
+        self.battery = 0x00
+
+
+class DSUServer:
+    def __init__(self, host='127.0.0.1', port=DSU_PORT, client_timeout=CLIENT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.client_timeout = client_timeout
+        self.server_id = int.from_bytes(os.urandom(4), 'little')
+        self.slots = {}
+        # (adres) -> [son yenileme, paket numarası, {yuva: ...} veya None = tümü]
+        self.clients = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._socket = None
+        self._threads = []
+        self._packet = bytearray(PAD_DATA_SIZE)
+        _HEADER.pack_into(self._packet, 0, SERVER_MAGIC, DSU_PROTOCOL_VERSION,
+                          PAD_DATA_SIZE - _HEADER.size, 0, self.server_id)
+        _MESSAGE_TYPE.pack_into(self._packet, _HEADER.size, MSG_PAD_DATA)
+        self.datagrams = 0
+        self.requests = 0
+        self.send_errors = 0
+
+    def add_slot(self, ring, info=None, slot=0, calibration=None):
+        if not 0 <= slot < DSU_MAX_SLOTS:
+            raise ValueError(f"Geçersiz DSU yuvası: {slot}")
+        entry = DSUSlot(slot, ring, info, calibration)
+        with self._lock:
+            old = self.slots.get(slot)
+            if old is not None:
+                old.ring.listeners.remove(self._wakeup.set)
+            self.slots[slot] = entry
+        ring.listeners.append(self._wakeup.set)
+        return entry
+
+    def remove_slot(self, slot=0):
+        with self._lock:
+            entry = self.slots.pop(slot, None)
+        if entry is not None and self._wakeup.set in entry.ring.listeners:
+            entry.ring.listeners.remove(self._wakeup.set)
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((self.host, self.port))
+        self.port = self._socket.getsockname()[1]
+        self._socket.settimeout(0.5)
+        self._threads = [threading.Thread(target=self._serve_requests, name="DSURequests", daemon=True),
+                         threading.Thread(target=self._send_loop, name="DSUSender", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stopping = True
+        self._wakeup.set()
+        for thread in self._threads:
+            if thread.is_alive() and threading.current_thread() is not thread:
+                thread.join(timeout)
+        for slot in list(self.slots):
+            self.remove_slot(slot)
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    # --- İstemci istekleri ---
+
+    def _serve_requests(self):
+        while not self._stopping:
+            try:
+                data, address = self._socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self._stopping:
+                    break
+                continue
+            if not packet_valid(data, CLIENT_MAGIC):
+                continue
+            self.requests += 1
+            message_type = _MESSAGE_TYPE.unpack_from(data, _HEADER.size)[0]
+            try:
+                if message_type == MSG_VERSION:
+                    self._reply(address, MSG_VERSION, struct.pack('<H', DSU_PROTOCOL_VERSION))
+                elif message_type == MSG_PORT_INFO:
+                    self._port_info(address, data)
+                elif message_type == MSG_PAD_DATA:
+                    self._subscribe(address, data)
+            except (struct.error, OSError) as e:
+                print(f"DSU isteği işlenemedi ({address}): {e}")
+
+    def _reply(self, address, message_type, payload):
+        self._socket.sendto(build_packet(SERVER_MAGIC, self.server_id, message_type, payload), address)
+
+    def _slot_head(self, slot):
+        entry = self.slots.get(slot)
+        if entry is None:
+            return _SLOT_HEAD.pack(slot, SLOT_DISCONNECTED, 0, 0, bytes(6), 0)
+        return _SLOT_HEAD.pack(slot, SLOT_CONNECTED, MODEL_FULL_GYRO, entry.connection, entry.mac, entry.battery)
+
+    def _port_info(self, address, data):
+        count = struct.unpack_from('<i', data, HEADER_SIZE)[0]
+        count = max(0, min(count, DSU_MAX_SLOTS))
+        for slot in data[HEADER_SIZE + 4:HEADER_SIZE + 4 + count]:
+            if slot < DSU_MAX_SLOTS:
+                self._reply(address, MSG_PORT_INFO, self._slot_head(slot) + b'\0')
+
+    def _subscribe(self, address, data):
+        flags, slot, mac = struct.unpack_from('<BB6s', data, HEADER_SIZE)
+        now = time.monotonic()
+        with self._lock:
+            client = self.clients.get(address)
+            if client is None:
+                client = self.clients[address] = [now, 0, set(), set()]
+            client[0] = now
+            if flags == REGISTER_ALL:
+                client[2] = None
+            else:
+                if client[2] is not None and flags & REGISTER_SLOT:
+                    client[2].add(slot)
+                if client[2] is not None and flags & REGISTER_MAC:
+                    client[3].add(mac)
+
+    def _wants(self, client, entry):
+        slots = client[2]
+        return slots is None or entry.slot in slots or entry.mac in client[3]
+
+    # --- Veri gönderimi ---
+
+    def _send_loop(self):
+        wait = self._wakeup.wait
+        clear = self._wakeup.clear
+        while not self._stopping:
+            wait(1.0)
+            clear()
+            now = time.monotonic()
+            with self._lock:
+                expired = [address for address, client in self.clients.items()
+                           if now - client[0] > self.client_timeout]
+                for address in expired:
+                    del self.clients[address]
+                slots = list(self.slots.values())
+                clients = list(self.clients.items())
+            for entry in slots:
+                self._send_slot(entry, clients)
+
+    def _send_slot(self, entry, clients):
+        ring = entry.ring
+        if ring.lost(entry.cursor):
+            entry._last_timestamp = None
+        targets = [(address, client) for address, client in clients if self._wants(client, entry)]
+        for seq, _, report in ring.reports_since(entry.cursor):
+            entry.cursor = seq + 1
+            if not targets or decode_any(report, entry.state) is None:
+                continue
+            self._fill(entry)
+            packet = self._packet
+            for address, client in targets:
+                client[1] = (client[1] + 1) & 0xFFFFFFFF
+                _PACKET_NUMBER.pack_into(packet, _PACKET_NUMBER_OFFSET, client[1])
+                try:
+                    self._socket.sendto(finish_packet(packet), address)
+                    self.datagrams += 1
+                except OSError:
+                    self.send_errors += 1
+        if not targets:
+            entry.cursor = ring.head
+
+    def _fill(self, entry):
+        # Son çözülen durumu önceden ayrılmış veri paketine yaz
+        state = entry.state
+        if entry._last_timestamp is not None:
+            entry.device_time_us += ((state.timestamp - entry._last_timestamp) & 0xFFFF) * DEVICE_TICK_US
+        entry._last_timestamp = state.timestamp
+        entry.battery = dsu_battery(state.status)
+        raw = entry.imu_raw
+        raw[0] = state.accel_x, state.accel_y, state.accel_z
+        raw[1] = state.gyro_x, state.gyro_y, state.gyro_z
+        accel = (entry.calibration.accel(raw[0]) * ACCEL_SIGNS).tolist()
+        gyro = (entry.calibration.gyro(raw[1]) * GYRO_SIGNS).tolist()
+        buttons = state.buttons
+        dpad = buttons & 0x0F
+        face = (buttons >> 4) & 0xFF
+        _SLOT_HEAD.pack_into(self._packet, HEADER_SIZE, entry.slot, SLOT_CONNECTED, MODEL_FULL_GYRO,
+                             entry.connection, entry.mac, entry.battery)
+        _PAD_DATA.pack_into(
+            self._packet, HEADER_SIZE + _SLOT_HEAD.size,
+            1, 0,
+            _BUTTONS1_LOW[dpad] | _BUTTONS1_HIGH[(buttons >> 12) & 0x0F], _BUTTONS2[face],
+            (buttons >> 16) & 1, (buttons >> 17) & 1,
+            state.lx, 255 - state.ly, state.rx, 255 - state.ry,
+            255 if dpad & 0x08 else 0, 255 if dpad & 0x04 else 0, 255 if dpad & 0x02 else 0, 255 if dpad & 0x01 else 0,
+            255 if face & 0x08 else 0, 255 if face & 0x04 else 0, 255 if face & 0x02 else 0, 255 if face & 0x01 else 0,
+            255 if face & 0x20 else 0, 255 if face & 0x10 else 0, state.r2, state.l2,
+            state.touch0_active, state.touch0_id, state.touch0_x, state.touch0_y,
+            state.touch1_active, state.touch1_id, state.touch1_x, state.touch1_y,
+            int(entry.device_time_us), *accel, *gyro)
+
+    def stats(self):
+        return {
+            'clients': len(self.clients),
+            'slots': len(self.slots),
+            'requests': self.requests,
+            'datagrams': self.datagrams,
+            'send_errors': self.send_errors,
+        }
+
+
+class DSUClient:
+    # Testler ve ölçümler için basit DSU istemcisi (emülatör yerine)
+    def __init__(self, server=('127.0.0.1', DSU_PORT), timeout=1.0):
+        self.server = server
+        self.client_id = int.from_bytes(os.urandom(4), 'little')
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.settimeout(timeout)
+
+    def _send(self, message_type, payload=b''):
+        self.socket.sendto(build_packet(CLIENT_MAGIC, self.client_id, message_type, payload), self.server)
+
+    def request_version(self):
+        self._send(MSG_VERSION)
+
+    def request_ports(self, slots=(0, 1, 2, 3)):
+        self._send(MSG_PORT_INFO, struct.pack('<i', len(slots)) + bytes(slots))
+
+    def subscribe(self, slot=None):
+        # slot verilmezse tüm yuvalara abone olunur
+        if slot is None:
+            self._send(MSG_PAD_DATA, struct.pack('<BB6s', REGISTER_ALL, 0, bytes(6)))
+        else:
+            self._send(MSG_PAD_DATA, struct.pack('<BB6s', REGISTER_SLOT, slot, bytes(6)))
+
+    def receive(self):
+        # (mesaj türü, ham paket); zaman aşımında socket.timeout yükselir
+        data = self.socket.recv(1024)
+        if not packet_valid(data, SERVER_MAGIC):
+            return None, data
+        return _MESSAGE_TYPE.unpack_from(data, _HEADER.size)[0], data
+
+    @staticmethod
+    def parse_pad_data(data):
+        # Veri paketinden (paket numarası, tuş1, tuş2, lx, ly, zaman damgası, ivme, jiroskop)
+        values = _PAD_DATA.unpack_from(data, HEADER_SIZE + _SLOT_HEAD.size)
+        return {
+            'packet': values[1], 'buttons1': values[2], 'buttons2': values[3],
+            'lx': values[6], 'ly': values[7], 'timestamp_us': values[-7],
+            'accel': values[-6:-3], 'gyro': values[-3:],
+        }
+
+    def close(self):
+        self.socket.close()
+
+
+def main():
+    from ds4_backend import HidapiBackend
+    from ds4_input import ReportRing, InputReader, valid_report
+    from ds4_imu import read_calibration
+
+    parser = argparse.ArgumentParser(description='DualShock 4 DSU (cemuhook) sunucusu')
+    parser.add_argument('--host', default='127.0.0.1', help='dinlenecek adres (yerel ağ için 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=DSU_PORT)
+    args = parser.parse_args()
+
+    backend = HidapiBackend()
+    devices = backend.enumerate()
+    if not devices:
+        print("DualShock 4 bulunamadı")
+        return
+    info = devices[0]
+    device = backend.open(info)
+    report = None
+    if info['transport'] == 'bt':
+        # Genişletilmiş rapor kipini açar; aynı rapor kalibrasyonu da taşır
+        report = device.get_feature_report(0x05, 41)
+    calibration = read_calibration(device, info['transport'], info.get('serial') or None, report)
+    ring = ReportRing(validate=valid_report)
+    reader = InputReader(device, ring)
+    server = DSUServer(args.host, args.port)
+    server.add_slot(ring, info, calibration=calibration)
+    reader.start()
+    server.start()
+    print(f"DSU sunucusu {args.host}:{server.port} üzerinde çalışıyor (Ctrl+C ile durur)")
+    try:
+        while True:
+            time.sleep(5)
+            stats = server.stats()
+            print(f"İstemci: {stats['clients']}, gönderilen: {stats['datagrams']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        reader.stop()
+        device.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+DualShock 4 titreşim desenleri: anahtar karelerden derlenen, iptal edilebilir oynatıcı
+Geliştirici: rtx4090
+
+Desen biçimi (yerleşik desenler ve patterns/*.json dosyaları için aynı):
+    {
+        "name": "nabiz",
+        "label": "Nabız",              # Arayüzde buton metni (yoksa buton gösterilmez)
+        "interpolation": "step",       # "linear" veya "step"
+        "repeat": 3,
+        "keyframes": [[0.0, 255, 255], [0.2, 0, 0], [0.4, 0, 0]]
+    }
+Her anahtar kare [zaman (sn), küçük motor, büyük motor] şeklindedir.
+"""
+
+import json
+import os
+import threading
+import time
+from array import array
+
+DEFAULT_TICK_RATE = 250  # Hz, çıkış yazıcısının 4 ms aralığıyla aynı
+
+PATTERN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns')
+
+BUILTIN_PATTERNS = [
+    {
+        'name': 'artan', 'label': 'Artan', 'interpolation': 'linear', 'repeat': 1,
+        'keyframes': [[0.0, 0, 0], [2.55, 255, 255]],
+    },
+    {
+        'name': 'dalgali', 'label': 'Dalgalı', 'interpolation': 'linear', 'repeat': 2,
+        'keyframes': [[0.0, 0, 255], [1.3, 255, 0], [2.6, 0, 255]],
+    },
+    {
+        'name': 'nabiz', 'label': 'Nabız', 'interpolation': 'step', 'repeat': 3,
+        'keyframes': [[0.0, 255, 255], [0.2, 0, 0], [0.4, 0, 0]],
+    },
+    {
+        'name': 'soft', 'label': 'Yumuşak', 'interpolation': 'linear', 'repeat': 2,
+        'keyframes': [[0.0, 0, 0], [2.6, 128, 128], [5.2, 0, 0]],
+    },
+    {
+        # Bağlantı sonrası kısa test titreşimi
+        'name': 'baglanti', 'interpolation': 'step', 'repeat': 1,
+        'keyframes': [[0.0, 128, 128], [0.5, 0, 0]],
+    },
+]
+
+
+class CompiledPattern:
+    __slots__ = ('name', 'label', 'small', 'big', 'tick_rate')
+
+    def __init__(self, name, label, small, big, tick_rate):
+        self.name = name
+        self.label = label
+        self.small = small
+        self.big = big
+        self.tick_rate = tick_rate
+
+    @property
+    def duration(self):
+        return len(self.small) / self.tick_rate
+
+
+def compile_pattern(pattern, tick_rate=DEFAULT_TICK_RATE):
+    # Anahtar kareleri sabit tick hızında motor değeri dizilerine çevir
+    keyframes = sorted(pattern['keyframes'], key=lambda k: k[0])
+    if not keyframes:
+        raise ValueError(f"Desende anahtar kare yok: {pattern.get('name')}")
+    step = pattern.get('interpolation', 'linear') == 'step'
+    repeat = max(1, int(pattern.get('repeat', 1)))
+    cycle = keyframes[-1][0]
+    cycle_ticks = max(1, round(cycle * tick_rate))
+
+    small = array('B')
+    big = array('B')
+    k = 0
+    for tick in range(cycle_ticks):
+        t = tick / tick_rate
+        while k + 1 < len(keyframes) and keyframes[k + 1][0] <= t:
+            k += 1
+        t0, s0, b0 = keyframes[k]
+        if step or k + 1 >= len(keyframes):
+            s, b = s0, b0
+        else:
+            t1, s1, b1 = keyframes[k + 1]
+            f = (t - t0) / (t1 - t0)
+            s = s0 + (s1 - s0) * f
+            b = b0 + (b1 - b0) * f
+        small.append(max(0, min(255, round(s))))
+        big.append(max(0, min(255, round(b))))
+
+    return CompiledPattern(pattern['name'], pattern.get('label'),
+                           small * repeat, big * repeat, tick_rate)
+
+
+def load_pattern_file(path):
+    with open(path, encoding='utf-8') as f:
+        pattern = json.load(f)
+    pattern.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return pattern
+
+
+def load_pattern_dir(path=PATTERN_DIR):
+    patterns = []
+    if not os.path.isdir(path):
+        return patterns
+    for filename in sorted(os.listdir(path)):
+        if filename.endswith('.json'):
+            try:
+                patterns.append(load_pattern_file(os.path.join(path, filename)))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Titreşim deseni yüklenemedi ({filename}): {e}")
+    return patterns
+
+
+class HapticsPlayer(threading.Thread):
+    # Derlenmiş desenleri arka planda oynatır. Her katmanda en fazla bir desen
+    # çalar; aynı katmanda yeni desen eskisini keser, farklı katmanlar üst üste
+    # bindirilir (motor başına en büyük değer). Kare indeksi geçen süreden
+    # hesaplandığı için geç uyanmalar kaymaya (drift) yol açmaz.
+    def __init__(self, sink, tick_rate=DEFAULT_TICK_RATE):
+        super().__init__(name="DS4Haptics", daemon=True)
+        self.sink = sink
+        self.tick_rate = tick_rate
+        self.period = 1.0 / tick_rate
+        self.patterns = {}
+        self._layers = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        # Çıkışa en son gönderilen (küçük, büyük); attach sonrası None (bilinmiyor)
+        self._last = (0, 0)
+        self.ticks = 0
+        self.missed_ticks = 0
+
+        for pattern in BUILTIN_PATTERNS + load_pattern_dir():
+            self.add_pattern(pattern)
+
+    def add_pattern(self, pattern):
+        try:
+            compiled = compile_pattern(pattern, self.tick_rate)
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"Titreşim deseni derlenemedi ({pattern.get('name')}): {e}")
+            return None
+        self.patterns[compiled.name] = compiled
+        return compiled
+
+    def play(self, name, layer=0):
+        compiled = self.patterns[name]
+        with self._lock:
+            self._layers[layer] = (compiled, time.perf_counter())
+        self._wake.set()
+
+    def cancel(self, layer=None):
+        with self._lock:
+            if layer is None:
+                self._layers.clear()
+            else:
+                self._layers.pop(layer, None)
+        self._wake.set()
+
+    def attach(self, sink=None):
+        # Yeni bağlantı veya çıkış: cihazın motor durumu bilinmiyor, bir sonraki
+        # değer aynı olsa bile yeniden gönderilir
+        with self._lock:
+            if sink is not None:
+                self.sink = sink
+            self._last = None
+        self._wake.set()
+
+    def is_playing(self, layer=None):
+        with self._lock:
+            return bool(self._layers) if layer is None else layer in self._layers
+
+    def run(self):
+        clock = time.perf_counter
+        rate = self.tick_rate
+        period = self.period
+        epoch = clock()
+        expected_tick = None
+        while not self._stopping:
+            now = clock()
+            small = big = 0
+            with self._lock:
+                layers = self._layers
+                for layer in list(layers):
+                    compiled, start = layers[layer]
+                    index = int((now - start) * rate)
+                    if index >= len(compiled.small):
+                        del layers[layer]
+                        continue
+                    if compiled.small[index] > small:
+                        small = compiled.small[index]
+                    if compiled.big[index] > big:
+                        big = compiled.big[index]
+                active = bool(layers)
+                sink, last = self.sink, self._last
+
+            if (small, big) != last:
+                sink(small, big)
+                with self._lock:
+                    # Bu arada attach çağrıldıysa sıfırlama korunur
+                    if self._last is last:
+                        self._last = (small, big)
+
+            if not active:
+                # Boşta: yeni bir desen gelene kadar uyu
+                expected_tick = None
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            # Bir sonraki tick mutlak zaman ızgarasından hesaplanır
+            tick = int((now - epoch) / period)
+            if expected_tick is not None and tick > expected_tick:
+                self.missed_ticks += tick - expected_tick
+            self.ticks += 1
+            expected_tick = tick + 1
+            delay = epoch + expected_tick * period - clock()
+            if delay > 0:
+                self._wake.wait(delay)
+            self._wake.clear()
+
+    def stop(self, timeout=1.0):
+        self._stopping = True
+        self.cancel()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
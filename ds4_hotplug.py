@@ -0,0 +1,247 @@
+"""
+DualShock 4 tak-çıkar takibi
+Geliştirici: rtx4090
+
+Linux'ta netlink uevent yayınını dinler ve /sys/class/hidraw üzerinden
+yalnızca Sony DS4 cihazlarını önbellekte tutar; hiçbir zaman tüm HID
+cihazlarını yeniden listelemez. udev çalışıyorsa onun yayını dinlenir:
+çekirdeğin "add" olayı /dev/hidrawN oluşturulup izinleri verilmeden gelir,
+udev'inki ise düğüm açılmaya hazır olunca. Diğer sistemlerde üreticiye göre
+filtrelenmiş hid.enumerate() ile yoklama yapar.
+"""
+
+import os
+import selectors
+import socket
+import struct
+import sys
+import threading
+
+SONY_VENDOR_ID = 0x054C
+DS4_PRODUCT_IDS = (
+    0x09CC,  # DualShock 4 v2
+    0x05C4,  # DualShock 4 v1
+    0x0BA0,  # DualShock 4 USB Wireless Adaptor
+)
+
+# Linux çekirdeğinin HID veri yolu kodları
+BUS_USB = 0x03
+BUS_BLUETOOTH = 0x05
+# hidapi'nin hid_bus_type değerleri
+HIDAPI_BUS_BLUETOOTH = 2
+
+SYS_HIDRAW = '/sys/class/hidraw'
+NETLINK_KOBJECT_UEVENT = 15
+# Çekirdek olayları 1. gruba, udev'in işlediği olaylar 2. gruba yayınlanır
+NETLINK_GROUP_KERNEL = 1
+NETLINK_GROUP_UDEV = 2
+UDEV_CONTROL = '/run/udev/control'
+# udev mesajı başlığı: "libudev\0", sihirli sayı (ağ sırası), başlık boyutu,
+# özelliklerin konumu ve uzunluğu
+UDEV_MESSAGE_PREFIX = b'libudev\0'
+UDEV_MESSAGE_MAGIC = 0xFEEDCAFE
+_UDEV_HEADER = struct.Struct('=8s4xIII')
+
+
+def read_hidraw_info(name, sys_root=SYS_HIDRAW):
+    # /sys/class/hidraw/<name>/device/uevent içindeki HID_ID satırını çöz.
+    # DS4 değilse veya okunamıyorsa None döner.
+    try:
+        with open(os.path.join(sys_root, name, 'device', 'uevent'), encoding='utf-8') as f:
+            fields = dict(line.rstrip('\n').split('=', 1) for line in f if '=' in line)
+    except OSError:
+        return None
+    try:
+        bus, vendor, product = (int(part, 16) for part in fields['HID_ID'].split(':'))
+    except (KeyError, ValueError):
+        return None
+    if vendor != SONY_VENDOR_ID or product not in DS4_PRODUCT_IDS:
+        return None
+    return {
+        'path': f'/dev/{name}'.encode(),
+        'vendor_id': vendor,
+        'product_id': product,
+        'bus': bus,
+        'transport': 'bt' if bus == BUS_BLUETOOTH else 'usb',
+        'name': fields.get('HID_NAME', ''),
+        'serial': fields.get('HID_UNIQ', ''),
+    }
+
+
+def scan_hidraw(sys_root=SYS_HIDRAW):
+    # Sistemdeki tüm DS4 hidraw düğümleri: {yol: bilgi}
+    found = {}
+    try:
+        names = sorted(os.listdir(sys_root))
+    except OSError:
+        names = []
+    for name in names:
+        info = read_hidraw_info(name, sys_root)
+        if info:
+            found[info['path']] = info
+    return found
+
+
+def info_from_hidapi(dev):
+    # hid.enumerate() kaydını read_hidraw_info ile aynı biçime çevir
+    return {
+        'path': dev['path'],
+        'vendor_id': dev['vendor_id'],
+        'product_id': dev['product_id'],
+        'bus': dev.get('bus_type', 0),
+        'transport': 'bt' if dev.get('bus_type') == HIDAPI_BUS_BLUETOOTH else 'usb',
+        'name': dev.get('product_string') or '',
+        'serial': dev.get('serial_number') or '',
+    }
+
+
+def parse_uevent(message):
+    # "eylem@devpath\0ANAHTAR=DEĞER\0..." biçimindeki çekirdek mesajı ya da
+    # başlığı "libudev\0" olan udev mesajı; tanınmayan mesajlar için {}
+    if message.startswith(UDEV_MESSAGE_PREFIX):
+        if len(message) < _UDEV_HEADER.size:
+            return {}
+        if int.from_bytes(message[8:12], 'big') != UDEV_MESSAGE_MAGIC:
+            return {}
+        _, _, offset, length = _UDEV_HEADER.unpack_from(message)
+        parts = message[offset:offset + length].split(b'\0')
+    else:
+        parts = message.split(b'\0')[1:]
+    fields = {}
+    for part in parts:
+        key, sep, value = part.partition(b'=')
+        if sep:
+            fields[key.decode(errors='replace')] = value.decode(errors='replace')
+    return fields
+
+
+def udev_running(control=UDEV_CONTROL):
+    # udevd'nin denetim soketi varsa udev çalışıyordur (kapsayıcılarda genelde yok)
+    return os.path.exists(control)
+
+
+class HotplugMonitor(threading.Thread):
+    # on_attach(info) / on_detach(info) geri çağrıları bu thread'den yapılır
+    def __init__(self, on_attach=None, on_detach=None, poll_interval=1.0):
+        super().__init__(name="DS4Hotplug", daemon=True)
+        self.on_attach = on_attach
+        self.on_detach = on_detach
+        self.poll_interval = poll_interval
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._socket = None
+        self._selector = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                                             NETLINK_KOBJECT_UEVENT)
+                self._socket.bind((0, NETLINK_GROUP_UDEV if udev_running() else NETLINK_GROUP_KERNEL))
+            except OSError as e:
+                print(f"Netlink soketi açılamadı, yoklamaya geçiliyor: {e}")
+                self._socket = None
+        if self._socket is not None:
+            # stop() döngüyü bu borudan uyandırır; zaman aşımıyla yoklamaya gerek kalmaz
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._socket, selectors.EVENT_READ)
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+    def devices(self):
+        with self._lock:
+            return list(self._devices.values())
+
+    def rescan(self):
+        # Önbelleği baştan kur; farkları olay olarak bildir
+        if self._socket is not None:
+            found = scan_hidraw()
+        else:
+            found = self._enumerate()
+        self._update(found)
+
+    def _enumerate(self):
+        import hid
+        found = {}
+        try:
+            for dev in hid.enumerate(SONY_VENDOR_ID):
+                if dev['product_id'] in DS4_PRODUCT_IDS:
+                    found[dev['path']] = info_from_hidapi(dev)
+        except Exception as e:
+            print(f"HID listeleme hatası: {e}")
+        return found
+
+    def _update(self, found):
+        with self._lock:
+            removed = [info for path, info in self._devices.items() if path not in found]
+            added = [info for path, info in found.items() if path not in self._devices]
+            self._devices = found
+        for info in removed:
+            self._emit(self.on_detach, info)
+        for info in added:
+            self._emit(self.on_attach, info)
+
+    def _emit(self, callback, info):
+        if callback:
+            try:
+                callback(info)
+            except Exception as e:
+                print(f"Tak-çıkar bildirimi hatası: {e}")
+
+    def _handle_uevent(self, fields):
+        if fields.get('SUBSYSTEM') != 'hidraw' or 'DEVNAME' not in fields:
+            return
+        name = os.path.basename(fields['DEVNAME'])
+        path = f'/dev/{name}'.encode()
+        action = fields.get('ACTION')
+        if action == 'add':
+            info = read_hidraw_info(name)
+            if info:
+                with self._lock:
+                    self._devices[path] = info
+                self._emit(self.on_attach, info)
+        elif action == 'remove':
+            with self._lock:
+                info = self._devices.pop(path, None)
+            if info:
+                self._emit(self.on_detach, info)
+
+    def run(self):
+        self.rescan()
+        while not self._stop_event.is_set():
+            if self._socket is None:
+                self._stop_event.wait(self.poll_interval)
+                if not self._stop_event.is_set():
+                    self.rescan()
+                continue
+            ready = [key.fileobj for key, _ in self._selector.select()]
+            if self._socket not in ready:
+                continue
+            try:
+                message = self._socket.recv(8192)
+            except OSError as e:
+                print(f"Netlink okuma hatası: {e}")
+                self._stop_event.wait(self.poll_interval)
+                continue
+            self._handle_uevent(parse_uevent(message))
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self._selector is not None:
+            self._wake()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+        if self._selector is None:
+            return
+        self._selector.close()
+        self._selector = None
+        self._socket.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
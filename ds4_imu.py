@@ -0,0 +1,274 @@
+"""
+DualShock 4 hareket sensörleri: fabrika kalibrasyonu ve yönelim filtresi
+Geliştirici: rtx4090
+
+Kalibrasyon, bağlanırken özellik raporundan (USB'de 0x02, Bluetooth'ta
+0x05) bir kez okunur ve kontrolcü başına önbellekte tutulur. Dönüşüm Linux
+hid-playstation sürücüsüyle aynıdır: jiroskop (ham - sapma) * hız / aralık
+derece/sn, ivmeölçer (ham - orta) * 2 / aralık g verir.
+
+Yönelim Mahony filtresiyle izlenir. Örnekler halka tampondan NumPy
+dizileri halinde toplu alınır. Pencere içindeki jiroskop artımları
+koning düzeltmeli tek bir dönme vektörüne toplanır, ivmeölçer düzeltmesi
+pencere başına bir kez uygulanır. Böylece örnek başına Python çağrısı
+yapılmaz. Bu, ataletsel seyir sistemlerindeki yüksek hızlı artım /
+düşük hızlı durum güncellemesi ayrımıyla aynıdır.
+
+Filtre ekseni: X = DS4 x (sağ), Y = -DS4 z, Z = DS4 y (yukarı). Kontrolcü
+masada düz dururken ivme +Z yönündedir.
+"""
+
+import math
+import struct
+
+import numpy as np
+
+from ds4_input import (BT_REPORT_ID, USB_REPORT_ID, BT_REPORT_SIZE, MIN_REPORT_LENGTH, DEVICE_TICK_US,
+                       BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE,
+                       USB_CALIBRATION_REPORT_ID, USB_CALIBRATION_REPORT_SIZE)
+from ds4_output import TRANSPORT_BT, TRANSPORT_USB
+
+# Kalibrasyon yoksa kullanılan nominal değerler
+NOMINAL_GYRO_PER_DEG_S = 16.384
+NOMINAL_ACCEL_PER_G = 8192.0
+
+# Rapor kimliğinden sonraki ilk bayta göre IMU alanları: zaman damgası (H),
+# sıcaklık (B), jiroskop (3h), ivmeölçer (3h)
+_TIMESTAMP_OFFSET = 10
+_IMU_OFFSET = 13
+_IMU_BYTES = 12
+# DS4 ekseni -> filtre ekseni (x, -z, y)
+_AXIS_ORDER = np.array([0, 2, 1])
+_AXIS_SIGNS = np.array([1.0, -1.0, 1.0])
+
+_calibration_cache = {}
+
+
+class IMUCalibration:
+    # bias/scale: (pitch, yaw, roll) ve (x, y, z) için; değer = (ham - bias) * scale
+    __slots__ = ('gyro_bias', 'gyro_scale', 'accel_bias', 'accel_scale', 'factory')
+
+    def __init__(self, gyro_bias=(0, 0, 0), gyro_scale=None, accel_bias=(0, 0, 0), accel_scale=None, factory=False):
+        self.gyro_bias = np.array(gyro_bias, dtype=np.float64)
+        self.gyro_scale = np.array(gyro_scale or (1 / NOMINAL_GYRO_PER_DEG_S,) * 3, dtype=np.float64)
+        self.accel_bias = np.array(accel_bias, dtype=np.float64)
+        self.accel_scale = np.array(accel_scale or (1 / NOMINAL_ACCEL_PER_G,) * 3, dtype=np.float64)
+        self.factory = factory
+
+    @classmethod
+    def from_report(cls, report, transport=TRANSPORT_USB):
+        # Özellik raporunu çöz; anlamsız değerler varsa o eksen nominal kalır
+        values = struct.unpack_from('<17h', bytes(report), 1)
+        gyro_bias = values[0:3]
+        if transport == TRANSPORT_BT:
+            plus, minus = values[3:6], values[6:9]
+        else:
+            plus, minus = values[3:9:2], values[4:9:2]
+        speed_2x = values[9] + values[10]
+        calibration = cls(factory=True)
+        calibration.gyro_bias[:] = gyro_bias
+        for axis in range(3):
+            denominator = plus[axis] - minus[axis]
+            if denominator and speed_2x:
+                calibration.gyro_scale[axis] = speed_2x / abs(denominator)
+            else:
+                calibration.factory = False
+        for axis in range(3):
+            accel_plus, accel_minus = values[11 + axis * 2], values[12 + axis * 2]
+            range_2g = accel_plus - accel_minus
+            if range_2g:
+                calibration.accel_bias[axis] = accel_plus - range_2g / 2
+                calibration.accel_scale[axis] = 2 / range_2g
+            else:
+                calibration.factory = False
+        return calibration
+
+    def gyro(self, raw):
+        # (N, 3) ham jiroskop -> derece/sn
+        return (raw - self.gyro_bias) * self.gyro_scale
+
+    def accel(self, raw):
+        # (N, 3) ham ivme -> g
+        return (raw - self.accel_bias) * self.accel_scale
+
+
+def read_calibration(device, transport=TRANSPORT_USB, key=None, report=None):
+    # Kontrolcünün kalibrasyonunu bir kez oku; key (seri no) ile önbellekle, None ise önbellekleme.
+    # Bluetooth'ta bağlanırken zaten okunan rapor `report` ile verilebilir.
+    if key is not None and key in _calibration_cache:
+        return _calibration_cache[key]
+    try:
+        if report is None:
+            if transport == TRANSPORT_BT:
+                report = device.get_feature_report(BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+            else:
+                report = device.get_feature_report(USB_CALIBRATION_REPORT_ID, USB_CALIBRATION_REPORT_SIZE)
+        calibration = IMUCalibration.from_report(report, transport)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"IMU kalibrasyonu okunamadı, nominal değerler kullanılıyor: {e}")
+        calibration = IMUCalibration()
+    if key is not None:
+        _calibration_cache[key] = calibration
+    return calibration
+
+
+class MahonyFilter:
+    # kp: ivmeölçere orantılı düzeltme kazancı, ki: jiroskop sapması için integral kazancı
+    def __init__(self, kp=1.0, ki=0.01):
+        self.kp = kp
+        self.ki = ki
+        self.reset()
+
+    def reset(self):
+        self.q = np.array([1.0, 0.0, 0.0, 0.0])
+        self.integral = np.zeros(3)
+
+    def update_batch(self, gyro, accel, dt):
+        # gyro: (N, 3) rad/sn, accel: (N, 3) herhangi birim, dt: (N,) sn
+        if not len(dt):
+            return self.q
+        increments = gyro * dt[:, None]
+        total = np.cumsum(increments, axis=0)
+        # Koning düzeltmesi: eksen pencere içinde dönerken toplamın hatası
+        previous = total - increments
+        theta = total[-1] + 0.5 * np.cross(previous, increments).sum(axis=0)
+        period = float(dt.sum())
+
+        a = accel.mean(axis=0)
+        norm = math.sqrt(float(a @ a))
+        if norm > 0 and period > 0:
+            a = a / norm
+            w, x, y, z = self.q
+            # Mevcut yönelime göre beklenen yerçekimi yönü (gövde ekseninde)
+            v = np.array([2 * (x * z - w * y), 2 * (w * x + y * z), w * w - x * x - y * y + z * z])
+            error = np.cross(a, v)
+            if self.ki:
+                self.integral += self.ki * error * period
+            theta = theta + (self.kp * error + self.integral) * period
+
+        self.q = quaternion_multiply(self.q, rotation_quaternion(theta))
+        self.q /= math.sqrt(float(self.q @ self.q))
+        return self.q
+
+    def euler(self):
+        return quaternion_to_euler(self.q)
+
+
+def rotation_quaternion(theta):
+    angle = math.sqrt(float(theta @ theta))
+    if angle < 1e-12:
+        return np.array([1.0, *(theta / 2)])
+    half = angle / 2
+    return np.array([math.cos(half), *(theta / angle * math.sin(half))])
+
+
+def quaternion_multiply(a, b):
+    w1, x1, y1, z1 = a
+    w2, x2, y2, z2 = b
+    return np.array([
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+    ])
+
+
+def quaternion_to_euler(q):
+    # (yuvarlanma, yunuslama, sapma) derece
+    w, x, y, z = q
+    roll = math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    pitch = math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x))))
+    yaw = math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return math.degrees(roll), math.degrees(pitch), math.degrees(yaw)
+
+
+def extract_imu(rows, lengths):
+    # (N, rapor boyutu) uint8 satırlarından ve rapor uzunluklarından (geçerli
+    # maske, zaman damgası, ham jiroskop (N, 3), ham ivme (N, 3)). USB ve BT
+    # raporları karışık olabilir; Bluetooth'un kısa 0x01 raporu (10 bayt) IMU
+    # taşımaz, slotun geri kalanı eski rapordan kalmadır ve geçersiz sayılır.
+    report_ids = rows[:, 0]
+    valid = (((report_ids == USB_REPORT_ID) & (lengths >= MIN_REPORT_LENGTH))
+             | ((report_ids == BT_REPORT_ID) & (lengths >= BT_REPORT_SIZE)))
+    base = np.where(report_ids == BT_REPORT_ID, 2, 0)[:, None]
+    index = np.arange(len(rows))[:, None]
+    timestamp_bytes = rows[index, base + np.arange(_TIMESTAMP_OFFSET, _TIMESTAMP_OFFSET + 2)]
+    timestamps = timestamp_bytes[:, 0].astype(np.int64) | (timestamp_bytes[:, 1].astype(np.int64) << 8)
+    imu_bytes = np.ascontiguousarray(rows[index, base + np.arange(_IMU_OFFSET, _IMU_OFFSET + _IMU_BYTES)])
+    imu = imu_bytes.view('<i2').astype(np.float64)
+    return valid, timestamps, imu[:, 0:3], imu[:, 3:6]
+
+
+class OrientationTracker:
+    # Halka tampondaki raporları kendi imleciyle toplu işler (GUI zamanlayıcısında)
+    def __init__(self, calibration=None, kp=1.0, ki=0.01):
+        self.calibration = calibration or IMUCalibration()
+        self.filter = MahonyFilter(kp, ki)
+        self.cursor = 0
+        self.samples = 0
+        self.batches = 0
+        self.gyro_dps = np.zeros(3)
+        self.accel_g = np.zeros(3)
+        self._last_timestamp = None
+        self._views = None
+
+    def reset(self, ring=None):
+        self.filter.reset()
+        self._last_timestamp = None
+        if ring is not None:
+            self.cursor = ring.head
+
+    def _ring_views(self, ring):
+        # Halka tamponun (kapasite, slot) biçimli NumPy görünümü ve slot
+        # uzunlukları; bir kez oluşturulur
+        if self._views is None or self._views[0] is not ring:
+            rows = np.frombuffer(ring.buffer, dtype=np.uint8).reshape(ring.capacity, ring.report_size)
+            lengths = np.frombuffer(ring.lengths, dtype=np.uint16)
+            self._views = (ring, rows, lengths)
+        return self._views[1:]
+
+    def consume(self, ring):
+        start, head = ring.window(self.cursor)
+        if start >= head:
+            return 0
+        if start > self.cursor:
+            self._last_timestamp = None
+        slots = np.arange(start, head) & (ring.capacity - 1)
+        all_rows, all_lengths = self._ring_views(ring)
+        rows = all_rows[slots]
+        lengths = all_lengths[slots]
+        # Kopyalama sırasında üzerine yazılan en eski slotları at
+        overwritten = ring.head - ring.capacity - start
+        if overwritten > 0:
+            rows = rows[overwritten:]
+            lengths = lengths[overwritten:]
+            self._last_timestamp = None
+        self.cursor = head
+
+        valid, timestamps, raw_gyro, raw_accel = extract_imu(rows, lengths)
+        if not valid.all():
+            timestamps, raw_gyro, raw_accel = timestamps[valid], raw_gyro[valid], raw_accel[valid]
+        count = len(timestamps)
+        if not count:
+            return 0
+
+        # Cihaz zaman damgasından örnek aralıkları (16 bit sarması açılarak)
+        previous = np.empty(count, dtype=np.int64)
+        previous[1:] = timestamps[:-1]
+        previous[0] = timestamps[0] if self._last_timestamp is None else self._last_timestamp
+        dt = ((timestamps - previous) & 0xFFFF) * (DEVICE_TICK_US / 1e6)
+        self._last_timestamp = int(timestamps[-1])
+
+        gyro = self.calibration.gyro(raw_gyro)
+        accel = self.calibration.accel(raw_accel)
+        self.gyro_dps = gyro[-1]
+        self.accel_g = accel[-1]
+        gyro = gyro[:, _AXIS_ORDER] * _AXIS_SIGNS
+        accel = accel[:, _AXIS_ORDER] * _AXIS_SIGNS
+        self.filter.update_batch(np.radians(gyro), accel, dt)
+        self.samples += count
+        self.batches += 1
+        return count
+
+    def euler(self):
+        return self.filter.euler()
@@ -0,0 +1,352 @@
+"""
+DualShock 4 giriş raporları: çözücü, arka plan okuyucu ve halka tampon
+Geliştirici: rtx4090
+
+USB'de rapor 0x01 (64 bayt), Bluetooth'ta genişletilmiş rapor 0x11 (78 bayt,
+sonunda CRC32) gelir. İkisi de aynı DS4State nesnesine aynı yoldan çözülür;
+0x11'de veriler USB yerleşimine göre iki bayt kaymıştır.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+USB_REPORT_ID = 0x01
+BT_REPORT_ID = 0x11
+USB_REPORT_SIZE = 64
+BT_REPORT_SIZE = 78
+# Halka tampondaki slot boyutu (en uzun rapor sığmalı)
+REPORT_SIZE = 80
+
+# Kalibrasyon özellik raporu; Bluetooth'ta okunması genişletilmiş 0x11 raporlarını açar
+BT_CALIBRATION_REPORT_ID = 0x05
+BT_CALIBRATION_REPORT_SIZE = 41
+# USB'de aynı kalibrasyon verisi farklı sıralamayla 0x02 raporundadır
+USB_CALIBRATION_REPORT_ID = 0x02
+USB_CALIBRATION_REPORT_SIZE = 37
+
+# Bluetooth CRC32'si rapordan önce gelen HID başlık baytını da kapsar
+# (girişte 0xA1, çıkışta 0xA2). Başlığın CRC'si bir kez hesaplanıp tohum
+# olarak kullanılır; zlib.crc32 tablo tabanlı C uygulamasıdır.
+BT_INPUT_CRC_SEED = zlib.crc32(b'\xa1')
+BT_OUTPUT_CRC_SEED = zlib.crc32(b'\xa2')
+_CRC_STRUCT = struct.Struct('<I')
+
+# Tuş bit maskesi (DS4State.buttons)
+BTN_UP = 1 << 0
+BTN_RIGHT = 1 << 1
+BTN_DOWN = 1 << 2
+BTN_LEFT = 1 << 3
+BTN_SQUARE = 1 << 4
+BTN_CROSS = 1 << 5
+BTN_CIRCLE = 1 << 6
+BTN_TRIANGLE = 1 << 7
+BTN_L1 = 1 << 8
+BTN_R1 = 1 << 9
+BTN_L2 = 1 << 10
+BTN_R2 = 1 << 11
+BTN_SHARE = 1 << 12
+BTN_OPTIONS = 1 << 13
+BTN_L3 = 1 << 14
+BTN_R3 = 1 << 15
+BTN_PS = 1 << 16
+BTN_TOUCHPAD = 1 << 17
+
+# D-Pad yön değeri (0-7, 8 = bırakılmış) -> yön bitleri
+_DPAD_BITS = (
+    BTN_UP, BTN_UP | BTN_RIGHT, BTN_RIGHT, BTN_RIGHT | BTN_DOWN,
+    BTN_DOWN, BTN_DOWN | BTN_LEFT, BTN_LEFT, BTN_LEFT | BTN_UP,
+    0, 0, 0, 0, 0, 0, 0, 0,
+)
+
+# Rapordaki 16 bitlik zaman damgasının birimi (µs)
+DEVICE_TICK_US = 16 / 3
+
+# USB rapor 0x01 yerleşimi, rapor kimliğinden sonraki bayttan itibaren:
+# çubuklar, tuşlar, sayaç, L2/R2, zaman damgası, sıcaklık, jiroskop, ivmeölçer,
+# pil, dokunmatik paket sayısı ve ilk dokunmatik paketin iki parmağı
+_REPORT_STRUCT = struct.Struct('<4B3B2BHB3h3h5xB2xBBII')
+# Çözülebilmesi için bir USB raporunun en az uzunluğu
+MIN_REPORT_LENGTH = 1 + _REPORT_STRUCT.size
+
+
+class DS4State:
+    # Her raporda yeniden kullanılan durum nesnesi. Sık kullanılmayan alanlar
+    # (pil, dokunmatik) ham olarak saklanır ve okunurken çözülür.
+    __slots__ = (
+        'lx', 'ly', 'rx', 'ry', 'buttons', 'l2', 'r2', 'counter', 'timestamp',
+        'temperature', 'gyro_x', 'gyro_y', 'gyro_z', 'accel_x', 'accel_y', 'accel_z',
+        'status', 'touch_packets', 'touch_counter', 'finger0', 'finger1',
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.lx = self.ly = self.rx = self.ry = 128
+        # bit7 = dokunmuyor
+        self.finger0 = self.finger1 = 0x80
+
+    def copy_from(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    @property
+    def battery(self):
+        # 0-10 arası (kabloluyken 11'e kadar çıkabilir)
+        return self.status & 0x0F
+
+    @property
+    def cable(self):
+        return (self.status & 0x10) != 0
+
+    # Parmak: bayt0 bit7 = dokunmuyor, bit0-6 = id; ardından 12 bit X ve 12 bit Y
+    @property
+    def touch0_active(self):
+        return not (self.finger0 & 0x80)
+
+    @property
+    def touch0_id(self):
+        return self.finger0 & 0x7F
+
+    @property
+    def touch0_x(self):
+        return (self.finger0 >> 8) & 0xFFF
+
+    @property
+    def touch0_y(self):
+        return self.finger0 >> 20
+
+    @property
+    def touch1_active(self):
+        return not (self.finger1 & 0x80)
+
+    @property
+    def touch1_id(self):
+        return self.finger1 & 0x7F
+
+    @property
+    def touch1_x(self):
+        return (self.finger1 >> 8) & 0xFFF
+
+    @property
+    def touch1_y(self):
+        return self.finger1 >> 20
+
+
+def decode_report(buffer, state, offset=1):
+    # Raporu tek bir struct geçişiyle var olan DS4State nesnesine çöz.
+    # offset, rapor kimliğinden sonraki ilk baytın konumudur (USB için 1).
+    (state.lx, state.ly, state.rx, state.ry, b5, b6, b7, state.l2, state.r2,
+     state.timestamp, state.temperature,
+     state.gyro_x, state.gyro_y, state.gyro_z,
+     state.accel_x, state.accel_y, state.accel_z,
+     state.status, state.touch_packets, state.touch_counter,
+     state.finger0, state.finger1) = _REPORT_STRUCT.unpack_from(buffer, offset)
+    state.buttons = _DPAD_BITS[b5 & 0x0F] | (b5 & 0xF0) | (b6 << 8) | ((b7 & 0x03) << 16)
+    state.counter = b7 >> 2
+    return state
+
+
+def button_mask(b5, b6, b7):
+    # Rapordaki üç tuş baytından DS4State.buttons maskesi (decode_report ile aynı)
+    return _DPAD_BITS[b5 & 0x0F] | (b5 & 0xF0) | (b6 << 8) | ((b7 & 0x03) << 16)
+
+
+def bt_crc_valid(report):
+    # 0x11 raporunun son dört baytındaki CRC32'yi doğrula
+    crc = zlib.crc32(report[:BT_REPORT_SIZE - 4], BT_INPUT_CRC_SEED)
+    return crc == _CRC_STRUCT.unpack_from(report, BT_REPORT_SIZE - 4)[0]
+
+
+def valid_report(report):
+    # Halka tampona yalnızca CRC'si tutan Bluetooth raporları girer
+    if report[0] == BT_REPORT_ID:
+        return len(report) >= BT_REPORT_SIZE and bt_crc_valid(report)
+    return True
+
+
+def decode_any(report, state):
+    # USB 0x01 veya Bluetooth 0x11 raporunu çöz; çözülemeyen raporlar için None.
+    # Bluetooth'un kısaltılmış 0x01 raporu (10 bayt) genişletilmiş mod açılana
+    # kadar gelir ve atlanır.
+    length = len(report)
+    if not length:
+        return None
+    report_id = report[0]
+    if report_id == USB_REPORT_ID and length >= MIN_REPORT_LENGTH:
+        return decode_report(report, state, 1)
+    if report_id == BT_REPORT_ID and length >= BT_REPORT_SIZE:
+        return decode_report(report, state, 3)
+    return None
+
+
+def hidraw_get_feature(fd, report_id, length):
+    # HIDIOCGFEATURE(len) ioctl'ü ile özellik raporunu oku
+    import fcntl
+    buffer = bytearray(length)
+    buffer[0] = report_id
+    request = (3 << 30) | (length << 16) | (ord('H') << 8) | 0x07
+    fcntl.ioctl(fd, request, buffer)
+    return buffer
+
+
+class ReportRing:
+    # Sabit boyutlu, önceden ayrılmış halka tampon. Tek yazar (okuyucu thread),
+    # birden fazla okuyucu. Her tüketici kendi imlecini (cursor) tutar.
+    def __init__(self, capacity=1024, report_size=REPORT_SIZE, validate=None):
+        if capacity & (capacity - 1):
+            raise ValueError("Kapasite 2'nin kuvveti olmalı")
+        self.capacity = capacity
+        self.report_size = report_size
+        # validate(rapor) False dönerse rapor tampona alınmaz ve rejected artar
+        self.validate = validate
+        self.rejected = 0
+        self._mask = capacity - 1
+        self._buffer = bytearray(capacity * report_size)
+        self._view = memoryview(self._buffer)
+        # os.readv için her slotun önceden hazırlanmış görünümü
+        self._iov = [[self._view[i * report_size:(i + 1) * report_size]] for i in range(capacity)]
+        # Doğrulama varken rapor önce buraya okunur; reddedilen rapor, tampon
+        # doluyken geride kalan okuyucuların hâlâ okuduğu en eski slotu bozmaz
+        self._scratch = bytearray(report_size)
+        self._scratch_iov = [memoryview(self._scratch)]
+        self._lengths = array('H', [0]) * capacity
+        self._stamps = array('d', [0.0]) * capacity
+        # Şimdiye kadar yazılan toplam rapor sayısı (bir sonraki sıra numarası)
+        self.head = 0
+        # Her yeni rapordan sonra yazar thread'inde çağrılır; uzun iş yapmamalı
+        # (ör. threading.Event.set ile bekleyen bir tüketiciyi uyandırmak)
+        self.listeners = []
+
+    def push(self, data, stamp):
+        length = len(data)
+        if length > self.report_size:
+            length = self.report_size
+            data = data[:length]
+        # Slota yazmadan önce doğrula
+        if self.validate and not self.validate(data):
+            self.rejected += 1
+            return False
+        index = self.head & self._mask
+        offset = index * self.report_size
+        self._buffer[offset:offset + length] = data
+        self._lengths[index] = length
+        self._stamps[index] = stamp
+        # Sıra numarası en son artırılır; okuyucular yarım yazılmış slotu görmez
+        self.head += 1
+        for listener in self.listeners:
+            listener()
+        return True
+
+    def read_from(self, fd, stamp):
+        # Raporu sıradaki slota oku (doğrulama yoksa ara kopya olmadan doğrudan).
+        # Okunacak veri yoksa BlockingIOError yükselir; 0 dönerse cihaz kapanmıştır.
+        index = self.head & self._mask
+        if self.validate:
+            length = os.readv(fd, self._scratch_iov)
+            if not length:
+                return length
+            if not self.validate(self._scratch_iov[0][:length]):
+                self.rejected += 1
+                return length
+            offset = index * self.report_size
+            self._buffer[offset:offset + length] = self._scratch_iov[0][:length]
+        else:
+            length = os.readv(fd, self._iov[index])
+        if length:
+            self._lengths[index] = length
+            self._stamps[index] = stamp
+            self.head += 1
+            for listener in self.listeners:
+                listener()
+        return length
+
+    def _slot(self, seq):
+        index = seq & self._mask
+        offset = index * self.report_size
+        return self._view[offset:offset + self._lengths[index]], self._stamps[index]
+
+    def latest(self):
+        # En son raporu (sıra, zaman damgası, memoryview) olarak döndür
+        seq = self.head - 1
+        if seq < 0:
+            return None
+        report, stamp = self._slot(seq)
+        return seq, stamp, report
+
+    def reports_since(self, cursor):
+        # cursor'dan bu yana gelen raporları sırayla döndür. Tüketici yetişemediyse
+        # üzerine yazılmış raporlar atlanır; kaç tanesinin kaçırıldığı lost() ile bulunur.
+        head = self.head
+        seq = max(cursor, head - self.capacity)
+        while seq < head:
+            report, stamp = self._slot(seq)
+            # Okurken yazar slotun üzerinden geçtiyse bu rapor artık geçersiz
+            if self.head - seq > self.capacity:
+                seq = self.head - self.capacity
+                continue
+            yield seq, stamp, report
+            seq += 1
+
+    def lost(self, cursor):
+        return max(0, self.head - self.capacity - cursor)
+
+    def window(self, cursor):
+        # Toplu (NumPy) işleme için cursor'dan bu yana geçerli sıra aralığı
+        # (başlangıç, bitiş). Slotlar buffer/stamps/lengths üzerinden doğrudan
+        # okunur; kopyalamadan sonra bitişten beri yazılanlar lost() mantığıyla
+        # elenmelidir, çünkü yazar en eski slotların üzerine yazmış olabilir.
+        head = self.head
+        return max(cursor, head - self.capacity), head
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    @property
+    def stamps(self):
+        return self._stamps
+
+    @property
+    def lengths(self):
+        return self._lengths
+
+
+class InputReader(threading.Thread):
+    # HID cihazındaki tüm bekleyen raporları GUI thread'ini bloklamadan
+    # halka tampona boşaltan arka plan okuyucu
+    def __init__(self, device, ring, read_timeout_ms=100):
+        super().__init__(name="DS4InputReader", daemon=True)
+        self.device = device
+        self.ring = ring
+        self.read_timeout_ms = read_timeout_ms
+        self.read_errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        device = self.device
+        ring = self.ring
+        clock = time.perf_counter
+        stop = self._stop_event.is_set
+        while not stop():
+            try:
+                data = device.read(REPORT_SIZE, self.read_timeout_ms)
+            except Exception as e:
+                self.read_errors += 1
+                print(f"Okuyucu hatası: {e}")
+                if self.read_errors > 10:
+                    break
+                time.sleep(0.01)
+                continue
+            # Yalnızca art arda gelen hatalar okuyucuyu durdurur
+            self.read_errors = 0
+            if data:
+                ring.push(data, clock())
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -0,0 +1,173 @@
+"""
+DualShock 4 ışık çubuğu efektleri: nefes, gökkuşağı, flaş ve pil seviyesi
+Geliştirici: rtx4090
+
+Kareler efekt seçildiğinde gama düzeltmeli tablolara önceden hesaplanır;
+oynatma sırasında her kare yalnızca bir tablo okumasıdır.
+"""
+
+import colorsys
+import math
+import threading
+import time
+
+DEFAULT_FPS = 60
+DEFAULT_GAMMA = 2.2
+TABLE_FRAMES = 256
+
+# Pil seviyesi (0-10) için kırmızıdan yeşile renk geçişi
+BATTERY_LEVELS = 11
+
+
+def gamma_table(gamma=DEFAULT_GAMMA):
+    # Doğrusal parlaklık (0-255) -> LED değeri
+    return bytes(round(255 * (i / 255) ** gamma) for i in range(256))
+
+
+def breathing_table(color, gamma_lut, frames=TABLE_FRAMES):
+    # Sinüs eğrili parlaklık; en düşük noktada tamamen sönmez
+    table = bytearray(frames * 3)
+    for i in range(frames):
+        level = 0.08 + 0.92 * (0.5 - 0.5 * math.cos(2 * math.pi * i / frames))
+        for c in range(3):
+            table[i * 3 + c] = gamma_lut[round(color[c] * level)]
+    return table
+
+
+def rainbow_table(gamma_lut, frames=TABLE_FRAMES):
+    table = bytearray(frames * 3)
+    for i in range(frames):
+        rgb = colorsys.hsv_to_rgb(i / frames, 1.0, 1.0)
+        for c in range(3):
+            table[i * 3 + c] = gamma_lut[round(rgb[c] * 255)]
+    return table
+
+
+def battery_table(gamma_lut):
+    table = bytearray(BATTERY_LEVELS * 3)
+    for level in range(BATTERY_LEVELS):
+        # 0 -> kırmızı (0°), 10 -> yeşil (120°)
+        rgb = colorsys.hsv_to_rgb(level / (BATTERY_LEVELS - 1) / 3, 1.0, 1.0)
+        for c in range(3):
+            table[level * 3 + c] = gamma_lut[round(rgb[c] * 255)]
+    return table
+
+
+class LightbarEngine(threading.Thread):
+    # Seçili efektin karelerini sabit kare hızında ortak çıkış yoluna besler.
+    # Sabit renk ve flaş modlarında tek bir güncelleme gönderilir ve thread uyur.
+    def __init__(self, color_sink, flash_sink, battery_source=None,
+                 fps=DEFAULT_FPS, gamma=DEFAULT_GAMMA):
+        super().__init__(name="DS4Lightbar", daemon=True)
+        self.color_sink = color_sink
+        self.flash_sink = flash_sink
+        self.battery_source = battery_source
+        self.fps = fps
+        self.gamma_lut = gamma_table(gamma)
+        self._rainbow = rainbow_table(self.gamma_lut)
+        self._battery = battery_table(self.gamma_lut)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        # Aktif efekt: (ad, kare tablosu, periyot sn, başlangıç zamanı)
+        self._effect = None
+        self._flashing = False
+        self.effect_name = 'sabit'
+        self.frames = 0
+        self.frame_time_total = 0.0
+        self.frame_time_max = 0.0
+
+    def _set_effect(self, name, table=None, period=0.0):
+        with self._lock:
+            self._effect = (name, table, period, time.perf_counter()) if name else None
+            self.effect_name = name or 'sabit'
+            flashing = self._flashing
+            self._flashing = False
+        if flashing:
+            self.flash_sink(0, 0)
+        self._wake.set()
+
+    def stop_effect(self):
+        self._set_effect(None)
+
+    def set_color(self, red, green, blue):
+        self._set_effect(None)
+        self.color_sink(red, green, blue)
+
+    def breathing(self, color, period=3.0):
+        self._set_effect('nefes', breathing_table(color, self.gamma_lut), period)
+
+    def rainbow(self, period=6.0):
+        self._set_effect('gokkusagi', self._rainbow, period)
+
+    def battery_gradient(self):
+        self._set_effect('pil')
+
+    def strobe(self, color, on_ms=100, off_ms=100):
+        # Donanım flaşı: açık/kapalı süreleri ~10 ms birimindedir
+        self._set_effect(None)
+        with self._lock:
+            self.effect_name = 'flas'
+            self._flashing = True
+        self.color_sink(*color)
+        self.flash_sink(max(1, on_ms // 10), max(1, off_ms // 10))
+
+    def render_frame(self, now):
+        # Verilen zaman için (r, g, b) döndür; efekt yoksa None
+        effect = self._effect
+        if effect is None:
+            return None
+        name, table, period, start = effect
+        if name == 'pil':
+            level = self.battery_source() if self.battery_source else None
+            if level is None:
+                return None
+            index = min(BATTERY_LEVELS - 1, max(0, level)) * 3
+            table = self._battery
+        else:
+            frames = len(table) // 3
+            index = int((now - start) / period * frames) % frames * 3
+        return table[index], table[index + 1], table[index + 2]
+
+    def run(self):
+        clock = time.perf_counter
+        period = 1.0 / self.fps
+        epoch = clock()
+        last = None
+        while not self._stopping:
+            if self._effect is None:
+                last = None
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            started = clock()
+            rgb = self.render_frame(started)
+            if rgb is not None and rgb != last:
+                self.color_sink(*rgb)
+                last = rgb
+            cost = clock() - started
+            self.frames += 1
+            self.frame_time_total += cost
+            if cost > self.frame_time_max:
+                self.frame_time_max = cost
+
+            # Bir sonraki kare mutlak zaman ızgarasından hesaplanır
+            next_frame = epoch + (int((clock() - epoch) / period) + 1) * period
+            self._wake.wait(next_frame - clock())
+            self._wake.clear()
+
+    def stop(self, timeout=1.0):
+        self._stopping = True
+        self._wake.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def stats(self):
+        return {
+            'effect': self.effect_name,
+            'fps': self.fps,
+            'frames': self.frames,
+            'frame_us_avg': self.frame_time_total / self.frames * 1e6 if self.frames else 0.0,
+            'frame_us_max': self.frame_time_max * 1e6,
+        }
@@ -0,0 +1,231 @@
+"""
+Birden fazla DualShock 4'ü aynı anda yöneten çoklu kontrolcü yöneticisi
+Geliştirici: rtx4090
+
+Tüm kontrolcüler tek bir thread'de, tek bir selector (Linux'ta epoll)
+döngüsüyle okunur ve yazılır; kontrolcü başına thread açılmaz. hidraw
+dosya tanımlayıcısı gerektirdiği için yalnızca Linux'ta çalışır.
+"""
+
+import os
+import selectors
+import threading
+import time
+
+from ds4_input import (ReportRing, DS4State, decode_any, valid_report, hidraw_get_feature,
+                       BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+from ds4_output import OutputState, TRANSPORT_BT, TRANSPORT_USB
+
+
+class DS4Pad:
+    # Tek bir kontrolcünün tamponu, son durumu ve bekleyen çıkış durumu
+    def __init__(self, info, fd, ring_capacity=1024):
+        self.info = info
+        self.fd = fd
+        self.ring = ReportRing(ring_capacity, validate=valid_report)
+        self.state = DS4State()
+        self.transport = info.get('transport', TRANSPORT_USB)
+        self.output = OutputState()
+        self.output_dirty = False
+        self.next_write = 0.0
+        self._pack_output, size = self.output.packer(self.transport)
+        self._output_report = bytearray(size)
+        self._last_output = None
+        self.writes = 0
+        self.output_requests = 0
+        self.connected = True
+
+    @property
+    def path(self):
+        return self.info['path']
+
+
+class DS4Manager(threading.Thread):
+    def __init__(self, output_interval=0.004, ring_capacity=1024, sticks=None):
+        super().__init__(name="DS4Manager", daemon=True)
+        self.output_interval = output_interval
+        self.ring_capacity = ring_capacity
+        # Çubuk/tetik işlemcisi (ds4_sticks.StickProcessor); tüm kontrolcülerde paylaşılır
+        self.sticks = sticks
+        self._selector = selectors.DefaultSelector()
+        self._pads = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        # Boru dolarsa _wake() beklemeden döner; döngü zaten uyandırılmıştır
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._stopping = False
+        self.reports = 0
+        self.wakeups = 0
+        self.cpu_time = 0.0
+
+    def pads(self):
+        with self._lock:
+            return list(self._pads.values())
+
+    def open_device(self, info):
+        # hidraw düğümünü bloklamayan modda aç ve döngüye ekle
+        path = info['path']
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError as e:
+            print(f"Kontrolcü açılamadı ({path!r}): {e}")
+            return None
+        if info.get('transport') == TRANSPORT_BT:
+            try:
+                hidraw_get_feature(fd, BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE)
+            except OSError as e:
+                print(f"Bluetooth genişletilmiş rapor modu açılamadı ({path!r}): {e}")
+        return self.add_fd(info, fd)
+
+    def open_all(self, devices):
+        opened = []
+        known = {pad.path for pad in self.pads()}
+        for info in devices:
+            if info['path'] not in known:
+                pad = self.open_device(info)
+                if pad:
+                    opened.append(pad)
+        return opened
+
+    def add_fd(self, info, fd):
+        pad = DS4Pad(info, fd, self.ring_capacity)
+        with self._lock:
+            self._pads[pad.path] = pad
+            self._pending.append(pad)
+        self._wake()
+        return pad
+
+    def remove(self, path):
+        with self._lock:
+            pad = self._pads.get(path)
+            if pad:
+                pad.connected = False
+        self._wake()
+
+    def set_output(self, path, **values):
+        with self._lock:
+            pad = self._pads.get(path)
+            if not pad:
+                return
+            pad.output.set(**values)
+            pad.output_requests += 1
+            pad.output_dirty = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass
+
+    def _sync_pads(self):
+        # Yeni kontrolcüleri kaydet, çıkarılanları kapat (yalnızca döngü thread'i)
+        with self._lock:
+            pending, self._pending = self._pending, []
+            closed = [pad for pad in self._pads.values() if not pad.connected]
+            for pad in closed:
+                del self._pads[pad.path]
+        for pad in pending:
+            if pad.connected:
+                self._selector.register(pad.fd, selectors.EVENT_READ, pad)
+        for pad in closed:
+            try:
+                self._selector.unregister(pad.fd)
+            except (KeyError, ValueError):
+                pass
+            os.close(pad.fd)
+
+    def _drain(self, pad, clock):
+        ring = pad.ring
+        fd = pad.fd
+        head = ring.head
+        while True:
+            try:
+                length = ring.read_from(fd, clock())
+            except BlockingIOError:
+                break
+            except OSError as e:
+                print(f"Kontrolcü okuma hatası ({pad.path!r}): {e}")
+                length = 0
+            if not length:
+                pad.connected = False
+                break
+        # CRC'si bozuk raporlar okunur ama tampona girmez
+        count = ring.head - head
+        if count:
+            self.reports += count
+            # Durum yalnızca en son rapordan çözülür; aradakiler tamponda kalır
+            _, _, report = ring.latest()
+            if decode_any(report, pad.state) is not None and self.sticks:
+                self.sticks.apply(pad.state)
+
+    def _flush_outputs(self, now):
+        # Zamanı gelen kirli çıkış durumlarını yaz; bir sonraki bekleme süresini döndür
+        delay = None
+        with self._lock:
+            pads = [pad for pad in self._pads.values() if pad.output_dirty]
+        for pad in pads:
+            wait = pad.next_write - now
+            if wait > 0:
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            with self._lock:
+                report = bytes(pad._pack_output(pad._output_report))
+                pad.output_dirty = False
+            if report == pad._last_output:
+                continue
+            try:
+                os.write(pad.fd, report)
+                pad.writes += 1
+                pad._last_output = report
+            except OSError as e:
+                print(f"Kontrolcü yazma hatası ({pad.path!r}): {e}")
+            pad.next_write = now + self.output_interval
+        return delay
+
+    def run(self):
+        clock = time.perf_counter
+        select = self._selector.select
+        timeout = None
+        while not self._stopping:
+            events = select(timeout)
+            self.wakeups += 1
+            for key, _ in events:
+                pad = key.data
+                if pad is None:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    self._sync_pads()
+                elif pad.connected:
+                    self._drain(pad, clock)
+                    if not pad.connected:
+                        self._sync_pads()
+            timeout = self._flush_outputs(clock())
+            self.cpu_time = time.thread_time()
+        for pad in self.pads():
+            pad.connected = False
+        self._sync_pads()
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def stop(self, timeout=1.0):
+        self._stopping = True
+        self._wake()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def stats(self):
+        return {
+            'pads': len(self._pads),
+            'reports': self.reports,
+            'wakeups': self.wakeups,
+            'reports_per_wakeup': self.reports / self.wakeups if self.wakeups else 0.0,
+            'cpu_seconds': self.cpu_time,
+        }
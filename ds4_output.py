@@ -0,0 +1,167 @@
+"""
+DualShock 4 çıkış raporları: birleşik titreşim/LED durumu ve birleştirici yazıcı
+Geliştirici: rtx4090
+"""
+
+import struct
+import threading
+import time
+import zlib
+
+from ds4_input import BT_OUTPUT_CRC_SEED
+
+USB_OUTPUT_REPORT_SIZE = 32
+BT_OUTPUT_REPORT_SIZE = 78
+
+TRANSPORT_USB = 'usb'
+TRANSPORT_BT = 'bt'
+
+# Bluetooth 0x11 çıkış raporunun ikinci baytı: HID + CRC, en yüksek giriş hızı
+BT_OUTPUT_HID_CRC = 0xC0
+
+_CRC_STRUCT = struct.Struct('<I')
+
+# Rapor 0x05 bayrakları
+FLAG_RUMBLE = 0x01
+FLAG_LIGHTBAR = 0x02
+FLAG_FLASH = 0x04
+
+
+def clamp_byte(value):
+    return max(0, min(255, int(value)))
+
+
+class OutputState:
+    # Motorlar, ışık çubuğu ve yanıp sönme ayarları tek yerde tutulur;
+    # böylece LED değiştirmek titreşimi (ve tersi) sıfırlamaz.
+    __slots__ = ('small_motor', 'big_motor', 'red', 'green', 'blue', 'flash_on', 'flash_off')
+
+    def __init__(self):
+        self.small_motor = 0
+        self.big_motor = 0
+        self.red = 0
+        self.green = 0
+        self.blue = 0
+        self.flash_on = 0
+        self.flash_off = 0
+
+    def set(self, **values):
+        for name, value in values.items():
+            if name not in self.__slots__:
+                raise AttributeError(f"Bilinmeyen çıkış alanı: {name}")
+            setattr(self, name, clamp_byte(value))
+
+    def pack_usb(self, report):
+        # USB rapor 0x05 yerleşimi
+        report[0] = 0x05
+        report[1] = FLAG_RUMBLE | FLAG_LIGHTBAR | FLAG_FLASH
+        report[2] = 0x04
+        report[4] = self.small_motor  # Sağ (hafif) motor
+        report[5] = self.big_motor    # Sol (güçlü) motor
+        report[6] = self.red
+        report[7] = self.green
+        report[8] = self.blue
+        report[9] = self.flash_on
+        report[10] = self.flash_off
+        return report
+
+    def pack_bt(self, report):
+        # Bluetooth rapor 0x11 yerleşimi: alanlar USB'ye göre iki bayt kaymıştır,
+        # son dört bayt 0xA2 başlığıyla birlikte hesaplanan CRC32'dir
+        report[0] = 0x11
+        report[1] = BT_OUTPUT_HID_CRC
+        report[3] = FLAG_RUMBLE | FLAG_LIGHTBAR | FLAG_FLASH
+        report[6] = self.small_motor
+        report[7] = self.big_motor
+        report[8] = self.red
+        report[9] = self.green
+        report[10] = self.blue
+        report[11] = self.flash_on
+        report[12] = self.flash_off
+        crc = zlib.crc32(memoryview(report)[:BT_OUTPUT_REPORT_SIZE - 4], BT_OUTPUT_CRC_SEED)
+        _CRC_STRUCT.pack_into(report, BT_OUTPUT_REPORT_SIZE - 4, crc)
+        return report
+
+    def packer(self, transport):
+        # Bağlantı türüne göre (paketleme fonksiyonu, rapor boyutu)
+        if transport == TRANSPORT_BT:
+            return self.pack_bt, BT_OUTPUT_REPORT_SIZE
+        return self.pack_usb, USB_OUTPUT_REPORT_SIZE
+
+
+class OutputWriter(threading.Thread):
+    # Değişiklikleri biriktirip en fazla `interval` saniyede bir rapor gönderir.
+    # Gönderilecek baytlar son gönderilenle aynıysa yazma atlanır. Yazma işlemi
+    # GUI thread'inde değil bu thread'de yapılır.
+    def __init__(self, device, interval=0.004, transport=TRANSPORT_USB):
+        super().__init__(name="DS4OutputWriter", daemon=True)
+        self.device = device
+        self.interval = interval
+        self.state = OutputState()
+        self._pack, size = self.state.packer(transport)
+        self._report = bytearray(size)
+        self._last_report = None
+        self._last_write = 0.0
+        self._dirty = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self.requests = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.write_errors = 0
+
+    def update(self, **values):
+        with self._cond:
+            self.state.set(**values)
+            self.requests += 1
+            if self._dirty:
+                # Henüz gönderilmemiş bir değişikliğin üzerine yazıldı
+                self.coalesced += 1
+            self._dirty = True
+            self._cond.notify()
+
+    def run(self):
+        clock = time.perf_counter
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopping:
+                    self._cond.wait()
+                if not self._dirty:
+                    break
+                wait = self._last_write + self.interval - clock()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                report = bytes(self._pack(self._report))
+                self._dirty = False
+
+            if report == self._last_report:
+                self.unchanged += 1
+                continue
+            try:
+                self.device.write(report)
+                self.writes += 1
+                self._last_report = report
+            except Exception as e:
+                self.write_errors += 1
+                print(f"Çıkış raporu gönderilirken hata oluştu: {e}")
+            self._last_write = clock()
+
+    def stop(self, timeout=1.0):
+        # Bekleyen son değişiklik gönderildikten sonra thread sonlanır
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'unchanged': self.unchanged,
+            'saved': self.requests - self.writes,
+            'errors': self.write_errors,
+        }
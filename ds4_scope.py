@@ -0,0 +1,166 @@
+"""
+DualShock 4 osiloskobu: çubuk, tetik ve jiroskop geçmişi
+Geliştirici: rtx4090
+
+Kayma (drift) ve titremeyi incelemek için son N saniyenin tüm örnekleri
+tutulur. Okuyucu thread'i her raporda (ReportRing.listeners) raporun ilgili
+24 baytını önceden ayrılmış halka tampona kopyalar. Rapor başına yalnızca
+tek bir dilim ataması yapılır, nesne oluşturulmaz.
+
+Çözme ve zaman ekseninin kurulması çizimden hemen önce NumPy ile toplu
+yapılır. Zaman ekseni kontrolcünün kendi zaman damgasından gelir.
+
+Çizimden önce her kanal widget'ın piksel genişliğine min/maks seyreltilir
+(decimate). Her piksel sütunu için o sütuna düşen örneklerin en küçüğü ve
+en büyüğü alınır. Böylece çizilen nokta sayısı örnek hızına değil ekran
+genişliğine bağlıdır. Tek örneklik sıçramalar da kaybolmaz.
+"""
+
+import numpy as np
+
+from ds4_input import USB_REPORT_ID, BT_REPORT_ID, BT_REPORT_SIZE, MIN_REPORT_LENGTH, DEVICE_TICK_US
+from ds4_imu import IMUCalibration
+
+# Örnek başına saklanan baytlar, rapor kimliğinden sonraki ilk bayttan
+# itibaren: çubuklar (4), tuşlar (3), tetikler (2), zaman damgası (2),
+# sıcaklık (1), jiroskop (3h), ivmeölçer (3h)
+SAMPLE_SIZE = 24
+_TRIGGER_OFFSET = 7
+_TIMESTAMP_OFFSET = 9
+_GYRO_OFFSET = 12
+
+CHANNELS = ('lx', 'ly', 'rx', 'ry', 'l2', 'r2', 'gyro_pitch', 'gyro_yaw', 'gyro_roll')
+# Çizimdeki gruplar: (başlık, kanal indeksleri, y aralığı). Çubuklar -1..1,
+# tetikler 0..1, jiroskop derece/sn
+GROUPS = (
+    ('Çubuklar', (0, 1, 2, 3), (-1.0, 1.0)),
+    ('Tetikler', (4, 5), (0.0, 1.0)),
+    ('Jiroskop (°/sn)', (6, 7, 8), (-250.0, 250.0)),
+)
+
+
+class ScopeBuffer:
+    # Tek yazar (okuyucu thread), tek okuyucu (GUI). Kapasite en az
+    # seconds * rate örnektir (2'nin kuvvetine yuvarlanır).
+    def __init__(self, seconds=10.0, rate=1000, calibration=None):
+        self.seconds = seconds
+        self.capacity = 1 << (max(1, int(seconds * rate)) - 1).bit_length()
+        self._mask = self.capacity - 1
+        self._raw = bytearray(self.capacity * SAMPLE_SIZE)
+        self._rows = np.frombuffer(self._raw, dtype=np.uint8).reshape(self.capacity, SAMPLE_SIZE)
+        self.calibration = calibration or IMUCalibration()
+        # Şimdiye kadar yazılan toplam örnek; start'tan öncekiler gösterilmez
+        self.head = 0
+        self.start = 0
+        self.rejected = 0
+        self._ring = None
+        self._last_seq = -1
+
+    def attach(self, ring):
+        self.detach()
+        self._ring = ring
+        self._last_seq = ring.head - 1
+        ring.listeners.append(self._on_report)
+
+    def detach(self):
+        if self._ring is not None:
+            try:
+                self._ring.listeners.remove(self._on_report)
+            except ValueError:
+                pass
+            self._ring = None
+
+    def reset(self):
+        # Yazarla yarışmamak için head sıfırlanmaz; eski örnekler yalnızca gizlenir
+        self.start = self.head
+
+    def _on_report(self):
+        latest = self._ring.latest()
+        if latest is None or latest[0] == self._last_seq:
+            return
+        self._last_seq, _, report = latest
+        self.push(report)
+
+    def push(self, report):
+        length = len(report)
+        if not length:
+            return False
+        report_id = report[0]
+        if report_id == USB_REPORT_ID and length >= MIN_REPORT_LENGTH:
+            first = 1
+        elif report_id == BT_REPORT_ID and length >= BT_REPORT_SIZE:
+            first = 3
+        else:
+            self.rejected += 1
+            return False
+        offset = (self.head & self._mask) * SAMPLE_SIZE
+        self._raw[offset:offset + SAMPLE_SIZE] = report[first:first + SAMPLE_SIZE]
+        # Sayaç en son artırılır; okuyucu yarım yazılmış örneği görmez
+        self.head += 1
+        return True
+
+    def window(self, seconds=None):
+        # Son `seconds` saniyenin (None ise tüm tamponun) kopyası:
+        # (zaman (N,) sn, en yeni örnek 0 ve öncekiler negatif; değerler (kanal, N) float32)
+        head = self.head
+        first = max(self.start, head - self.capacity)
+        rows = self._rows[np.arange(first, head) & self._mask]
+        # Kopyalarken yazar en eski slotların üzerine yazmış olabilir; onlar atılır
+        overwritten = self.head - self.capacity - first
+        if overwritten > 0:
+            rows = rows[overwritten:]
+        if not len(rows):
+            return np.zeros(0), np.zeros((len(CHANNELS), 0), dtype=np.float32)
+
+        timestamps = rows[:, _TIMESTAMP_OFFSET].astype(np.int64) | (rows[:, _TIMESTAMP_OFFSET + 1].astype(np.int64) << 8)
+        ticks = np.zeros(len(rows))
+        np.cumsum(np.diff(timestamps) & 0xFFFF, out=ticks[1:])
+        times = (ticks - ticks[-1]) * (DEVICE_TICK_US / 1e6)
+        if seconds is not None:
+            first = np.searchsorted(times, -seconds)
+            times = times[first:]
+            rows = rows[first:]
+
+        values = np.empty((len(CHANNELS), len(rows)), dtype=np.float32)
+        values[0:4] = (rows[:, 0:4].T - 128.0) / 127
+        values[4:6] = rows[:, _TRIGGER_OFFSET:_TRIGGER_OFFSET + 2].T / 255.0
+        gyro = np.ascontiguousarray(rows[:, _GYRO_OFFSET:_GYRO_OFFSET + 6]).view('<i2')
+        values[6:9] = self.calibration.gyro(gyro).T
+        return times, values
+
+
+def crop(times, values, span):
+    # Yalnızca son `span` saniyedeki örnekler (kopyasız dilim)
+    first = np.searchsorted(times, -span)
+    return times[first:], values[:, first:]
+
+
+def decimate(times, values, width, span):
+    # Son `span` saniyeyi `width` piksel sütununa min/maks seyrelt.
+    # (sütunlar (M,), en küçükler (kanal, M), en büyükler (kanal, M)); M <= width
+    times, values = crop(times, values, span)
+    if not len(times) or width < 1:
+        empty = np.zeros((len(values), 0), dtype=values.dtype)
+        return np.zeros(0, dtype=np.intp), empty, empty
+    columns = np.minimum(((times + span) / span * width).astype(np.intp), width - 1)
+    # Zaman sıralı olduğundan sütunlar artandır; her dolu sütunun ilk örneği
+    starts = np.flatnonzero(np.diff(columns, prepend=-1))
+    return (columns[starts], np.minimum.reduceat(values, starts, axis=1),
+            np.maximum.reduceat(values, starts, axis=1))
+
+
+def envelope(columns, low, high):
+    # Sütun başına (x, en küçük), (x, en büyük) noktaları: çizgi (polyline)
+    # olarak çizilince sütundaki tüm aralığı kapsar. (2M, 2) float64
+    points = np.empty((2 * len(columns), 2))
+    points[0::2, 0] = columns
+    points[1::2, 0] = columns
+    points[0::2, 1] = low
+    points[1::2, 1] = high
+    return points
+
+
+def export_csv(path, times, values):
+    # Pencerenin tüm örnekleri (seyreltilmemiş) CSV olarak
+    np.savetxt(path, np.column_stack((times, values.T)), delimiter=',', fmt='%.6f',
+               header=','.join(('time_s',) + CHANNELS), comments='')
@@ -0,0 +1,168 @@
+"""
+DualShock 4 giriş gecikmesi ve rapor kaybı ölçümü
+Geliştirici: rtx4090
+
+Okuyucu thread'e hiçbir şey eklenmez: halka tampon her raporu geliş anıyla
+zaten damgalar. InputStats tampondaki raporları kendi imleciyle, yalnızca
+açıkken ve GUI zamanlayıcısında işler; kapalıyken maliyeti sıfırdır.
+
+Kaybolan raporlar DS4'ün kendi sayaçlarından bulunur: 7. bayttaki 6 bitlik
+rapor sayacı (BT'de 9. bayt) ve 10-11. baytlardaki 16 bitlik zaman damgası
+(yaklaşık 5,33 µs birimli, BT'de 12-13. baytlar). Sayaç 64'te sarar; daha
+uzun boşluklar zaman damgasından tamamlanır.
+"""
+
+import json
+import time
+from array import array
+
+from ds4_input import USB_REPORT_ID, BT_REPORT_ID, BT_REPORT_SIZE, MIN_REPORT_LENGTH, DEVICE_TICK_US
+
+COUNTER_MODULO = 64
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class InputStats:
+    # window: yüzdelikler için saklanan son örnek sayısı
+    # bin_us/bins: geliş aralığı histogramının kutu genişliği ve sayısı (son kutu taşma)
+    def __init__(self, window=4096, bin_us=250, bins=40):
+        self.window = window
+        self.bin_us = bin_us
+        self.bins = bins
+        self.reset()
+
+    def reset(self, ring=None):
+        self.cursor = ring.head if ring is not None else 0
+        self.started = time.perf_counter()
+        self.reports = 0
+        self.dropped = 0
+        self.ring_lost = 0
+        self.ring_rejected_start = ring.rejected if ring is not None else 0
+        self.ring_rejected = 0
+        self.histogram = array('I', [0]) * self.bins
+        self._intervals = array('d', [0.0]) * self.window
+        self._device_intervals = array('d', [0.0]) * self.window
+        self._latencies = array('d', [0.0]) * self.window
+        self._interval_count = 0
+        self._latency_count = 0
+        self._first_stamp = None
+        self._last_stamp = None
+        self._final_stamp = None
+        self._last_counter = None
+        self._last_timestamp = None
+        # Sayaç boşluğu olmayan raporlardan öğrenilen cihaz rapor aralığı (µs)
+        self._period_us = None
+
+    def consume(self, ring):
+        # Halka tamponda bu yana gelen raporları işle
+        lost = ring.lost(self.cursor)
+        if lost:
+            self.ring_lost += lost
+            # Üzerine yazılan raporlardan sonra sayaç sürekliliği bozulur
+            self._last_counter = None
+            self._last_stamp = None
+        self.ring_rejected = ring.rejected - self.ring_rejected_start
+        window = self.window
+        bin_us = self.bin_us
+        last_bin = self.bins - 1
+        histogram = self.histogram
+        for seq, stamp, report in ring.reports_since(self.cursor):
+            self.cursor = seq + 1
+            length = len(report)
+            if not length:
+                continue
+            report_id = report[0]
+            if report_id == USB_REPORT_ID and length >= MIN_REPORT_LENGTH:
+                base = 0
+            elif report_id == BT_REPORT_ID and length >= BT_REPORT_SIZE:
+                base = 2
+            else:
+                continue
+            counter = report[7 + base] >> 2
+            timestamp = report[10 + base] | (report[11 + base] << 8)
+            self.reports += 1
+            if self._first_stamp is None:
+                self._first_stamp = stamp
+
+            if self._last_stamp is not None:
+                interval_us = (stamp - self._last_stamp) * 1e6
+                index = self._interval_count % window
+                self._intervals[index] = interval_us
+                device_us = ((timestamp - self._last_timestamp) & 0xFFFF) * DEVICE_TICK_US
+                self._device_intervals[index] = device_us
+                self._interval_count += 1
+                slot = int(interval_us // bin_us)
+                histogram[slot if slot < last_bin else last_bin] += 1
+
+                gap = (counter - self._last_counter - 1) % COUNTER_MODULO
+                if self._period_us:
+                    # Sayaç 64'ün katı kadar rapor atladıysa zaman damgası gösterir
+                    expected = device_us / self._period_us - 1
+                    gap += COUNTER_MODULO * max(0, round((expected - gap) / COUNTER_MODULO))
+                elif gap == 0 and device_us > 0:
+                    self._period_us = device_us
+                if gap == 0 and device_us > 0:
+                    # Gürültüyü bastıran yavaş ortalama
+                    self._period_us += (device_us - self._period_us) * 0.01
+                self.dropped += gap
+            self._last_stamp = self._final_stamp = stamp
+            self._last_counter = counter
+            self._last_timestamp = timestamp
+
+    def rendered(self, stamp):
+        # Ekrana çizilen raporun tampona giriş anı; okuyucu -> çizim gecikmesi
+        self._latencies[self._latency_count % self.window] = time.perf_counter() - stamp
+        self._latency_count += 1
+
+    def _recent(self, values, count):
+        return list(values[:min(count, self.window)])
+
+    def snapshot(self):
+        intervals = self._recent(self._intervals, self._interval_count)
+        device = self._recent(self._device_intervals, self._interval_count)
+        latencies = self._recent(self._latencies, self._latency_count)
+        span = self._final_stamp - self._first_stamp if self._first_stamp is not None else 0.0
+        mean = sum(intervals) / len(intervals) if intervals else 0.0
+        jitter = (sum((value - mean) ** 2 for value in intervals) / len(intervals)) ** 0.5 if intervals else 0.0
+        expected = self.reports + self.dropped
+        return {
+            'reports': self.reports,
+            'seconds': time.perf_counter() - self.started,
+            'rate_hz': (self.reports - 1) / span if span > 0 else 0.0,
+            'device_rate_hz': 1e6 / self._period_us if self._period_us else 0.0,
+            'dropped': self.dropped,
+            'drop_percent': self.dropped / expected * 100 if expected else 0.0,
+            'ring_lost': self.ring_lost,
+            'crc_rejected': self.ring_rejected,
+            'interval_mean_us': mean,
+            'interval_p50_us': percentile(intervals, 0.5),
+            'interval_p99_us': percentile(intervals, 0.99),
+            'interval_max_us': max(intervals) if intervals else 0.0,
+            'jitter_us': jitter,
+            'device_interval_p50_us': percentile(device, 0.5),
+            'render_latency_p50_ms': percentile(latencies, 0.5) * 1e3,
+            'render_latency_p95_ms': percentile(latencies, 0.95) * 1e3,
+            'render_latency_p99_ms': percentile(latencies, 0.99) * 1e3,
+            'histogram_bin_us': self.bin_us,
+            'histogram': list(self.histogram),
+        }
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+def histogram_text(histogram, width=None):
+    # Histogramı tek satırlık blok karakterlere çevir (panelde gösterim için)
+    blocks = ' ▁▂▃▄▅▆▇█'
+    counts = histogram[:width] if width else histogram
+    peak = max(counts) if counts else 0
+    if not peak:
+        return ''
+    return ''.join(blocks[(count * 8 + peak - 1) // peak] for count in counts)
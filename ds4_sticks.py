@@ -0,0 +1,230 @@
+"""
+DualShock 4 analog çubuk ve tetik işleme: ölü bölge, eğri, kayma düzeltmesi
+Geliştirici: rtx4090
+
+Ayarlar değiştiğinde tüm işlem zinciri tablolara derlenir:
+- Her çubuk için 256x256 girişli iki bayt tablosu (X ve Y). Tablonun
+  indeksi ham_x | ham_y << 8'dir.
+- Her tetik için 256 girişli bir bayt tablosu.
+Böylece rapor başına maliyet yalnızca tablo indekslemesidir; eksen başına
+hesap yapılmaz. Aynı derlenmiş işlemci birden çok kontrolcüde paylaşılabilir.
+
+Çubuk zinciri (sırasıyla):
+1. Kalibrasyon ofseti (kayma düzeltmesi)
+2. Eksenel ölü bölge
+3. Dairesel ölü bölge
+4. Tepki eğrisi (büyüklüğe üs)
+5. Ters ölü bölge (oyunun kendi ölü bölgesini aşmak için en küçük çıkış)
+Çıkış, ham raporla aynı biçimdedir (0-255, merkez 128).
+
+Tablolar NumPy ile derlenir. Kaydedilmiş halka tampon pencereleri için
+NumPy toplu yolu da vardır (process_rows).
+"""
+
+from ds4_input import USB_REPORT_ID, BT_REPORT_ID
+
+# Hazır tepki eğrileri (büyüklüğe uygulanan üs)
+CURVES = {
+    'dogrusal': 1.0,
+    'hassas': 1.6,
+    'kuadratik': 2.0,
+    'kubik': 3.0,
+    'agresif': 0.6,
+}
+
+# Rapor kimliğinden sonraki ilk bayta göre lx, ly, rx, ry ve l2, r2
+_STICK_OFFSET = 0
+_TRIGGER_OFFSET = 7
+
+
+class StickSettings:
+    # Değerler normalize birimdedir (0-1, tam sapma = 1); ofsetler ham birimdir
+    __slots__ = ('radial_deadzone', 'axial_deadzone_x', 'axial_deadzone_y',
+                 'anti_deadzone', 'curve', 'offset_x', 'offset_y')
+
+    def __init__(self, radial_deadzone=0.05, axial_deadzone_x=0.0, axial_deadzone_y=0.0,
+                 anti_deadzone=0.0, curve=1.0, offset_x=0.0, offset_y=0.0):
+        self.radial_deadzone = radial_deadzone
+        self.axial_deadzone_x = axial_deadzone_x
+        self.axial_deadzone_y = axial_deadzone_y
+        self.anti_deadzone = anti_deadzone
+        self.curve = curve
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TriggerSettings:
+    __slots__ = ('deadzone', 'anti_deadzone', 'curve', 'saturation')
+
+    def __init__(self, deadzone=0.0, anti_deadzone=0.0, curve=1.0, saturation=1.0):
+        self.deadzone = deadzone
+        self.anti_deadzone = anti_deadzone
+        self.curve = curve
+        # Bu değere basılınca tam çıkış (0-1)
+        self.saturation = saturation
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _curve_exponent(curve):
+    return CURVES[curve] if isinstance(curve, str) else float(curve)
+
+
+def compile_stick(settings):
+    # (lut_x, lut_y): 65536'şar baytlık tablolar, indeks ham_x | ham_y << 8
+    import numpy as np
+    raw = np.arange(256, dtype=np.float64)
+    x = np.clip((raw[None, :] - 128 - settings.offset_x) / 127, -1, 1)
+    y = np.clip((raw[:, None] - 128 - settings.offset_y) / 127, -1, 1)
+    x, y = np.broadcast_arrays(x, y)
+    x = _axial(x, settings.axial_deadzone_x)
+    y = _axial(y, settings.axial_deadzone_y)
+    magnitude = np.hypot(x, y)
+    deadzone = min(settings.radial_deadzone, 0.99)
+    scaled = np.clip((np.minimum(magnitude, 1) - deadzone) / (1 - deadzone), 0, 1)
+    scaled = scaled ** _curve_exponent(settings.curve)
+    anti = settings.anti_deadzone
+    scaled = np.where(scaled > 0, anti + (1 - anti) * scaled, 0)
+    # Yön korunur, yalnızca büyüklük değişir
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(magnitude > 0, scaled / magnitude, 0)
+    lut_x = np.clip(np.rint(x * ratio * 127) + 128, 1, 255).astype(np.uint8)
+    lut_y = np.clip(np.rint(y * ratio * 127) + 128, 1, 255).astype(np.uint8)
+    return lut_x.tobytes(), lut_y.tobytes()
+
+
+def _axial(value, deadzone):
+    import numpy as np
+    if deadzone <= 0:
+        return value
+    deadzone = min(deadzone, 0.99)
+    return np.sign(value) * np.clip((np.abs(value) - deadzone) / (1 - deadzone), 0, 1)
+
+
+def compile_trigger(settings):
+    # 256 baytlık tablo
+    import numpy as np
+    value = np.arange(256, dtype=np.float64) / 255
+    deadzone = min(settings.deadzone, 0.99)
+    saturation = max(settings.saturation, deadzone + 0.01)
+    scaled = np.clip((value - deadzone) / (saturation - deadzone), 0, 1)
+    scaled = scaled ** _curve_exponent(settings.curve)
+    anti = settings.anti_deadzone
+    scaled = np.where(scaled > 0, anti + (1 - anti) * scaled, 0)
+    return np.rint(scaled * 255).astype(np.uint8).tobytes()
+
+
+class StickProcessor:
+    # Ayarlar değiştikten sonra compile() çağrılmalıdır; apply() yalnızca
+    # tabloları kullanır. compile() yeni tabloları hazırlayıp tek atamayla
+    # değiştirir; okuyucu thread'i yarım tablo görmez. lazy=True ile derleme
+    # (ve NumPy'nin yüklenmesi) ilk compile() çağrısına bırakılır.
+    def __init__(self, left=None, right=None, l2=None, r2=None, lazy=False):
+        self.left = left or StickSettings()
+        self.right = right or StickSettings()
+        self.l2 = l2 or TriggerSettings()
+        self.r2 = r2 or TriggerSettings()
+        self.compiles = 0
+        self._tables = None
+        self._arrays = None
+        if not lazy:
+            self.compile()
+
+    @property
+    def compiled(self):
+        return self._tables is not None
+
+    def compile(self):
+        left_x, left_y = compile_stick(self.left)
+        right_x, right_y = compile_stick(self.right)
+        self._tables = (left_x, left_y, right_x, right_y,
+                        compile_trigger(self.l2), compile_trigger(self.r2))
+        self._arrays = None
+        self.compiles += 1
+
+    def apply(self, state):
+        # DS4State'in çubuk ve tetik alanlarını yerinde işle
+        left_x, left_y, right_x, right_y, l2, r2 = self._tables
+        index = state.lx | (state.ly << 8)
+        state.lx = left_x[index]
+        state.ly = left_y[index]
+        index = state.rx | (state.ry << 8)
+        state.rx = right_x[index]
+        state.ry = right_y[index]
+        state.l2 = l2[state.l2]
+        state.r2 = r2[state.r2]
+        return state
+
+    def process(self, lx, ly, rx, ry, l2, r2):
+        # Ham değerlerden işlenmiş (lx, ly, rx, ry, l2, r2)
+        left_x, left_y, right_x, right_y, l2_table, r2_table = self._tables
+        left = lx | (ly << 8)
+        right = rx | (ry << 8)
+        return (left_x[left], left_y[left], right_x[right], right_y[right],
+                l2_table[l2], r2_table[r2])
+
+    def arrays(self):
+        # Tabloların NumPy görünümleri (toplu yol için, bir kez oluşturulur)
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = tuple(np.frombuffer(table, dtype=np.uint8) for table in self._tables)
+        return self._arrays
+
+    def process_batch(self, lx, ly, rx, ry, l2, r2):
+        # Aynı işlem uint8 NumPy dizileri üzerinde; (6, N) uint8 dizi döner
+        import numpy as np
+        left_x, left_y, right_x, right_y, l2_table, r2_table = self.arrays()
+        left = lx.astype(np.intp) | (ly.astype(np.intp) << 8)
+        right = rx.astype(np.intp) | (ry.astype(np.intp) << 8)
+        return np.stack((left_x[left], left_y[left], right_x[right], right_y[right],
+                         l2_table[l2], r2_table[r2]))
+
+    def process_rows(self, rows):
+        # (N, rapor boyutu) uint8 rapor satırlarından (örn. halka tampon penceresi
+        # veya kayıt dosyası) işlenmiş değerler. USB ve BT raporları karışık olabilir.
+        import numpy as np
+        report_ids = rows[:, 0]
+        rows = rows[(report_ids == USB_REPORT_ID) | (report_ids == BT_REPORT_ID)]
+        base = np.where(rows[:, 0] == BT_REPORT_ID, 3, 1)
+        index = np.arange(len(rows))
+        columns = [rows[index, base + _STICK_OFFSET + i] for i in range(4)]
+        columns += [rows[index, base + _TRIGGER_OFFSET + i] for i in range(2)]
+        return self.process_batch(*columns)
+
+    def process_ring(self, ring, cursor=0):
+        # Halka tampondaki geçerli raporların işlenmiş değerleri ve yeni imleç
+        import numpy as np
+        start, head = ring.window(cursor)
+        view = np.frombuffer(ring.buffer, dtype=np.uint8).reshape(ring.capacity, ring.report_size)
+        rows = view[np.arange(start, head) & (ring.capacity - 1)]
+        overwritten = ring.head - ring.capacity - start
+        if overwritten > 0:
+            rows = rows[overwritten:]
+        return self.process_rows(rows), head
+
+    def calibrate_center(self, ring, stick='left', count=256):
+        # Çubuk bırakılmışken son raporların medyanını merkez ofseti yap (kayma düzeltmesi)
+        import numpy as np
+        settings = self.left if stick == 'left' else self.right
+        start, head = ring.window(max(0, ring.head - count))
+        view = np.frombuffer(ring.buffer, dtype=np.uint8).reshape(ring.capacity, ring.report_size)
+        rows = view[np.arange(start, head) & (ring.capacity - 1)]
+        report_ids = rows[:, 0]
+        rows = rows[(report_ids == USB_REPORT_ID) | (report_ids == BT_REPORT_ID)]
+        if not len(rows):
+            return None
+        base = np.where(rows[:, 0] == BT_REPORT_ID, 3, 1)
+        first = 0 if stick == 'left' else 2
+        index = np.arange(len(rows))
+        settings.offset_x = float(np.median(rows[index, base + first])) - 128
+        settings.offset_y = float(np.median(rows[index, base + first + 1])) - 128
+        self.compile()
+        return settings.offset_x, settings.offset_y
+
+    def to_dict(self):
+        return {'left': self.left.to_dict(), 'right': self.right.to_dict(),
+                'l2': self.l2.to_dict(), 'r2': self.r2.to_dict()}
@@ -0,0 +1,323 @@
+"""
+DualShock 4 dokunmatik yüzey: çoklu dokunma takibi ve hareket tanıma
+Geliştirici: rtx4090
+
+Her rapor birden fazla dokunma paketi taşıyabilir (USB'de en fazla 3,
+Bluetooth'ta 4). Her paket bir sayaç ve iki parmak içerir: parmak başına
+dokunma kimliği, 12 bitlik X ve 12 bitlik Y. Ardışık raporlar aynı paketi
+tekrar taşıyabilir. Paketler sayaçlarına göre sıralanır ve her biri
+yalnızca bir kez işlenir.
+
+TouchTracker halka tampondaki raporları kendi imleciyle, artımlı olarak
+işler. Parmaklar kimlikleriyle izlenir. Kaydırma (swipe), kıstırma
+(pinch), iki parmakla kaydırma (scroll) ve dokunma (tap) olayları
+yayınlanır. Olay zamanları kontrolcünün kendi zaman damgasından hesaplanır.
+"""
+
+import math
+from collections import deque
+
+from ds4_input import USB_REPORT_ID, BT_REPORT_ID, BT_REPORT_SIZE, MIN_REPORT_LENGTH, DEVICE_TICK_US
+
+TAP = 'dokunma'
+SWIPE = 'kaydirma'
+PINCH = 'kistirma'
+SCROLL = 'iki_parmak_kaydirma'
+GESTURE_KINDS = (TAP, SWIPE, PINCH, SCROLL)
+
+# Kaydırma yönleri
+LEFT = 'sol'
+RIGHT = 'sag'
+UP = 'yukari'
+DOWN = 'asagi'
+
+# Dokunmatik yüzey çözünürlüğü
+TOUCHPAD_WIDTH = 1920
+TOUCHPAD_HEIGHT = 942
+
+# Rapor kimliğinden sonraki ilk bayta göre paket sayısı ve ilk paketin konumu
+_TOUCH_COUNT_OFFSET = 32
+_TOUCH_PACKET_OFFSET = 33
+_TOUCH_PACKET_SIZE = 9
+_USB_MAX_PACKETS = 3
+_BT_MAX_PACKETS = 4
+_DEVICE_TICK = DEVICE_TICK_US / 1e6
+
+
+class Finger:
+    __slots__ = ('id', 'x', 'y', 'start_x', 'start_y', 'start_time', 'max_distance', 'trail')
+
+    def __init__(self, touch_id, x, y, time, trail_length):
+        self.id = touch_id
+        self.x = x
+        self.y = y
+        self.start_x = x
+        self.start_y = y
+        self.start_time = time
+        self.max_distance = 0.0
+        # Arayüzde çizilen iz (en yeni sonda)
+        self.trail = deque(((x, y),), maxlen=trail_length)
+
+    def move(self, x, y):
+        if x == self.x and y == self.y:
+            return
+        self.x = x
+        self.y = y
+        self.trail.append((x, y))
+        distance = math.hypot(x - self.start_x, y - self.start_y)
+        if distance > self.max_distance:
+            self.max_distance = distance
+
+
+class TouchGesture:
+    __slots__ = ('kind', 'fingers', 'x', 'y', 'dx', 'dy', 'scale', 'direction', 'time')
+
+    def __init__(self, kind, fingers, x, y, time, dx=0.0, dy=0.0, scale=1.0, direction=None):
+        self.kind = kind
+        self.fingers = fingers      # Harekete katılan parmak sayısı
+        self.x = x                  # Hareketin merkezi (dokunmatik yüzey birimi)
+        self.y = y
+        self.dx = dx                # Kaydırmada toplam, scroll'da bu adımdaki yer değişimi
+        self.dy = dy
+        self.scale = scale          # Kıstırmada bu adımdaki ölçek oranı
+        self.direction = direction  # Kaydırma yönü
+        self.time = time            # Cihaz zamanı (sn)
+
+    def __repr__(self):
+        return f'TouchGesture({self.kind}, {self.fingers}, {self.direction or ""}, {self.time:.4f})'
+
+
+class TouchTracker:
+    # Eşikler dokunmatik yüzey birimi ve saniye cinsindendir. Geri çağrılar
+    # consume() çağıran thread'de çalışır.
+    def __init__(self, tap_time=0.25, tap_slop=40, swipe_distance=400, swipe_time=0.6,
+                 scroll_threshold=60, pinch_threshold=80, trail_length=48, trail_linger=0.5):
+        self.tap_time = tap_time
+        self.tap_slop = tap_slop
+        self.swipe_distance = swipe_distance
+        self.swipe_time = swipe_time
+        self.scroll_threshold = scroll_threshold
+        self.pinch_threshold = pinch_threshold
+        self.trail_length = trail_length
+        self.trail_linger = trail_linger
+        self._listeners = []
+        self.reset()
+
+    def reset(self, ring=None):
+        self.cursor = ring.head if ring is not None else 0
+        self.fingers = {}
+        # Kalkan parmakların izleri: (kalkış zamanı, iz) - arayüzde sönerek çizilir
+        self.ended_trails = deque()
+        self.device_time = 0.0
+        self.frames = 0
+        self.gestures = 0
+        self.lost = 0
+        # Arayüz yalnızca bu sayı değiştiyse yeniden çizer
+        self.version = 0
+        self._last_timestamp = None
+        self._last_packet = None
+        self._reset_session()
+
+    def _reset_session(self):
+        # Bir dokunma oturumu ilk parmağın inişinden son parmağın kalkışına kadar sürer
+        self._session_start = None
+        self._session_fingers = 0
+        self._session_gesture = False
+        self._pair = None
+        self._pair_mode = None
+
+    def on(self, callback, kinds=GESTURE_KINDS):
+        # callback(TouchGesture); kaldırmak için dönen değer off()'a verilir
+        listener = (callback, frozenset((kinds,) if isinstance(kinds, str) else kinds))
+        self._listeners.append(listener)
+        return listener
+
+    def off(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, kind, fingers, x, y, **values):
+        self.gestures += 1
+        gesture = None
+        for callback, kinds in self._listeners:
+            if kind in kinds:
+                if gesture is None:
+                    gesture = TouchGesture(kind, fingers, x, y, self.device_time, **values)
+                try:
+                    callback(gesture)
+                except Exception as e:
+                    print(f"Dokunmatik olay işleyici hatası: {e}")
+
+    def consume(self, ring):
+        # Halka tamponda bu yana gelen tüm raporların dokunma paketlerini işle
+        lost = ring.lost(self.cursor)
+        if lost:
+            # Aradaki dokunmalar kaçtı; yarım kalan hareketler tamamlanmaz
+            self.lost += lost
+            self._last_timestamp = None
+            self._last_packet = None
+            self._drop_fingers()
+        cursor = self.cursor
+        last_timestamp = self._last_timestamp
+        for seq, stamp, report in ring.reports_since(cursor):
+            cursor = seq + 1
+            length = len(report)
+            if not length:
+                continue
+            report_id = report[0]
+            if report_id == USB_REPORT_ID and length >= MIN_REPORT_LENGTH:
+                base = 1
+                max_packets = _USB_MAX_PACKETS
+            elif report_id == BT_REPORT_ID and length >= BT_REPORT_SIZE:
+                base = 3
+                max_packets = _BT_MAX_PACKETS
+            else:
+                continue
+            timestamp = report[base + 9] | (report[base + 10] << 8)
+            if last_timestamp is not None:
+                self.device_time += ((timestamp - last_timestamp) & 0xFFFF) * _DEVICE_TICK
+            last_timestamp = timestamp
+            count = report[base + _TOUCH_COUNT_OFFSET]
+            if not count:
+                continue
+            first = base + _TOUCH_PACKET_OFFSET
+            # Çoğu raporda tek ve zaten işlenmiş bir paket vardır
+            if count == 1 and report[first] == self._last_packet:
+                continue
+            self._packets(report, first, min(count, max_packets))
+        self._last_timestamp = last_timestamp
+        self.cursor = cursor
+        self._expire_trails()
+
+    def _packets(self, report, first, count):
+        # Henüz işlenmemiş paketleri sayaç sırasıyla işle
+        last = self._last_packet
+        pending = []
+        for i in range(count):
+            offset = first + i * _TOUCH_PACKET_SIZE
+            counter = report[offset]
+            age = (counter - last) & 0xFF if last is not None else 1
+            if 0 < age < 128:
+                pending.append((age, offset))
+        if not pending:
+            return
+        pending.sort()
+        for _, offset in pending:
+            self._frame(report, offset + 1)
+        self._last_packet = report[pending[-1][1]]
+
+    def _frame(self, report, offset):
+        self.frames += 1
+        self.version += 1
+        now = self.device_time
+        fingers = self.fingers
+        active = []
+        for finger_offset in (offset, offset + 4):
+            b0 = report[finger_offset]
+            if b0 & 0x80:
+                continue
+            b2 = report[finger_offset + 2]
+            active.append((b0 & 0x7F,
+                           report[finger_offset + 1] | ((b2 & 0x0F) << 8),
+                           (b2 >> 4) | (report[finger_offset + 3] << 4)))
+        # Kalkan parmaklar
+        if len(fingers) > len(active) or any(touch_id not in fingers for touch_id, _, _ in active):
+            ids = {touch_id for touch_id, _, _ in active}
+            for touch_id in [touch_id for touch_id in fingers if touch_id not in ids]:
+                self._lift(fingers.pop(touch_id), now)
+        # İnen ve hareket eden parmaklar
+        for touch_id, x, y in active:
+            finger = fingers.get(touch_id)
+            if finger is None:
+                if self._session_start is None:
+                    self._session_start = now
+                fingers[touch_id] = Finger(touch_id, x, y, now, self.trail_length)
+                self._session_fingers = max(self._session_fingers, len(fingers))
+            else:
+                finger.move(x, y)
+        if len(fingers) == 2:
+            self._two_fingers()
+        else:
+            self._pair = None
+            self._pair_mode = None
+        if not fingers and self._session_start is not None:
+            self._reset_session()
+
+    def _lift(self, finger, now):
+        self.ended_trails.append((now, finger.trail))
+        if self._session_gesture:
+            return
+        duration = now - self._session_start
+        remaining = len(self.fingers)
+        if self._session_fingers == 1:
+            dx = finger.x - finger.start_x
+            dy = finger.y - finger.start_y
+            if (math.hypot(dx, dy) >= self.swipe_distance and now - finger.start_time <= self.swipe_time):
+                if abs(dx) >= abs(dy):
+                    direction = RIGHT if dx > 0 else LEFT
+                else:
+                    direction = DOWN if dy > 0 else UP
+                self._session_gesture = True
+                self._emit(SWIPE, 1, finger.x, finger.y, dx=dx, dy=dy, direction=direction)
+                return
+        if finger.max_distance > self.tap_slop or duration > self.tap_time:
+            # Hareket etti veya uzun kaldı: bu oturum dokunma sayılmaz
+            self._session_gesture = True
+            return
+        if not remaining:
+            self._emit(TAP, self._session_fingers, finger.start_x, finger.start_y)
+
+    def _two_fingers(self):
+        a, b = self.fingers.values()
+        center_x = (a.x + b.x) / 2
+        center_y = (a.y + b.y) / 2
+        spread = math.hypot(a.x - b.x, a.y - b.y)
+        if self._pair is None:
+            # Başlangıç merkezi/açıklığı ve son yayınlanan değerler
+            self._pair = [center_x, center_y, spread, center_x, center_y, spread]
+            return
+        pair = self._pair
+        if self._pair_mode is None:
+            moved = math.hypot(center_x - pair[0], center_y - pair[1])
+            stretched = abs(spread - pair[2])
+            if stretched >= self.pinch_threshold and stretched > moved:
+                self._pair_mode = PINCH
+            elif moved >= self.scroll_threshold:
+                self._pair_mode = SCROLL
+            else:
+                return
+            self._session_gesture = True
+        if self._pair_mode == SCROLL:
+            dx = center_x - pair[3]
+            dy = center_y - pair[4]
+            if dx or dy:
+                pair[3] = center_x
+                pair[4] = center_y
+                self._emit(SCROLL, 2, center_x, center_y, dx=dx, dy=dy)
+        elif spread != pair[5] and pair[5] > 0:
+            scale = spread / pair[5]
+            pair[5] = spread
+            self._emit(PINCH, 2, center_x, center_y, scale=scale)
+
+    def _drop_fingers(self):
+        now = self.device_time
+        for finger in self.fingers.values():
+            self.ended_trails.append((now, finger.trail))
+        self.fingers = {}
+        self._reset_session()
+        self.version += 1
+
+    def _expire_trails(self):
+        ended = self.ended_trails
+        limit = self.device_time - self.trail_linger
+        while ended and ended[0][0] < limit:
+            ended.popleft()
+            self.version += 1
+
+    def trails(self):
+        # Arayüz için (iz, solukluk 0-1) listesi; aktif parmaklar 0
+        now = self.device_time
+        result = [(finger.trail, 0.0) for finger in self.fingers.values()]
+        for ended_at, trail in self.ended_trails:
+            result.append((trail, min(1.0, (now - ended_at) / self.trail_linger)))
+        return result
@@ -0,0 +1,320 @@
+"""
+/dev/uhid üzerinden sanal DualShock 4
+Geliştirici: rtx4090
+
+Çekirdekte gerçek bir HID cihazı (054C:09CC) oluşturur; hid.enumerate() ve
+DS4Controller.connect() onu gerçek kontrolcü gibi bulur. Sentetik ya da
+kaydedilmiş (.ds4cap) giriş raporlarını tam hızda gönderir, uygulamanın
+yazdığı çıkış raporlarını zaman damgasıyla toplar ve sürücünün istediği
+özellik raporlarını (kalibrasyon, eşleşme, yazılım sürümü) yanıtlar.
+Böylece kontrolcü takılı olmayan Linux CI makinelerinde gerçek hidapi yolu
+uçtan uca denenebilir. /dev/uhid için yazma izni gerekir (genellikle root).
+
+Kullanım:
+    python ds4_uhid.py [--transport usb|bt] [--rate HZ] [--duration SN]
+                       [--capture KAYIT.ds4cap] [--outputs CIKIS.txt]
+"""
+
+import argparse
+import os
+import struct
+import threading
+import time
+import zlib
+
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_hotplug import SONY_VENDOR_ID, BUS_USB, BUS_BLUETOOTH
+from ds4_input import (USB_REPORT_ID, BT_REPORT_ID,
+                       BT_CALIBRATION_REPORT_ID, BT_CALIBRATION_REPORT_SIZE,
+                       USB_CALIBRATION_REPORT_ID, USB_CALIBRATION_REPORT_SIZE)
+from ds4_output import TRANSPORT_USB, TRANSPORT_BT
+
+UHID_PATH = '/dev/uhid'
+DS4_V2_PRODUCT_ID = 0x09CC
+
+# linux/uhid.h olay türleri
+UHID_DESTROY = 1
+UHID_START = 2
+UHID_STOP = 3
+UHID_OPEN = 4
+UHID_CLOSE = 5
+UHID_OUTPUT = 6
+UHID_GET_REPORT = 9
+UHID_GET_REPORT_REPLY = 10
+UHID_CREATE2 = 11
+UHID_INPUT2 = 12
+UHID_SET_REPORT = 13
+UHID_SET_REPORT_REPLY = 14
+
+UHID_DATA_MAX = 4096
+# struct uhid_event: 4 baytlık tür + en büyük birleşim üyesi (uhid_create2_req)
+UHID_EVENT_SIZE = 4 + 128 + 64 + 64 + 2 + 2 + 4 * 4 + UHID_DATA_MAX
+
+_CREATE2 = struct.Struct(f'<I128s64s64sHHIIII{UHID_DATA_MAX}s')
+_INPUT2_HEAD = struct.Struct('<IH')
+_OUTPUT_TAIL = struct.Struct('<HB')
+_REPORT_REQUEST = struct.Struct('<IIBB')
+_GET_REPORT_REPLY_HEAD = struct.Struct('<IIHH')
+_SET_REPORT_REPLY = struct.Struct('<IIH')
+
+EIO = 5
+
+# Özellik raporları (DS4 ve Linux hid-playstation sürücüsünün kullandıkları)
+PAIRING_INFO_REPORT_ID = 0x12
+PAIRING_INFO_REPORT_SIZE = 16
+FIRMWARE_INFO_REPORT_ID = 0xA3
+FIRMWARE_INFO_REPORT_SIZE = 49
+BT_FEATURE_CRC_SEED = zlib.crc32(b'\xa3')
+
+# Rapor kimlikleri ve boyutları DS4 ile aynı olan sade bir tanımlayıcı. hidraw
+# ve hidapi raporları ham bayt olarak taşıdığı için alanların ayrıntılı
+# tanımına gerek yoktur; önemli olan kimlik/boyut eşleşmesidir.
+DS4_REPORT_DESCRIPTOR = bytes((
+    0x05, 0x01,        # Usage Page (Generic Desktop)
+    0x09, 0x05,        # Usage (Game Pad)
+    0xA1, 0x01,        # Collection (Application)
+    0x06, 0x00, 0xFF,  # Usage Page (Vendor)
+    0x15, 0x00,        # Logical Minimum (0)
+    0x26, 0xFF, 0x00,  # Logical Maximum (255)
+    0x75, 0x08,        # Report Size (8)
+    0x85, 0x01,        # Report ID (0x01): USB giriş, 63 bayt
+    0x09, 0x20, 0x95, 0x3F, 0x81, 0x02,
+    0x85, 0x05,        # Report ID (0x05): USB çıkış 31 bayt, BT kalibrasyon 40 bayt
+    0x09, 0x21, 0x95, 0x1F, 0x91, 0x02,
+    0x09, 0x22, 0x95, 0x28, 0xB1, 0x02,
+    0x85, 0x11,        # Report ID (0x11): BT giriş/çıkış, 77 bayt
+    0x09, 0x23, 0x95, 0x4D, 0x81, 0x02,
+    0x09, 0x24, 0x91, 0x02,
+    0x85, 0x02,        # Report ID (0x02): USB kalibrasyon, 36 bayt
+    0x09, 0x25, 0x95, 0x24, 0xB1, 0x02,
+    0x85, 0x12,        # Report ID (0x12): eşleşme bilgisi, 15 bayt
+    0x09, 0x26, 0x95, 0x0F, 0xB1, 0x02,
+    0x85, 0xA3,        # Report ID (0xA3): yazılım sürümü, 48 bayt
+    0x09, 0x27, 0x95, 0x30, 0xB1, 0x02,
+    0xC0,              # End Collection
+))
+
+
+def calibration_report(transport, gyro_range=8192, accel_range=8192, gyro_speed=540):
+    # Sıfır sapmalı, nominal kazançlı kalibrasyon. USB'de artı/eksi değerler
+    # eksen eksen, Bluetooth'ta önce tüm artılar sonra tüm eksiler gelir.
+    if transport == TRANSPORT_BT:
+        report = bytearray(BT_CALIBRATION_REPORT_SIZE)
+        report[0] = BT_CALIBRATION_REPORT_ID
+        gyro = (gyro_range, gyro_range, gyro_range, -gyro_range, -gyro_range, -gyro_range)
+    else:
+        report = bytearray(USB_CALIBRATION_REPORT_SIZE)
+        report[0] = USB_CALIBRATION_REPORT_ID
+        gyro = (gyro_range, -gyro_range, gyro_range, -gyro_range, gyro_range, -gyro_range)
+    struct.pack_into('<3h6h2h6h', report, 1, 0, 0, 0, *gyro, gyro_speed, gyro_speed,
+                     accel_range, -accel_range, accel_range, -accel_range, accel_range, -accel_range)
+    return report
+
+
+def default_feature_reports(transport, mac=b'\x00\x11\x22\x33\x44\x55'):
+    reports = {USB_CALIBRATION_REPORT_ID: calibration_report(TRANSPORT_USB),
+               BT_CALIBRATION_REPORT_ID: calibration_report(TRANSPORT_BT)}
+    pairing = bytearray(PAIRING_INFO_REPORT_SIZE)
+    pairing[0] = PAIRING_INFO_REPORT_ID
+    pairing[1:7] = mac[::-1]  # MAC adresi ters bayt sırasıyla
+    reports[PAIRING_INFO_REPORT_ID] = pairing
+    firmware = bytearray(FIRMWARE_INFO_REPORT_SIZE)
+    firmware[0] = FIRMWARE_INFO_REPORT_ID
+    firmware[1:12] = b'Sep 21 2018'
+    firmware[17:25] = b'04:50:51'
+    struct.pack_into('<HH', firmware, 35, 0x0100, 0xB400)  # Donanım / yazılım sürümü
+    reports[FIRMWARE_INFO_REPORT_ID] = firmware
+    if transport == TRANSPORT_BT:
+        # Bluetooth'ta özellik raporlarının sonu 0xA3 başlıklı CRC32'dir
+        for report in reports.values():
+            crc = zlib.crc32(memoryview(report)[:len(report) - 4], BT_FEATURE_CRC_SEED)
+            struct.pack_into('<I', report, len(report) - 4, crc)
+    return reports
+
+
+class UhidDS4:
+    # Sanal kontrolcü. Olaylar (çıkış raporları, özellik istekleri) ayrı bir
+    # thread'de okunur; send() herhangi bir thread'den çağrılabilir.
+    def __init__(self, transport=TRANSPORT_USB, name='Sony Interactive Entertainment Wireless Controller',
+                 uniq='00:11:22:33:44:55', product_id=DS4_V2_PRODUCT_ID, uhid_path=UHID_PATH,
+                 max_outputs=100_000):
+        self.transport = transport
+        self.name = name
+        self.uniq = uniq
+        self.product_id = product_id
+        self.uhid_path = uhid_path
+        self.max_outputs = max_outputs
+        mac = bytes(int(part, 16) for part in uniq.split(':'))
+        self.feature_reports = default_feature_reports(transport, mac)
+        # Alınan çıkış raporları: (zaman damgası, bayt)
+        self.outputs = []
+        self.output_count = 0
+        self.feature_requests = 0
+        self.sent = 0
+        self.late = 0
+        self.started = threading.Event()
+        self.opened = threading.Event()
+        self._fd = None
+        self._thread = None
+        self._input = bytearray(_INPUT2_HEAD.size + UHID_DATA_MAX)
+
+    def create(self):
+        try:
+            self._fd = os.open(self.uhid_path, os.O_RDWR | os.O_CLOEXEC)
+        except OSError as e:
+            raise OSError(f"{self.uhid_path} açılamadı (yazma izni gerekli): {e}") from e
+        bus = BUS_BLUETOOTH if self.transport == TRANSPORT_BT else BUS_USB
+        event = _CREATE2.pack(UHID_CREATE2, self.name.encode()[:127], b'ds4-uhid',
+                              self.uniq.encode()[:63], len(DS4_REPORT_DESCRIPTOR), bus,
+                              SONY_VENDOR_ID, self.product_id, 0x0100, 0, DS4_REPORT_DESCRIPTOR)
+        os.write(self._fd, event.ljust(UHID_EVENT_SIZE, b'\0'))
+        self._thread = threading.Thread(target=self._event_loop, name="DS4Uhid", daemon=True)
+        self._thread.start()
+
+    def send(self, report):
+        # Tek bir giriş raporunu çekirdeğe ver
+        size = len(report)
+        buffer = self._input
+        _INPUT2_HEAD.pack_into(buffer, 0, UHID_INPUT2, size)
+        buffer[_INPUT2_HEAD.size:_INPUT2_HEAD.size + size] = report
+        os.write(self._fd, memoryview(buffer)[:_INPUT2_HEAD.size + size])
+        self.sent += 1
+
+    def stream(self, reports, rate=1000, duration=None, stop_event=None):
+        # Raporları mutlak zaman ızgarasına göre `rate` Hz'de gönder; geciken
+        # raporlar beklemeden gönderilir, böylece kayma birikmez.
+        clock = time.perf_counter
+        stop_event = stop_event or threading.Event()
+        start = clock()
+        count = len(reports)
+        index = 0
+        while not stop_event.is_set():
+            due = start + index / rate
+            if duration is not None and due - start >= duration:
+                break
+            delay = due - clock()
+            if delay > 0:
+                stop_event.wait(delay)
+            elif delay < -1.0 / rate:
+                self.late += 1
+            self.send(reports[index % count])
+            index += 1
+        return index
+
+    def _event_loop(self):
+        while True:
+            try:
+                event = os.read(self._fd, UHID_EVENT_SIZE)
+            except OSError:
+                break
+            if len(event) < 4:
+                break
+            kind = struct.unpack_from('<I', event)[0]
+            if kind == UHID_OUTPUT:
+                size, _ = _OUTPUT_TAIL.unpack_from(event, 4 + UHID_DATA_MAX)
+                self.output_count += 1
+                if len(self.outputs) < self.max_outputs:
+                    self.outputs.append((time.perf_counter(), bytes(event[4:4 + size])))
+            elif kind == UHID_GET_REPORT:
+                _, request_id, report_id, _ = _REPORT_REQUEST.unpack_from(event)
+                self.feature_requests += 1
+                self._reply_get_report(request_id, self.feature_reports.get(report_id))
+            elif kind == UHID_SET_REPORT:
+                _, request_id, _, _ = _REPORT_REQUEST.unpack_from(event)
+                self._write_event(_SET_REPORT_REPLY.pack(UHID_SET_REPORT_REPLY, request_id, 0))
+            elif kind == UHID_START:
+                self.started.set()
+            elif kind == UHID_OPEN:
+                self.opened.set()
+            elif kind == UHID_CLOSE:
+                self.opened.clear()
+            elif kind == UHID_STOP:
+                self.started.clear()
+
+    def _reply_get_report(self, request_id, report):
+        if report is None:
+            event = _GET_REPORT_REPLY_HEAD.pack(UHID_GET_REPORT_REPLY, request_id, EIO, 0)
+        else:
+            event = _GET_REPORT_REPLY_HEAD.pack(UHID_GET_REPORT_REPLY, request_id, 0, len(report)) + bytes(report)
+        self._write_event(event)
+
+    def _write_event(self, event):
+        try:
+            os.write(self._fd, event.ljust(UHID_EVENT_SIZE, b'\0'))
+        except OSError as e:
+            print(f"uhid yanıtı yazılamadı: {e}")
+
+    def destroy(self):
+        if self._fd is None:
+            return
+        try:
+            os.write(self._fd, struct.pack('<I', UHID_DESTROY).ljust(UHID_EVENT_SIZE, b'\0'))
+        except OSError:
+            pass
+        os.close(self._fd)
+        self._fd = None
+        if self._thread is not None:
+            self._thread.join(1.0)
+
+    def output_reports(self, report_id=None):
+        # report_id verilirse yalnızca o kimlikli çıkış raporları
+        return [(stamp, data) for stamp, data in self.outputs
+                if report_id is None or (data and data[0] == report_id)]
+
+    def __enter__(self):
+        self.create()
+        return self
+
+    def __exit__(self, *exc):
+        self.destroy()
+
+
+def load_reports(transport, capture=None):
+    if capture:
+        from ds4_capture import CaptureReader
+        reader = CaptureReader(capture)
+        try:
+            reports = [bytes(report) for _, report in reader]
+        finally:
+            reader.close()
+        if not reports:
+            raise ValueError(f"Kayıt boş: {capture}")
+        wanted = BT_REPORT_ID if transport == TRANSPORT_BT else USB_REPORT_ID
+        if reports[0][0] != wanted:
+            print(f"Uyarı: kayıt 0x{reports[0][0]:02X} raporları içeriyor, sanal cihaz {transport}")
+        return reports
+    make = synthetic_bt_report if transport == TRANSPORT_BT else synthetic_report
+    return [bytes(make(i)) for i in range(256)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='/dev/uhid üzerinden sanal DualShock 4')
+    parser.add_argument('--transport', choices=(TRANSPORT_USB, TRANSPORT_BT), default=TRANSPORT_USB)
+    parser.add_argument('--rate', type=float, default=1000, help='giriş raporu hızı (Hz)')
+    parser.add_argument('--duration', type=float, help='süre (sn); verilmezse Ctrl+C ile durur')
+    parser.add_argument('--capture', help='oynatılacak .ds4cap kaydı (verilmezse sentetik)')
+    parser.add_argument('--outputs', help='alınan çıkış raporlarını bu dosyaya yaz')
+    args = parser.parse_args()
+
+    reports = load_reports(args.transport, args.capture)
+    stop_event = threading.Event()
+    with UhidDS4(args.transport) as device:
+        if not device.started.wait(2.0):
+            print("Uyarı: çekirdek cihazı başlatmadı")
+        print(f"Sanal DS4 hazır ({args.transport}, {args.rate:g} Hz)")
+        start = time.perf_counter()
+        try:
+            device.stream(reports, args.rate, args.duration, stop_event)
+        except KeyboardInterrupt:
+            stop_event.set()
+        elapsed = time.perf_counter() - start
+        print(f"Gönderilen: {device.sent} rapor ({device.sent / elapsed:,.0f}/sn), geciken: {device.late}, "
+              f"çıkış raporu: {device.output_count}, özellik isteği: {device.feature_requests}")
+        if args.outputs:
+            with open(args.outputs, 'w', encoding='utf-8') as f:
+                for stamp, data in device.outputs:
+                    f.write(f"{stamp - start:.6f} {data.hex()}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,462 @@
+"""
+Linux uinput üzerinden sanal gamepad: DS4 girişini yeniden eşleyip yayınlar
+Geliştirici: rtx4090
+
+DS4 durumu kullanıcı tanımlı bir eşlemeden geçirilir ve /dev/uinput ile
+oluşturulan standart bir gamepad'den (BTN_SOUTH, ABS_X, ...) yayınlanır.
+Eşleme şunları yapabilir:
+- tuşları değiştirmek veya kapatmak
+- turbo
+- eksen ters çevirme
+- çubuktan tuşa eşleme
+Eşleme düz tablolara derlenir: üç bayt tuş için üç bit maskesi tablosu,
+eksen başına 256 baytlık tablo. Rapor başına iş birkaç tablo indekslemesinden
+ibarettir.
+
+Yayın doğrudan okuyucu thread'inde, ReportRing.listeners üzerinden yapılır.
+GUI zamanlayıcısı beklenmez. Değişen olaylar tek bir write() ile gönderilir.
+Her rapor için rapor alındığı andan uinput'a yazılana kadar geçen ek
+gecikme ölçülür (stats()).
+
+Eşleme biçimi (yerleşik eşlemeler ve mappings/*.json dosyaları için aynı):
+    {
+        "name": "nintendo",
+        "label": "Nintendo Düzeni",
+        "buttons": {"CROSS": "CIRCLE", "CIRCLE": "CROSS", "SHARE": null},
+        "turbo": {"SQUARE": 15},
+        "invert": ["ly", "ry"],
+        "axis_buttons": [{"axis": "lx", "direction": -1, "threshold": 0.5, "button": "LEFT"}]
+    }
+"buttons" içinde bir DS4 tuşu başka bir tuşa (veya listeye) eşlenir; null
+tuşu kapatır. "turbo" değerleri saniyedeki basış sayısıdır. /dev/uinput için
+yazma izni gerekir.
+
+Kullanım:
+    python ds4_uinput.py [--mapping ESLEME.json | --name YERLESIK]
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+from array import array
+
+import ds4_input
+from ds4_input import DS4State, decode_any, DEVICE_TICK_US
+
+UINPUT_PATH = '/dev/uinput'
+MAPPING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mappings')
+
+# linux/uinput.h
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_SET_ABSBIT = 0x40045567
+BUS_VIRTUAL = 0x06
+
+# linux/input-event-codes.h
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0
+ABS_X, ABS_Y, ABS_Z, ABS_RX, ABS_RY, ABS_RZ = 0x00, 0x01, 0x02, 0x03, 0x04, 0x05
+ABS_HAT0X, ABS_HAT0Y = 0x10, 0x11
+
+# struct input_event (timeval + tür + kod + değer) ve struct uinput_user_dev
+_EVENT = struct.Struct('@llHHi')
+_USER_DEV = struct.Struct('80sHHHHI64i64i64i64i')
+
+# DS4 tuş adları -> DS4State.buttons bitleri
+BUTTONS = {name[4:]: getattr(ds4_input, name) for name in dir(ds4_input) if name.startswith('BTN_')}
+DPAD_MASK = BUTTONS['UP'] | BUTTONS['DOWN'] | BUTTONS['LEFT'] | BUTTONS['RIGHT']
+
+# Her DS4 tuşunun sanal gamepad'deki karşılığı (hid-playstation ile aynı düzen).
+# D-Pad tuşları HAT ekseni olarak yayınlanır.
+KEY_CODES = {
+    'CROSS': 0x130, 'CIRCLE': 0x131, 'TRIANGLE': 0x133, 'SQUARE': 0x134,
+    'L1': 0x136, 'R1': 0x137, 'L2': 0x138, 'R2': 0x139,
+    'SHARE': 0x13A, 'OPTIONS': 0x13B, 'PS': 0x13C, 'L3': 0x13D, 'R3': 0x13E,
+    'TOUCHPAD': 0x2C0,
+}
+
+# Eksen adı -> (DS4State alanı, uinput kodu)
+AXES = (('lx', ABS_X), ('ly', ABS_Y), ('rx', ABS_RX), ('ry', ABS_RY), ('l2', ABS_Z), ('r2', ABS_RZ))
+AXIS_INDEX = {name: index for index, (name, _) in enumerate(AXES)}
+
+BUILTIN_MAPPINGS = [
+    {'name': 'varsayilan', 'label': 'Varsayılan'},
+    {
+        'name': 'nintendo', 'label': 'Nintendo Düzeni',
+        'buttons': {'CROSS': 'CIRCLE', 'CIRCLE': 'CROSS', 'SQUARE': 'TRIANGLE', 'TRIANGLE': 'SQUARE'},
+    },
+    {
+        # Sol çubuk D-Pad gibi de çalışır (2D oyunlar için)
+        'name': 'cubuk_dpad', 'label': 'Sol Çubuk = D-Pad',
+        'axis_buttons': [
+            {'axis': 'lx', 'direction': -1, 'threshold': 0.5, 'button': 'LEFT'},
+            {'axis': 'lx', 'direction': 1, 'threshold': 0.5, 'button': 'RIGHT'},
+            {'axis': 'ly', 'direction': -1, 'threshold': 0.5, 'button': 'UP'},
+            {'axis': 'ly', 'direction': 1, 'threshold': 0.5, 'button': 'DOWN'},
+        ],
+    },
+]
+
+
+class CompiledMapping:
+    __slots__ = ('name', 'label', 'low', 'mid', 'high', 'turbo', 'axis_tables', 'axis_buttons')
+
+    def __init__(self, name, label, low, mid, high, turbo, axis_tables, axis_buttons):
+        self.name = name
+        self.label = label
+        # Tuş baytı -> çıkış maskesi: buttons & 0xFF, (>> 8) & 0xFF, >> 16
+        self.low = low
+        self.mid = mid
+        self.high = high
+        # (maske, yarım periyot sn)
+        self.turbo = turbo
+        # Eksen başına 256 baytlık tablo (AXES sırasıyla)
+        self.axis_tables = axis_tables
+        # (eksen indeksi, 256 baytlık 0/1 tablo, çıkış maskesi)
+        self.axis_buttons = axis_buttons
+
+    def remap(self, state, device_time):
+        # (çıkış tuş maskesi, eksen değerleri)
+        buttons = state.buttons
+        out = self.low[buttons & 0xFF] | self.mid[(buttons >> 8) & 0xFF] | self.high[buttons >> 16]
+        raw = (state.lx, state.ly, state.rx, state.ry, state.l2, state.r2)
+        for index, table, mask in self.axis_buttons:
+            if table[raw[index]]:
+                out |= mask
+        for mask, half_period in self.turbo:
+            if out & mask and int(device_time / half_period) & 1:
+                out &= ~mask
+        tables = self.axis_tables
+        return out, (tables[0][raw[0]], tables[1][raw[1]], tables[2][raw[2]],
+                     tables[3][raw[3]], tables[4][raw[4]], tables[5][raw[5]])
+
+
+def _button(name):
+    try:
+        return BUTTONS[name.upper()]
+    except KeyError:
+        raise ValueError(f"Bilinmeyen tuş: {name}") from None
+
+
+def compile_mapping(mapping):
+    # Eşlemeyi tuş baytı başına maske tablolarına ve eksen tablolarına çevir
+    targets = {bit: bit for bit in BUTTONS.values()}
+    for source, target in mapping.get('buttons', {}).items():
+        if target is None:
+            targets[_button(source)] = 0
+        elif isinstance(target, str):
+            targets[_button(source)] = _button(target)
+        else:
+            targets[_button(source)] = sum(_button(name) for name in target)
+    tables = []
+    for shift, size in ((0, 256), (8, 256), (16, 4)):
+        table = array('I', [0]) * size
+        for value in range(size):
+            out = 0
+            bits = value << shift
+            for bit, target in targets.items():
+                if bits & bit:
+                    out |= target
+            table[value] = out
+        tables.append(table)
+
+    # Aynı hızdaki turbo tuşları tek maskede toplanır
+    rates = {}
+    for name, rate in mapping.get('turbo', {}).items():
+        rates[float(rate)] = rates.get(float(rate), 0) | _button(name)
+    turbo = tuple((mask, 0.5 / rate) for rate, mask in rates.items() if rate > 0)
+
+    invert = set(mapping.get('invert', ()))
+    unknown = invert - set(AXIS_INDEX)
+    if unknown:
+        raise ValueError(f"Bilinmeyen eksen: {', '.join(sorted(unknown))}")
+    identity = bytes(range(256))
+    inverted = bytes(range(255, -1, -1))
+    axis_tables = tuple(inverted if name in invert else identity for name, _ in AXES)
+
+    axis_buttons = []
+    for rule in mapping.get('axis_buttons', ()):
+        index = AXIS_INDEX[rule['axis']]
+        threshold = float(rule.get('threshold', 0.5))
+        direction = int(rule.get('direction', 1))
+        if rule['axis'] in ('l2', 'r2'):
+            table = bytes(value / 255 >= threshold for value in range(256))
+        else:
+            table = bytes((value - 128) / 127 * direction >= threshold for value in range(256))
+        axis_buttons.append((index, table, _button(rule['button'])))
+
+    return CompiledMapping(mapping.get('name', 'adsiz'), mapping.get('label'),
+                           tables[0], tables[1], tables[2], turbo, axis_tables, tuple(axis_buttons))
+
+
+def load_mapping_file(path):
+    with open(path, encoding='utf-8') as f:
+        mapping = json.load(f)
+    mapping.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return mapping
+
+
+def load_mappings(path=MAPPING_DIR):
+    # Yerleşik eşlemeler ve mappings/*.json: ad -> derlenmiş eşleme
+    mappings = {}
+    sources = list(BUILTIN_MAPPINGS)
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith('.json'):
+                try:
+                    sources.append(load_mapping_file(os.path.join(path, filename)))
+                except (OSError, ValueError) as e:
+                    print(f"Eşleme yüklenemedi ({filename}): {e}")
+    for mapping in sources:
+        try:
+            compiled = compile_mapping(mapping)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Eşleme derlenemedi ({mapping.get('name')}): {e}")
+            continue
+        mappings[compiled.name] = compiled
+    return mappings
+
+
+class VirtualGamepad:
+    # attach(ring) ile bir halka tampona bağlanır; her yeni raporda yazar
+    # (okuyucu) thread'inde çözülür, eşlenir ve yayınlanır. fd verilirse
+    # uinput kurulumu atlanır ve olaylar doğrudan o tanımlayıcıya yazılır
+    # (ölçümler için).
+    def __init__(self, mapping=None, name='DS4 Sanal Gamepad', uinput_path=UINPUT_PATH,
+                 vendor_id=0, product_id=0, sticks=None, fd=None, latency_samples=4096):
+        self.mapping = mapping or compile_mapping(BUILTIN_MAPPINGS[0])
+        self.name = name
+        self.uinput_path = uinput_path
+        self.vendor_id = vendor_id
+        self.product_id = product_id
+        # Çubuk/tetik işlemcisi (ds4_sticks.StickProcessor), eşlemeden önce uygulanır
+        self.sticks = sticks
+        self._fd = fd
+        self._owns_fd = fd is None
+        self._ring = None
+        self._state = DS4State()
+        self._last_seq = -1
+        self._last_timestamp = None
+        self._device_time = 0.0
+        # Son yayınlanan değerler; yalnızca değişenler gönderilir
+        self._buttons = 0
+        self._hat = (0, 0)
+        self._axes = [None] * len(AXES)
+        self._events = bytearray(_EVENT.size * 32)
+        self._bit_codes = {BUTTONS[name]: code for name, code in KEY_CODES.items()}
+        self.reports = 0
+        self.events = 0
+        self.writes = 0
+        self.errors = 0
+        self.remap_time = 0.0
+        # Son latency_samples raporun ek gecikmesi (sn)
+        self._latencies = array('d', [0.0]) * latency_samples
+        self._latency_count = 0
+
+    def set_mapping(self, mapping):
+        # Tek atama; okuyucu thread'i bir sonraki raporda yeni eşlemeyi kullanır
+        self.mapping = mapping
+
+    def create(self):
+        if self._fd is not None:
+            return
+        import fcntl
+        try:
+            fd = os.open(self.uinput_path, os.O_WRONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        except OSError as e:
+            raise OSError(f"{self.uinput_path} açılamadı (yazma izni gerekli): {e}") from e
+        try:
+            fcntl.ioctl(fd, UI_SET_EVBIT, EV_KEY)
+            fcntl.ioctl(fd, UI_SET_EVBIT, EV_ABS)
+            fcntl.ioctl(fd, UI_SET_EVBIT, EV_SYN)
+            for code in KEY_CODES.values():
+                fcntl.ioctl(fd, UI_SET_KEYBIT, code)
+            absmax = [0] * 64
+            absmin = [0] * 64
+            for _, code in AXES:
+                fcntl.ioctl(fd, UI_SET_ABSBIT, code)
+                absmax[code] = 255
+            for code in (ABS_HAT0X, ABS_HAT0Y):
+                fcntl.ioctl(fd, UI_SET_ABSBIT, code)
+                absmin[code] = -1
+                absmax[code] = 1
+            os.write(fd, _USER_DEV.pack(self.name.encode()[:79], BUS_VIRTUAL, self.vendor_id,
+                                        self.product_id, 1, 0, *absmax, *absmin, *([0] * 64), *([0] * 64)))
+            fcntl.ioctl(fd, UI_DEV_CREATE)
+        except OSError:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def attach(self, ring):
+        self.detach()
+        self._ring = ring
+        self._last_seq = ring.head - 1
+        self._last_timestamp = None
+        ring.listeners.append(self._on_report)
+
+    def detach(self):
+        if self._ring is not None:
+            try:
+                self._ring.listeners.remove(self._on_report)
+            except ValueError:
+                pass
+            self._ring = None
+
+    def _on_report(self):
+        latest = self._ring.latest()
+        if latest is None or latest[0] == self._last_seq:
+            return
+        self._last_seq, stamp, report = latest
+        self.process(report, stamp)
+
+    def process(self, report, stamp):
+        # Bir raporu çöz, eşle ve değişen olayları tek write() ile gönder
+        begin = time.perf_counter()
+        state = self._state
+        if decode_any(report, state) is None:
+            return
+        if self._last_timestamp is not None:
+            self._device_time += ((state.timestamp - self._last_timestamp) & 0xFFFF) * (DEVICE_TICK_US / 1e6)
+        self._last_timestamp = state.timestamp
+        if self.sticks:
+            self.sticks.apply(state)
+        buttons, axes = self.mapping.remap(state, self._device_time)
+
+        events = self._events
+        count = 0
+        changed = (buttons ^ self._buttons) & ~DPAD_MASK
+        bit_codes = self._bit_codes
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            code = bit_codes.get(bit)
+            if code is not None:
+                _EVENT.pack_into(events, count * _EVENT.size, 0, 0, EV_KEY, code, 1 if buttons & bit else 0)
+                count += 1
+        if (buttons ^ self._buttons) & DPAD_MASK:
+            hat = ((1 if buttons & BUTTONS['RIGHT'] else 0) - (1 if buttons & BUTTONS['LEFT'] else 0),
+                   (1 if buttons & BUTTONS['DOWN'] else 0) - (1 if buttons & BUTTONS['UP'] else 0))
+            for axis, (code, value) in enumerate(((ABS_HAT0X, hat[0]), (ABS_HAT0Y, hat[1]))):
+                if value != self._hat[axis]:
+                    _EVENT.pack_into(events, count * _EVENT.size, 0, 0, EV_ABS, code, value)
+                    count += 1
+            self._hat = hat
+        self._buttons = buttons
+        last_axes = self._axes
+        for index in range(len(AXES)):
+            value = axes[index]
+            if value != last_axes[index]:
+                last_axes[index] = value
+                _EVENT.pack_into(events, count * _EVENT.size, 0, 0, EV_ABS, AXES[index][1], value)
+                count += 1
+        self.reports += 1
+        if not count:
+            self.remap_time += time.perf_counter() - begin
+            return
+        _EVENT.pack_into(events, count * _EVENT.size, 0, 0, EV_SYN, SYN_REPORT, 0)
+        count += 1
+        try:
+            os.write(self._fd, memoryview(events)[:count * _EVENT.size])
+            self.writes += 1
+            self.events += count
+        except OSError:
+            # Çekirdek kuyruğu dolu veya cihaz kapandı; okuyucu thread'i durdurulmaz
+            self.errors += 1
+        end = time.perf_counter()
+        self.remap_time += end - begin
+        self._latencies[self._latency_count % len(self._latencies)] = end - stamp
+        self._latency_count += 1
+
+    def stats(self):
+        count = min(self._latency_count, len(self._latencies))
+        latencies = sorted(self._latencies[:count])
+
+        def percentile(fraction):
+            return latencies[min(count - 1, int(fraction * count))] * 1e6 if count else 0.0
+
+        return {
+            'reports': self.reports,
+            'writes': self.writes,
+            'events': self.events,
+            'errors': self.errors,
+            'remap_us_avg': self.remap_time / self.reports * 1e6 if self.reports else 0.0,
+            'latency_p50_us': percentile(0.5),
+            'latency_p99_us': percentile(0.99),
+            'latency_max_us': latencies[-1] * 1e6 if count else 0.0,
+        }
+
+    def destroy(self):
+        self.detach()
+        if self._fd is None or not self._owns_fd:
+            return
+        import fcntl
+        try:
+            fcntl.ioctl(self._fd, UI_DEV_DESTROY)
+        except OSError:
+            pass
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.create()
+        return self
+
+    def __exit__(self, *exc):
+        self.destroy()
+
+
+def main():
+    from ds4_backend import HidapiBackend
+    from ds4_input import ReportRing, InputReader, valid_report
+    from ds4_output import TRANSPORT_BT
+
+    parser = argparse.ArgumentParser(description='DualShock 4 -> uinput sanal gamepad')
+    parser.add_argument('--mapping', help='eşleme JSON dosyası')
+    parser.add_argument('--name', default='varsayilan', help='yerleşik veya mappings/ içindeki eşleme adı')
+    args = parser.parse_args()
+
+    if args.mapping:
+        mapping = compile_mapping(load_mapping_file(args.mapping))
+    else:
+        mappings = load_mappings()
+        if args.name not in mappings:
+            parser.error(f"bilinmeyen eşleme: {args.name} ({', '.join(mappings)})")
+        mapping = mappings[args.name]
+
+    backend = HidapiBackend()
+    devices = backend.enumerate()
+    if not devices:
+        print("DualShock 4 bulunamadı")
+        return
+    info = devices[0]
+    device = backend.open(info)
+    if info['transport'] == TRANSPORT_BT:
+        device.get_feature_report(0x05, 41)
+    ring = ReportRing(validate=valid_report)
+    reader = InputReader(device, ring)
+    with VirtualGamepad(mapping) as gamepad:
+        gamepad.attach(ring)
+        reader.start()
+        print(f"Sanal gamepad çalışıyor, eşleme: {mapping.label or mapping.name} (Ctrl+C ile durur)")
+        try:
+            while True:
+                time.sleep(5)
+                stats = gamepad.stats()
+                print(f"Rapor: {stats['reports']}, yazma: {stats['writes']}, "
+                      f"ek gecikme p50/p99: {stats['latency_p50_us']:.0f}/{stats['latency_p99_us']:.0f} µs")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            reader.stop()
+            device.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# Modüller depo kökünde düz dosyalar olarak durur
+sys.path.insert(0, ROOT)
+
+
+def load_hex_reports(name):
+    # fixtures/<name> dosyasından {ad: bytes}
+    reports = {}
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                label, data = line.split()
+                reports[label] = bytes.fromhex(data)
+    return reports
+
+
+@pytest.fixture(scope='session')
+def bt_reports():
+    return load_hex_reports('ds4_bt_0x11.hex')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    # Arayüz testleri ekransız (offscreen) Qt ile çalışır; PyQt5 yoksa atlanır
+    pytest.importorskip('PyQt5')
+    if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def panel(qapp):
+    import ds4_controller
+    panel = ds4_controller.DS4ControlPanel()
+    yield panel
+    panel.close()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import socket
+import sys
+
+import pytest
+
+from ds4_async import AsyncDS4
+from ds4_backend import synthetic_report, synthetic_bt_report
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='hidraw yalnızca Linux')
+
+
+def make_pad(transport='usb', **kwargs):
+    # SOCK_SEQPACKET, hidraw gibi rapor sınırlarını korur
+    device_end, app_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    app_end.setblocking(False)
+    pad = AsyncDS4({'path': b'test', 'transport': transport}, os.dup(app_end.fileno()), **kwargs)
+    app_end.close()
+    device_end.setblocking(False)
+    return device_end, pad
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 5.0))
+
+
+def test_states_follow_reports():
+    async def main():
+        device_end, pad = make_pad()
+        states = pad.states()
+        first = asyncio.ensure_future(states.__anext__())
+        await asyncio.sleep(0)
+        device_end.send(bytes(synthetic_report(5)))
+        state = await first
+        assert state.counter == 5
+        device_end.close()
+        # Kontrolcü ayrılınca akış biter
+        assert [state async for state in states] == []
+        assert pad.closed and pad.reports == 1
+
+    run(main())
+
+
+def test_slow_subscriber_keeps_latest_state():
+    async def main():
+        device_end, pad = make_pad(queue_size=4)
+        states = pad.states()
+        first = asyncio.ensure_future(states.__anext__())
+        await asyncio.sleep(0)
+        for i in range(10):
+            device_end.send(bytes(synthetic_report(i)))
+            await asyncio.sleep(0.001)
+        await first
+        received = []
+        while pad.reports < 10:
+            await asyncio.sleep(0.001)
+        device_end.close()
+        async for state in states:
+            received.append(state.counter)
+        assert received[-1] == 9
+        assert pad.overflows > 0
+        await pad.aclose()
+
+    run(main())
+
+
+def test_bad_bluetooth_report_rejected():
+    async def main():
+        device_end, pad = make_pad('bt')
+        bad = bytearray(synthetic_bt_report(1))
+        bad[10] ^= 0xFF
+        device_end.send(bytes(bad))
+        device_end.send(bytes(synthetic_bt_report(2)))
+        while pad.reports < 1:
+            await asyncio.sleep(0.001)
+        assert pad.state.counter == 2
+        assert pad.stats()['rejected'] == 1
+        await pad.aclose()
+
+    run(main())
+
+
+def test_only_bad_reports_publish_nothing():
+    async def main():
+        device_end, pad = make_pad('bt')
+        states = pad.states()
+        first = asyncio.ensure_future(states.__anext__())
+        bad = bytearray(synthetic_bt_report(1))
+        bad[10] ^= 0xFF
+        device_end.send(bytes(bad))
+        while not pad.ring.rejected:
+            await asyncio.sleep(0.001)
+        assert not first.done() and pad.reports == 0
+        device_end.send(bytes(synthetic_bt_report(2)))
+        assert (await first).counter == 2
+        await pad.aclose()
+
+    run(main())
+
+
+def test_outputs_are_coalesced_and_awaited():
+    async def main():
+        device_end, pad = make_pad(output_interval=0.01)
+        await asyncio.gather(*(pad.set_led(value, 0, 0) for value in range(1, 11)))
+        await pad.set_led(1, 2, 3)
+        received = []
+        while True:
+            try:
+                received.append(device_end.recv(64))
+            except BlockingIOError:
+                break
+        assert len(received) == pad.writes == 2
+        assert received[0][6] == 10
+        assert received[-1][6:9] == b'\x01\x02\x03'
+        # Aynı durum yeniden yazılmaz
+        await pad.set_led(1, 2, 3)
+        assert pad.writes == 2
+        await pad.aclose()
+
+    run(main())
+
+
+def test_rumble_duration_stops_motors():
+    async def main():
+        device_end, pad = make_pad(output_interval=0.0)
+        await pad.rumble(10, 200, duration=0.01)
+        first, last = device_end.recv(64), device_end.recv(64)
+        assert first[4:6] == bytes((10, 200))
+        assert last[4:6] == b'\x00\x00'
+        await pad.aclose()
+
+    run(main())
+
+
+def test_closed_pad_rejects_outputs():
+    async def main():
+        device_end, pad = make_pad()
+        pad.close()
+        with pytest.raises(ConnectionError):
+            await pad.set_led(1, 1, 1)
+        device_end.close()
+
+    run(main())
@@ -0,0 +1,106 @@
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+import ds4_bench
+from conftest import ROOT
+from ds4_backend import FakeDevice, FakeBackend, synthetic_report, synthetic_bt_report
+from ds4_controller import DS4Controller
+from ds4_input import bt_crc_valid, decode_any, DS4State
+
+
+def test_synthetic_reports_decode():
+    state = DS4State()
+    for i in (0, 1, 63, 255):
+        assert decode_any(synthetic_report(i), state).counter == i & 0x3F
+        bt = synthetic_bt_report(i)
+        assert bt_crc_valid(bt)
+        assert decode_any(bt, DS4State()).buttons == state.buttons
+
+
+def test_fake_device_paces_reports():
+    device = FakeDevice(rate=1000)
+    device.open_path(device.path)
+    start = time.perf_counter()
+    for _ in range(50):
+        assert len(device.read(64, 100)) == 64
+    # 50 rapor 1000 Hz'de ~49 ms sürer
+    assert time.perf_counter() - start >= 0.045
+    device.set_nonblocking(True)
+    device.start_time = time.perf_counter()
+    device.emitted = 10
+    assert device.read(64) == []
+    assert device.read(64, 1) == []
+
+
+def test_fake_device_records_writes_and_features():
+    device = FakeDevice(rate=0, transport='bt')
+    with pytest.raises(OSError):
+        device.read(78)
+    device.open_path(device.path)
+    assert device.read(78)[0] == 0x11
+    device.write(b'\x05\x01')
+    assert device.writes[0][1] == b'\x05\x01'
+    assert device.get_feature_report(0x05, 41)[0] == 0x05
+    assert device.feature_requests == [0x05]
+    device.close()
+    with pytest.raises(OSError):
+        device.write(b'\x05')
+
+
+def test_fake_backend_enumerates_only_ds4():
+    pads = [FakeDevice(path=b'a'), FakeDevice(path=b'b', product_id=0x1234)]
+    backend = FakeBackend(pads)
+    assert [info['path'] for info in backend.enumerate()] == [b'a']
+    assert backend.open(pads[0].info) is pads[0]
+    assert not pads[0].closed
+
+
+def test_controller_end_to_end_with_fake_backend():
+    # Donanımsız tam yol: bağlan, raporları halkaya oku, çıkış raporu yaz, bağlantıyı kes
+    device = FakeDevice(rate=1000)
+    ds4 = DS4Controller(FakeBackend([device]))
+    assert ds4.connect()
+    try:
+        deadline = time.monotonic() + 2.0
+        while ds4.ring.head < 20 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert ds4.ring.head >= 20
+        ds4.set_led_color(1, 2, 3)
+        deadline = time.monotonic() + 1.0
+        while not (device.writes and device.writes[-1][1][6:9] == b'\x01\x02\x03'):
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+    finally:
+        ds4.disconnect()
+    assert device.closed and ds4.device is None
+
+
+def test_connect_without_device_fails():
+    assert not DS4Controller(FakeBackend([FakeDevice(product_id=0x1234)])).connect()
+
+
+def test_benchmarks_return_named_results():
+    # Ölçümler küçük sayılarla da çalışmalı ve adlarını döndürmeli
+    for name in ('decode', 'replay', 'stats', 'buttons', 'combos'):
+        result = ds4_bench.BENCHMARKS[name](count=2000, duration=0.05)
+        assert result['name'] == name
+
+
+def test_compare_prints_changes(capsys):
+    ds4_bench.compare({'decode': {'name': 'decode', 'ns': 50.0}},
+                      {'results': {'decode': {'ns': 100.0}}})
+    assert 'decode.ns: 100.0 -> 50.0 (-50.0%)' in capsys.readouterr().out
+
+
+def test_bench_cli_writes_json(tmp_path):
+    path = tmp_path / 'sonuc.json'
+    result = subprocess.run([sys.executable, 'ds4_bench.py', 'decode', '--count', '1000', '--json', str(path)],
+                            cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert data['version'] == ds4_bench.RESULTS_VERSION
+    assert data['results']['decode']['reports'] == 1000
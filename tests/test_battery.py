@@ -0,0 +1,95 @@
+import pytest
+
+from ds4_battery import BatteryMonitor, battery_percent, sparkline, format_duration
+
+
+def test_battery_percent_decoding():
+    assert battery_percent(0x05) == (55, False, False)
+    assert battery_percent(0x0A) == (100, False, False)
+    assert battery_percent(0x13) == (35, True, True)
+    assert battery_percent(0x1B) == (100, False, True)
+    assert battery_percent(0x0E) == (None, False, False)
+
+
+def test_sparkline_and_duration():
+    assert sparkline([]) == ''
+    assert sparkline([0, 50, 100]) == '▁▅█'
+    assert sparkline([150, -10]) == '█▁'
+    assert format_duration(59) == '0 dk'
+    assert format_duration(3 * 3600 + 25 * 60) == '3 sa 25 dk'
+
+
+def test_capacity_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        BatteryMonitor(capacity=100)
+
+
+def test_updates_are_rate_limited():
+    monitor = BatteryMonitor(sample_interval=10.0)
+    assert monitor.update(0x08, now=0.0)
+    assert not monitor.update(0x07, now=5.0)
+    assert monitor.update(0x07, now=10.0)
+    assert monitor.head == 2
+    # Geçersiz seviye örnek olarak alınmaz
+    assert not monitor.update(0x0F, now=20.0)
+    assert monitor.head == 2
+
+
+def test_smoothing_and_state_change():
+    monitor = BatteryMonitor(sample_interval=0.0, smoothing=60.0)
+    monitor.update(0x08, now=0.0)
+    monitor.update(0x07, now=30.0)
+    # Yarım zaman sabiti: 85 -> 75 yolunun yarısı
+    assert monitor.smoothed == pytest.approx(80.0)
+    monitor.update(0x13, now=40.0)
+    # Kablo takılınca ortalama sıfırlanır
+    assert monitor.smoothed == 35.0 and monitor.state_since == 40.0
+    assert monitor.charging and monitor.cable
+
+
+def discharge(monitor, seconds, start=0.0, level=10, step=600):
+    # Her step saniyede bir seviye düşen pil
+    t = start
+    while t <= start + seconds:
+        monitor.update(max(0, level - int((t - start) // step)), now=t)
+        t += 10.0
+    return t
+
+
+def test_remaining_time_while_discharging():
+    monitor = BatteryMonitor()
+    assert monitor.remaining() is None
+    discharge(monitor, 1800)
+    # %10 / 600 sn: kalan süre yaklaşık yüzde * 60 sn
+    remaining = monitor.remaining()
+    assert remaining is not None
+    assert remaining == pytest.approx(monitor.smoothed * 60, rel=0.3)
+    snapshot = monitor.snapshot()
+    assert snapshot['remaining_seconds'] == remaining
+    assert snapshot['samples'] == monitor.head
+
+
+def test_remaining_needs_enough_history():
+    monitor = BatteryMonitor()
+    discharge(monitor, 100)
+    assert monitor.slope() is None
+
+
+def test_estimate_ignores_samples_before_plugging_in():
+    monitor = BatteryMonitor()
+    t = discharge(monitor, 1200)
+    for i in range(60):
+        monitor.update(0x10 | min(9, 3 + i // 20), now=t + i * 10.0)
+    assert monitor.charging
+    assert monitor.slope() > 0
+    assert monitor.remaining() > 0
+
+
+def test_history_and_samples_wrap():
+    monitor = BatteryMonitor(capacity=8, sample_interval=0.0)
+    for i in range(20):
+        monitor.update(0x05, now=float(i))
+    assert len(monitor.samples()) == 8
+    assert monitor.samples()[0][0] == 12.0
+    assert len(monitor.history(40)) == 8
+    assert monitor.samples(since=18.0) == [(18.0, 55.0), (19.0, 55.0)]
@@ -0,0 +1,137 @@
+import os
+import struct
+import zlib
+
+from ds4_input import (BT_REPORT_ID, BT_REPORT_SIZE, BTN_CROSS, BTN_L2, BTN_PS, BTN_RIGHT, BTN_UP,
+                       DS4State, ReportRing, bt_crc_valid, decode_any, decode_report, valid_report)
+from ds4_output import BT_OUTPUT_REPORT_SIZE, OutputState, TRANSPORT_BT
+
+GOOD = ('idle', 'idle_next', 'cross_l2', 'dpad_up_right_ps', 'touch')
+
+
+def usb_equivalent(report):
+    # Aynı verinin USB 0x01 karşılığı: Bluetooth'ta veriler iki bayt kaymıştır
+    return b'\x01' + report[3:3 + 63]
+
+
+def test_fixture_reports_have_bt_layout(bt_reports):
+    for name, report in bt_reports.items():
+        assert len(report) == BT_REPORT_SIZE, name
+        assert report[0] == BT_REPORT_ID, name
+
+
+def test_crc_accepts_good_reports(bt_reports):
+    for name in GOOD:
+        assert bt_crc_valid(bt_reports[name]), name
+        assert valid_report(bt_reports[name]), name
+
+
+def test_crc_covers_hid_header_byte(bt_reports):
+    # CRC32, rapordan önce gelen 0xA1 başlık baytını da kapsar
+    report = bt_reports['idle']
+    assert zlib.crc32(b'\xa1' + report[:-4]) == struct.unpack('<I', report[-4:])[0]
+
+
+def test_crc_rejects_bad_report(bt_reports):
+    assert not bt_crc_valid(bt_reports['bad_crc'])
+    assert not valid_report(bt_reports['bad_crc'])
+
+
+def test_truncated_bt_report_is_rejected(bt_reports):
+    assert not valid_report(bt_reports['idle'][:BT_REPORT_SIZE - 1])
+
+
+def test_idle_report_fields(bt_reports):
+    state = decode_any(bt_reports['idle'], DS4State())
+    assert (state.lx, state.ly, state.rx, state.ry) == (0x80, 0x7F, 0x81, 0x80)
+    assert state.buttons == 0
+    assert state.counter == 12
+    assert state.timestamp == 0x3A10
+    assert (state.gyro_x, state.gyro_y, state.gyro_z) == (-3, 2, 1)
+    assert (state.accel_x, state.accel_y, state.accel_z) == (-312, 8071, 1520)
+    assert state.battery == 8 and not state.cable
+    assert not state.touch0_active and not state.touch1_active
+
+
+def test_buttons_and_triggers(bt_reports):
+    state = decode_any(bt_reports['cross_l2'], DS4State())
+    assert state.buttons == BTN_CROSS | BTN_L2
+    assert state.l2 == 0xC4 and state.r2 == 0
+    state = decode_any(bt_reports['dpad_up_right_ps'], DS4State())
+    assert state.buttons == BTN_UP | BTN_RIGHT | BTN_PS
+
+
+def test_touch_finger(bt_reports):
+    state = decode_any(bt_reports['touch'], DS4State())
+    assert state.touch0_active
+    assert state.touch0_id == 5
+    assert (state.touch0_x, state.touch0_y) == (0x140, 0x203)
+    assert state.touch_counter == 7
+
+
+def test_bt_offset_matches_usb_layout(bt_reports):
+    # 0x11 raporu, iki bayt kaydırılmış USB raporuyla aynı duruma çözülmeli
+    for name in GOOD:
+        report = bt_reports[name]
+        bt_state = decode_any(report, DS4State())
+        usb_state = decode_report(usb_equivalent(report), DS4State())
+        for field in DS4State.__slots__:
+            assert getattr(bt_state, field) == getattr(usb_state, field), (name, field)
+
+
+def test_short_bt_mode_report_is_skipped():
+    # Genişletilmiş mod açılana kadar gelen 10 baytlık 0x01 raporu çözülmez
+    assert decode_any(b'\x01\x80\x80\x80\x80\x08\x00\x00\x00\x00', DS4State()) is None
+    assert decode_any(b'', DS4State()) is None
+
+
+def test_ring_rejects_bad_crc(bt_reports):
+    ring = ReportRing(8, validate=valid_report)
+    assert ring.push(bt_reports['idle'], 1.0)
+    assert not ring.push(bt_reports['bad_crc'], 2.0)
+    assert ring.head == 1
+    assert ring.rejected == 1
+    assert bytes(ring.latest()[2]) == bt_reports['idle']
+
+
+def test_rejected_report_keeps_oldest_slot_intact(bt_reports):
+    # Tampon doluyken sıradaki slot en eski geçerli raporu tutar; geride kalan
+    # okuyucular onu hâlâ okuyabilmeli
+    ring = ReportRing(4, validate=valid_report)
+    for i, name in enumerate(GOOD[:4]):
+        ring.push(bt_reports[name], float(i))
+    assert not ring.push(bt_reports['bad_crc'], 9.0)
+    seq, stamp, report = next(iter(ring.reports_since(0)))
+    assert (seq, stamp, bytes(report)) == (0, 0.0, bt_reports['idle'])
+
+
+def test_read_from_rejects_bad_crc_without_touching_slot(bt_reports):
+    ring = ReportRing(4, validate=valid_report)
+    for i, name in enumerate(GOOD[:4]):
+        ring.push(bt_reports[name], float(i))
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, bt_reports['bad_crc'])
+        assert ring.read_from(read_fd, 9.0) == BT_REPORT_SIZE
+        assert ring.rejected == 1 and ring.head == 4
+        assert bytes(next(iter(ring.reports_since(0)))[2]) == bt_reports['idle']
+        os.write(write_fd, bt_reports['touch'])
+        ring.read_from(read_fd, 10.0)
+        assert ring.head == 5
+        assert bytes(ring.latest()[2]) == bt_reports['touch']
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+
+def test_bt_output_report():
+    output = OutputState()
+    output.set(small_motor=0x40, big_motor=0x80, red=255, green=16, blue=1, flash_on=10, flash_off=20)
+    pack, size = output.packer(TRANSPORT_BT)
+    report = pack(bytearray(size))
+    assert size == BT_OUTPUT_REPORT_SIZE
+    assert report[0] == 0x11
+    assert bytes(report[6:13]) == bytes((0x40, 0x80, 255, 16, 1, 10, 20))
+    # Çıkışta CRC başlığı 0xA2'dir
+    assert zlib.crc32(b'\xa2' + bytes(report[:-4])) == struct.unpack('<I', report[-4:])[0]
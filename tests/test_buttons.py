@@ -0,0 +1,118 @@
+import pytest
+
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_buttons import ButtonEvents, PRESS, RELEASE, LONG_PRESS, DOUBLE_TAP
+from ds4_input import ReportRing, BTN_CROSS, BTN_CIRCLE, BTN_LEFT, BTN_L1, BTN_PS
+
+TICKS_PER_MS = 188  # ~1 ms, 16/3 µs'lik cihaz tikleriyle
+
+
+def report(i, b5=0x08, b6=0x00, b7=0x00, bt=False):
+    # i. milisaniyedeki rapor, verilen tuş baytlarıyla
+    data = synthetic_bt_report(i) if bt else synthetic_report(i)
+    base = 7 if bt else 5
+    data[base:base + 3] = bytes((b5, b6, (b7 & 0x03) | (data[base + 2] & 0xFC)))
+    data[base + 5:base + 7] = ((i * TICKS_PER_MS) & 0xFFFF).to_bytes(2, 'little')
+    return bytes(data)
+
+
+def run(frames, bt=False, **kwargs):
+    # frames: her milisaniye için (b5, b6, b7)
+    ring = ReportRing(1 << 14)
+    events = ButtonEvents(**kwargs)
+    received = []
+    events.on(received.append)
+    for i, frame in enumerate(frames):
+        ring.push(report(i, *frame, bt=bt), i / 1000)
+    events.consume(ring)
+    return events, [(event.kind, event.button) for event in received], received
+
+
+IDLE = (0x08, 0, 0)
+CROSS = (0x28, 0, 0)
+
+
+def test_press_and_release_between_frames():
+    # Tek raporluk basış iki arayüz karesi arasında kaçmamalı
+    events, kinds, _ = run([IDLE] * 5 + [CROSS] + [IDLE] * 5)
+    assert kinds == [(PRESS, BTN_CROSS), (RELEASE, BTN_CROSS)]
+    assert events.buttons == 0
+
+
+def test_multiple_buttons_in_one_report():
+    _, kinds, _ = run([IDLE, (0x46, 0x01, 0x01), IDLE])
+    pressed = {button for kind, button in kinds if kind == PRESS}
+    assert pressed == {BTN_CIRCLE, BTN_LEFT, BTN_L1, BTN_PS}
+    assert len(kinds) == 8
+
+
+def test_long_press_uses_device_time():
+    _, kinds, received = run([IDLE] + [CROSS] * 700 + [IDLE], long_press=0.6)
+    assert kinds == [(PRESS, BTN_CROSS), (LONG_PRESS, BTN_CROSS), (RELEASE, BTN_CROSS)]
+    assert received[1].time - received[0].time == pytest.approx(0.6, abs=0.01)
+
+
+def test_short_press_is_not_long():
+    _, kinds, _ = run([IDLE] + [CROSS] * 100 + [IDLE] * 700)
+    assert LONG_PRESS not in [kind for kind, _ in kinds]
+
+
+def test_double_tap():
+    frames = [IDLE] + [CROSS] * 50 + [IDLE] * 100 + [CROSS] * 50 + [IDLE] * 100 + [CROSS] * 50 + [IDLE]
+    _, kinds, _ = run(frames)
+    # Üçüncü basış yeni bir çiftin ilk basışı sayılır
+    assert [kind for kind, _ in kinds].count(DOUBLE_TAP) == 1
+    slow = [IDLE] + [CROSS] * 50 + [IDLE] * 400 + [CROSS] * 50 + [IDLE]
+    assert DOUBLE_TAP not in [kind for kind, _ in run(slow)[1]]
+
+
+def test_bluetooth_reports():
+    _, kinds, _ = run([IDLE, CROSS, IDLE], bt=True)
+    assert kinds == [(PRESS, BTN_CROSS), (RELEASE, BTN_CROSS)]
+
+
+def test_timestamp_wrap_keeps_time_increasing():
+    # 16 bitlik zaman damgası ~350 ms'de sarar
+    events, _, _ = run([IDLE] * 1000)
+    assert events.device_time == pytest.approx(0.999 * 1.00267, rel=1e-3)
+
+
+def test_listener_filters_and_off():
+    ring = ReportRing(64)
+    events = ButtonEvents()
+    crosses, presses = [], []
+    events.on(crosses.append, mask=BTN_CROSS)
+    listener = events.on(presses.append, kinds=PRESS)
+    for i, frame in enumerate([IDLE, (0x68, 0, 0), IDLE]):
+        ring.push(report(i, *frame), i / 1000)
+    events.consume(ring)
+    assert {event.button for event in crosses} == {BTN_CROSS}
+    assert {event.kind for event in presses} == {PRESS} and len(presses) == 2
+    events.off(listener)
+    ring.push(report(3, *CROSS), 0.003)
+    events.consume(ring)
+    assert len(presses) == 2
+    assert [event.kind for event in crosses[2:]] == [PRESS, DOUBLE_TAP]
+
+
+def test_failing_listener_does_not_stop_others(capsys):
+    ring = ReportRing(64)
+    events = ButtonEvents()
+    received = []
+    events.on(lambda event: 1 / 0)
+    events.on(received.append)
+    ring.push(report(0, *CROSS), 0.0)
+    events.consume(ring)
+    assert len(received) == 1
+    assert 'Tuş olayı işleyici hatası' in capsys.readouterr().out
+
+
+def test_ring_overrun_is_counted():
+    ring = ReportRing(16)
+    events = ButtonEvents()
+    for i in range(40):
+        ring.push(report(i), i / 1000)
+    events.consume(ring)
+    assert events.lost == 24
+    events.reset(ring)
+    assert events.cursor == ring.head and events.lost == 0
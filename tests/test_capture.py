@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from ds4_backend import FakeDevice
+from ds4_capture import (CaptureWriter, CaptureReader, CaptureReplayer, HEADER_SIZE, RECORD_SIZE)
+from ds4_input import ReportRing
+
+
+def usb_report(i):
+    # 64 baytlık USB raporu; ikinci bayt hangi rapor olduğunu gösterir
+    report = bytearray(64)
+    report[0] = 0x01
+    report[1] = i & 0xFF
+    return bytes(report)
+
+
+@pytest.fixture
+def capture_path(tmp_path):
+    return str(tmp_path / 'oturum.ds4cap')
+
+
+def write_capture(path, reports, rate=1000, ring_capacity=1024):
+    ring = ReportRing(ring_capacity)
+    writer = CaptureWriter(ring, path)
+    for i, report in enumerate(reports):
+        ring.push(report, i / rate)
+    writer.flush()
+    writer.close()
+    return writer
+
+
+def test_round_trip_usb_and_bt(capture_path, bt_reports):
+    reports = [usb_report(1), bt_reports['idle'], usb_report(3)]
+    write_capture(capture_path, reports)
+    reader = CaptureReader(capture_path)
+    try:
+        assert len(reader) == 3
+        records = [(stamp, bytes(report)) for stamp, report in reader]
+        assert records == [(0.0, reports[0]), (0.001, reports[1]), (0.002, reports[2])]
+        assert reader.duration == pytest.approx(0.002)
+        assert reader.wall_start > 0
+    finally:
+        reader.close()
+
+
+def test_writer_only_records_after_start(capture_path):
+    ring = ReportRing(16)
+    ring.push(usb_report(0), 0.0)
+    writer = CaptureWriter(ring, capture_path)
+    ring.push(usb_report(1), 1.0)
+    writer.flush()
+    writer.close()
+    reader = CaptureReader(capture_path)
+    assert [stamp for stamp, _ in reader] == [1.0]
+    reader.close()
+
+
+def test_writer_counts_lost_reports(capture_path):
+    ring = ReportRing(8)
+    writer = CaptureWriter(ring, capture_path)
+    for i in range(20):
+        ring.push(usb_report(i), float(i))
+    writer.flush()
+    writer.close()
+    assert (writer.records, writer.lost) == (8, 12)
+
+
+def test_append_to_existing_capture(capture_path):
+    write_capture(capture_path, [usb_report(0)])
+    write_capture(capture_path, [usb_report(1)])
+    reader = CaptureReader(capture_path)
+    assert len(reader) == 2
+    reader.close()
+
+
+def test_truncated_last_record_is_ignored(capture_path):
+    write_capture(capture_path, [usb_report(i) for i in range(3)])
+    with open(capture_path, 'r+b') as f:
+        f.truncate(HEADER_SIZE + 2 * RECORD_SIZE + 10)
+    reader = CaptureReader(capture_path)
+    assert len(reader) == 2
+    reader.close()
+
+
+def test_foreign_file_rejected(capture_path):
+    with open(capture_path, 'wb') as f:
+        f.write(b'PNG' + bytes(100))
+    with pytest.raises(ValueError):
+        CaptureReader(capture_path)
+    with pytest.raises(ValueError):
+        CaptureWriter(ReportRing(8), capture_path)
+    with open(capture_path, 'wb') as f:
+        f.write(b'kisa')
+    with pytest.raises(ValueError):
+        CaptureReader(capture_path)
+
+
+def test_realtime_replay_keeps_spacing(capture_path):
+    write_capture(capture_path, [usb_report(i) for i in range(51)], rate=1000)
+    reader = CaptureReader(capture_path)
+    times = []
+    played = reader.replay(lambda stamp, report: times.append(time.perf_counter()), realtime=True, speed=2.0)
+    reader.close()
+    assert played == 51
+    # 50 ms'lik kayıt iki kat hızla ~25 ms sürer
+    assert 0.02 <= times[-1] - times[0] < 0.1
+
+
+@pytest.mark.parametrize('realtime', [True, False])
+def test_replay_can_be_stopped(capture_path, realtime):
+    # Kayıtlar 10 µs arayla; işleyici 1 ms sürdüğü için gerçek zamanlı oynatma
+    # geride kalır ve hiç beklemez. Durdurma isteği yine de bir sonraki kayıtta görülür.
+    write_capture(capture_path, [usb_report(i) for i in range(1000)], rate=100_000)
+    reader = CaptureReader(capture_path)
+    stop = threading.Event()
+
+    def sink(stamp, report):
+        stop.set()
+        time.sleep(0.001)
+
+    played = reader.replay(sink, realtime=realtime, stop_event=stop)
+    reader.close()
+    assert played == 1
+
+
+def test_replayer_feeds_ring(capture_path):
+    reports = [usb_report(i) for i in range(100)]
+    write_capture(capture_path, reports)
+    ring = ReportRing(128)
+    finished = threading.Event()
+    replayer = CaptureReplayer(capture_path, ring, realtime=False, on_finished=finished.set)
+    replayer.start()
+    assert finished.wait(2.0)
+    assert replayer.played == 100
+    assert [bytes(report) for _, _, report in ring.reports_since(0)] == reports
+
+
+def test_fake_device_from_capture(capture_path):
+    reports = [usb_report(i) for i in range(5)]
+    write_capture(capture_path, reports)
+    device = FakeDevice.from_capture(capture_path, rate=0)
+    device.open_path(device.path)
+    assert [bytes(device.read(64)) for _ in range(5)] == reports
@@ -0,0 +1,182 @@
+import pytest
+
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_combos import ComboRecognizer, parse_combo, BUTTON_SYMBOLS
+from ds4_input import ReportRing, BTN_UP, BTN_DOWN, BTN_CROSS, BTN_CIRCLE, BTN_L1, BTN_R1
+
+DPAD = {'↑': 0, '→': 2, '↓': 4, '←': 6}
+
+
+def report(i, held=(), bt=False):
+    # i. milisaniyedeki rapor; held: basılı tuş simgeleri
+    data = synthetic_bt_report(i) if bt else synthetic_report(i)
+    base = 7 if bt else 5
+    hat = 8
+    mask = 0
+    for name in held:
+        if name in DPAD:
+            hat = DPAD[name]
+        else:
+            mask |= BUTTON_SYMBOLS[name]
+    data[base:base + 3] = bytes((hat | (mask & 0xF0), (mask >> 8) & 0xFF, (data[base + 2] & 0xFC) | (mask >> 16)))
+    data[base + 5:base + 7] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+    return bytes(data)
+
+
+class Script:
+    # 1 kHz rapor akışı: her basış press_ms basılı, release_ms bırakılmış
+    def __init__(self, capacity=1 << 14, bt=False):
+        self.ring = ReportRing(capacity)
+        self.bt = bt
+        self.t = 0
+
+    def hold(self, held, ms):
+        for _ in range(ms):
+            self.ring.push(report(self.t, held, self.bt), self.t / 1000)
+            self.t += 1
+
+    def press(self, *names, press_ms=30, release_ms=30):
+        for name in names:
+            self.hold((name,), press_ms)
+            self.hold((), release_ms)
+
+
+def recognizer_with(*texts, **kwargs):
+    recognizer = ComboRecognizer(**kwargs)
+    fired = []
+    for text in texts:
+        recognizer.add(text, lambda combo, time: fired.append((combo.name, round(time, 3))))
+    return recognizer, fired
+
+
+def test_parse_combo():
+    assert parse_combo('↑ ↑ ↓') == ('sequence', [BTN_UP, BTN_UP, BTN_DOWN], 0.0)
+    assert parse_combo('L1+R1 2sn') == ('chord', BTN_L1 | BTN_R1, 2.0)
+    assert parse_combo('l1+r1 1.5 s') == ('chord', BTN_L1 | BTN_R1, 1.5)
+    assert parse_combo('×+○') == ('chord', BTN_CROSS | BTN_CIRCLE, 0.0)
+    for text in ('', '2sn', 'L1 R1 2sn', '↑ L1+R1', 'YOK'):
+        with pytest.raises(ValueError):
+            parse_combo(text)
+
+
+@pytest.mark.parametrize('bt', [False, True])
+def test_sequence_recognized(bt):
+    recognizer, fired = recognizer_with('↑ ↑ ↓ ↓ × ○')
+    script = Script(bt=bt)
+    script.press('×', '↑', '↑', '↓', '↓', '×', '○')
+    recognizer.consume(script.ring)
+    assert [name for name, _ in fired] == ['↑ ↑ ↓ ↓ × ○']
+
+
+def test_overlapping_sequences_share_automaton():
+    recognizer, fired = recognizer_with('↑ ↑ ↓', '↑ ↓', '↓ ×')
+    script = Script()
+    script.press('↑', '↑', '↑', '↓', '×')
+    recognizer.consume(script.ring)
+    assert [name for name, _ in fired] == ['↑ ↑ ↓', '↑ ↓', '↓ ×']
+    assert recognizer.states == 7
+
+
+def test_slow_presses_break_sequence():
+    recognizer, fired = recognizer_with('↑ ↓', gap=0.3)
+    script = Script()
+    script.press('↑', release_ms=400)
+    script.press('↓')
+    recognizer.consume(script.ring)
+    assert fired == []
+
+
+def test_within_limits_total_time():
+    recognizer = ComboRecognizer(gap=1.0)
+    fired = []
+    recognizer.add('↑ ↓ ×', lambda combo, time: fired.append(combo), within=0.5)
+    script = Script()
+    script.press('↑', '↓', '×', release_ms=300)
+    script.press('↑', '↓', '×', release_ms=100)
+    recognizer.consume(script.ring)
+    assert len(fired) == 1
+
+
+def test_chord_holds_fire_in_order_once():
+    recognizer, fired = recognizer_with('L1+R1 2sn', 'L1+R1 1sn')
+    script = Script()
+    script.hold(('L1', 'R1'), 2500)
+    script.hold((), 10)
+    recognizer.consume(script.ring)
+    assert fired == [('L1+R1 1sn', pytest.approx(1.003, abs=0.01)), ('L1+R1 2sn', pytest.approx(2.005, abs=0.01))]
+
+
+def test_chord_released_early_does_not_fire():
+    recognizer, fired = recognizer_with('L1+R1 1sn')
+    script = Script()
+    script.hold(('L1', 'R1'), 800)
+    script.hold(('L1',), 400)
+    recognizer.consume(script.ring)
+    assert fired == []
+
+
+def test_consume_in_small_pieces():
+    recognizer, fired = recognizer_with('↑ ↑ ↓ ↓ × ○', 'L1+R1 1sn')
+    script = Script(capacity=64)
+    for names in ('↑', '↑', '↓', '↓', '×', '○'):
+        script.press(names, press_ms=20, release_ms=20)
+        recognizer.consume(script.ring)
+    for _ in range(24):
+        script.hold(('L1', 'R1'), 50)
+        recognizer.consume(script.ring)
+    assert [name for name, _ in fired] == ['↑ ↑ ↓ ↓ × ○', 'L1+R1 1sn']
+    assert recognizer.lost == 0
+
+
+def test_lost_reports_cancel_pending_chord():
+    recognizer, fired = recognizer_with('L1+R1 1sn')
+    script = Script(capacity=64)
+    script.hold(('L1', 'R1'), 10)
+    recognizer.consume(script.ring)
+    script.hold(('L1', 'R1'), 1200)
+    recognizer.consume(script.ring)
+    assert recognizer.lost > 0 and fired == []
+
+
+def test_nested_consume_from_callback_is_ignored():
+    # Geri çağrı modal pencere açıp olay döngüsünden yeniden consume() çağırabilir
+    script = Script()
+    recognizer = ComboRecognizer()
+    fired = []
+
+    def nested(combo, time):
+        fired.append(combo.name)
+        script.press('×', '○')
+        recognizer.consume(script.ring)
+
+    recognizer.add('× ○', nested)
+    script.press('×', '○')
+    recognizer.consume(script.ring)
+    assert fired == ['× ○']
+    # İç içe çağrıda eklenen raporlar sonraki consume()'da bir kez işlenir
+    recognizer.consume(script.ring)
+    assert fired == ['× ○', '× ○']
+
+
+def test_failing_callback_and_remove(capsys):
+    recognizer = ComboRecognizer()
+    combo = recognizer.add('× ○', lambda combo, time: 1 / 0, name='bozuk')
+    script = Script()
+    script.press('×', '○')
+    recognizer.consume(script.ring)
+    assert combo.fired == 1
+    assert 'Kombo işleyici hatası (bozuk)' in capsys.readouterr().out
+    recognizer.remove(combo)
+    script.press('×', '○')
+    recognizer.consume(script.ring)
+    assert combo.fired == 1
+
+
+def test_many_registered_combos_do_not_interfere():
+    recognizer, fired = recognizer_with('↑ ↑ ↓ ↓ × ○')
+    for i in range(500):
+        recognizer.add(f'L1 R1 {"× " * (i % 7)}□', lambda combo, time: None)
+    script = Script()
+    script.press('↑', '↑', '↓', '↓', '×', '○')
+    recognizer.consume(script.ring)
+    assert [name for name, _ in fired] == ['↑ ↑ ↓ ↓ × ○']
@@ -0,0 +1,101 @@
+import pytest
+
+import ds4_input
+from ds4_input import DS4State
+
+
+@pytest.fixture
+def widget(qapp):
+    from ds4_controller import ControllerWidget
+    widget = ControllerWidget()
+    yield widget
+    widget.close()
+
+
+def test_unchanged_state_updates_nothing(widget):
+    state = DS4State()
+    widget.show_state(state)
+    assert widget.show_state(state) == 0
+
+
+def test_only_changed_elements_are_updated(widget):
+    state = DS4State()
+    widget.show_state(state)
+    state.buttons = ds4_input.BTN_CROSS
+    assert widget.show_state(state) == 1
+    state.buttons |= ds4_input.BTN_L1 | ds4_input.BTN_R1
+    assert widget.show_state(state) == 2
+    state.lx = 200
+    state.r2 = 128
+    assert widget.show_state(state) == 2
+    state.buttons = 0
+    assert widget.show_state(state) == 3
+
+
+def test_counter_bits_do_not_cause_updates(widget):
+    # Yalnızca şemada gösterilen tuş bitleri karşılaştırılır
+    state = DS4State()
+    widget.show_state(state)
+    state.buttons = 1 << 20
+    state.counter = 9
+    state.timestamp = 1234
+    assert widget.show_state(state) == 0
+
+
+def test_panel_counts_skipped_elements(panel):
+    from ds4_controller import ControllerWidget
+    state = DS4State()
+    panel.render_state(state)
+    panel.widget_updates = panel.widget_updates_skipped = 0
+    state.buttons = ds4_input.BTN_TRIANGLE
+    panel.render_state(state)
+    panel.render_state(state)
+    assert panel.widget_updates == 1
+    assert panel.widget_updates_skipped == 2 * ControllerWidget.ELEMENT_COUNT - 1
+
+
+def states_sequence(count):
+    # Her karede çubuk ve tetik değişir, birkaç karede bir tuş basılır/bırakılır
+    from ds4_controller import BUTTON_BITS
+    bits = list(BUTTON_BITS.values())
+    buttons = 0
+    for i in range(count):
+        if i % 4 == 0:
+            buttons ^= bits[(i // 4) % len(bits)]
+        state = DS4State()
+        state.buttons = buttons
+        state.lx = 128 + (i * 7) % 100 - 50
+        state.ly = 128 + (i * 5) % 80 - 40
+        state.rx = 128 + (i * 3) % 60 - 30
+        state.l2 = (i * 9) & 0xFF
+        yield state
+
+
+def test_static_art_is_cached_until_resize(qapp, widget):
+    widget.show()
+    qapp.processEvents()
+    cache = widget.cache
+    assert cache is not None
+    for state in states_sequence(20):
+        widget.show_state(state)
+        qapp.processEvents()
+    assert widget.cache is cache
+    assert len(widget.paint_times) > 20
+    widget.resize(widget.width() + 40, widget.height())
+    qapp.processEvents()
+    assert widget.cache is not cache
+    assert widget.cache.width() >= widget.width()
+
+
+def test_incremental_updates_match_full_repaint(qapp, widget):
+    # Yalnızca değişen alanlar çizilse de pencere tam çizimle piksel piksel aynı olmalı
+    widget.show()
+    qapp.processEvents()
+    for state in states_sequence(300):
+        widget.show_state(state)
+        qapp.processEvents()
+    screen = qapp.primaryScreen()
+    incremental = screen.grabWindow(widget.winId()).toImage()
+    full = widget.grab().toImage().convertToFormat(incremental.format())
+    assert incremental.size() == full.size()
+    assert incremental == full
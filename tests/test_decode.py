@@ -0,0 +1,117 @@
+import struct
+import tracemalloc
+
+import pytest
+
+import ds4_input
+from ds4_input import DS4State, decode_report, decode_any, MIN_REPORT_LENGTH
+
+
+def make_usb_report():
+    report = bytearray(64)
+    report[0] = 0x01
+    report[1:5] = bytes((0, 255, 100, 200))         # LX, LY, RX, RY
+    report[5] = 0x20 | 0x04                         # × ve d-pad aşağı
+    report[6] = 0x01 | 0x20                         # L1 ve OPTIONS
+    report[7] = (42 << 2) | 0x01                    # sayaç 42, PS
+    report[8] = 17                                  # L2
+    report[9] = 230                                 # R2
+    struct.pack_into('<HB3h3h', report, 10, 0xBEEF, 25, -1, 2, -300, 8192, -8192, 32767)
+    report[30] = 0x10 | 7                           # kablo takılı, pil 7
+    report[33] = 2                                  # dokunmatik paket sayısı
+    report[34] = 99
+    # Parmak 0: id 5, x=1000, y=500; parmak 1 yok
+    report[35:39] = struct.pack('<I', 5 | (1000 << 8) | (500 << 20))
+    report[39:43] = struct.pack('<I', 0x80)
+    return report
+
+
+def counted_report(i):
+    # i. rapor: sayaç ve kare/çarpı/daire/üçgen tuşları i ile değişir
+    report = make_usb_report()
+    report[5] = ((i & 0x0F) << 4) | 0x08
+    report[7] = (i & 0x3F) << 2
+    return report
+
+
+def test_state_has_no_instance_dict():
+    state = DS4State()
+    assert not hasattr(state, '__dict__')
+    assert (state.lx, state.ly, state.rx, state.ry) == (128, 128, 128, 128)
+    assert not state.touch0_active and not state.touch1_active
+
+
+def test_decode_all_fields():
+    state = decode_report(make_usb_report(), DS4State())
+    assert (state.lx, state.ly, state.rx, state.ry) == (0, 255, 100, 200)
+    assert (state.l2, state.r2) == (17, 230)
+    assert state.buttons == (ds4_input.BTN_CROSS | ds4_input.BTN_DOWN | ds4_input.BTN_L1 |
+                             ds4_input.BTN_OPTIONS | ds4_input.BTN_PS)
+    assert state.counter == 42
+    assert state.timestamp == 0xBEEF
+    assert state.temperature == 25
+    assert (state.gyro_x, state.gyro_y, state.gyro_z) == (-1, 2, -300)
+    assert (state.accel_x, state.accel_y, state.accel_z) == (8192, -8192, 32767)
+    assert state.battery == 7 and state.cable
+    assert (state.touch_packets, state.touch_counter) == (2, 99)
+    assert state.touch0_active and not state.touch1_active
+    assert (state.touch0_id, state.touch0_x, state.touch0_y) == (5, 1000, 500)
+
+
+@pytest.mark.parametrize('hat, expected', [
+    (0, ds4_input.BTN_UP),
+    (1, ds4_input.BTN_UP | ds4_input.BTN_RIGHT),
+    (2, ds4_input.BTN_RIGHT),
+    (3, ds4_input.BTN_RIGHT | ds4_input.BTN_DOWN),
+    (4, ds4_input.BTN_DOWN),
+    (5, ds4_input.BTN_DOWN | ds4_input.BTN_LEFT),
+    (6, ds4_input.BTN_LEFT),
+    (7, ds4_input.BTN_LEFT | ds4_input.BTN_UP),
+    (8, 0),
+])
+def test_dpad_hat_values(hat, expected):
+    report = make_usb_report()
+    report[5:8] = bytes((hat, 0, 0))
+    assert decode_report(report, DS4State()).buttons == expected
+
+
+def test_decode_reuses_state_and_memoryview():
+    state = DS4State()
+    view = memoryview(counted_report(3))
+    assert decode_report(view, state) is state
+    first = state.buttons
+    decode_report(memoryview(counted_report(4)), state)
+    assert state.counter == 4 and state.buttons != first
+
+
+def test_decode_any_rejects_short_and_unknown():
+    state = DS4State()
+    assert decode_any(b'', state) is None
+    assert decode_any(bytes(MIN_REPORT_LENGTH - 1), state) is None
+    assert decode_any(b'\x05' + bytes(63), state) is None
+    assert decode_any(make_usb_report(), state) is state
+
+
+def test_copy_from_copies_every_field():
+    source = decode_report(make_usb_report(), DS4State())
+    target = DS4State()
+    target.copy_from(source)
+    for name in DS4State.__slots__:
+        assert getattr(target, name) == getattr(source, name)
+
+
+def test_decode_does_not_retain_memory():
+    views = [memoryview(counted_report(i)) for i in range(256)]
+    state = DS4State()
+    for view in views:
+        decode_report(view, state)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(20_000):
+            decode_report(views[i & 0xFF], state)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # Küçük tamsayı önbelleği dışındaki değerler eski değerlerin yerine geçer
+    assert after - before < 4096
@@ -0,0 +1,157 @@
+import socket
+import time
+
+import pytest
+
+from ds4_backend import synthetic_report
+from ds4_dsu import (DSUServer, DSUClient, DSUSlot, MSG_VERSION, MSG_PORT_INFO, MSG_PAD_DATA, SERVER_MAGIC,
+                     CLIENT_MAGIC, SLOT_CONNECTED, SLOT_DISCONNECTED, PAD_DATA_SIZE, PORT_INFO_SIZE, HEADER_SIZE,
+                     build_packet, packet_valid, dsu_battery, mac_bytes)
+from ds4_imu import IMUCalibration
+from ds4_input import ReportRing
+
+
+@pytest.fixture
+def server():
+    server = DSUServer(port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = DSUClient(('127.0.0.1', server.port))
+    yield client
+    client.close()
+
+
+def wait_clients(server, count):
+    deadline = time.monotonic() + 1.0
+    while server.stats()['clients'] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_packet_crc():
+    packet = build_packet(CLIENT_MAGIC, 7, MSG_VERSION, b'')
+    assert packet_valid(packet, CLIENT_MAGIC)
+    assert not packet_valid(packet, SERVER_MAGIC)
+    broken = bytearray(packet)
+    broken[-1] ^= 1
+    assert not packet_valid(bytes(broken), CLIENT_MAGIC)
+    assert not packet_valid(packet[:10], CLIENT_MAGIC)
+
+
+def test_battery_and_mac():
+    assert dsu_battery(0x0A) == 0x05
+    assert dsu_battery(0x02) == 0x02
+    assert dsu_battery(0x13) == 0xEE
+    assert dsu_battery(0x1B) == 0xEF
+    assert dsu_battery(0x0F) == 0x00
+    assert mac_bytes('aa:bb:cc:dd:ee:ff') == bytes.fromhex('aabbccddeeff')
+    assert mac_bytes('') == bytes(6)
+    assert mac_bytes(None) == bytes(6)
+
+
+def test_invalid_slot_rejected():
+    with pytest.raises(ValueError):
+        DSUServer(port=0).add_slot(ReportRing(), slot=4)
+
+
+def test_version_and_port_info(server, client):
+    server.add_slot(ReportRing(), {'serial': '01:02:03:04:05:06', 'transport': 'bt'})
+    client.request_version()
+    message_type, data = client.receive()
+    assert message_type == MSG_VERSION
+    client.request_ports((0, 1))
+    replies = [client.receive() for _ in range(2)]
+    assert [message_type for message_type, _ in replies] == [MSG_PORT_INFO] * 2
+    assert len(replies[0][1]) == PORT_INFO_SIZE
+    first, second = replies[0][1], replies[1][1]
+    assert first[HEADER_SIZE:HEADER_SIZE + 2] == bytes((0, SLOT_CONNECTED))
+    assert first[HEADER_SIZE + 4:HEADER_SIZE + 10] == bytes((1, 2, 3, 4, 5, 6))
+    assert second[HEADER_SIZE:HEADER_SIZE + 2] == bytes((1, SLOT_DISCONNECTED))
+
+
+def test_pad_data_follows_ring(server, client):
+    ring = ReportRing()
+    server.add_slot(ring)
+    client.subscribe()
+    wait_clients(server, 1)
+    for i in range(5):
+        report = synthetic_report(i)
+        # Yalnızca çarpı basılı
+        report[5:7] = b'\x28\x00'
+        ring.push(bytes(report), time.perf_counter())
+    packets = []
+    for _ in range(5):
+        message_type, data = client.receive()
+        assert message_type == MSG_PAD_DATA and len(data) == PAD_DATA_SIZE
+        packets.append(DSUClient.parse_pad_data(data))
+    assert [packet['packet'] for packet in packets] == [1, 2, 3, 4, 5]
+    assert packets[-1]['buttons2'] == 0x40 and packets[-1]['buttons1'] == 0
+    assert packets[-1]['lx'] == synthetic_report(4)[1]
+    assert packets[-1]['ly'] == 255 - synthetic_report(4)[2]
+    # Cihaz zaman damgası sürekli artar (188 tik ~1 ms)
+    assert packets[-1]['timestamp_us'] == pytest.approx(4 * 1002.67, abs=2)
+
+
+def test_slot_subscription_filters(server, client):
+    rings = [ReportRing(), ReportRing()]
+    server.add_slot(rings[0], slot=0)
+    server.add_slot(rings[1], slot=1)
+    client.subscribe(slot=1)
+    wait_clients(server, 1)
+    rings[0].push(bytes(synthetic_report(0)), 0.0)
+    rings[1].push(bytes(synthetic_report(1)), 0.0)
+    _, data = client.receive()
+    assert data[HEADER_SIZE] == 1
+    with pytest.raises(socket.timeout):
+        client.socket.settimeout(0.1)
+        client.receive()
+
+
+def test_expired_clients_are_dropped():
+    server = DSUServer(port=0, client_timeout=0.05)
+    server.start()
+    client = DSUClient(('127.0.0.1', server.port))
+    try:
+        server.add_slot(ReportRing())
+        client.subscribe()
+        wait_clients(server, 1)
+        time.sleep(0.1)
+        server.add_slot(ReportRing(), slot=1).ring.push(bytes(synthetic_report(0)), 0.0)
+        deadline = time.monotonic() + 1.0
+        while server.stats()['clients']:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_motion_uses_slot_calibration():
+    ring = ReportRing()
+    calibration = IMUCalibration()
+    calibration.accel_scale = calibration.accel_scale * 2
+    slot = DSUSlot(0, ring, calibration=calibration)
+    nominal = DSUSlot(0, ring)
+    server = DSUServer(port=0)
+    values = []
+    for entry in (nominal, slot):
+        entry.state.accel_y = 8192
+        server._fill(entry)
+        values.append(DSUClient.parse_pad_data(server._packet)['accel'][1])
+    assert values[1] == pytest.approx(values[0] * 2)
+
+
+def test_stop_removes_ring_listeners():
+    ring = ReportRing()
+    server = DSUServer(port=0)
+    server.start()
+    server.add_slot(ring)
+    server.add_slot(ring)
+    assert len(ring.listeners) == 1
+    server.stop()
+    assert ring.listeners == []
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from ds4_haptics import HapticsPlayer, compile_pattern, BUILTIN_PATTERNS
+
+
+class RecordingSink:
+    def __init__(self):
+        self.values = []
+        self.changed = threading.Event()
+
+    def __call__(self, small, big):
+        self.values.append((small, big))
+        self.changed.set()
+
+    def wait_for(self, value, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        while value not in self.values:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.changed.wait(remaining)
+            self.changed.clear()
+        return True
+
+
+@pytest.fixture
+def player():
+    player = HapticsPlayer(RecordingSink())
+    player.start()
+    yield player
+    player.stop()
+
+
+def test_step_pattern_ticks():
+    compiled = compile_pattern({
+        'name': 'deneme', 'interpolation': 'step', 'repeat': 2,
+        'keyframes': [[0.0, 255, 10], [0.1, 0, 0], [0.2, 0, 0]],
+    }, tick_rate=100)
+    assert len(compiled.small) == 40
+    assert compiled.small[:10].tolist() == [255] * 10
+    assert compiled.small[10:20].tolist() == [0] * 10
+    assert compiled.big[20] == 10
+    assert compiled.duration == pytest.approx(0.4)
+
+
+def test_linear_pattern_interpolates():
+    compiled = compile_pattern({
+        'name': 'rampa', 'keyframes': [[0.0, 0, 255], [1.0, 255, 0]],
+    }, tick_rate=10)
+    assert compiled.small.tolist() == [0, 26, 51, 76, 102, 128, 153, 178, 204, 230]
+    assert compiled.big[0] == 255
+
+
+def test_empty_pattern_rejected():
+    with pytest.raises(ValueError):
+        compile_pattern({'name': 'bos', 'keyframes': []})
+
+
+def test_builtin_patterns_compile(player):
+    for pattern in BUILTIN_PATTERNS:
+        assert pattern['name'] in player.patterns
+
+
+def test_layers_take_max_per_motor(player):
+    player.add_pattern({'name': 'sol', 'keyframes': [[0.0, 200, 0], [1.0, 200, 0]]})
+    player.add_pattern({'name': 'sag', 'keyframes': [[0.0, 0, 100], [1.0, 0, 100]]})
+    player.play('sol', layer=0)
+    player.play('sag', layer=1)
+    assert player.sink.wait_for((200, 100))
+    player.cancel()
+    assert player.sink.wait_for((0, 0))
+    assert not player.is_playing()
+
+
+def test_attach_resends_current_value(player):
+    # Yeniden bağlanınca önceki çıkışa gönderilen değer yeni çıkışa da gitmeli
+    player.play('baglanti')
+    assert player.sink.wait_for((128, 128))
+    new_sink = RecordingSink()
+    player.attach(new_sink)
+    assert new_sink.wait_for((128, 128))
+    assert player.sink is new_sink
+
+
+def test_attach_without_sink_resets_last(player):
+    # Boştayken (0, 0) de yeniden gönderilir; aynı çıkışa bağlanma da sıfırlar
+    sink = player.sink
+    player.attach()
+    assert sink.wait_for((0, 0))
+    assert sink.values == [(0, 0)]
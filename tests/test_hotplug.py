@@ -0,0 +1,120 @@
+import struct
+import sys
+import time
+
+import pytest
+
+import ds4_hotplug
+from ds4_hotplug import (HotplugMonitor, read_hidraw_info, parse_uevent, info_from_hidapi,
+                         SONY_VENDOR_ID, HIDAPI_BUS_BLUETOOTH, NETLINK_GROUP_KERNEL, NETLINK_GROUP_UDEV)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='netlink yalnızca Linux')
+def test_stop_does_not_wait_for_netlink():
+    monitor = HotplugMonitor()
+    monitor.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    monitor.stop()
+    assert time.perf_counter() - start < 0.1
+    assert not monitor.is_alive()
+    # İkinci çağrı zararsız
+    monitor.stop()
+
+
+def make_hidraw(root, name, hid_id, uniq='aa:bb:cc:dd:ee:ff'):
+    device = root / name / 'device'
+    device.mkdir(parents=True)
+    (device / 'uevent').write_text(
+        f'DRIVER=sony\nHID_ID={hid_id}\nHID_NAME=Wireless Controller\nHID_UNIQ={uniq}\n')
+
+
+def test_read_hidraw_info_usb_and_bt(tmp_path):
+    make_hidraw(tmp_path, 'hidraw0', '0003:0000054C:000009CC')
+    make_hidraw(tmp_path, 'hidraw1', '0005:0000054C:000005C4')
+    usb = read_hidraw_info('hidraw0', str(tmp_path))
+    assert usb['path'] == b'/dev/hidraw0'
+    assert (usb['vendor_id'], usb['product_id'], usb['transport']) == (SONY_VENDOR_ID, 0x09CC, 'usb')
+    assert usb['serial'] == 'aa:bb:cc:dd:ee:ff'
+    assert read_hidraw_info('hidraw1', str(tmp_path))['transport'] == 'bt'
+
+
+def test_other_devices_are_ignored(tmp_path):
+    make_hidraw(tmp_path, 'hidraw0', '0003:0000046D:0000C52B')   # Logitech alıcı
+    make_hidraw(tmp_path, 'hidraw1', '0003:0000054C:00000CE6')   # DualSense
+    (tmp_path / 'hidraw2' / 'device').mkdir(parents=True)         # uevent yok
+    make_hidraw(tmp_path, 'hidraw3', '0003:0000054C:000009CC')
+    found = [name for name in ('hidraw0', 'hidraw1', 'hidraw2', 'hidraw3', 'hidraw4')
+             if read_hidraw_info(name, str(tmp_path))]
+    assert found == ['hidraw3']
+
+
+def test_parse_uevent():
+    message = (b'add@/devices/pci0000:00/hidraw/hidraw4\0ACTION=add\0SUBSYSTEM=hidraw\0'
+               b'DEVNAME=hidraw4\0SEQNUM=1234\0')
+    fields = parse_uevent(message)
+    assert fields == {'ACTION': 'add', 'SUBSYSTEM': 'hidraw', 'DEVNAME': 'hidraw4', 'SEQNUM': '1234'}
+
+
+def udev_message(properties, magic=0xFEEDCAFE):
+    header = b'libudev\0' + magic.to_bytes(4, 'big') + struct.pack('=III', 40, 40, len(properties))
+    return header + bytes(16) + properties
+
+
+def test_parse_udev_message():
+    properties = b'ACTION=add\0DEVPATH=/devices/x/hidraw/hidraw4\0SUBSYSTEM=hidraw\0DEVNAME=/dev/hidraw4\0'
+    fields = parse_uevent(udev_message(properties))
+    assert (fields['ACTION'], fields['SUBSYSTEM'], fields['DEVNAME']) == ('add', 'hidraw', '/dev/hidraw4')
+    assert parse_uevent(udev_message(properties, magic=0)) == {}
+    assert parse_uevent(b'libudev\0') == {}
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='netlink yalnızca Linux')
+@pytest.mark.parametrize('running, group', [(True, NETLINK_GROUP_UDEV), (False, NETLINK_GROUP_KERNEL)])
+def test_listens_to_udev_when_it_runs(monkeypatch, running, group):
+    # udev varsa "add" olayı düğüm açılabilir olduğunda gelsin diye onun grubu dinlenir
+    monkeypatch.setattr(ds4_hotplug, 'udev_running', lambda: running)
+    monitor = HotplugMonitor()
+    try:
+        assert monitor._socket.getsockname()[1] == group
+    finally:
+        monitor.stop()
+
+
+def test_info_from_hidapi_matches_sysfs_shape():
+    info = info_from_hidapi({'path': b'1-2:1.3', 'vendor_id': SONY_VENDOR_ID, 'product_id': 0x09CC,
+                             'bus_type': HIDAPI_BUS_BLUETOOTH, 'product_string': None,
+                             'serial_number': 'x'})
+    assert info['transport'] == 'bt'
+    assert info['name'] == '' and info['serial'] == 'x'
+
+
+def test_uevents_update_cache_and_notify(monkeypatch):
+    attached, detached = [], []
+    monitor = HotplugMonitor(attached.append, detached.append)
+    try:
+        info = {'path': b'/dev/hidraw7', 'product_id': 0x09CC}
+        monkeypatch.setattr(ds4_hotplug, 'read_hidraw_info', lambda name: info if name == 'hidraw7' else None)
+        monitor._handle_uevent({'ACTION': 'add', 'SUBSYSTEM': 'hidraw', 'DEVNAME': '/dev/hidraw7'})
+        monitor._handle_uevent({'ACTION': 'add', 'SUBSYSTEM': 'hidraw', 'DEVNAME': '/dev/hidraw8'})
+        monitor._handle_uevent({'ACTION': 'add', 'SUBSYSTEM': 'input', 'DEVNAME': '/dev/input/event3'})
+        assert attached == [info]
+        assert monitor.devices() == [info]
+        monitor._handle_uevent({'ACTION': 'remove', 'SUBSYSTEM': 'hidraw', 'DEVNAME': '/dev/hidraw7'})
+        assert detached == [info]
+        assert monitor.devices() == []
+    finally:
+        monitor.stop()
+
+
+def test_rescan_reports_differences(monkeypatch):
+    attached, detached = [], []
+    monitor = HotplugMonitor(attached.append, detached.append)
+    try:
+        first = {b'a': {'path': b'a'}, b'b': {'path': b'b'}}
+        monitor._update(first)
+        monitor._update({b'b': first[b'b'], b'c': {'path': b'c'}})
+        assert [info['path'] for info in attached] == [b'a', b'b', b'c']
+        assert [info['path'] for info in detached] == [b'a']
+    finally:
+        monitor.stop()
@@ -0,0 +1,156 @@
+import struct
+
+import numpy as np
+import pytest
+
+import ds4_imu
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_imu import IMUCalibration, OrientationTracker, MahonyFilter, read_calibration, extract_imu
+from ds4_input import ReportRing
+from ds4_output import TRANSPORT_USB, TRANSPORT_BT
+from ds4_uhid import calibration_report
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(ds4_imu, '_calibration_cache', {})
+
+
+class CalibrationDevice:
+    def __init__(self, report):
+        self.report = report
+        self.requests = 0
+
+    def get_feature_report(self, report_id, length):
+        self.requests += 1
+        if self.report is None:
+            raise OSError('okunamadı')
+        return self.report
+
+
+def test_from_report_applies_bias_and_range():
+    report = bytearray(calibration_report(TRANSPORT_USB))
+    # Jiroskop sapması ve kaymış ivme aralığı
+    struct.pack_into('<3h', report, 1, 10, -20, 30)
+    struct.pack_into('<2h', report, 23, 8292, -8092)
+    calibration = IMUCalibration.from_report(report, TRANSPORT_USB)
+    assert calibration.factory
+    assert calibration.gyro([10, -20, 30]).tolist() == [0.0, 0.0, 0.0]
+    assert calibration.accel([8292, 0, 0])[0] == pytest.approx(1.0)
+    assert calibration.accel([100, 0, 0])[0] == pytest.approx(0.0)
+
+
+def test_from_report_keeps_nominal_for_bad_axes():
+    calibration = IMUCalibration.from_report(bytes(37), TRANSPORT_USB)
+    assert not calibration.factory
+    assert calibration.gyro([16.384, 0, 0])[0] == pytest.approx(1.0)
+    assert calibration.accel([0, 8192, 0])[1] == pytest.approx(1.0)
+
+
+def test_calibration_is_cached_by_serial():
+    device = CalibrationDevice(calibration_report(TRANSPORT_BT))
+    first = read_calibration(device, TRANSPORT_BT, 'aa:bb')
+    assert read_calibration(device, TRANSPORT_BT, 'aa:bb') is first
+    assert device.requests == 1
+    # Seri numarası yoksa önbelleğe alınmaz
+    read_calibration(device, TRANSPORT_BT, None)
+    read_calibration(device, TRANSPORT_BT, None)
+    assert device.requests == 3
+
+
+def test_calibration_report_passed_in_is_used():
+    device = CalibrationDevice(None)
+    calibration = read_calibration(device, TRANSPORT_BT, None, calibration_report(TRANSPORT_BT))
+    assert calibration.factory and device.requests == 0
+
+
+def test_unreadable_calibration_falls_back(capsys):
+    calibration = read_calibration(CalibrationDevice(None), TRANSPORT_USB, 'cc:dd')
+    assert not calibration.factory
+    assert 'nominal' in capsys.readouterr().out
+
+
+def imu_report(i, gyro=(0, 0, 0), accel=(0, 8192, 0), bt=False):
+    report = synthetic_bt_report(i) if bt else synthetic_report(i)
+    base = 2 if bt else 0
+    report[base + 10:base + 12] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+    report[base + 13:base + 25] = struct.pack('<6h', *gyro, *accel)
+    return bytes(report)
+
+
+def test_extract_imu_mixed_transports():
+    ring = ReportRing(8)
+    ring.push(imu_report(1, gyro=(1, 2, 3)), 0.0)
+    ring.push(imu_report(2, accel=(4, 5, 6), bt=True), 0.0)
+    rows = np.frombuffer(ring.buffer, dtype=np.uint8).reshape(ring.capacity, ring.report_size)[:2]
+    lengths = np.frombuffer(ring.lengths, dtype=np.uint16)[:2]
+    valid, timestamps, gyro, accel = extract_imu(rows, lengths)
+    assert valid.tolist() == [True, True]
+    assert timestamps.tolist() == [188, 376]
+    assert gyro[0].tolist() == [1, 2, 3]
+    assert accel[1].tolist() == [4, 5, 6]
+
+
+@pytest.mark.parametrize('batch', [1, 50])
+def test_constant_yaw_rate_is_integrated(batch):
+    # Masada düz duran kontrolcü 90 derece/sn döner
+    ring = ReportRing(1 << 10)
+    tracker = OrientationTracker()
+    raw_yaw = round(90 * 16.384)
+    for i in range(1001):
+        ring.push(imu_report(i, gyro=(0, raw_yaw, 0)), i / 1000)
+        if (i + 1) % batch == 0:
+            tracker.consume(ring)
+    tracker.consume(ring)
+    roll, pitch, yaw = tracker.euler()
+    assert tracker.samples == 1001
+    expected = 1000 * 188 * 16 / 3 / 1e6 * raw_yaw / 16.384
+    assert yaw == pytest.approx(expected, abs=0.5)
+    assert abs(roll) < 0.5 and abs(pitch) < 0.5
+
+
+def test_tilt_converges_to_gravity():
+    # Sağa yatık kontrolcüde ivmeölçer filtreyi yavaşça düzeltir
+    ring = ReportRing(1 << 12)
+    tracker = OrientationTracker(kp=5.0)
+    for i in range(3000):
+        ring.push(imu_report(i, accel=(4096, 7094, 0)), i / 1000)
+        if i % 50 == 49:
+            tracker.consume(ring)
+    roll, pitch, _ = tracker.euler()
+    assert abs(roll) + abs(pitch) == pytest.approx(30, abs=2)
+    assert tracker.accel_g.tolist() == pytest.approx([0.5, 0.866, 0.0], abs=0.001)
+
+
+def test_short_bluetooth_report_is_not_a_sample():
+    # Genişletilmiş mod açılmadan gelen 10 baytlık 0x01 raporunun slotta kalan
+    # baytları IMU örneği sayılmamalı
+    ring = ReportRing(8)
+    tracker = OrientationTracker()
+    ring.push(imu_report(0, gyro=(0, 1000, 0)), 0.0)
+    tracker.consume(ring)
+    ring.push(imu_report(1, gyro=(0, 1000, 0))[:10], 0.001)
+    assert tracker.consume(ring) == 0
+    rows = np.frombuffer(ring.buffer, dtype=np.uint8).reshape(ring.capacity, ring.report_size)[:2]
+    lengths = np.frombuffer(ring.lengths, dtype=np.uint16)[:2]
+    assert extract_imu(rows, lengths)[0].tolist() == [True, False]
+    ring.push(imu_report(2, bt=True)[:40], 0.002)
+    assert tracker.consume(ring) == 0
+    assert tracker.samples == 1
+
+
+def test_ring_overrun_skips_lost_reports():
+    ring = ReportRing(64)
+    tracker = OrientationTracker()
+    for i in range(200):
+        ring.push(imu_report(i), i / 1000)
+    assert tracker.consume(ring) == 64
+    assert tracker.cursor == ring.head
+    tracker.reset(ring)
+    assert tracker.consume(ring) == 0
+
+
+def test_filter_without_samples_is_unchanged():
+    mahony = MahonyFilter()
+    mahony.update_batch(np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0))
+    assert mahony.euler() == (0.0, 0.0, 0.0)
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from ds4_lightbar import (LightbarEngine, gamma_table, breathing_table, rainbow_table,
+                          battery_table, TABLE_FRAMES, BATTERY_LEVELS)
+
+
+class Sinks:
+    def __init__(self):
+        self.colors = []
+        self.flashes = []
+        self.changed = threading.Event()
+
+    def color(self, red, green, blue):
+        self.colors.append((red, green, blue))
+        self.changed.set()
+
+    def flash(self, on, off):
+        self.flashes.append((on, off))
+
+
+@pytest.fixture
+def sinks():
+    return Sinks()
+
+
+@pytest.fixture
+def engine(sinks):
+    engine = LightbarEngine(sinks.color, sinks.flash, lambda: 10)
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def test_gamma_table_endpoints_and_monotonic():
+    lut = gamma_table()
+    assert len(lut) == 256
+    assert lut[0] == 0 and lut[255] == 255
+    assert lut[128] < 128
+    assert all(a <= b for a, b in zip(lut, lut[1:]))
+
+
+def test_breathing_table_never_fully_dark():
+    table = breathing_table((255, 0, 0), gamma_table())
+    assert len(table) == TABLE_FRAMES * 3
+    reds = table[0::3]
+    assert min(reds) > 0 and max(reds) >= 250
+    assert max(table[1::3]) == 0
+
+
+def test_rainbow_and_battery_tables():
+    lut = gamma_table()
+    rainbow = rainbow_table(lut)
+    assert tuple(rainbow[0:3]) == (255, 0, 0)
+    battery = battery_table(lut)
+    assert len(battery) == BATTERY_LEVELS * 3
+    assert tuple(battery[0:3]) == (255, 0, 0)
+    assert tuple(battery[-3:]) == (0, 255, 0)
+
+
+def test_render_frame_reads_table(sinks):
+    engine = LightbarEngine(sinks.color, sinks.flash)
+    assert engine.render_frame(0.0) is None
+    engine.rainbow(period=1.0)
+    start = engine._effect[3]
+    assert engine.render_frame(start) == tuple(engine._rainbow[0:3])
+    half = TABLE_FRAMES // 2 * 3
+    assert engine.render_frame(start + 0.5) == tuple(engine._rainbow[half:half + 3])
+    # Periyot sonunda başa sarar
+    assert engine.render_frame(start + 1.0) == tuple(engine._rainbow[0:3])
+
+
+def test_battery_effect_without_level(sinks):
+    engine = LightbarEngine(sinks.color, sinks.flash, lambda: None)
+    engine.battery_gradient()
+    assert engine.render_frame(0.0) is None
+
+
+def test_effect_streams_frames_until_stopped(engine, sinks):
+    engine.battery_gradient()
+    assert sinks.changed.wait(1.0)
+    assert sinks.colors[-1] == (0, 255, 0)
+    assert engine.effect_name == 'pil'
+    engine.set_color(1, 2, 3)
+    assert engine.effect_name == 'sabit'
+    assert sinks.colors[-1] == (1, 2, 3)
+
+
+def test_strobe_uses_hardware_flash(engine, sinks):
+    engine.strobe((9, 9, 9), on_ms=250, off_ms=5)
+    assert sinks.flashes == [(25, 1)]
+    assert engine.effect_name == 'flas'
+    # Başka bir efekte geçince flaş kapatılır
+    engine.stop_effect()
+    assert sinks.flashes[-1] == (0, 0)
@@ -0,0 +1,128 @@
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+from ds4_manager import DS4Manager
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='hidraw yalnızca Linux')
+
+
+def usb_report(i):
+    # 64 baytlık USB raporu; sayaç 7. baytın üst altı bitinde
+    report = bytearray(64)
+    report[0] = 0x01
+    report[1:5] = bytes((128, 128, 128, 128))
+    report[5] = 0x08
+    report[7] = (i & 0x3F) << 2
+    return bytes(report)
+
+
+def wait_until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.002)
+    return True
+
+
+@pytest.fixture
+def manager():
+    manager = DS4Manager(output_interval=0.01)
+    manager.start()
+    yield manager
+    manager.stop()
+
+
+def add_pad(manager, name, transport='usb'):
+    # SOCK_SEQPACKET, hidraw gibi rapor sınırlarını korur
+    device_end, app_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    app_end.setblocking(False)
+    pad = manager.add_fd({'path': name, 'transport': transport}, os.dup(app_end.fileno()))
+    app_end.close()
+    return device_end, pad
+
+
+def test_reports_from_many_pads(manager):
+    pads = [add_pad(manager, f'pad{i}'.encode()) for i in range(4)]
+    for i in range(50):
+        for device_end, _ in pads:
+            device_end.send(usb_report(i))
+    assert wait_until(lambda: manager.reports == 200)
+    for device_end, pad in pads:
+        assert pad.ring.head == 50
+        assert pad.state.counter == 49
+        device_end.close()
+    assert wait_until(lambda: not manager.pads())
+
+
+def test_bad_bluetooth_report_rejected(manager, bt_reports):
+    device_end, pad = add_pad(manager, b'bt', 'bt')
+    good = bt_reports['idle']
+    bad = bytearray(good)
+    bad[10] ^= 0xFF
+    device_end.send(bytes(bad))
+    device_end.send(good)
+    assert wait_until(lambda: pad.ring.head == 1)
+    assert pad.ring.rejected == 1
+    device_end.close()
+
+
+def test_outputs_are_coalesced(manager):
+    device_end, pad = add_pad(manager, b'out')
+    device_end.settimeout(0.2)
+    for value in range(1, 21):
+        manager.set_output(b'out', red=value)
+    received = []
+    try:
+        while True:
+            received.append(device_end.recv(64))
+    except socket.timeout:
+        pass
+    # Yirmi istek en fazla birkaç yazmada birleşir; son değer kaybolmaz
+    assert received[-1][0] == 0x05
+    assert received[-1][6] == 20
+    assert len(received) <= 3 and pad.writes == len(received)
+    assert pad.output_requests == 20
+    # Aynı değer yeniden yazılmaz
+    manager.set_output(b'out', red=20)
+    time.sleep(0.03)
+    assert pad.writes == len(received)
+    device_end.close()
+
+
+def test_closed_device_is_removed(manager):
+    device_end, pad = add_pad(manager, b'gone')
+    device_end.close()
+    assert wait_until(lambda: not manager.pads())
+    assert not pad.connected
+    with pytest.raises(OSError):
+        os.fstat(pad.fd)
+
+
+def test_wake_never_blocks():
+    # Döngü çalışmıyorken uyandırma borusu dolsa bile çağıran beklememeli
+    manager = DS4Manager()
+    start = time.perf_counter()
+    for _ in range(200_000):
+        manager._wake()
+    assert time.perf_counter() - start < 5.0
+    manager.start()
+    manager.stop()
+    assert not manager.is_alive()
+
+
+def test_only_bad_reports_keep_loop_alive(manager, bt_reports):
+    # Tampona hiç rapor girmeden gelen bozuk rapor döngüyü düşürmemeli
+    device_end, pad = add_pad(manager, b'bad', 'bt')
+    bad = bytearray(bt_reports['idle'])
+    bad[10] ^= 0xFF
+    device_end.send(bytes(bad))
+    assert wait_until(lambda: pad.ring.rejected == 1)
+    device_end.send(bt_reports['idle_next'])
+    assert wait_until(lambda: pad.ring.head == 1)
+    assert manager.is_alive() and manager.reports == 1
+    device_end.close()
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from ds4_output import OutputState, OutputWriter, USB_OUTPUT_REPORT_SIZE, TRANSPORT_USB
+
+
+class RecordingDevice:
+    # Yazılan çıkış raporlarını (zaman damgası, bayt) olarak saklar
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append((time.perf_counter(), bytes(data)))
+        return len(data)
+
+
+@pytest.fixture
+def device():
+    return RecordingDevice()
+
+
+def test_led_and_rumble_share_one_report():
+    state = OutputState()
+    state.set(small_motor=10, big_motor=20)
+    state.set(red=1, green=2, blue=3)
+    report = state.pack_usb(bytearray(USB_OUTPUT_REPORT_SIZE))
+    assert report[0] == 0x05
+    assert tuple(report[4:9]) == (10, 20, 1, 2, 3)
+
+
+def test_values_are_clamped():
+    state = OutputState()
+    state.set(red=300, green=-5, flash_on=12.7)
+    assert (state.red, state.green, state.flash_on) == (255, 0, 12)
+
+
+def test_unknown_field_rejected():
+    with pytest.raises(AttributeError):
+        OutputState().set(volume=3)
+
+
+def test_packer_by_transport():
+    pack, size = OutputState().packer(TRANSPORT_USB)
+    assert size == USB_OUTPUT_REPORT_SIZE
+
+
+def test_writer_coalesces_bursts(device):
+    # Bir aralık içindeki istekler tek yazmada birleşir; son değer kazanır
+    writer = OutputWriter(device, interval=0.05)
+    writer.start()
+    try:
+        writer.update(red=1)
+        time.sleep(0.01)
+        for value in range(2, 101):
+            writer.update(red=value)
+    finally:
+        writer.stop()
+    assert not writer.is_alive()
+    reports = [report for _, report in device.writes]
+    assert reports[-1][6] == 100
+    assert len(reports) <= 3
+    stats = writer.stats()
+    assert stats['requests'] == 100
+    assert stats['saved'] == 100 - stats['writes']
+
+
+def test_writer_skips_unchanged_reports(device):
+    writer = OutputWriter(device, interval=0.001)
+    writer.start()
+    try:
+        writer.update(green=7)
+        time.sleep(0.02)
+        writer.update(green=7)
+        time.sleep(0.02)
+    finally:
+        writer.stop()
+    assert len(device.writes) == 1
+    assert writer.unchanged == 1
+
+
+def test_writer_respects_rate_limit(device):
+    writer = OutputWriter(device, interval=0.01)
+    writer.start()
+    try:
+        for value in range(30):
+            writer.update(big_motor=value)
+            time.sleep(0.002)
+    finally:
+        writer.stop()
+    stamps = [stamp for stamp, _ in device.writes]
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert gaps and min(gaps) >= 0.009
+
+
+def test_rumble_update_keeps_led(device):
+    writer = OutputWriter(device, interval=0.001)
+    writer.start()
+    try:
+        writer.update(red=9, green=8, blue=7)
+        time.sleep(0.01)
+        writer.update(small_motor=50)
+    finally:
+        writer.stop()
+    assert tuple(device.writes[-1][1][4:9]) == (50, 0, 9, 8, 7)
@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.fixture
+def connects(panel, monkeypatch):
+    calls = []
+    monkeypatch.setattr(panel, 'start_connect', lambda user_initiated: calls.append(user_initiated))
+    return calls
+
+
+def test_attach_auto_connects(panel, connects):
+    panel.on_controller_attached({'path': b'/dev/hidraw9'})
+    assert connects == [False]
+
+
+def test_attach_during_replay_does_not_connect(panel, connects):
+    panel.replayer = object()
+    panel.on_controller_attached({'path': b'/dev/hidraw9'})
+    assert connects == []
+    panel.replayer = None
+
+
+def test_replay_finished_connects_waiting_controller(panel, connects, monkeypatch):
+    panel.replayer = object()
+    panel.on_controller_attached({'path': b'/dev/hidraw9'})
+    monkeypatch.setattr(panel.hotplug, 'devices', lambda: [{'path': b'/dev/hidraw9'}])
+    panel.on_replay_finished()
+    assert panel.replayer is None
+    assert connects == [False]
+
+
+def test_feature_modules_load_after_first_paint(qapp):
+    # Ayrı işlemde: panel kurulduğunda özellik modülleri henüz yüklenmemiş olmalı
+    import os
+    import subprocess
+    import sys
+    from conftest import ROOT
+    script = (
+        "import sys\n"
+        "from PyQt5.QtWidgets import QApplication\n"
+        "app = QApplication([])\n"
+        "import ds4_controller\n"
+        "panel = ds4_controller.DS4ControlPanel()\n"
+        "panel.show()\n"
+        "app.processEvents()\n"
+        "features = ('ds4_buttons', 'ds4_battery', 'ds4_sticks', 'ds4_combos', 'ds4_touch',\n"
+        "            'ds4_haptics', 'ds4_lightbar', 'numpy')\n"
+        "print(sorted(m for m in features if m in sys.modules))\n"
+        "panel.load_features()\n"
+        "print(panel.curve_combo.count() > 0, len(panel.ds4.haptics.patterns) > 0)\n"
+        "panel.close()\n"
+    )
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.stdout.splitlines() == ['[]', 'True True'], result.stderr
@@ -0,0 +1,155 @@
+import os
+import time
+
+import pytest
+
+from ds4_input import ReportRing, InputReader
+
+
+def make_report(i):
+    # 64 baytlık USB raporu; ikinci bayt hangi rapor olduğunu gösterir
+    report = bytearray(64)
+    report[0] = 0x01
+    report[1] = i & 0xFF
+    return bytes(report)
+
+
+def push_many(ring, count, first=0):
+    for i in range(first, first + count):
+        ring.push(make_report(i), float(i))
+
+
+class ScriptedDevice:
+    # read() her çağrıda sıradaki raporu döndürür; fail_every'nin katlarında hata verir
+    def __init__(self, count, fail_every=0):
+        self.count = count
+        self.fail_every = fail_every
+        self.reads = 0
+        self.emitted = 0
+
+    def read(self, size, timeout_ms):
+        self.reads += 1
+        if self.fail_every and self.reads % self.fail_every == 0:
+            raise OSError('geçici hata')
+        if self.emitted >= self.count:
+            return []
+        self.emitted += 1
+        return make_report(self.emitted - 1)
+
+
+def test_capacity_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        ReportRing(1000)
+
+
+def test_empty_ring_has_no_latest():
+    ring = ReportRing(8)
+    assert ring.latest() is None
+    assert list(ring.reports_since(0)) == []
+
+
+def test_latest_returns_newest_report():
+    ring = ReportRing(8)
+    push_many(ring, 3)
+    seq, stamp, report = ring.latest()
+    assert (seq, stamp) == (2, 2.0)
+    assert bytes(report) == make_report(2)
+
+
+def test_reports_since_cursor_in_order():
+    ring = ReportRing(8)
+    push_many(ring, 5)
+    seqs = [seq for seq, _, _ in ring.reports_since(2)]
+    assert seqs == [2, 3, 4]
+    assert list(ring.reports_since(ring.head)) == []
+
+
+def test_overrun_skips_overwritten_reports():
+    ring = ReportRing(8)
+    push_many(ring, 20)
+    seqs = [seq for seq, _, _ in ring.reports_since(0)]
+    assert seqs == list(range(12, 20))
+    assert ring.lost(0) == 12
+    assert ring.lost(12) == 0
+    assert ring.window(0) == (12, 20)
+
+
+def test_long_reports_are_truncated_to_slot():
+    ring = ReportRing(4, report_size=16)
+    ring.push(bytes(range(40)), 0.0)
+    assert bytes(ring.latest()[2]) == bytes(range(16))
+
+
+def test_listeners_run_after_each_report():
+    ring = ReportRing(8)
+    seen = []
+    ring.listeners.append(lambda: seen.append(ring.head))
+    push_many(ring, 3)
+    assert seen == [1, 2, 3]
+
+
+def test_read_from_fills_slot_without_copy():
+    ring = ReportRing(8)
+    r, w = os.pipe()
+    try:
+        os.write(w, make_report(7))
+        assert ring.read_from(r, 1.5) == 64
+        seq, stamp, report = ring.latest()
+        assert (seq, stamp) == (0, 1.5)
+        assert bytes(report) == make_report(7)
+        os.set_blocking(r, False)
+        with pytest.raises(BlockingIOError):
+            ring.read_from(r, 2.0)
+    finally:
+        os.close(r)
+        os.close(w)
+
+
+def wait_for_head(ring, count, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while ring.head < count:
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_reader_thread_drains_every_report():
+    # Okuyucu hiçbir raporu atlamamalı: sıra numarası cihazın ürettiği sırayla aynı
+    device = ScriptedDevice(500)
+    ring = ReportRing(1024)
+    reader = InputReader(device, ring, read_timeout_ms=10)
+    reader.start()
+    try:
+        assert wait_for_head(ring, 500)
+    finally:
+        reader.stop()
+    assert not reader.is_alive()
+    assert ring.head == device.emitted
+    for seq, stamp, report in ring.reports_since(0):
+        assert bytes(report) == make_report(seq)
+
+
+def test_reader_survives_scattered_errors():
+    # Her üç okumadan biri hata verir: toplamda 10'dan fazla hata olsa da
+    # araya başarılı okumalar girdiği için okuyucu durmamalı
+    device = ScriptedDevice(30, fail_every=3)
+    ring = ReportRing(64)
+    reader = InputReader(device, ring, read_timeout_ms=1)
+    reader.start()
+    try:
+        assert wait_for_head(ring, 30, timeout=5.0)
+        assert reader.is_alive()
+    finally:
+        reader.stop()
+    assert reader.read_errors <= 1
+
+
+def test_reader_stops_after_consecutive_errors(capsys):
+    device = ScriptedDevice(0, fail_every=1)
+    reader = InputReader(device, ReportRing(8), read_timeout_ms=1)
+    reader.start()
+    reader.join(2.0)
+    assert not reader.is_alive()
+    assert reader.read_errors == 11
+    assert 'Okuyucu hatası' in capsys.readouterr().out
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_input import ReportRing
+from ds4_scope import ScopeBuffer, CHANNELS, crop, decimate, envelope, export_csv
+
+
+def scope_report(i, lx=128, bt=False, step=188):
+    report = synthetic_bt_report(i) if bt else synthetic_report(i)
+    base = 2 if bt else 0
+    report[base + 1] = lx
+    report[base + 10:base + 12] = ((i * step) & 0xFFFF).to_bytes(2, 'little')
+    return bytes(report)
+
+
+def filled(count, seconds=10.0, rate=1000, **kwargs):
+    buffer = ScopeBuffer(seconds, rate)
+    for i in range(count):
+        buffer.push(scope_report(i, **kwargs))
+    return buffer
+
+
+def test_capacity_rounds_up_to_power_of_two():
+    assert ScopeBuffer(10.0, 1000).capacity == 16384
+    assert ScopeBuffer(1.0, 1024).capacity == 1024
+
+
+def test_push_accepts_usb_and_bt_only():
+    buffer = ScopeBuffer(1.0)
+    assert buffer.push(scope_report(0, lx=255))
+    assert buffer.push(scope_report(1, lx=1, bt=True))
+    assert not buffer.push(b'\x05' + bytes(31))
+    assert not buffer.push(b'')
+    assert (buffer.head, buffer.rejected) == (2, 1)
+    _, values = buffer.window()
+    assert values[0].tolist() == pytest.approx([1.0, -1.0])
+
+
+def test_window_uses_device_time_across_wraps():
+    # 16 bitlik zaman damgası ~350 ms'de sarar; 1 sn'lik pencere yine doğru olmalı
+    buffer = filled(2001)
+    times, values = buffer.window()
+    assert times[-1] == 0.0
+    assert times[0] == pytest.approx(-2000 * 188 * 16 / 3 / 1e6)
+    assert np.all(np.diff(times) > 0)
+    times, values = buffer.window(1.0)
+    assert -1.0 <= times[0] < -0.998
+    assert values.shape == (len(CHANNELS), len(times))
+
+
+def test_old_samples_are_overwritten():
+    buffer = filled(3000, seconds=1.0, rate=1024)
+    times, _ = buffer.window()
+    assert len(times) == 1024
+
+
+def test_reset_hides_old_samples():
+    buffer = filled(100)
+    buffer.reset()
+    assert len(buffer.window()[0]) == 0
+    buffer.push(scope_report(100))
+    assert len(buffer.window()[0]) == 1
+
+
+def test_attached_ring_copies_each_report():
+    ring = ReportRing(64)
+    buffer = ScopeBuffer(1.0)
+    buffer.attach(ring)
+    for i in range(10):
+        ring.push(scope_report(i), 0.0)
+    assert buffer.head == 10
+    buffer.detach()
+    ring.push(scope_report(10), 0.0)
+    assert buffer.head == 10 and ring.listeners == []
+
+
+def test_decimate_keeps_spikes_and_bounds_points():
+    # 10 sn, 4 kHz: 40000 örnek 500 sütuna iner; tek örneklik sıçrama kaybolmaz
+    rate = 4000
+    step = round(1e6 / rate / (16 / 3))
+    buffer = ScopeBuffer(10.0, rate)
+    for i in range(40000):
+        buffer.push(scope_report(i, lx=255 if i == 20000 else 128, step=step))
+    times, values = buffer.window()
+    columns, low, high = decimate(times, values, 500, 10.0)
+    assert len(columns) <= 500
+    assert np.all(np.diff(columns) > 0)
+    assert high[0].max() == pytest.approx(1.0)
+    assert low[0].min() == pytest.approx(0.0)
+    points = envelope(columns, low[0], high[0])
+    assert points.shape == (2 * len(columns), 2)
+    assert points[1::2, 1].tolist() == high[0].tolist()
+
+
+def test_crop_and_empty_decimate():
+    times = np.array([-3.0, -2.0, -1.0, 0.0])
+    values = np.arange(8, dtype=np.float32).reshape(2, 4)
+    cropped_times, cropped = crop(times, values, 1.5)
+    assert cropped_times.tolist() == [-1.0, 0.0]
+    assert cropped.tolist() == [[2.0, 3.0], [6.0, 7.0]]
+    columns, low, high = decimate(np.zeros(0), np.zeros((2, 0), dtype=np.float32), 100, 1.0)
+    assert len(columns) == 0 and low.shape == (2, 0)
+
+
+def test_export_csv(tmp_path):
+    times, values = filled(5).window()
+    path = tmp_path / 'kapsam.csv'
+    export_csv(str(path), times, values)
+    lines = path.read_text().splitlines()
+    assert lines[0] == ','.join(('time_s',) + CHANNELS)
+    assert len(lines) == 6
+    assert float(lines[-1].split(',')[0]) == 0.0
+
+
+def test_scope_widget_points_follow_width(qapp):
+    from ds4_controller import ScopeWidget
+    shown = []
+    for rate in (1000, 4000):
+        step = round(1e6 / rate / (16 / 3))
+        buffer = ScopeBuffer(2.0, rate)
+        for i in range(int(2 * rate)):
+            buffer.push(scope_report(i, lx=128 + i % 50, step=step))
+        scope = ScopeWidget(buffer)
+        scope.resize(600, 400)
+        scope.show()
+        qapp.processEvents()
+        scope.repaint()
+        shown.append(scope.shown_points)
+        assert scope.shown_samples == pytest.approx(2 * rate, rel=0.01)
+        assert scope.paint_times
+        scope.close()
+    # Örnek hızı dört katına çıksa da çizilen nokta sayısı ekran genişliğiyle sınırlı
+    assert shown[0] == shown[1]
+    assert shown[0] <= 2 * 600 * len(CHANNELS)
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_input import ReportRing
+from ds4_stats import InputStats, histogram_text, percentile
+
+
+def feed(ring, indices, make=synthetic_report, period=0.001):
+    for i in indices:
+        ring.push(bytes(make(i)), i * period)
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(list(range(100)), 0.99) == 99
+
+
+def test_steady_stream_has_no_drops():
+    ring = ReportRing(1024)
+    stats = InputStats()
+    feed(ring, range(500))
+    stats.consume(ring)
+    snapshot = stats.snapshot()
+    assert snapshot['reports'] == 500
+    assert snapshot['dropped'] == 0
+    assert snapshot['rate_hz'] == pytest.approx(1000.0)
+    # 188 tik * 16/3 µs = ~1 ms
+    assert snapshot['device_rate_hz'] == pytest.approx(1000 / 1.00267, rel=1e-3)
+    assert snapshot['interval_p50_us'] == pytest.approx(1000.0)
+    assert sum(snapshot['histogram']) == 499
+
+
+def test_counter_gaps_are_counted():
+    ring = ReportRing(1024)
+    stats = InputStats()
+    indices = [i for i in range(300) if i % 100 not in (50, 51, 52)]
+    feed(ring, indices)
+    stats.consume(ring)
+    assert stats.snapshot()['dropped'] == 9
+
+
+def test_gap_longer_than_counter_wrap_uses_timestamp():
+    # 130 rapor atlanır: 6 bitlik sayaç iki kez sarar, zaman damgası tamamlar
+    ring = ReportRing(1024)
+    stats = InputStats()
+    feed(ring, list(range(100)) + list(range(230, 330)))
+    stats.consume(ring)
+    assert stats.snapshot()['dropped'] == 130
+
+
+def test_bluetooth_reports_use_offset():
+    ring = ReportRing(1024)
+    stats = InputStats()
+    feed(ring, [i for i in range(100) if i != 40], make=synthetic_bt_report)
+    stats.consume(ring)
+    assert (stats.reports, stats.dropped) == (99, 1)
+
+
+def test_consume_in_pieces_matches_single_pass():
+    whole, pieces = InputStats(), InputStats()
+    ring = ReportRing(1024)
+    indices = [i for i in range(400) if i % 37]
+    feed(ring, indices)
+    whole.consume(ring)
+    ring = ReportRing(1024)
+    for start in range(0, len(indices), 25):
+        feed(ring, indices[start:start + 25])
+        pieces.consume(ring)
+    assert (pieces.reports, pieces.dropped) == (whole.reports, whole.dropped)
+
+
+def test_ring_overrun_is_reported_not_counted_as_drop():
+    ring = ReportRing(64)
+    stats = InputStats()
+    feed(ring, range(200))
+    stats.consume(ring)
+    snapshot = stats.snapshot()
+    assert snapshot['ring_lost'] == 136
+    assert snapshot['reports'] == 64 and snapshot['dropped'] == 0
+
+
+def test_reset_starts_from_ring_head(tmp_path):
+    ring = ReportRing(1024)
+    feed(ring, range(50))
+    stats = InputStats()
+    stats.reset(ring)
+    feed(ring, range(50, 60))
+    stats.consume(ring)
+    assert stats.reports == 10
+    stats.rendered(0.0)
+    path = tmp_path / 'stats.json'
+    stats.export_json(str(path))
+    assert json.loads(path.read_text(encoding='utf-8'))['reports'] == 10
+
+
+def test_histogram_text():
+    assert histogram_text([0, 0]) == ''
+    assert histogram_text([0, 4, 8]) == ' ▄█'
+    assert histogram_text([8, 1, 1], width=1) == '█'
@@ -0,0 +1,106 @@
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_input import ReportRing, DS4State, decode_report
+from ds4_sticks import StickSettings, TriggerSettings, StickProcessor, CURVES
+
+
+def stick(processor, x, y):
+    return processor.process(x, y, 128, 128, 0, 0)[:2]
+
+
+def test_defaults_keep_full_range():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.0))
+    assert stick(processor, 128, 128) == (128, 128)
+    assert stick(processor, 255, 128) == (255, 128)
+    assert stick(processor, 1, 128) == (1, 128)
+    assert processor.process(128, 128, 128, 128, 0, 255)[4:] == (0, 255)
+
+
+def test_radial_deadzone_and_rescale():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.2))
+    # Ölü bölge içi merkeze, kenar hâlâ tam sapma
+    assert stick(processor, 150, 140) == (128, 128)
+    assert stick(processor, 255, 128) == (255, 128)
+    # Ölü bölgenin hemen dışı sıfırdan yeniden başlar
+    # (38 / 127 - 0,2) / 0,8 * 127 = ~16
+    assert stick(processor, 128 + 38, 128) == (144, 128)
+
+
+def test_axial_deadzone_only_affects_its_axis():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.0, axial_deadzone_x=0.2))
+    x, y = stick(processor, 150, 200)
+    assert x == 128 and y == 200
+
+
+def test_curve_keeps_direction():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.0, curve='kuadratik'))
+    x, y = stick(processor, 128 + 64, 128 + 64)
+    assert x == y
+    # Yarım sapmada ~%71 büyüklük karesi ~%50
+    assert 128 + 40 <= x <= 128 + 50
+    assert CURVES['kuadratik'] == 2.0
+
+
+def test_anti_deadzone_sets_minimum_output():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.1, anti_deadzone=0.3))
+    x, _ = stick(processor, 128 + 20, 128)
+    assert x >= 128 + 38
+    assert stick(processor, 128, 128) == (128, 128)
+
+
+def test_center_offset_corrects_drift():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.02, offset_x=10, offset_y=-5))
+    assert stick(processor, 138, 123) == (128, 128)
+
+
+def test_trigger_deadzone_and_saturation():
+    processor = StickProcessor(l2=TriggerSettings(deadzone=0.1, saturation=0.8))
+    l2 = lambda raw: processor.process(128, 128, 128, 128, raw, 0)[4]
+    assert l2(20) == 0
+    assert l2(204) == 255
+    assert 0 < l2(120) < 255
+
+
+def test_apply_matches_process():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.1, curve=1.6),
+                               StickSettings(anti_deadzone=0.2), TriggerSettings(deadzone=0.05))
+    for i in range(0, 256, 17):
+        state = DS4State()
+        report = synthetic_report(i)
+        decode_report(report, state)
+        expected = processor.process(report[1], report[2], report[3], report[4], report[8], report[9])
+        processor.apply(state)
+        assert (state.lx, state.ly, state.rx, state.ry, state.l2, state.r2) == expected
+
+
+def test_ring_batch_matches_single_path():
+    processor = StickProcessor(StickSettings(radial_deadzone=0.1, curve='kubik'))
+    ring = ReportRing(256)
+    for i in range(300):
+        ring.push(bytes(synthetic_bt_report(i) if i % 3 else synthetic_report(i)), i / 1000)
+    values, cursor = processor.process_ring(ring)
+    assert cursor == 300 and values.shape == (6, 256)
+    for column, i in enumerate(range(44, 300)):
+        report = synthetic_report(i)
+        expected = processor.process(report[1], report[2], report[3], report[4], report[8], report[9])
+        assert tuple(int(v) for v in values[:, column]) == expected
+
+
+def test_calibrate_center_from_idle_reports():
+    processor = StickProcessor()
+    ring = ReportRing(64)
+    for i in range(64):
+        report = synthetic_report(i)
+        report[3:5] = bytes((133, 120))
+        ring.push(bytes(report), i / 1000)
+    assert processor.calibrate_center(ring, 'right') == (5.0, -8.0)
+    assert processor.compiles == 2
+    assert processor.process(128, 128, 133, 120, 0, 0)[2:4] == (128, 128)
+    assert processor.calibrate_center(ReportRing(8)) is None
+
+
+def test_lazy_processor_compiles_on_demand():
+    processor = StickProcessor(lazy=True)
+    assert not processor.compiled
+    processor.compile()
+    assert processor.compiled
+    assert processor.to_dict()['left'] == StickSettings().to_dict()
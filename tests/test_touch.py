@@ -0,0 +1,141 @@
+import pytest
+
+from ds4_backend import synthetic_report, synthetic_bt_report
+from ds4_input import ReportRing
+from ds4_touch import TouchTracker, TAP, SWIPE, PINCH, SCROLL, LEFT, RIGHT, UP, DOWN
+
+
+def touch_packet(counter, fingers):
+    # Tek dokunma paketi: sayaç ve iki parmak (kimlik, x, y); boş parmak 0x80
+    packet = bytearray(9)
+    packet[0] = counter & 0xFF
+    for slot in range(2):
+        offset = 1 + slot * 4
+        if slot < len(fingers):
+            touch_id, x, y = fingers[slot]
+            packet[offset:offset + 4] = bytes((touch_id & 0x7F, x & 0xFF, (x >> 8) | ((y & 0x0F) << 4), y >> 4))
+        else:
+            packet[offset] = 0x80
+    return packet
+
+
+def touch_report(i, packets, bt=False):
+    # i. milisaniyedeki rapor; packets: [(sayaç, parmaklar), ...]
+    report = synthetic_bt_report(i) if bt else synthetic_report(i)
+    base = 3 if bt else 1
+    report[base + 9:base + 11] = ((i * 188) & 0xFFFF).to_bytes(2, 'little')
+    report[base + 32] = len(packets)
+    for n, (counter, fingers) in enumerate(packets):
+        offset = base + 33 + n * 9
+        report[offset:offset + 9] = touch_packet(counter, fingers)
+    return bytes(report)
+
+
+def run(frames, bt=False, **kwargs):
+    # Her kare bir rapor (1 kHz) ve kendi paketi
+    ring = ReportRing(1 << 12)
+    tracker = TouchTracker(**kwargs)
+    gestures = []
+    tracker.on(gestures.append)
+    for i, fingers in enumerate(frames):
+        ring.push(touch_report(i, [(i, fingers)], bt=bt), i / 1000)
+    tracker.consume(ring)
+    return tracker, gestures
+
+
+def kinds(gestures):
+    return [gesture.kind for gesture in gestures]
+
+
+def test_tap():
+    tracker, gestures = run([[(1, 900, 400)]] * 20 + [[]] * 5)
+    assert kinds(gestures) == [TAP]
+    assert (gestures[0].fingers, gestures[0].x, gestures[0].y) == (1, 900, 400)
+    assert tracker.fingers == {}
+
+
+def test_long_touch_is_not_tap():
+    _, gestures = run([[(1, 900, 400)]] * 400 + [[]])
+    assert gestures == []
+
+
+def test_two_finger_tap():
+    _, gestures = run([[(3, 800, 400), (4, 1100, 420)]] * 30 + [[]] * 5)
+    assert kinds(gestures) == [TAP]
+    assert gestures[0].fingers == 2
+
+
+@pytest.mark.parametrize('step, direction', [((6, 0), RIGHT), ((-6, 0), LEFT), ((0, 4), DOWN), ((0, -4), UP)])
+def test_swipe_directions(step, direction):
+    frames = [[(2, 960 + step[0] * i, 470 + step[1] * i)] for i in range(-100, 100)] + [[]]
+    _, gestures = run(frames)
+    assert kinds(gestures) == [SWIPE]
+    assert gestures[0].direction == direction
+
+
+def test_slow_swipe_is_ignored():
+    frames = [[(2, 300 + i, 450)] for i in range(700)] + [[]]
+    _, gestures = run(frames)
+    assert gestures == []
+
+
+def test_pinch_and_scroll():
+    pinch = [[(5, 860 - i * 2, 470), (6, 1060 + i * 2, 470)] for i in range(200)] + [[]]
+    _, gestures = run(pinch)
+    assert set(kinds(gestures)) == {PINCH}
+    total = 1.0
+    for gesture in gestures:
+        total *= gesture.scale
+    assert total == pytest.approx((200 + 199 * 4) / 200, rel=0.01)
+    scroll = [[(7, 800, 200 + i * 2), (8, 1100, 200 + i * 2)] for i in range(200)] + [[]]
+    _, gestures = run(scroll)
+    assert set(kinds(gestures)) == {SCROLL}
+    assert sum(gesture.dy for gesture in gestures) == pytest.approx(398, abs=1)
+
+
+def test_bluetooth_reports():
+    _, gestures = run([[(1, 900, 400)]] * 20 + [[]] * 5, bt=True)
+    assert kinds(gestures) == [TAP]
+
+
+def test_packets_are_processed_once_in_order():
+    # Rapor önceki paketi tekrar taşır; sıra karışık gelse de sayaç sırasıyla işlenir
+    ring = ReportRing(64)
+    tracker = TouchTracker()
+    ring.push(touch_report(0, [(1, [(1, 100, 100)])]), 0.0)
+    ring.push(touch_report(1, [(3, [(1, 120, 100)]), (2, [(1, 110, 100)])]), 0.001)
+    ring.push(touch_report(2, [(3, [(1, 120, 100)])]), 0.002)
+    tracker.consume(ring)
+    assert tracker.frames == 3
+    assert list(tracker.fingers[1].trail)[-3:] == [(100, 100), (110, 100), (120, 100)]
+
+
+def test_lost_reports_drop_fingers():
+    ring = ReportRing(16)
+    tracker = TouchTracker()
+    for i in range(40):
+        ring.push(touch_report(i, [(i, [(1, 500, 500)])]), i / 1000)
+    tracker.consume(ring)
+    assert tracker.lost == 24
+    assert len(tracker.fingers) == 1
+
+
+def test_trails_fade_after_lift():
+    tracker, _ = run([[(1, 900, 400)]] * 20 + [[]] * 100, trail_linger=0.5)
+    trails = tracker.trails()
+    assert len(trails) == 1 and 0 < trails[0][1] < 1
+    tracker, _ = run([[(1, 900, 400)]] * 20 + [[]] * 600, trail_linger=0.5)
+    assert tracker.trails() == []
+
+
+def test_listener_kinds_and_off():
+    ring = ReportRing(256)
+    tracker = TouchTracker()
+    swipes = []
+    listener = tracker.on(swipes.append, kinds=SWIPE)
+    for i, fingers in enumerate([[(1, 900, 400)]] * 20 + [[]]):
+        ring.push(touch_report(i, [(i, fingers)]), i / 1000)
+    tracker.consume(ring)
+    assert swipes == [] and tracker.gestures == 1
+    tracker.off(listener)
+    tracker.off(listener)
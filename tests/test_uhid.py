@@ -0,0 +1,130 @@
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import pytest
+
+import ds4_uhid
+from ds4_backend import synthetic_report
+from ds4_imu import IMUCalibration
+from ds4_output import TRANSPORT_USB, TRANSPORT_BT
+from ds4_uhid import (UhidDS4, UHID_PATH, UHID_EVENT_SIZE, UHID_INPUT2, UHID_OUTPUT, UHID_GET_REPORT,
+                      UHID_GET_REPORT_REPLY, UHID_START, UHID_OPEN, UHID_DESTROY, UHID_DATA_MAX, EIO,
+                      BT_FEATURE_CRC_SEED, calibration_report, default_feature_reports)
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='uhid yalnızca Linux')
+
+
+def test_create_event_fits_uhid_event():
+    assert ds4_uhid._CREATE2.size == UHID_EVENT_SIZE
+
+
+@pytest.mark.parametrize('transport', [TRANSPORT_USB, TRANSPORT_BT])
+def test_calibration_report_is_nominal(transport):
+    calibration = IMUCalibration.from_report(calibration_report(transport), transport)
+    assert calibration.factory
+    assert calibration.accel([8192, -8192, 0]).tolist() == pytest.approx([1.0, -1.0, 0.0])
+    assert calibration.gyro([8192, 0, 0])[0] == pytest.approx(540.0)
+
+
+def test_bt_feature_reports_carry_crc():
+    for report in default_feature_reports(TRANSPORT_BT).values():
+        crc = zlib.crc32(bytes(report[:-4]), BT_FEATURE_CRC_SEED)
+        assert struct.unpack_from('<I', report, len(report) - 4)[0] == crc
+
+
+@pytest.fixture
+def kernel():
+    # Çekirdek tarafını taklit eden soket: /dev/uhid gibi olay sınırlarını korur
+    kernel_end, device_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    pad = UhidDS4()
+    pad._fd = os.dup(device_end.fileno())
+    device_end.close()
+    pad._thread = threading.Thread(target=pad._event_loop, daemon=True)
+    pad._thread.start()
+    kernel_end.settimeout(1.0)
+    yield kernel_end, pad
+    pad.destroy()
+    kernel_end.close()
+
+
+def kernel_event(kind, body=b''):
+    return (struct.pack('<I', kind) + body).ljust(UHID_EVENT_SIZE, b'\0')
+
+
+def test_send_writes_input2_event(kernel):
+    kernel_end, pad = kernel
+    report = bytes(synthetic_report(5))
+    pad.send(report)
+    event = kernel_end.recv(UHID_EVENT_SIZE)
+    kind, size = struct.unpack_from('<IH', event)
+    assert (kind, size) == (UHID_INPUT2, 64)
+    assert event[6:6 + size] == report
+    assert pad.sent == 1
+
+
+def test_feature_requests_are_answered(kernel):
+    kernel_end, pad = kernel
+    kernel_end.send(kernel_event(UHID_GET_REPORT, struct.pack('<IBB', 7, 0x02, 0)))
+    kind, request_id, error, size = struct.unpack_from('<IIHH', kernel_end.recv(UHID_EVENT_SIZE))
+    assert (kind, request_id, error, size) == (UHID_GET_REPORT_REPLY, 7, 0, 37)
+    kernel_end.send(kernel_event(UHID_GET_REPORT, struct.pack('<IBB', 8, 0x77, 0)))
+    _, request_id, error, _ = struct.unpack_from('<IIHH', kernel_end.recv(UHID_EVENT_SIZE))
+    assert (request_id, error) == (8, EIO)
+    assert pad.feature_requests == 2
+
+
+def test_output_reports_are_collected(kernel):
+    kernel_end, pad = kernel
+    kernel_end.send(kernel_event(UHID_START))
+    kernel_end.send(kernel_event(UHID_OPEN))
+    output = b'\x05\x07\x04\x00\x10\x20'
+    data = output.ljust(UHID_DATA_MAX, b'\0')
+    kernel_end.send(kernel_event(UHID_OUTPUT, data + struct.pack('<HB', len(output), 1)))
+    assert pad.opened.wait(1.0) and pad.started.is_set()
+    deadline = time.monotonic() + 1.0
+    while not pad.outputs and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert [data for _, data in pad.output_reports(0x05)] == [output]
+    assert pad.output_reports(0x11) == []
+
+
+def test_destroy_sends_destroy_event(kernel):
+    kernel_end, pad = kernel
+    pad.destroy()
+    assert struct.unpack_from('<I', kernel_end.recv(UHID_EVENT_SIZE))[0] == UHID_DESTROY
+    # İkinci çağrı zararsız
+    pad.destroy()
+
+
+def test_stream_keeps_rate(kernel):
+    kernel_end, pad = kernel
+    reports = [bytes(synthetic_report(i)) for i in range(4)]
+    start = time.perf_counter()
+    sent = pad.stream(reports, rate=1000, duration=0.05)
+    assert time.perf_counter() - start >= 0.045
+    assert sent == 50 and pad.sent == 50
+    first = kernel_end.recv(UHID_EVENT_SIZE)
+    assert first[6:70] == reports[0]
+
+
+def test_missing_uhid_node_reports_path(tmp_path):
+    pad = UhidDS4(uhid_path=str(tmp_path / 'uhid'))
+    with pytest.raises(OSError, match='uhid'):
+        pad.create()
+
+
+def test_load_reports_defaults_to_synthetic():
+    assert ds4_uhid.load_reports(TRANSPORT_BT)[0][0] == 0x11
+    assert len(ds4_uhid.load_reports(TRANSPORT_USB)) == 256
+
+
+@pytest.mark.skipif(not os.access(UHID_PATH, os.W_OK), reason='/dev/uhid yazılabilir değil')
+def test_real_uhid_device_is_started():
+    with UhidDS4() as pad:
+        assert pad.started.wait(2.0)
+        assert pad.stream(ds4_uhid.load_reports(TRANSPORT_USB), rate=1000, duration=0.05) > 0
@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+
+import pytest
+
+from ds4_backend import synthetic_report
+from ds4_input import DS4State, ReportRing, BTN_CROSS, BTN_CIRCLE, BTN_SQUARE, BTN_SHARE, BTN_LEFT, BTN_R1
+from ds4_uinput import (VirtualGamepad, compile_mapping, load_mappings, BUILTIN_MAPPINGS, KEY_CODES, UINPUT_PATH,
+                        EV_KEY, EV_ABS, EV_SYN, ABS_X, ABS_RY, ABS_HAT0Y, _EVENT)
+
+
+def state_with(buttons=0, lx=128, ly=128, rx=128, ry=128, l2=0, r2=0):
+    state = DS4State()
+    state.buttons = buttons
+    state.lx, state.ly, state.rx, state.ry, state.l2, state.r2 = lx, ly, rx, ry, l2, r2
+    return state
+
+
+def test_default_mapping_is_identity():
+    mapping = compile_mapping(BUILTIN_MAPPINGS[0])
+    buttons = BTN_CROSS | BTN_SHARE | (1 << 17)
+    assert mapping.remap(state_with(buttons, lx=10, ry=200), 0.0) == (buttons, (10, 128, 128, 200, 0, 0))
+
+
+def test_buttons_swap_disable_and_fan_out():
+    mapping = compile_mapping({'buttons': {'CROSS': 'CIRCLE', 'CIRCLE': 'CROSS', 'SHARE': None,
+                                           'SQUARE': ['SQUARE', 'R1']}})
+    remap = lambda buttons: mapping.remap(state_with(buttons), 0.0)[0]
+    assert remap(BTN_CROSS) == BTN_CIRCLE
+    assert remap(BTN_CIRCLE) == BTN_CROSS
+    assert remap(BTN_SHARE) == 0
+    assert remap(BTN_SQUARE) == BTN_SQUARE | BTN_R1
+
+
+def test_turbo_toggles_with_device_time():
+    mapping = compile_mapping({'turbo': {'SQUARE': 10}})
+    held = state_with(BTN_SQUARE | BTN_CROSS)
+    # 10 Hz: 50 ms basılı, 50 ms bırakılmış
+    assert mapping.remap(held, 0.01)[0] == BTN_SQUARE | BTN_CROSS
+    assert mapping.remap(held, 0.06)[0] == BTN_CROSS
+    assert mapping.remap(held, 0.11)[0] == BTN_SQUARE | BTN_CROSS
+
+
+def test_invert_and_axis_buttons():
+    mapping = compile_mapping({
+        'invert': ['ry'],
+        'axis_buttons': [{'axis': 'lx', 'direction': -1, 'threshold': 0.5, 'button': 'LEFT'},
+                         {'axis': 'r2', 'threshold': 0.9, 'button': 'R1'}],
+    })
+    buttons, axes = mapping.remap(state_with(lx=20, ry=0, r2=240), 0.0)
+    assert buttons == BTN_LEFT | BTN_R1
+    assert axes[3] == 255
+    assert mapping.remap(state_with(lx=100, r2=200), 0.0)[0] == 0
+
+
+@pytest.mark.parametrize('mapping', [{'buttons': {'X': 'CROSS'}}, {'invert': ['lz']}, {'turbo': {'PAUSE': 5}}])
+def test_invalid_mappings_rejected(mapping):
+    with pytest.raises(ValueError):
+        compile_mapping(mapping)
+
+
+def test_load_mappings_skips_broken_files(tmp_path, capsys):
+    (tmp_path / 'iyi.json').write_text(json.dumps({'label': 'İyi', 'invert': ['ly']}), encoding='utf-8')
+    (tmp_path / 'bozuk.json').write_text('{', encoding='utf-8')
+    (tmp_path / 'hatali.json').write_text(json.dumps({'buttons': {'YOK': None}}), encoding='utf-8')
+    mappings = load_mappings(str(tmp_path))
+    assert set(mappings) == {'varsayilan', 'nintendo', 'cubuk_dpad', 'iyi'}
+    assert mappings['iyi'].label == 'İyi'
+    out = capsys.readouterr().out
+    assert 'bozuk.json' in out and 'hatali' in out
+
+
+def test_shipped_mappings_compile():
+    assert 'turbo_kare' in load_mappings()
+
+
+@pytest.fixture
+def gamepad():
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    pad = VirtualGamepad(fd=write_fd)
+    yield pad, read_fd
+    pad.destroy()
+    os.close(write_fd)
+    os.close(read_fd)
+
+
+def read_events(fd):
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return []
+    return [_EVENT.unpack_from(data, offset)[2:] for offset in range(0, len(data), _EVENT.size)]
+
+
+def usb_report(i, b5=0x08, lx=128):
+    report = synthetic_report(i)
+    report[1:5] = bytes((lx, 128, 128, 128))
+    report[5:8] = bytes((b5, 0, report[7] & 0xFC))
+    report[8:10] = b'\x00\x00'
+    return bytes(report)
+
+
+def test_only_changes_are_written(gamepad):
+    pad, read_fd = gamepad
+    pad.process(usb_report(0), 0.0)
+    first = read_events(read_fd)
+    assert first[-1] == (EV_SYN, 0, 0)
+    assert (EV_ABS, ABS_X, 128) in first
+    pad.process(usb_report(1), 0.0)
+    assert read_events(read_fd) == []
+    pad.process(usb_report(2, b5=0x28, lx=30), 0.0)
+    assert read_events(read_fd) == [(EV_KEY, KEY_CODES['CROSS'], 1), (EV_ABS, ABS_X, 30), (EV_SYN, 0, 0)]
+    # D-Pad yukarı HAT ekseni olarak yayınlanır
+    pad.process(usb_report(3, b5=0x00, lx=30), 0.0)
+    assert read_events(read_fd) == [(EV_KEY, KEY_CODES['CROSS'], 0), (EV_ABS, ABS_HAT0Y, -1), (EV_SYN, 0, 0)]
+    stats = pad.stats()
+    assert (stats['reports'], stats['writes'], stats['errors']) == (4, 3, 0)
+
+
+def test_attached_ring_publishes_new_reports(gamepad):
+    pad, read_fd = gamepad
+    pad.set_mapping(compile_mapping({'invert': ['ry']}))
+    ring = ReportRing(16)
+    pad.attach(ring)
+    ring.push(usb_report(0), 0.0)
+    assert (EV_ABS, ABS_RY, 127) in read_events(read_fd)
+    pad.detach()
+    ring.push(usb_report(1, b5=0x28), 0.0)
+    assert read_events(read_fd) == [] and ring.listeners == []
+
+
+def test_write_errors_do_not_raise():
+    read_fd, write_fd = os.pipe()
+    os.close(read_fd)
+    pad = VirtualGamepad(fd=write_fd)
+    pad.process(usb_report(0), 0.0)
+    assert pad.stats()['errors'] == 1
+    os.close(write_fd)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux') or not os.access(UINPUT_PATH, os.W_OK),
+                    reason='/dev/uinput yazılabilir değil')
+def test_real_uinput_device():
+    with VirtualGamepad() as pad:
+        pad.process(usb_report(0, b5=0x28), 0.0)
+        assert pad.stats()['writes'] == 1
+
+
+def test_missing_uinput_node_reports_path(tmp_path):
+    pad = VirtualGamepad(uinput_path=str(tmp_path / 'uinput'))
+    with pytest.raises(OSError, match='uinput'):
+        pad.create()